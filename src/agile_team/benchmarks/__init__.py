@@ -0,0 +1 @@
+"""Microbenchmarks for the Agile Team MCP Server hot paths."""
@@ -0,0 +1,82 @@
+"""Command line entry point for the benchmark suite."""
+
+import sys
+import json
+import argparse
+from agile_team.benchmarks.suite import run_suite, run_e2e_suite, run_replay_suite, compare_results
+from agile_team.shared.llm_providers import testing
+
+
+def _int_list(value: str):
+    """Parse a comma separated list of integers."""
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    """Run the benchmark suite and write machine-readable results."""
+    parser = argparse.ArgumentParser(description="Agile Team MCP Server benchmarks")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per benchmark")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Synthetic testing provider latency")
+    parser.add_argument("--team-sizes", type=_int_list, default=None, help="Comma separated team sizes")
+    parser.add_argument("--input-sizes", type=_int_list, default=None, help="Comma separated input sizes in characters")
+    parser.add_argument("--catalog-sizes", type=_int_list, default=None, help="Comma separated model catalog sizes")
+    parser.add_argument("--profiles", default=None, help="JSON file of testing provider profiles by model name")
+    parser.add_argument("--e2e", default=None, help="Comma separated providers to benchmark end-to-end against the local stub server")
+    parser.add_argument("--replay", default=None, help="Cassette of a recorded persona_dm run to replay through persona_dm")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="Multiplier applied to recorded timing when replaying")
+    parser.add_argument("--output", default=None, help="Write results JSON to this file instead of stdout")
+    parser.add_argument("--compare", default=None, help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative median slowdown reported as a regression")
+
+    args = parser.parse_args()
+
+    if args.profiles:
+        with open(args.profiles, "r", encoding="utf-8") as f:
+            for model, profile in json.load(f).items():
+                testing.set_profile(model, profile)
+
+    if args.replay:
+        results = run_replay_suite(
+            cassette_path=args.replay,
+            repeat=args.repeat,
+            time_scale=args.time_scale
+        )
+    elif args.e2e:
+        results = run_e2e_suite(
+            providers=args.e2e.split(","),
+            repeat=args.repeat,
+            latency_ms=args.latency_ms,
+            input_sizes=args.input_sizes
+        )
+    else:
+        results = run_suite(
+            repeat=args.repeat,
+            latency_ms=args.latency_ms,
+            team_sizes=args.team_sizes,
+            input_sizes=args.input_sizes,
+            catalog_sizes=args.catalog_sizes
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_results(baseline, results, args.threshold)
+        for regression in regressions:
+            print(
+                f"REGRESSION {regression['case']}: {regression['baseline_median']:.6f}s -> "
+                f"{regression['current_median']:.6f}s (x{regression['ratio']:.2f})",
+                file=sys.stderr
+            )
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""
+Local stub server for end-to-end benchmarks.
+
+Implements the chat and model listing endpoints of the OpenAI (also used by the
+DeepSeek and Groq SDKs), Anthropic, Gemini and Ollama APIs, including streaming,
+so the provider modules and their SDK/HTTP stacks can be exercised without
+network access. Responses, latency and faults come from the testing provider,
+so testing provider profiles (keyed by the requested model name) apply.
+
+Point the provider modules at the stub with:
+
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8089/v1
+    GROQ_BASE_URL=http://127.0.0.1:8089
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8089
+    GEMINI_BASE_URL=http://127.0.0.1:8089
+    OLLAMA_HOST=http://127.0.0.1:8089
+"""
+
+import re
+import json
+import socket
+import time
+import uuid
+import logging
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from agile_team.shared.llm_providers import testing
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Models listed by every stubbed provider unless overridden
+DEFAULT_STUB_MODELS = [
+    "gpt-4o-mini",
+    "gpt-4.1",
+    "claude-3-7-sonnet-20250219",
+    "gemini-2.5-pro-preview-03-25",
+    "llama-3.3-70b-versatile",
+    "deepseek-chat",
+    "llama3",
+] + testing.BASE_MODELS
+
+_GEMINI_PATH = re.compile(r"^/v1(?:beta|alpha)?/models/([^:/]+):(generateContent|streamGenerateContent)$")
+
+
+def _count_tokens(text: str) -> int:
+    """Approximate token count used in stubbed usage fields."""
+    return len(text.split())
+
+
+def _now_iso() -> str:
+    """Current UTC time in RFC 3339 format."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Request handler emulating the provider APIs."""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "AgileTeamStub/1.0"
+
+    # Set by StubServer
+    models: List[str] = DEFAULT_STUB_MODELS
+
+    def setup(self) -> None:
+        """Disable Nagle's algorithm so headers and body are not delayed by ACK timing."""
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        """Route access logs to the module logger."""
+        logger.debug(format % args)
+
+    # ----------------------------------------------------------------- helpers
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if not length:
+            return {}
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: str) -> None:
+        encoded = data.encode("utf-8")
+        self.wfile.write(f"{len(encoded):X}\r\n".encode("ascii") + encoded + b"\r\n")
+        self.wfile.flush()
+
+    def _end_stream(self) -> None:
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+    def _generate(self, text: str, model: str) -> Tuple[Optional[Iterator[str]], Optional[Tuple[int, str]]]:
+        """
+        Start generating a response with the testing provider.
+
+        Returns:
+            Tuple of (chunk iterator, None) on success or (None, (status, message)) on a simulated failure
+        """
+        chunks = testing.stream(text, model)
+        try:
+            first = next(chunks)
+        except StopIteration:
+            return iter(()), None
+        except testing.RateLimitError as e:
+            return None, (429, str(e))
+        except testing.ServerError as e:
+            return None, (503, str(e))
+        except ValueError as e:
+            return None, (400, str(e))
+
+        def iterate():
+            yield first
+            yield from chunks
+
+        return iterate(), None
+
+    # ----------------------------------------------------------------- routing
+
+    def do_GET(self) -> None:
+        path = urlparse(self.path).path
+        if path in ("/v1/models", "/openai/v1/models"):
+            if "anthropic-version" in self.headers:
+                self._anthropic_models()
+            else:
+                self._send_json(200, {
+                    "object": "list",
+                    "data": [{"id": m, "object": "model", "created": 0, "owned_by": "stub"} for m in self.models],
+                })
+        elif re.match(r"^/v1(beta|alpha)?/models$", path):
+            self._send_json(200, {"models": [
+                {
+                    "name": f"models/{m}",
+                    "displayName": m,
+                    "supportedGenerationMethods": ["generateContent", "countTokens"],
+                } for m in self.models
+            ]})
+        elif path == "/api/tags":
+            self._send_json(200, {"models": [
+                {"name": m, "model": m, "modified_at": _now_iso(), "size": 0, "digest": "", "details": {}}
+                for m in self.models
+            ]})
+        elif path == "/api/ps":
+            self._send_json(200, {"models": [
+                {"name": m, "model": m, "size": 0, "digest": "", "expires_at": _now_iso(), "size_vram": 0}
+                for m in self.models
+            ]})
+        elif path == "/health":
+            self._send_json(200, {"status": "ok"})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    def do_POST(self) -> None:
+        parsed = urlparse(self.path)
+        path = parsed.path
+        body = self._read_json()
+        if path in ("/v1/chat/completions", "/chat/completions", "/openai/v1/chat/completions"):
+            self._openai_chat(body)
+        elif path == "/v1/messages":
+            self._anthropic_messages(body)
+        elif _GEMINI_PATH.match(path):
+            model, method = _GEMINI_PATH.match(path).groups()
+            streaming = method == "streamGenerateContent"
+            sse = parse_qs(parsed.query).get("alt") == ["sse"]
+            self._gemini_generate(model, body, streaming, sse)
+        elif path == "/api/chat":
+            self._ollama_chat(body)
+        elif path == "/api/generate":
+            # Used to preload models; answer with an empty completion
+            self._send_json(200, {"model": body.get("model"), "created_at": _now_iso(), "response": "", "done": True})
+        else:
+            self._send_json(404, {"error": {"message": f"Unknown path {path}"}})
+
+    # ------------------------------------------------------------------ OpenAI
+
+    def _openai_chat(self, body: Dict[str, Any]) -> None:
+        model = body.get("model", "")
+        text = _last_user_text(body.get("messages", []))
+        chunks, error = self._generate(text, model)
+        if error:
+            status, message = error
+            self._send_json(status, {"error": {"message": message, "type": "stub_error", "code": status}})
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+        prompt_tokens = _count_tokens(text)
+
+        if body.get("stream"):
+            self._start_stream("text/event-stream")
+            output = ""
+            for chunk in chunks:
+                output += chunk
+                self._write_chunk("data: " + json.dumps({
+                    "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": {"role": "assistant", "content": chunk}, "finish_reason": None}],
+                }) + "\n\n")
+            final = {
+                "id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+            }
+            if (body.get("stream_options") or {}).get("include_usage"):
+                final["usage"] = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": _count_tokens(output),
+                    "total_tokens": prompt_tokens + _count_tokens(output),
+                }
+            self._write_chunk("data: " + json.dumps(final) + "\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self._end_stream()
+            return
+
+        output = "".join(chunks)
+        self._send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": output},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": _count_tokens(output),
+                "total_tokens": prompt_tokens + _count_tokens(output),
+            },
+        })
+
+    # --------------------------------------------------------------- Anthropic
+
+    def _anthropic_models(self) -> None:
+        data = [
+            {"id": m, "type": "model", "display_name": m, "created_at": "2025-01-01T00:00:00Z"}
+            for m in self.models
+        ]
+        self._send_json(200, {
+            "data": data,
+            "has_more": False,
+            "first_id": data[0]["id"] if data else None,
+            "last_id": data[-1]["id"] if data else None,
+        })
+
+    def _anthropic_messages(self, body: Dict[str, Any]) -> None:
+        model = body.get("model", "")
+        text = _last_user_text(body.get("messages", []))
+        chunks, error = self._generate(text, model)
+        if error:
+            status, message = error
+            error_type = "rate_limit_error" if status == 429 else "api_error"
+            self._send_json(status, {"type": "error", "error": {"type": error_type, "message": message}})
+            return
+
+        message_id = f"msg_{uuid.uuid4().hex[:12]}"
+        input_tokens = _count_tokens(text)
+
+        if body.get("stream"):
+            self._start_stream("text/event-stream")
+
+            def event(name: str, payload: Dict[str, Any]) -> None:
+                self._write_chunk(f"event: {name}\ndata: {json.dumps(payload)}\n\n")
+
+            event("message_start", {"type": "message_start", "message": {
+                "id": message_id, "type": "message", "role": "assistant", "model": model, "content": [],
+                "stop_reason": None, "stop_sequence": None,
+                "usage": {"input_tokens": input_tokens, "output_tokens": 0},
+            }})
+            event("content_block_start", {"type": "content_block_start", "index": 0,
+                                          "content_block": {"type": "text", "text": ""}})
+            output = ""
+            for chunk in chunks:
+                output += chunk
+                event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                              "delta": {"type": "text_delta", "text": chunk}})
+            event("content_block_stop", {"type": "content_block_stop", "index": 0})
+            event("message_delta", {"type": "message_delta",
+                                    "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                    "usage": {"output_tokens": _count_tokens(output)}})
+            event("message_stop", {"type": "message_stop"})
+            self._end_stream()
+            return
+
+        output = "".join(chunks)
+        self._send_json(200, {
+            "id": message_id,
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": [{"type": "text", "text": output}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": input_tokens, "output_tokens": _count_tokens(output)},
+        })
+
+    # ------------------------------------------------------------------ Gemini
+
+    def _gemini_generate(self, model: str, body: Dict[str, Any], streaming: bool, sse: bool) -> None:
+        text = _gemini_text(body.get("contents", []))
+        chunks, error = self._generate(text, model)
+        if error:
+            status, message = error
+            grpc_status = "RESOURCE_EXHAUSTED" if status == 429 else "UNAVAILABLE"
+            self._send_json(status, {"error": {"code": status, "message": message, "status": grpc_status}})
+            return
+
+        prompt_tokens = _count_tokens(text)
+
+        def candidate(part_text: str, finished: bool, output_tokens: int) -> Dict[str, Any]:
+            payload = {
+                "candidates": [{
+                    "content": {"parts": [{"text": part_text}], "role": "model"},
+                    "index": 0,
+                }],
+                "usageMetadata": {
+                    "promptTokenCount": prompt_tokens,
+                    "candidatesTokenCount": output_tokens,
+                    "totalTokenCount": prompt_tokens + output_tokens,
+                },
+                "modelVersion": model,
+            }
+            if finished:
+                payload["candidates"][0]["finishReason"] = "STOP"
+            return payload
+
+        if streaming:
+            parts = list(chunks)
+            output_tokens = 0
+            if sse:
+                self._start_stream("text/event-stream")
+                for index, part in enumerate(parts):
+                    output_tokens += _count_tokens(part)
+                    self._write_chunk("data: " + json.dumps(candidate(part, index == len(parts) - 1, output_tokens)) + "\r\n\r\n")
+                self._end_stream()
+            else:
+                # Without alt=sse the API streams a JSON array
+                self._start_stream("application/json")
+                self._write_chunk("[")
+                for index, part in enumerate(parts):
+                    output_tokens += _count_tokens(part)
+                    prefix = "," if index else ""
+                    self._write_chunk(prefix + json.dumps(candidate(part, index == len(parts) - 1, output_tokens)))
+                self._write_chunk("]")
+                self._end_stream()
+            return
+
+        output = "".join(chunks)
+        self._send_json(200, candidate(output, True, _count_tokens(output)))
+
+    # ------------------------------------------------------------------ Ollama
+
+    def _ollama_chat(self, body: Dict[str, Any]) -> None:
+        model = body.get("model", "")
+        text = _last_user_text(body.get("messages", []))
+        start = time.perf_counter_ns()
+        chunks, error = self._generate(text, model)
+        if error:
+            status, message = error
+            self._send_json(status, {"error": message})
+            return
+
+        prompt_tokens = _count_tokens(text)
+
+        # Ollama streams by default
+        if body.get("stream", True):
+            self._start_stream("application/x-ndjson")
+            output = ""
+            for chunk in chunks:
+                output += chunk
+                self._write_chunk(json.dumps({
+                    "model": model, "created_at": _now_iso(),
+                    "message": {"role": "assistant", "content": chunk}, "done": False,
+                }) + "\n")
+            self._write_chunk(json.dumps({
+                "model": model, "created_at": _now_iso(),
+                "message": {"role": "assistant", "content": ""},
+                "done": True, "done_reason": "stop",
+                "total_duration": time.perf_counter_ns() - start,
+                "prompt_eval_count": prompt_tokens, "eval_count": _count_tokens(output),
+            }) + "\n")
+            self._end_stream()
+            return
+
+        output = "".join(chunks)
+        self._send_json(200, {
+            "model": model,
+            "created_at": _now_iso(),
+            "message": {"role": "assistant", "content": output},
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": time.perf_counter_ns() - start,
+            "prompt_eval_count": prompt_tokens,
+            "eval_count": _count_tokens(output),
+        })
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    """Extract the text of the last user message in OpenAI/Anthropic/Ollama format."""
+    for message in reversed(messages):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content", "")
+        if isinstance(content, str):
+            return content
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _gemini_text(contents: Any) -> str:
+    """Extract the prompt text from Gemini contents."""
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, dict):
+        contents = [contents]
+    text = ""
+    for content in contents:
+        if isinstance(content, str):
+            text += content
+            continue
+        for part in content.get("parts", []):
+            text += part.get("text", "") if isinstance(part, dict) else str(part)
+    return text
+
+
+class StubServer:
+    """Threaded stub server that can run in the background of a benchmark or test."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, models: Optional[List[str]] = None):
+        handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"models": models or DEFAULT_STUB_MODELS})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def provider_env(self) -> Dict[str, str]:
+        """Environment variables pointing every provider module at this server."""
+        return {
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "DEEPSEEK_BASE_URL": f"{self.url}/v1",
+            "GROQ_BASE_URL": self.url,
+            "ANTHROPIC_BASE_URL": self.url,
+            "GEMINI_BASE_URL": self.url,
+            "OLLAMA_HOST": self.url,
+        }
+
+    def start(self) -> "StubServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+
+def main():
+    """Run the stub server in the foreground."""
+    parser = argparse.ArgumentParser(description="Local provider API stub for end-to-end benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind")
+    parser.add_argument("--port", type=int, default=8089, help="Port to bind")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Synthetic latency added to every response")
+    parser.add_argument("--profiles", default=None, help="JSON file of testing provider profiles by model name")
+    parser.add_argument("--models", default=None, help="Comma separated model names to list")
+    args = parser.parse_args()
+
+    testing.SYNTHETIC_LATENCY = args.latency_ms / 1000
+    if args.profiles:
+        with open(args.profiles, "r", encoding="utf-8") as f:
+            for model, profile in json.load(f).items():
+                testing.set_profile(model, profile)
+
+    models = args.models.split(",") if args.models else None
+    server = StubServer(args.host, args.port, models)
+    print(f"Stub server listening on {server.url}")
+    for name, value in server.provider_env().items():
+        print(f"  {name}={value}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+"""
+Benchmark suite for the tool, validator and router hot paths.
+
+All benchmarks use the testing provider, so no API keys or network access are
+needed. Provider latency is simulated with the testing provider's synthetic
+latency setting.
+"""
+
+import os
+import sys
+import json
+import time
+import importlib
+import platform
+import tempfile
+import statistics
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, List, Optional
+from unittest.mock import patch
+
+from agile_team.shared import cassette
+from agile_team.shared.llm_providers import testing
+from agile_team.shared.model_router import ModelRouter, invalidate_provider_handles
+from agile_team.shared.utils import weak_provider_and_model
+from agile_team.shared.validator import validate_and_correct_models
+from agile_team.tools.persona_base import persona_base
+from agile_team.tools.persona_dm import persona_dm
+from agile_team.tools.prompt_from_file_to_file import prompt_from_file_to_file
+
+# Version of the results document, bumped when its structure changes
+RESULTS_VERSION = 1
+
+# Testing provider models used as team members
+TEAM_MODELS = ["testing:test-model-1", "testing:test-model-2", "testing:test-model-3"]
+
+# Functions timed as stages of the composite benchmarks, by the module that calls them
+STAGE_TARGETS = {
+    "agile_team.tools.prompt_from_file_to_file": ["validate_and_correct_models", "prompt_model", "read_file", "write_file"],
+    "agile_team.tools.persona_dm": ["validate_and_correct_models", "prompt_model", "read_file", "write_file", "prompt_from_file_to_file"],
+    "agile_team.tools.persona_base": ["validate_and_correct_models", "prompt_model", "read_file", "write_file", "persona_dm"],
+}
+
+
+class StageTimer:
+    """Accumulates wall time spent in named stages of a benchmarked call."""
+
+    def __init__(self):
+        self.totals: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def wrap(self, name: str, fn: Callable) -> Callable:
+        """Return a wrapper around fn that records its wall time under name."""
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.totals[name] = self.totals.get(name, 0.0) + time.perf_counter() - start
+                self.calls[name] = self.calls.get(name, 0) + 1
+        return timed
+
+    @contextmanager
+    def instrument(self):
+        """
+        Patch the stage functions of every composite tool module.
+
+        Stage times are inclusive: a nested stage (e.g. prompt_model called from
+        prompt_from_file_to_file inside persona_dm) is also counted in its caller.
+        """
+        with ExitStack() as stack:
+            for module_name, attributes in STAGE_TARGETS.items():
+                module = importlib.import_module(module_name)
+                for attribute in attributes:
+                    original = getattr(module, attribute)
+                    stack.enter_context(
+                        patch.object(module, attribute, self.wrap(f"{module_name.rsplit('.', 1)[-1]}.{attribute}", original))
+                    )
+            yield self
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize wall time samples in seconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    return {
+        "min": ordered[0],
+        "median": statistics.median(ordered),
+        "mean": statistics.fmean(ordered),
+        "p95": ordered[p95_index],
+        "max": ordered[-1],
+    }
+
+
+def measure(
+    name: str,
+    fn: Callable[[], Any],
+    params: Optional[Dict[str, Any]] = None,
+    repeat: int = 5,
+    warmup: int = 1,
+    stages: bool = False
+) -> Dict[str, Any]:
+    """
+    Measure a callable's wall time, stage breakdown and allocations.
+
+    Wall time and stages are measured without tracemalloc, then one additional
+    run is traced to report allocations, so tracing overhead does not skew timings.
+
+    Args:
+        name: Benchmark name
+        fn: Zero-argument callable to benchmark
+        params: Parameters reported alongside the results (team size, input size, ...)
+        repeat: Number of timed runs
+        warmup: Number of untimed warmup runs
+        stages: Whether to record per-stage wall time of composite tools
+
+    Returns:
+        Result dictionary for the benchmark
+    """
+    for _ in range(warmup):
+        fn()
+
+    timer = StageTimer()
+    samples = []
+    with timer.instrument() if stages else ExitStack():
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        snapshot_before = tracemalloc.take_snapshot()
+        fn()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot_after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    allocated = sum(
+        stat.size_diff for stat in snapshot_after.compare_to(snapshot_before, "filename") if stat.size_diff > 0
+    )
+    blocks = sum(
+        stat.count_diff for stat in snapshot_after.compare_to(snapshot_before, "filename") if stat.count_diff > 0
+    )
+
+    result = {
+        "name": name,
+        "params": params or {},
+        "repeat": repeat,
+        "wall_seconds": _summarize(samples),
+        "alloc": {
+            "peak_bytes": peak - before,
+            "retained_bytes": current - before,
+            "allocated_bytes": allocated,
+            "allocated_blocks": blocks,
+        },
+    }
+    if stages:
+        result["stages_seconds"] = {
+            stage: total / repeat for stage, total in sorted(timer.totals.items())
+        }
+        result["stage_calls"] = {
+            stage: count // repeat for stage, count in sorted(timer.calls.items())
+        }
+    return result
+
+
+def _team(size: int) -> List[str]:
+    """Build a team of testing models of the given size."""
+    return [TEAM_MODELS[i % len(TEAM_MODELS)] for i in range(size)]
+
+
+def run_suite(
+    repeat: int = 5,
+    latency_ms: float = 0.0,
+    team_sizes: Optional[List[int]] = None,
+    input_sizes: Optional[List[int]] = None,
+    catalog_sizes: Optional[List[int]] = None,
+    work_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run every benchmark and return the machine-readable results document.
+
+    Args:
+        repeat: Number of timed runs per benchmark
+        latency_ms: Synthetic latency of the testing provider in milliseconds
+        team_sizes: Team sizes used for scaling benchmarks
+        input_sizes: Prompt sizes (characters) used for scaling benchmarks
+        catalog_sizes: Model catalog sizes used for the fuzzy matching benchmark
+        work_dir: Directory for benchmark input/output files (a temporary directory by default)
+
+    Returns:
+        Results document with metadata and one entry per benchmark
+    """
+    team_sizes = team_sizes or [1, 3, 6]
+    input_sizes = input_sizes or [1_000, 10_000, 100_000]
+    catalog_sizes = catalog_sizes or [10, 100, 1000]
+
+    results = []
+    previous_latency = testing.SYNTHETIC_LATENCY
+    testing.SYNTHETIC_LATENCY = latency_ms / 1000
+    try:
+        with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+            for team_size in team_sizes:
+                team = _team(team_size)
+                results.append(measure(
+                    "validate_and_correct_models",
+                    lambda team=team: validate_and_correct_models(team),
+                    {"team_size": team_size},
+                    repeat
+                ))
+
+            for catalog_size in catalog_sizes:
+                catalog = [f"model-{i}-v{i % 7}" for i in range(catalog_size)]
+                # Worst case for a linear scan: the match is the last entry
+                target = catalog[-1]
+                results.append(measure(
+                    "weak_provider_and_model",
+                    lambda catalog=catalog, target=target: weak_provider_and_model("o", target.upper(), catalog),
+                    {"catalog_size": catalog_size},
+                    repeat
+                ))
+
+            for input_size in input_sizes:
+                text = "x" * input_size
+                results.append(measure(
+                    "ModelRouter.prompt_model",
+                    lambda text=text: ModelRouter.prompt_model("testing", "test-model-1", text),
+                    {"input_size": input_size},
+                    repeat
+                ))
+
+            # Provider resolution: import and configuration checks on every call ("uncached")
+            # versus the cached handle lookup of the hot path ("cached")
+            for cached, resolve in (
+                ("uncached", ModelRouter._resolve_provider_handle),
+                ("cached", ModelRouter._get_provider_handle),
+            ):
+                results.append(measure(
+                    "ModelRouter.provider_handle",
+                    lambda resolve=resolve: resolve("testing"),
+                    {"provider": "testing", "handle": cached},
+                    repeat
+                ))
+
+            for input_size in input_sizes:
+                input_path = os.path.join(temp_dir, f"input_{input_size}.md")
+                with open(input_path, "w", encoding="utf-8") as f:
+                    f.write("x" * input_size)
+                for team_size in team_sizes:
+                    output_dir = os.path.join(temp_dir, f"out_{input_size}_{team_size}")
+                    team = _team(team_size)
+                    results.append(measure(
+                        "prompt_from_file_to_file",
+                        lambda path=input_path, team=team, out=output_dir: prompt_from_file_to_file(path, team, out),
+                        {"team_size": team_size, "input_size": input_size},
+                        repeat,
+                        stages=True
+                    ))
+                    if team_size >= 2:
+                        results.append(measure(
+                            "persona_dm",
+                            lambda path=input_path, team=team, out=output_dir: persona_dm(
+                                from_file=path,
+                                models_prefixed_by_provider=team,
+                                output_dir=out,
+                                persona_dm_model="testing:test-model-1"
+                            ),
+                            {"team_size": team_size, "input_size": input_size},
+                            repeat,
+                            stages=True
+                        ))
+
+                results.append(measure(
+                    "persona_base",
+                    lambda path=input_path, out=os.path.join(temp_dir, f"persona_{input_size}"): persona_base(
+                        persona_name="benchmark",
+                        persona_prompt="<request_data>{request_data}</request_data>",
+                        from_file=path,
+                        models_prefixed_by_provider=["testing:test-model-1"],
+                        output_dir=out
+                    ),
+                    {"team_size": 1, "input_size": input_size, "use_decision_maker": False},
+                    repeat,
+                    stages=True
+                ))
+                results.append(measure(
+                    "persona_base",
+                    lambda path=input_path, out=os.path.join(temp_dir, f"persona_dm_{input_size}"): persona_base(
+                        persona_name="benchmark",
+                        persona_prompt="<request_data>{request_data}</request_data>",
+                        from_file=path,
+                        output_dir=out,
+                        use_decision_maker=True,
+                        decision_maker_models=_team(max(team_sizes)),
+                        decision_maker_model="testing:test-model-1"
+                    ),
+                    {"team_size": max(team_sizes), "input_size": input_size, "use_decision_maker": True},
+                    repeat,
+                    stages=True
+                ))
+    finally:
+        testing.SYNTHETIC_LATENCY = previous_latency
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": latency_ms,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+# Model used for each provider in end-to-end benchmarks against the stub server
+E2E_MODELS = {
+    "openai": "gpt-4o-mini",
+    "anthropic": "claude-3-7-sonnet-20250219",
+    "gemini": "gemini-2.5-pro-preview-03-25",
+    "groq": "llama-3.3-70b-versatile",
+    "deepseek": "deepseek-chat",
+    "ollama": "llama3",
+}
+
+
+def run_e2e_suite(
+    providers: Optional[List[str]] = None,
+    repeat: int = 5,
+    latency_ms: float = 0.0,
+    input_sizes: Optional[List[int]] = None
+) -> Dict[str, Any]:
+    """
+    Benchmark the real provider modules and SDKs against the local stub server.
+
+    The provider modules are (re)imported with their base URLs pointing at the
+    stub, so client construction, HTTP, and JSON parsing are all measured.
+
+    Args:
+        providers: Providers to benchmark (defaults to all providers in E2E_MODELS)
+        repeat: Number of timed runs per benchmark
+        latency_ms: Synthetic latency added by the stub server
+        input_sizes: Prompt sizes (characters)
+
+    Returns:
+        Results document with metadata and one entry per benchmark
+    """
+    # Imported lazily so the regular suite does not depend on the stub server
+    from agile_team.benchmarks.stub_server import StubServer
+
+    providers = providers or list(E2E_MODELS)
+    input_sizes = input_sizes or [1_000, 10_000]
+
+    results = []
+    previous_latency = testing.SYNTHETIC_LATENCY
+    testing.SYNTHETIC_LATENCY = latency_ms / 1000
+    previous_env = dict(os.environ)
+    try:
+        with StubServer() as server:
+            os.environ.update(server.provider_env())
+            for provider in providers:
+                os.environ.setdefault(f"{provider.upper()}_API_KEY", "stub")
+                module_name = f"agile_team.shared.llm_providers.{provider}"
+                if module_name in sys.modules:
+                    importlib.reload(sys.modules[module_name])
+            invalidate_provider_handles()
+
+            for provider in providers:
+                model = E2E_MODELS[provider]
+                results.append(measure(
+                    "e2e.list_models",
+                    lambda provider=provider: ModelRouter.list_models(provider),
+                    {"provider": provider},
+                    repeat
+                ))
+                for input_size in input_sizes:
+                    text = "word " * (input_size // 5)
+                    results.append(measure(
+                        "e2e.prompt_model",
+                        lambda provider=provider, model=model, text=text: ModelRouter.prompt_model(provider, model, text),
+                        {"provider": provider, "input_size": input_size},
+                        repeat
+                    ))
+
+            if "gemini" in providers:
+                # Per-call request setup (safety settings, generation config, model handle), built
+                # on every call ("uncached") versus reused from the prepared handle cache
+                gemini = sys.modules["agile_team.shared.llm_providers.gemini"]
+                model = E2E_MODELS["gemini"]
+                for cached, setup in (("uncached", gemini._request_handle.__wrapped__), ("cached", gemini._request_handle)):
+                    results.append(measure(
+                        "e2e.gemini_request_setup",
+                        lambda setup=setup: setup(model, 0),
+                        {"provider": "gemini", "handle": cached},
+                        repeat
+                    ))
+    finally:
+        os.environ.clear()
+        os.environ.update(previous_env)
+        testing.SYNTHETIC_LATENCY = previous_latency
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "latency_ms": latency_ms,
+            "repeat": repeat,
+            "mode": "e2e",
+        },
+        "results": results,
+    }
+
+
+def run_replay_suite(
+    cassette_path: str,
+    repeat: int = 5,
+    time_scale: float = 1.0,
+    work_dir: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Replay a recorded persona_dm run from a cassette through the current orchestration.
+
+    The team prompt is the text of the first recorded call, the team is every
+    model that received that prompt, and the decision maker is the model of the
+    last recorded call. Calls are matched per provider and model in recorded
+    order, so changes to the decision prompt do not prevent replay.
+
+    Args:
+        cassette_path: Path to a cassette recorded from a persona_dm run
+        repeat: Number of timed runs
+        time_scale: Multiplier applied to recorded provider timing
+        work_dir: Directory for benchmark input/output files (a temporary directory by default)
+
+    Returns:
+        Results document with metadata and one entry per benchmark
+    """
+    player = cassette.start_replay(cassette_path, time_scale=time_scale, match="model")
+    try:
+        entries = player.entries
+        if not entries:
+            raise ValueError(f"Cassette {cassette_path} has no recorded calls")
+        team_prompt = entries[0]["text"]
+        team = list(dict.fromkeys(
+            f"{entry['provider']}:{entry['model']}" for entry in entries if entry["text"] == team_prompt
+        ))
+        decision_maker = f"{entries[-1]['provider']}:{entries[-1]['model']}"
+
+        with tempfile.TemporaryDirectory(dir=work_dir) as temp_dir:
+            input_path = os.path.join(temp_dir, "replay_input.md")
+            with open(input_path, "w", encoding="utf-8") as f:
+                f.write(team_prompt)
+            output_dir = os.path.join(temp_dir, "replay_out")
+            results = [measure(
+                "replay.persona_dm",
+                lambda: persona_dm(
+                    from_file=input_path,
+                    models_prefixed_by_provider=team,
+                    output_dir=output_dir,
+                    persona_dm_model=decision_maker
+                ),
+                {"team_size": len(team), "time_scale": time_scale},
+                repeat,
+                stages=True
+            )]
+    finally:
+        cassette.stop_replay()
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "mode": "replay",
+            "cassette": os.path.abspath(cassette_path),
+            "recorded_calls": len(entries),
+        },
+        "results": results,
+    }
+
+
+def _result_key(result: Dict[str, Any]) -> str:
+    """Key identifying a benchmark case across runs."""
+    return f"{result['name']}[{json.dumps(result['params'], sort_keys=True)}]"
+
+
+def compare_results(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = 0.2
+) -> List[Dict[str, Any]]:
+    """
+    Compare two results documents and report regressions.
+
+    Args:
+        baseline: Results document of the reference run
+        current: Results document of the new run
+        threshold: Relative slowdown of the median wall time considered a regression
+
+    Returns:
+        List of regressions with the case key, baseline and current medians and the ratio
+    """
+    baseline_by_key = {_result_key(result): result for result in baseline.get("results", [])}
+    regressions = []
+    for result in current.get("results", []):
+        key = _result_key(result)
+        reference = baseline_by_key.get(key)
+        if reference is None:
+            continue
+        before = reference["wall_seconds"]["median"]
+        after = result["wall_seconds"]["median"]
+        if before > 0 and after / before > 1 + threshold:
+            regressions.append({
+                "case": key,
+                "baseline_median": before,
+                "current_median": after,
+                "ratio": after / before,
+            })
+    return regressions
@@ -1,8 +1,13 @@
 """Entry point for the Agile Team MCP Server."""
 
+import os
 import sys
 import argparse
 from agile_team.server import mcp
+from agile_team.serving import serve
+from agile_team.shared.config import MCP_HOST, MCP_PORT, MCP_WORKERS
+from agile_team.shared.metrics import start_textfile_exporter
+from agile_team.shared.tracing import configure_tracing
 from agile_team import __version__
 
 
@@ -14,6 +19,29 @@ def main():
         action="store_true", 
         help="Show version information and exit"
     )
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "streamable-http"],
+        default=os.environ.get("MCP_TRANSPORT") or "stdio",
+        help="MCP transport (default: MCP_TRANSPORT or stdio)"
+    )
+    parser.add_argument(
+        "--host",
+        default=os.environ.get("MCP_HOST") or MCP_HOST,
+        help=f"Host of the streamable HTTP transport (default: MCP_HOST or {MCP_HOST})"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.environ.get("MCP_PORT") or MCP_PORT),
+        help=f"Port of the streamable HTTP transport (default: MCP_PORT or {MCP_PORT})"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("MCP_WORKERS") or MCP_WORKERS),
+        help="Worker processes behind a session-sticky router (default: MCP_WORKERS or 1)"
+    )
     
     args = parser.parse_args()
     
@@ -21,6 +49,22 @@ def main():
         print(f"Agile Team MCP Server v{__version__}")
         sys.exit(0)
     
+    # Export OpenTelemetry spans when TRACING_EXPORTER is set
+    configure_tracing()
+    
+    # Write Prometheus metrics to a textfile when METRICS_TEXTFILE is set
+    start_textfile_exporter()
+    
+    if args.transport == "streamable-http":
+        # Serve many agents from one warm server; workers warm up (and preload models) themselves
+        serve(args.host, args.port, args.workers)
+        return
+    
+    # Load the models in OLLAMA_PRELOAD_MODELS on every Ollama host in the background
+    if os.environ.get("OLLAMA_PRELOAD_MODELS"):
+        from agile_team.shared.llm_providers.ollama import preload_models
+        preload_models()
+    
     # Run the MCP server
     mcp.run()
 
@@ -1,7 +1,7 @@
 """MCP Server implementation for Agile Team."""
 
 from mcp.server.fastmcp import FastMCP
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Union
 
 # Import tools
 from agile_team.tools.prompt import prompt
@@ -13,6 +13,17 @@ from agile_team.tools.persona_dm import persona_dm, DEFAULT_PERSONA_PROMPT
 from agile_team.tools.persona_ba import persona_ba, DEFAULT_BA_PROMPT, DEFAULT_BA_DECISION_PROMPT
 from agile_team.tools.persona_pm import persona_pm, DEFAULT_PM_PROMPT, DEFAULT_PM_DECISION_PROMPT
 from agile_team.tools.persona_sw import persona_sw, DEFAULT_SW_PROMPT_CONTENT, DEFAULT_SW_DECISION_PROMPT
+from agile_team.tools.workflow import run_workflow
+from agile_team.tools.metrics import metrics
+from agile_team.tools.usage import usage
+from agile_team.tools.artifacts import artifacts
+from agile_team.tools.budget import budget
+from agile_team.tools.routing import routing
+from agile_team.tools.jobs import job_status, job_result, job_cancel
+from agile_team.shared import jobs
+from agile_team.shared.budget import budgeted
+from agile_team.shared.cancellation import cancellable, deadline_scope
+from agile_team.shared.tracing import traced
 
 # Import centralized configuration
 from agile_team.shared.config import DEFAULT_MODEL, DEFAULT_TEAM_MODELS, DEFAULT_DECISION_MAKER_MODEL, DEFAULT_SW_PROMPT
@@ -25,7 +36,12 @@ mcp = FastMCP("Agile Team MCP Server")
 
 # Register tools using decorators
 @mcp.tool()
-def prompt_tool(text: str, models_prefixed_by_provider: List[str] = None) -> List[str]:
+@cancellable
+@traced()
+@budgeted
+def prompt_tool(
+    text: str, models_prefixed_by_provider: List[str] = None, deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Send a text prompt to multiple LLM models and return their responses.
     
@@ -33,17 +49,25 @@ def prompt_tool(text: str, models_prefixed_by_provider: List[str] = None) -> Lis
         text: The prompt text to send to the models
         models_prefixed_by_provider: List of models in format "provider:model" (e.g., "openai:gpt-4").
                                      If None, defaults to ["openai:gpt-4o-mini"]
+        deadline_seconds: Seconds the call may run (defaults to TOOL_DEADLINE_SECONDS)
     
     Returns:
-        List of responses, one from each specified model
+        Dictionary with the responses, one from each specified model ("result"),
+        and the remaining budgets ("budget")
     """
     if models_prefixed_by_provider is None:
         models_prefixed_by_provider = DEFAULT_PROMPT_MODEL
-    return prompt(text, models_prefixed_by_provider)
+    with deadline_scope(deadline_seconds):
+        return prompt(text, models_prefixed_by_provider)
 
 
 @mcp.tool()
-def prompt_from_file_tool(file_path: str, models_prefixed_by_provider: List[str] = None) -> List[str]:
+@cancellable
+@traced()
+@budgeted
+def prompt_from_file_tool(
+    file_path: str, models_prefixed_by_provider: List[str] = None, deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Read a prompt from a file and send it to multiple LLM models.
     
@@ -51,20 +75,26 @@ def prompt_from_file_tool(file_path: str, models_prefixed_by_provider: List[str]
         file_path: Path to the file containing the prompt text
         models_prefixed_by_provider: List of models in format "provider:model" (e.g., "openai:gpt-4").
                                      If None, defaults to ["openai:gpt-4o-mini"]
+        deadline_seconds: Seconds the call may run (defaults to TOOL_DEADLINE_SECONDS)
     
     Returns:
-        List of responses, one from each specified model
+        Dictionary with the responses, one from each specified model ("result"),
+        and the remaining budgets ("budget")
     """
     if models_prefixed_by_provider is None:
         models_prefixed_by_provider = DEFAULT_PROMPT_MODEL
-    return prompt_from_file(file_path, models_prefixed_by_provider)
+    with deadline_scope(deadline_seconds):
+        return prompt_from_file(file_path, models_prefixed_by_provider)
 
 
 @mcp.tool()
+@cancellable
+@traced()
+@budgeted
 def prompt_from_file2file_tool(
     file_path: str, models_prefixed_by_provider: List[str] = None, output_dir: str = None, 
-    output_extension: str = None, output_path: str = None
-) -> List[str]:
+    output_extension: str = None, output_path: str = None, deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Read a prompt from a file, send it to multiple LLM models, and write responses to files.
     
@@ -77,16 +107,20 @@ def prompt_from_file2file_tool(
                           If None, defaults to 'md' (default: None)
         output_path: Optional full output path with filename. If provided, the extension
                      from this path will be used (overrides output_extension).
+        deadline_seconds: Seconds the call may run (defaults to TOOL_DEADLINE_SECONDS)
     
     Returns:
-        List of file paths where responses were written
+        Dictionary with the file paths where responses were written ("result"),
+        and the remaining budgets ("budget")
     """
     if models_prefixed_by_provider is None:
         models_prefixed_by_provider = DEFAULT_PROMPT_MODEL
-    return prompt_from_file_to_file(file_path, models_prefixed_by_provider, output_dir, output_extension, output_path)
+    with deadline_scope(deadline_seconds):
+        return prompt_from_file_to_file(file_path, models_prefixed_by_provider, output_dir, output_extension, output_path)
 
 
 @mcp.tool()
+@traced()
 def list_providers_tool() -> Dict[str, List[str]]:
     """
     List all supported LLM providers.
@@ -98,6 +132,7 @@ def list_providers_tool() -> Dict[str, List[str]]:
 
 
 @mcp.tool()
+@traced()
 def list_models_tool(provider: str) -> List[str]:
     """
     List all available models for a specific provider.
@@ -112,6 +147,22 @@ def list_models_tool(provider: str) -> List[str]:
 
 
 @mcp.tool()
+@traced()
+def list_loaded_models_tool() -> Dict[str, List[str]]:
+    """
+    List the Ollama models currently loaded in memory on each host of the Ollama pool.
+    
+    Returns:
+        Dictionary mapping each Ollama host to the names of its loaded models
+    """
+    from agile_team.shared.llm_providers.ollama import list_resident_models
+    return list_resident_models()
+
+
+@mcp.tool()
+@cancellable
+@traced()
+@budgeted
 def persona_dm_tool(
     from_file: str,
     models_prefixed_by_provider: Optional[List[str]] = None,
@@ -119,8 +170,10 @@ def persona_dm_tool(
     output_extension: Optional[str] = None,
     output_path: Optional[str] = None,
     persona_dm_model: str = DEFAULT_DECISION_MAKER_MODEL, 
-    persona_prompt: str = DEFAULT_PERSONA_PROMPT
-) -> str:
+    persona_prompt: str = DEFAULT_PERSONA_PROMPT,
+    background: bool = False,
+    deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Generate responses from multiple LLM models and use a decision maker model to choose the best direction.
     
@@ -136,11 +189,15 @@ def persona_dm_tool(
         output_path: Optional full output path with filename for the persona document
         persona_dm_model: Model to use for making the decision (defaults to DEFAULT_DECISION_MAKER_MODEL)
         persona_prompt: Custom persona prompt template (if None, uses the default)
+        background: Whether to run the call as a background job (see job_status_tool)
+        deadline_seconds: Seconds the call may run, split across its stages (defaults to TOOL_DEADLINE_SECONDS,
+                          or JOB_DEADLINE_SECONDS from the start of a background job)
     
     Returns:
-        Path to the persona output file
+        Dictionary with the path to the persona output file ("result"), or the
+        {"job_id", "status"} of the job when background is True, and the remaining budgets ("budget")
     """
-    return persona_dm(
+    arguments = dict(
         from_file=from_file,
         models_prefixed_by_provider=models_prefixed_by_provider,
         output_dir=output_dir,
@@ -149,9 +206,16 @@ def persona_dm_tool(
         persona_dm_model=persona_dm_model,
         persona_prompt=persona_prompt
     )
+    if background:
+        return jobs.background("persona_dm_tool", persona_dm, arguments, deadline_seconds)
+    with deadline_scope(deadline_seconds):
+        return persona_dm(**arguments)
 
 
 @mcp.tool()
+@cancellable
+@traced()
+@budgeted
 def persona_ba_tool(
     from_file: str,
     models_prefixed_by_provider: Optional[List[str]] = None,
@@ -162,8 +226,10 @@ def persona_ba_tool(
     decision_maker_models: Optional[List[str]] = None,
     ba_prompt: str = DEFAULT_BA_PROMPT,
     decision_maker_model: str = DEFAULT_DECISION_MAKER_MODEL,
-    decision_maker_prompt: str = DEFAULT_BA_DECISION_PROMPT
-) -> str:
+    decision_maker_prompt: str = DEFAULT_BA_DECISION_PROMPT,
+    background: bool = False,
+    deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Generate business analysis using a specialized Business Analyst persona, with optional decision making.
     
@@ -184,11 +250,15 @@ def persona_ba_tool(
         ba_prompt: Custom business analyst prompt template
         decision_maker_model: Model to use for decision making (defaults to DEFAULT_DECISION_MAKER_MODEL)
         decision_maker_prompt: Custom persona prompt template for decision making
+        background: Whether to run the call as a background job (see job_status_tool)
+        deadline_seconds: Seconds the call may run, split across its stages (defaults to TOOL_DEADLINE_SECONDS,
+                          or JOB_DEADLINE_SECONDS from the start of a background job)
     
     Returns:
-        Path to the business analysis output file
+        Dictionary with the path to the business analysis output file ("result"), or the
+        {"job_id", "status"} of the job when background is True, and the remaining budgets ("budget")
     """
-    return persona_ba(
+    arguments = dict(
         from_file=from_file,
         models_prefixed_by_provider=models_prefixed_by_provider,
         output_dir=output_dir,
@@ -200,9 +270,16 @@ def persona_ba_tool(
         decision_maker_model=decision_maker_model,
         decision_maker_prompt=decision_maker_prompt
     )
+    if background:
+        return jobs.background("persona_ba_tool", persona_ba, arguments, deadline_seconds)
+    with deadline_scope(deadline_seconds):
+        return persona_ba(**arguments)
 
 
 @mcp.tool()
+@cancellable
+@traced()
+@budgeted
 def persona_pm_tool(
     from_file: str,
     models_prefixed_by_provider: Optional[List[str]] = None,
@@ -213,8 +290,10 @@ def persona_pm_tool(
     decision_maker_models: Optional[List[str]] = None,
     pm_prompt: str = DEFAULT_PM_PROMPT,
     decision_maker_model: str = DEFAULT_DECISION_MAKER_MODEL,
-    decision_maker_prompt: str = DEFAULT_PM_DECISION_PROMPT
-) -> str:
+    decision_maker_prompt: str = DEFAULT_PM_DECISION_PROMPT,
+    background: bool = False,
+    deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Generate product management plans using a specialized Product Manager persona, with optional decision making.
     
@@ -235,11 +314,15 @@ def persona_pm_tool(
         pm_prompt: Custom product manager prompt template
         decision_maker_model: Model to use for decision making (defaults to DEFAULT_DECISION_MAKER_MODEL)
         decision_maker_prompt: Custom persona prompt template for decision making
+        background: Whether to run the call as a background job (see job_status_tool)
+        deadline_seconds: Seconds the call may run, split across its stages (defaults to TOOL_DEADLINE_SECONDS,
+                          or JOB_DEADLINE_SECONDS from the start of a background job)
     
     Returns:
-        Path to the product plan output file
+        Dictionary with the path to the product plan output file ("result"), or the
+        {"job_id", "status"} of the job when background is True, and the remaining budgets ("budget")
     """
-    return persona_pm(
+    arguments = dict(
         from_file=from_file,
         models_prefixed_by_provider=models_prefixed_by_provider,
         output_dir=output_dir,
@@ -251,9 +334,16 @@ def persona_pm_tool(
         decision_maker_model=decision_maker_model,
         decision_maker_prompt=decision_maker_prompt
     )
+    if background:
+        return jobs.background("persona_pm_tool", persona_pm, arguments, deadline_seconds)
+    with deadline_scope(deadline_seconds):
+        return persona_pm(**arguments)
 
 
 @mcp.tool()
+@cancellable
+@traced()
+@budgeted
 def persona_sw_tool(
     from_file: str,
     models_prefixed_by_provider: Optional[List[str]] = None,
@@ -264,8 +354,10 @@ def persona_sw_tool(
     decision_maker_models: Optional[List[str]] = None,
     sw_prompt: str = DEFAULT_SW_PROMPT_CONTENT,
     decision_maker_model: str = DEFAULT_DECISION_MAKER_MODEL,
-    decision_maker_prompt: str = DEFAULT_SW_DECISION_PROMPT
-) -> str:
+    decision_maker_prompt: str = DEFAULT_SW_DECISION_PROMPT,
+    background: bool = False,
+    deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
     """
     Generate specification documents using a specialized Spec Writer persona, with optional decision making.
     
@@ -286,11 +378,15 @@ def persona_sw_tool(
         sw_prompt: Custom spec writer prompt template
         decision_maker_model: Model to use for decision making (defaults to DEFAULT_DECISION_MAKER_MODEL)
         decision_maker_prompt: Custom persona prompt template for decision making
+        background: Whether to run the call as a background job (see job_status_tool)
+        deadline_seconds: Seconds the call may run, split across its stages (defaults to TOOL_DEADLINE_SECONDS,
+                          or JOB_DEADLINE_SECONDS from the start of a background job)
     
     Returns:
-        Path to the specification output file
+        Dictionary with the path to the specification output file ("result"), or the
+        {"job_id", "status"} of the job when background is True, and the remaining budgets ("budget")
     """
-    return persona_sw(
+    arguments = dict(
         from_file=from_file,
         models_prefixed_by_provider=models_prefixed_by_provider,
         output_dir=output_dir,
@@ -302,8 +398,226 @@ def persona_sw_tool(
         decision_maker_model=decision_maker_model,
         decision_maker_prompt=decision_maker_prompt
     )
+    if background:
+        return jobs.background("persona_sw_tool", persona_sw, arguments, deadline_seconds)
+    with deadline_scope(deadline_seconds):
+        return persona_sw(**arguments)
+
+
+@mcp.tool()
+@cancellable
+@traced()
+@budgeted
+def workflow_tool(
+    steps: List[Dict[str, Any]],
+    workflow_name: str = "workflow",
+    output_dir: Optional[str] = None,
+    output_extension: Optional[str] = None,
+    use_cache: bool = True,
+    background: bool = False,
+    deadline_seconds: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run a declarative workflow of chained persona, prompt and decision maker steps.
+    
+    Each step is a dictionary with an "id", a "type" ("prompt", "persona" or "dm") and
+    optional "depends_on" step ids. Root steps take their input from "from_file" or
+    "text"; other steps receive the outputs of their dependencies in memory. Independent
+    branches run in parallel, and completed steps are cached by input hash so that a
+    failed run resumes from the last completed step when re-run.
+    
+    Args:
+        steps: List of step definitions. Supported keys: id, type, persona ("ba", "pm", "sw"),
+               depends_on, from_file, text, prompt, models_prefixed_by_provider,
+               use_decision_maker, decision_maker_model
+        workflow_name: Name used to prefix output files
+        output_dir: Directory where step outputs are written (defaults to the first input file's directory/responses)
+        output_extension: File extension for output files (e.g., 'py', 'txt', 'md')
+        use_cache: Whether to reuse cached outputs of previously completed steps
+        background: Whether to run the call as a background job (see job_status_tool)
+        deadline_seconds: Seconds the call may run, split across its stages (defaults to TOOL_DEADLINE_SECONDS,
+                          or JOB_DEADLINE_SECONDS from the start of a background job)
+    
+    Returns:
+        Dictionary with per-step status, output paths and errors (or {"job_id", "status"}
+        of the job when background is True), and the remaining budgets ("budget")
+    """
+    arguments = dict(
+        steps=steps,
+        workflow_name=workflow_name,
+        output_dir=output_dir,
+        output_extension=output_extension,
+        use_cache=use_cache
+    )
+    if background:
+        return jobs.background("workflow_tool", run_workflow, arguments, deadline_seconds)
+    with deadline_scope(deadline_seconds):
+        return run_workflow(**arguments)
+
+
+@mcp.tool()
+@traced()
+def metrics_tool(format: str = "json") -> Union[Dict[str, Any], str]:
+    """
+    Get per-provider and per-model request metrics recorded since the server started.
+    
+    Includes request and error counts (by error class), latency and time-to-first-token
+    histograms with percentile estimates, estimated input/output tokens, and queue wait.
+    
+    Args:
+        format: "json" for a snapshot dictionary, or "prometheus" for the Prometheus text format
+    
+    Returns:
+        Metrics snapshot dictionary or Prometheus text
+    """
+    return metrics(format=format)
+
+
+@mcp.tool()
+@traced()
+def usage_tool(
+    group_by: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Aggregate token usage from the local usage ledger (enabled with USAGE_LEDGER).
+    
+    Rows include request counts, input/output/cached/thinking tokens, the cache hit
+    ratio and mean latency, using the token counts reported by each provider.
+    
+    Args:
+        group_by: Columns to group by: "provider", "model", "persona", "day" (defaults to provider and model)
+        since: First day to include (YYYY-MM-DD)
+        until: Last day to include (YYYY-MM-DD)
+    
+    Returns:
+        Dictionary with one row per group and overall totals
+    """
+    return usage(group_by=group_by, since=since, until=until)
 
 
+@mcp.tool()
+@traced()
+def artifacts_tool(
+    run: Optional[str] = None,
+    path: Optional[str] = None,
+    materialize: bool = False,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    List responses in the content-addressed artifact store (enabled with ARTIFACT_STORE).
+    
+    Identical responses are stored once, compressed; their output paths are hard links,
+    copies, or (with ARTIFACT_MATERIALIZE=lazy) written on demand.
+    
+    Args:
+        run: Only responses of this run
+        path: Only responses written to this path
+        materialize: Whether to write the listed paths that are not on disk
+        limit: Maximum number of responses to list
+    
+    Returns:
+        Dictionary with the store's statistics and the listed responses (run, path, digest,
+        input, provider, model, sizes, timestamp and whether the path is on disk)
+    """
+    return artifacts(run=run, path=path, materialize=materialize, limit=limit)
+
+
+@mcp.tool()
+@traced()
+def budget_tool(
+    scope: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    max_cost_usd: Optional[float] = None,
+    policy: Optional[str] = None,
+    reset: bool = False
+) -> Dict[str, Any]:
+    """
+    Report, and optionally change, the token and cost budgets enforced on model calls.
+    
+    Budgets apply per tool call, per session and globally. Calls whose estimated cost
+    would exceed a budget are rejected, or downgraded to a cheaper model with the
+    "downgrade" policy.
+    
+    Args:
+        scope: Budget to change: "global", "session" or "call" (the default for later tool calls)
+        max_tokens: New token limit for the scope (0 removes the limit)
+        max_cost_usd: New USD limit for the scope (0 removes the limit)
+        policy: "reject" or "downgrade"
+        reset: Whether to clear the amounts spent against the scope's budget
+    
+    Returns:
+        Dictionary with the policy and the limits, spent and remaining amounts of each budget
+    """
+    return budget(scope=scope, max_tokens=max_tokens, max_cost_usd=max_cost_usd, policy=policy, reset=reset)
+
+
+@mcp.tool()
+@traced()
+def routing_tool(decisions: int = 50) -> Dict[str, Any]:
+    """
+    Report how calls to model aliases are routed across their equivalent targets.
+    
+    An alias (e.g. "alias:fast-drafter") can be used wherever "provider:model" is
+    accepted; each call goes to the target with the best recent latency and error
+    rate that is not rate limited, failing over to the next target on error.
+    
+    Args:
+        decisions: Number of recent routing decisions to include
+    
+    Returns:
+        Dictionary with per-target statistics of every alias and the recent decisions
+    """
+    return routing(decisions=decisions)
+
+
+@mcp.tool()
+@traced()
+def job_status_tool(job_id: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+    """
+    Report the status of a background job started with background=True, or list recent jobs.
+    
+    Args:
+        job_id: Job id returned by the tool call (lists the most recent jobs if None)
+        limit: Number of recent jobs to list when no job id is given
+    
+    Returns:
+        Dictionary with the job's tool, status (queued, running, succeeded, failed,
+        cancelled or interrupted), timestamps and error, or "jobs" with recent jobs
+    """
+    return job_status(job_id=job_id, limit=limit)
+
+
+@mcp.tool()
+@traced()
+def job_result_tool(job_id: str) -> Dict[str, Any]:
+    """
+    Fetch the result of a background job: the output path of a persona tool or the workflow result.
+    
+    Args:
+        job_id: Job id returned by the tool call
+    
+    Returns:
+        Dictionary with the job's status and its result (None until the job succeeded)
+    """
+    return job_result(job_id)
+
+
+@mcp.tool()
+@traced()
+def job_cancel_tool(job_id: str) -> Dict[str, Any]:
+    """
+    Cancel a background job. Queued jobs never start; running jobs stop before their next model call or streamed chunk.
+    
+    Args:
+        job_id: Job id returned by the tool call
+    
+    Returns:
+        Dictionary with the job's status after the cancellation request
+    """
+    return job_cancel(job_id)
+
 @mcp.prompt()
 def list_mcp_assets() -> str:
     """
@@ -331,6 +645,7 @@ Agent persona management and LLM provider integration functions:
 ### Provider Discovery
 • **list_providers_tool** () - List all supported LLM providers with shortcuts
 • **list_models_tool** (provider) - List available models for a specific provider
+• **list_loaded_models_tool** () - List the Ollama models loaded in memory on each Ollama host
 
 ### Agent Personas
 • **persona_ba_tool** (from_file, models_prefixed_by_provider, use_decision_maker, ...) - Business Analyst persona for project briefs and requirements
@@ -338,6 +653,24 @@ Agent persona management and LLM provider integration functions:
 • **persona_sw_tool** (from_file, models_prefixed_by_provider, use_decision_maker, ...) - Spec Writer persona for technical specifications
 • **persona_dm_tool** (from_file, models_prefixed_by_provider, persona_dm_model, ...) - Team Decision Maker for multi-model consensus
 
+### Workflows
+• **workflow_tool** (steps, workflow_name, output_dir, ...) - Run chained persona steps as a dependency graph with parallel branches and resumable caching
+
+### Background Jobs
+Add `background=true` to any persona or workflow tool to get a job id immediately instead of waiting:
+• **job_status_tool** (job_id, limit) - Status of a background job, or the most recent jobs
+• **job_result_tool** (job_id) - Result of a finished background job
+• **job_cancel_tool** (job_id) - Cancel a queued or running background job
+
+Every prompt, persona and workflow tool also accepts `deadline_seconds` (default TOOL_DEADLINE_SECONDS).
+
+### Observability
+• **metrics_tool** (format) - Per-provider latency, time-to-first-token, token, error and queue wait metrics as JSON or Prometheus text
+• **usage_tool** (group_by, since, until) - Token usage from the local ledger aggregated by provider, model, persona and day
+• **artifacts_tool** (run, path, materialize, limit) - Responses in the deduplicated artifact store, with on-demand materialization of their files
+• **budget_tool** (scope, max_tokens, max_cost_usd, policy, reset) - Report or change the per-call, session and global token/cost budgets
+• **routing_tool** (decisions) - Latency and error statistics of model alias targets and recent routing decisions
+
 ---
 
 ## 🏢 Supported LLM Providers
@@ -0,0 +1,329 @@
+"""
+Streamable HTTP serving of the Agile Team MCP Server.
+
+With the stdio transport every agent spawns its own server process, with cold
+model catalogs, provider clients and connection pools. Over streamable HTTP
+many agents share one warm server:
+
+- With one worker the MCP app is served directly on the configured host and port.
+- With several workers, each worker is a separate process serving the MCP app on
+  a loopback port (port + 1, port + 2, ...). A session-sticky router on the
+  configured port forwards every request to the worker owning its
+  Mcp-Session-Id, and assigns new sessions to the worker with the fewest
+  sessions, since MCP session state lives in the worker that created it.
+  Sessions are forgotten when their worker ends them (404 or DELETE) or is
+  unreachable (502), and when they have been idle, without requests or open
+  streams, for MCP_SESSION_IDLE_SECONDS (clients may simply disconnect).
+
+Workers share one cache (CACHE_BACKEND, "shm" unless set; see shared/cache.py),
+so model catalogs are fetched once for all of them.
+
+Workers also share one job store (JOB_STORE_DIR). Every job records the worker
+process running it, so a worker starting up never interrupts the running jobs
+of the others, and job status, result and cancel calls work from any worker
+and session (see shared/jobs.py).
+
+Every worker warms up in the background on start (provider modules and clients,
+and the models in OLLAMA_PRELOAD_MODELS) and answers GET /ready with 503 until
+the warm-up is done. The router's /ready is 200 once every worker is ready.
+"""
+
+import os
+import time
+import asyncio
+import logging
+import threading
+import multiprocessing
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from agile_team.shared.config import (
+    MCP_HOST, MCP_PORT, MCP_WORKERS, MCP_READY_TIMEOUT_SECONDS, MCP_SESSION_IDLE_SECONDS
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Header carrying the MCP session id of streamable HTTP requests
+SESSION_HEADER = "mcp-session-id"
+
+# Headers describing a single connection, not forwarded by the router
+_HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailers", "transfer-encoding", "upgrade", "host", "content-length",
+}
+
+_ready = threading.Event()
+_warm_up_error: Optional[str] = None
+
+
+def warm_up() -> None:
+    """
+    Load the provider modules and clients of every configured provider, and preload Ollama models.
+
+    Sets the worker ready when done; failures are logged and reported by /ready
+    but do not keep the worker from serving.
+    """
+    global _warm_up_error
+    from agile_team.shared.model_router import ModelRouter, PROVIDER_CONFIG
+
+    started = time.perf_counter()
+    try:
+        for provider, config in PROVIDER_CONFIG.items():
+            key_env = config.get("key_env")
+            if config.get("testing") or (key_env and not os.environ.get(key_env)):
+                continue
+            try:
+                ModelRouter._get_provider_handle(provider)
+            except Exception as e:
+                logger.warning(f"Warm-up could not load provider {provider}: {e}")
+        if os.environ.get("OLLAMA_PRELOAD_MODELS"):
+            from agile_team.shared.llm_providers.ollama import preload_models
+            preload_models(wait=True)
+    except Exception as e:
+        _warm_up_error = str(e)
+        logger.error(f"Warm-up failed: {e}")
+    finally:
+        _ready.set()
+        logger.info(f"Worker {os.getpid()} ready after {time.perf_counter() - started:.2f}s")
+
+
+async def ready(request: Request) -> Response:
+    """Readiness of this worker: 200 once the warm-up is done, 503 before."""
+    body = {"status": "ready" if _ready.is_set() else "starting", "pid": os.getpid(), "warm_up_error": _warm_up_error}
+    return JSONResponse(body, status_code=200 if _ready.is_set() else 503)
+
+
+def worker_app(host: str = MCP_HOST) -> Starlette:
+    """
+    The streamable HTTP app of the MCP server, with the /ready endpoint.
+
+    Args:
+        host: Host the app is served on; DNS rebinding protection stays on for loopback hosts only
+
+    Returns:
+        The Starlette app
+    """
+    from agile_team.server import mcp
+
+    if host not in ("127.0.0.1", "localhost", "::1"):
+        # Reachable under other host names, which the loopback-only allowed hosts would reject
+        mcp.settings.transport_security = None
+    mcp.custom_route("/ready", methods=["GET"])(ready)
+    return mcp.streamable_http_app()
+
+
+def serve_worker(host: str, port: int, log_level: str = "info") -> None:
+    """
+    Serve the MCP app in this process, warming up in the background.
+
+    Args:
+        host: Host to listen on
+        port: Port to listen on
+        log_level: uvicorn log level
+    """
+    app = worker_app(host)
+    threading.Thread(target=warm_up, name="agile-team-warm-up", daemon=True).start()
+    uvicorn.run(app, host=host, port=port, log_level=log_level)
+
+
+def _worker_main(index: int, port: int, log_level: str) -> None:
+    """Entry point of a worker process."""
+    from agile_team.shared.metrics import start_textfile_exporter
+    from agile_team.shared.tracing import configure_tracing
+
+    configure_tracing()
+    textfile = os.environ.get("METRICS_TEXTFILE")
+    if textfile:
+        # One textfile per worker, so workers do not overwrite each other's metrics
+        root, extension = os.path.splitext(textfile)
+        start_textfile_exporter(f"{root}-worker{index}{extension}")
+    serve_worker("127.0.0.1", port, log_level)
+
+
+class StickyRouter:
+    """Forwards requests to worker processes, keeping every MCP session on the worker that created it."""
+
+    def __init__(
+        self,
+        workers: List[str],
+        client: Optional[httpx.AsyncClient] = None,
+        idle_seconds: Optional[float] = None
+    ):
+        self.workers = workers
+        self.sessions: Dict[str, int] = {}
+        self.idle_seconds = idle_seconds if idle_seconds is not None else float(
+            os.environ.get("MCP_SESSION_IDLE_SECONDS") or MCP_SESSION_IDLE_SECONDS
+        )
+        # Last request or stream end of every session, and its responses still streaming
+        self._last_seen: Dict[str, float] = {}
+        self._streams: Dict[str, int] = {}
+        self._next_sweep = 0.0
+        # No read timeout: server-sent event streams stay open for the whole session
+        self._client = client or httpx.AsyncClient(timeout=httpx.Timeout(None, connect=10.0))
+
+    def forget(self, session_id: str) -> None:
+        """Stop routing a session."""
+        self.sessions.pop(session_id, None)
+        self._last_seen.pop(session_id, None)
+
+    def expire(self, now: Optional[float] = None) -> None:
+        """
+        Forget sessions idle for longer than idle_seconds.
+
+        Args:
+            now: Current time.monotonic() (defaults to now)
+        """
+        now = time.monotonic() if now is None else now
+        for session_id in list(self.sessions):
+            if not self._streams.get(session_id) and now - self._last_seen.get(session_id, now) > self.idle_seconds:
+                logger.info(f"Forgetting idle session {session_id} of worker {self.workers[self.sessions[session_id]]}")
+                self.forget(session_id)
+
+    def route(self, session_id: Optional[str]) -> int:
+        """
+        The worker for a request.
+
+        Args:
+            session_id: The request's Mcp-Session-Id, if any
+
+        Returns:
+            Index of the worker owning the session, or of the worker with the fewest sessions
+        """
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.expire(now)
+            self._next_sweep = now + min(self.idle_seconds, 60.0)
+        if session_id in self.sessions:
+            self._last_seen[session_id] = now
+            return self.sessions[session_id]
+        counts = [0] * len(self.workers)
+        for index in self.sessions.values():
+            counts[index] += 1
+        return min(range(len(self.workers)), key=counts.__getitem__)
+
+    async def proxy(self, request: Request) -> Response:
+        """Forward a request to its worker and stream the response back."""
+        session_id = request.headers.get(SESSION_HEADER)
+        index = self.route(session_id)
+        upstream = self._client.build_request(
+            request.method,
+            f"{self.workers[index]}{request.url.path}",
+            params=request.query_params,
+            headers=[(name, value) for name, value in request.headers.items() if name not in _HOP_BY_HOP_HEADERS],
+            content=await request.body(),
+        )
+        try:
+            response = await self._client.send(upstream, stream=True)
+        except httpx.HTTPError as e:
+            logger.error(f"Worker {self.workers[index]} unreachable: {e}")
+            if session_id:
+                # The session died with its worker; the client starts a new one
+                self.forget(session_id)
+            return JSONResponse({"error": f"Worker unavailable: {e}"}, status_code=502)
+
+        created = response.headers.get(SESSION_HEADER)
+        if created and created not in self.sessions:
+            self.sessions[created] = index
+            self._last_seen[created] = time.monotonic()
+        if session_id and (
+            response.status_code in (404, 502) or request.method == "DELETE" and response.status_code < 300
+        ):
+            # Terminated or expired on the worker, or the worker is failing
+            self.forget(session_id)
+        stream_session = created or session_id
+        if stream_session:
+            self._streams[stream_session] = self._streams.get(stream_session, 0) + 1
+
+        async def body() -> AsyncIterator[bytes]:
+            # Closed also when the client disconnects from a server-sent event stream
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                await response.aclose()
+                if stream_session:
+                    self._streams[stream_session] -= 1
+                    if not self._streams[stream_session]:
+                        del self._streams[stream_session]
+                    if stream_session in self.sessions:
+                        self._last_seen[stream_session] = time.monotonic()
+
+        headers = {name: value for name, value in response.headers.items() if name not in _HOP_BY_HOP_HEADERS}
+        return StreamingResponse(body(), status_code=response.status_code, headers=headers)
+
+    async def ready(self, request: Request) -> Response:
+        """Readiness of the router: 200 once every worker is ready."""
+        async def probe(url: str) -> Dict[str, Any]:
+            try:
+                response = await self._client.get(f"{url}/ready", timeout=MCP_READY_TIMEOUT_SECONDS)
+                return {"url": url, **response.json()}
+            except (httpx.HTTPError, ValueError) as e:
+                return {"url": url, "status": "unreachable", "error": str(e)}
+
+        workers = await asyncio.gather(*(probe(url) for url in self.workers))
+        is_ready = all(worker["status"] == "ready" for worker in workers)
+        return JSONResponse(
+            {"status": "ready" if is_ready else "starting", "sessions": len(self.sessions), "workers": workers},
+            status_code=200 if is_ready else 503
+        )
+
+    def app(self) -> Starlette:
+        """The router's Starlette app."""
+        @asynccontextmanager
+        async def lifespan(app: Starlette) -> AsyncIterator[None]:
+            yield
+            await self._client.aclose()
+
+        return Starlette(
+            routes=[
+                Route("/ready", self.ready, methods=["GET"]),
+                Route("/{path:path}", self.proxy, methods=["GET", "POST", "DELETE"]),
+            ],
+            lifespan=lifespan,
+        )
+
+
+def serve(host: str = MCP_HOST, port: int = MCP_PORT, workers: int = MCP_WORKERS, log_level: str = "info") -> None:
+    """
+    Serve the MCP server over streamable HTTP.
+
+    Args:
+        host: Host to listen on
+        port: Port to listen on
+        workers: Number of worker processes (1 serves in this process)
+        log_level: uvicorn log level
+    """
+    if workers <= 1:
+        logger.info(f"Serving streamable HTTP on {host}:{port}")
+        serve_worker(host, port, log_level)
+        return
+
+    if not os.environ.get("CACHE_BACKEND"):
+        # Workers share model catalogs, cached responses and provider health (inherited by the spawned processes)
+        os.environ["CACHE_BACKEND"] = "shm"
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    for index in range(1, workers + 1):
+        process = context.Process(
+            target=_worker_main, args=(index, port + index, log_level), name=f"agile-team-worker-{index}", daemon=True
+        )
+        process.start()
+        processes.append(process)
+    logger.info(f"Serving streamable HTTP on {host}:{port} with {workers} workers on ports {port + 1}-{port + workers}")
+
+    router = StickyRouter([f"http://127.0.0.1:{port + index}" for index in range(1, workers + 1)])
+    try:
+        uvicorn.run(router.app(), host=host, port=port, log_level=log_level)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=10)
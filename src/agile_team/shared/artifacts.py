@@ -0,0 +1,451 @@
+"""
+Content-addressed store of model responses.
+
+Batch runs write one response file per model per run, most of them small and
+many identical. With ARTIFACT_STORE set to a directory, response files are
+written through this store instead:
+
+- every distinct response is stored once, as a blob named by the SHA-256 of its
+  text and compressed with zstd (zlib when the zstandard package is not installed)
+- a SQLite index records each write: run, path, input file and prompt hash,
+  provider, model and timestamp
+- the familiar output paths are materialized according to ARTIFACT_MATERIALIZE:
+  "hardlink" links every path to one read-only file per distinct response,
+  "copy" writes a regular file per path, and "lazy" writes nothing until the
+  path is read (read_file materializes missing paths from the store) or
+  materialized with artifacts_tool
+
+The tools writing responses within one call share a run id (run_scope), so the
+files of a run can be listed and materialized together.
+"""
+
+import os
+import time
+import uuid
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from agile_team.shared.config import ARTIFACT_MATERIALIZE, ARTIFACT_COMPRESSION_LEVEL
+from agile_team.shared import metrics
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on installed extras
+    zstandard = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Ways of materializing output paths
+MATERIALIZE_MODES = ("hardlink", "copy", "lazy")
+
+# File suffix of the blobs of each codec
+_CODEC_SUFFIXES = {"zstd": ".zst", "zlib": ".zz"}
+
+# Run the artifacts written by the current tool call belong to
+_current_run: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("artifact_run", default=None)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    codec TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    run TEXT,
+    path TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    input_path TEXT,
+    input_digest TEXT,
+    provider TEXT,
+    model TEXT
+);
+CREATE INDEX IF NOT EXISTS artifacts_path ON artifacts (path);
+CREATE INDEX IF NOT EXISTS artifacts_run ON artifacts (run);
+"""
+
+
+@contextmanager
+def run_scope(run: Optional[str] = None) -> Iterator[str]:
+    """
+    Group the artifacts written inside the block into one run.
+
+    Nested scopes join the enclosing run, so a decision maker and the team it
+    fans out to share a run id.
+
+    Args:
+        run: Run id (a new one by default)
+
+    Yields:
+        The run id
+    """
+    current = _current_run.get()
+    if current is not None:
+        yield current
+        return
+    # Time-ordered, so run directories and index entries sort by start time
+    token = _current_run.set(run or f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{uuid.uuid4().hex[:8]}")
+    try:
+        yield _current_run.get()
+    finally:
+        _current_run.reset(token)
+
+
+def current_run() -> Optional[str]:
+    """The run the current artifacts belong to, if any."""
+    return _current_run.get()
+
+
+def _write_atomically(path: str, data: bytes) -> None:
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+    os.replace(temp_path, path)
+
+
+class ArtifactStore:
+    """Compressed blobs keyed by content hash, with an index of the paths written from them."""
+
+    def __init__(
+        self,
+        root: str,
+        materialize: str = ARTIFACT_MATERIALIZE,
+        compression_level: int = ARTIFACT_COMPRESSION_LEVEL
+    ):
+        if materialize not in MATERIALIZE_MODES:
+            raise ValueError(f"Unknown materialize mode: {materialize}. Use one of: {', '.join(MATERIALIZE_MODES)}")
+        self.root = root
+        self.materialize_mode = materialize
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.compression_level = compression_level
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(root, "index.sqlite3"), timeout=10.0, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def _blob_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, "blobs", digest[:2], f"{digest}{_CODEC_SUFFIXES[codec]}")
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], digest)
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.compression_level).compress(data)
+        return zlib.compress(data, min(self.compression_level, 9))
+
+    def put(
+        self,
+        path: str,
+        content: str,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        input_text: Optional[str] = None,
+        input_path: Optional[str] = None
+    ) -> str:
+        """
+        Store a response and materialize it at its output path.
+
+        Args:
+            path: Output path of the response
+            content: Response text
+            provider: Provider that produced the response
+            model: Model that produced the response
+            input_text: Prompt the response answers (indexed by its hash)
+            input_path: File the prompt was read from
+
+        Returns:
+            SHA-256 digest of the content
+        """
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.abspath(path)
+
+        with self._lock:
+            row = self._connection.execute("SELECT codec FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        stored = row is None or not os.path.isfile(self._blob_path(digest, row[0]))
+        if stored:
+            compressed = self._compress(data)
+            blob_path = self._blob_path(digest, self.codec)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            _write_atomically(blob_path, compressed)
+            with self._lock:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO blobs (digest, codec, size, stored_size, created_at) VALUES (?, ?, ?, ?, ?)",
+                    (digest, self.codec, len(data), len(compressed), time.time())
+                )
+        metrics.registry.inc(
+            "artifacts_written_total", {"outcome": "stored" if stored else "deduplicated"},
+            help_text="Responses written through the artifact store, stored as new blobs or deduplicated"
+        )
+
+        input_digest = hashlib.sha256(input_text.encode("utf-8")).hexdigest() if input_text is not None else None
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO artifacts (ts, run, path, digest, input_path, input_digest, provider, model) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (time.time(), current_run(), path, digest,
+                 os.path.abspath(input_path) if input_path else None, input_digest, provider, model)
+            )
+
+        if self.materialize_mode == "lazy":
+            # A file left by an earlier run would shadow this artifact
+            if os.path.lexists(path):
+                os.unlink(path)
+        else:
+            self._materialize(path, digest, data, self.materialize_mode)
+        return digest
+
+    def _materialize(self, path: str, digest: str, data: bytes, mode: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if mode == "hardlink":
+            object_path = self._object_path(digest)
+            try:
+                if not os.path.isfile(object_path):
+                    os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                    _write_atomically(object_path, data)
+                    # Read-only, so editing one path cannot change the others
+                    os.chmod(object_path, 0o444)
+                temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+                os.link(object_path, temp_path)
+                os.replace(temp_path, path)
+                return
+            except OSError as e:
+                # e.g. the output directory is on another file system
+                logger.debug(f"Copying artifact to {path} instead of linking: {e}")
+        _write_atomically(path, data)
+
+    def _load(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connection.execute("SELECT codec FROM blobs WHERE digest = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._blob_path(digest, row[0]), "rb") as f:
+                compressed = f.read()
+        except OSError as e:
+            logger.error(f"Artifact blob {digest} is missing: {e}")
+            return None
+        if row[0] == "zstd":
+            if zstandard is None:
+                logger.error(f"Artifact blob {digest} is zstd-compressed but zstandard is not installed")
+                return None
+            return zstandard.ZstdDecompressor().decompress(compressed)
+        return zlib.decompress(compressed)
+
+    def _latest_digest(self, path: str) -> Optional[str]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT digest FROM artifacts WHERE path = ? ORDER BY id DESC LIMIT 1", (os.path.abspath(path),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def read(self, path: str) -> Optional[str]:
+        """
+        The content last written to a path through the store.
+
+        Args:
+            path: Output path
+
+        Returns:
+            The content, or None if the store has no artifact for the path
+        """
+        digest = self._latest_digest(path)
+        data = self._load(digest) if digest else None
+        return data.decode("utf-8") if data is not None else None
+
+    def materialize(self, path: str) -> bool:
+        """
+        Write the content last stored for a path to the path.
+
+        Lazily stored paths are written as regular files; otherwise the store's
+        materialize mode is used.
+
+        Args:
+            path: Output path
+
+        Returns:
+            True if the path was written, False if the store has no artifact for it
+        """
+        digest = self._latest_digest(path)
+        data = self._load(digest) if digest else None
+        if data is None:
+            return False
+        mode = "copy" if self.materialize_mode == "lazy" else self.materialize_mode
+        self._materialize(os.path.abspath(path), digest, data, mode)
+        return True
+
+    def entries(self, run: Optional[str] = None, path: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Index entries, newest first.
+
+        Args:
+            run: Only entries of this run
+            path: Only entries written to this path
+            limit: Maximum number of entries
+
+        Returns:
+            List of entries with their run, path, digest, input, provider, model, sizes and timestamp
+        """
+        query = (
+            "SELECT a.ts, a.run, a.path, a.digest, a.input_path, a.input_digest, a.provider, a.model, "
+            "b.size, b.stored_size FROM artifacts a LEFT JOIN blobs b ON a.digest = b.digest"
+        )
+        conditions, params = [], []
+        if run:
+            conditions.append("a.run = ?")
+            params.append(run)
+        if path:
+            conditions.append("a.path = ?")
+            params.append(os.path.abspath(path))
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY a.id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._connection.execute(query, params).fetchall()
+        columns = ("ts", "run", "path", "digest", "input_path", "input_digest", "provider", "model", "size", "stored_size")
+        results = []
+        for row in rows:
+            entry = dict(zip(columns, row))
+            entry["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(entry.pop("ts")))
+            entry["materialized"] = os.path.isfile(entry["path"])
+            results.append(entry)
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        """Counts of index entries and distinct blobs, with their raw and stored sizes."""
+        with self._lock:
+            artifacts, referenced = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(b.size), 0) FROM artifacts a JOIN blobs b ON a.digest = b.digest"
+            ).fetchone()
+            blobs, size, stored_size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "root": self.root,
+            "codec": self.codec,
+            "materialize": self.materialize_mode,
+            "artifacts": artifacts,
+            "blobs": blobs,
+            "bytes_written": referenced,
+            "bytes_unique": size,
+            "bytes_stored": stored_size,
+        }
+
+    def close(self) -> None:
+        """Close the index."""
+        with self._lock:
+            self._connection.close()
+
+
+_store: Optional[ArtifactStore] = None
+
+
+def open_store(root: Optional[str] = None, materialize: Optional[str] = None) -> Optional[ArtifactStore]:
+    """
+    Open the artifact store.
+
+    Args:
+        root: Store directory (defaults to the ARTIFACT_STORE environment variable)
+        materialize: "hardlink", "copy" or "lazy" (defaults to ARTIFACT_MATERIALIZE)
+
+    Returns:
+        The store, or None if no directory is configured
+    """
+    global _store
+    root = root or os.environ.get("ARTIFACT_STORE")
+    if not root:
+        return None
+    close_store()
+    _store = ArtifactStore(
+        os.path.expanduser(root), materialize or os.environ.get("ARTIFACT_MATERIALIZE") or ARTIFACT_MATERIALIZE
+    )
+    logger.info(f"Storing responses in {root} ({_store.codec}, {_store.materialize_mode})")
+    return _store
+
+
+def close_store() -> None:
+    """Close the artifact store, if open."""
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def get_store() -> Optional[ArtifactStore]:
+    """The open artifact store, if any."""
+    return _store
+
+
+def store_artifact(
+    path: str,
+    content: str,
+    provider: Optional[str] = None,
+    model: Optional[str] = None,
+    input_text: Optional[str] = None,
+    input_path: Optional[str] = None
+) -> bool:
+    """
+    Write a response to its output path through the artifact store, if it is open.
+
+    Args:
+        path: Output path
+        content: Response text
+        provider: Provider that produced the response
+        model: Model that produced the response
+        input_text: Prompt the response answers
+        input_path: File the prompt was read from
+
+    Returns:
+        True if the store took the response, False if the caller should write the file itself
+    """
+    store = _store
+    if store is None:
+        return False
+    try:
+        store.put(path, content, provider, model, input_text, input_path)
+        return True
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"Failed to store artifact {path}, writing it directly: {e}")
+        return False
+
+
+def materialize(path: str) -> bool:
+    """
+    Write a path lazily stored in the open artifact store.
+
+    Args:
+        path: Output path
+
+    Returns:
+        True if the path was written
+    """
+    store = _store
+    if store is None:
+        return False
+    try:
+        return store.materialize(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.error(f"Failed to materialize artifact {path}: {e}")
+        return False
+
+
+try:
+    open_store()
+except (ValueError, OSError, sqlite3.Error) as e:
+    logger.error(f"Artifact store disabled: {e}")
@@ -0,0 +1,482 @@
+"""
+Token and cost budgets enforced by the model router.
+
+Budgets exist at three scopes, each with an optional token limit and an
+optional USD limit:
+
+- "global": shared by every call the server makes (BUDGET_GLOBAL_TOKENS,
+  BUDGET_GLOBAL_USD)
+- "session": one per MCP client session (BUDGET_SESSION_TOKENS,
+  BUDGET_SESSION_USD)
+- "call": one per tool call, opened by budget_scope() (BUDGET_CALL_TOKENS,
+  BUDGET_CALL_USD)
+
+Before each provider call the router estimates its cost from the prompt's
+estimated tokens, the assumed response and thinking tokens, and the price table
+(MODEL_PRICES), and reserves it against every active budget. A call that does
+not fit is rejected, or with the "downgrade" policy (BUDGET_POLICY) retried on
+the same model without its thinking suffix and then on the cheaper models in
+BUDGET_DOWNGRADE_MODELS. After the call, the reservation is replaced by the cost
+of the tokens the provider reported.
+"""
+
+import os
+import logging
+import functools
+import threading
+import contextvars
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from mcp.server.fastmcp.exceptions import ToolError
+from mcp.server.lowlevel.server import request_ctx
+from dotenv import load_dotenv
+
+from agile_team.shared.config import (
+    MODEL_PRICES,
+    BUDGET_DOWNGRADE_MODELS,
+    BUDGET_ESTIMATED_OUTPUT_TOKENS,
+    BUDGET_REASONING_EFFORT_TOKENS,
+    BUDGET_DEFAULT_POLICY,
+)
+from agile_team.shared.data_types import ModelSpec
+from agile_team.shared.utils import model_spec
+from agile_team.shared import metrics, tracing
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Budget scopes, from narrowest to widest
+SCOPES = ("call", "session", "global")
+
+# Supported over-budget policies
+POLICIES = ("reject", "downgrade")
+
+class BudgetExceededError(ToolError):
+    """Raised when a provider call would exceed a token or cost budget."""
+
+
+class Budget:
+    """Token and USD limits with the amounts spent and reserved against them."""
+
+    def __init__(self, scope: str, max_tokens: Optional[int] = None, max_cost_usd: Optional[float] = None):
+        self.scope = scope
+        self.max_tokens = max_tokens
+        self.max_cost_usd = max_cost_usd
+        self.spent_tokens = 0
+        self.spent_cost_usd = 0.0
+        self.reserved_tokens = 0
+        self.reserved_cost_usd = 0.0
+        self.rejected = 0
+        self.downgraded = 0
+
+    @property
+    def limited(self) -> bool:
+        """Whether the budget has a token or USD limit."""
+        return self.max_tokens is not None or self.max_cost_usd is not None
+
+    def remaining_tokens(self) -> Optional[int]:
+        """Tokens left after spent and reserved tokens, or None without a token limit."""
+        if self.max_tokens is None:
+            return None
+        return max(self.max_tokens - self.spent_tokens - self.reserved_tokens, 0)
+
+    def remaining_cost_usd(self) -> Optional[float]:
+        """USD left after spent and reserved cost, or None without a USD limit."""
+        if self.max_cost_usd is None:
+            return None
+        return max(self.max_cost_usd - self.spent_cost_usd - self.reserved_cost_usd, 0.0)
+
+    def fits(self, tokens: int, cost_usd: float) -> bool:
+        """Whether a call of the given size fits in what is left."""
+        if self.max_tokens is not None and self.spent_tokens + self.reserved_tokens + tokens > self.max_tokens:
+            return False
+        if self.max_cost_usd is not None and self.spent_cost_usd + self.reserved_cost_usd + cost_usd > self.max_cost_usd:
+            return False
+        return True
+
+    def status(self) -> Dict[str, Any]:
+        """Limits, spent amounts and what is left, as a JSON-serializable dictionary."""
+        remaining_cost = self.remaining_cost_usd()
+        return {
+            "scope": self.scope,
+            "max_tokens": self.max_tokens,
+            "max_cost_usd": self.max_cost_usd,
+            "spent_tokens": self.spent_tokens,
+            "spent_cost_usd": round(self.spent_cost_usd, 6),
+            "remaining_tokens": self.remaining_tokens(),
+            "remaining_cost_usd": round(remaining_cost, 6) if remaining_cost is not None else None,
+            "rejected_calls": self.rejected,
+            "downgraded_calls": self.downgraded,
+        }
+
+
+class Reservation:
+    """Estimated cost of one provider call, held against the active budgets until it completes."""
+
+    def __init__(self, provider: str, model: str, tokens: int, cost_usd: float, budgets: List[Budget]):
+        self.provider = provider
+        self.model = model
+        self.tokens = tokens
+        self.cost_usd = cost_usd
+        self.budgets = budgets
+
+    def settle(self, response: Any) -> None:
+        """
+        Replace the reservation with the cost of the tokens the provider reported.
+
+        Args:
+            response: ProviderResponse of the call
+        """
+        input_tokens = response.input_tokens or 0
+        output_tokens = response.output_tokens or 0
+        cost_usd = token_cost(self.provider, self.model, input_tokens, output_tokens) or 0.0
+        with _lock:
+            for budget in self.budgets:
+                budget.reserved_tokens -= self.tokens
+                budget.reserved_cost_usd -= self.cost_usd
+                budget.spent_tokens += input_tokens + output_tokens
+                budget.spent_cost_usd += cost_usd
+        if cost_usd:
+            metrics.registry.inc(
+                "cost_usd_total", {"provider": self.provider, "model": self.model}, cost_usd,
+                help_text="Estimated provider cost in USD from reported tokens and the price table"
+            )
+
+    def release(self) -> None:
+        """Drop the reservation of a call that failed."""
+        with _lock:
+            for budget in self.budgets:
+                budget.reserved_tokens -= self.tokens
+                budget.reserved_cost_usd -= self.cost_usd
+
+
+def _thinking_tokens(spec: ModelSpec) -> int:
+    """Thinking tokens requested by a model's thinking budget or reasoning effort suffix."""
+    return spec.thinking_budget or BUDGET_REASONING_EFFORT_TOKENS.get(spec.reasoning_effort, 0)
+
+
+def _lookup(table: Dict[str, Any], provider: str, model: str) -> Any:
+    """Value of the longest "provider:model" prefix in a table matching the model, or None."""
+    key = f"{provider}:{model}"
+    matches = [prefix for prefix in table if key.startswith(prefix)]
+    return table[max(matches, key=len)] if matches else None
+
+
+@functools.lru_cache(maxsize=256)
+def model_price(provider: str, model: str) -> Optional[Tuple[float, float]]:
+    """
+    Price of a model in USD per million (input, output) tokens.
+
+    Args:
+        provider: Provider name
+        model: Model name (a thinking or reasoning suffix is ignored)
+
+    Returns:
+        Tuple of (input price, output price), or None if the model is not in the price table
+    """
+    return _lookup(MODEL_PRICES, provider, model_spec(provider, model).base_model)
+
+
+def token_cost(provider: str, model: str, input_tokens: int, output_tokens: int) -> Optional[float]:
+    """
+    Cost of a call in USD.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        input_tokens: Prompt tokens
+        output_tokens: Response tokens, including thinking tokens
+
+    Returns:
+        Cost in USD, or None if the model is not in the price table
+    """
+    price = model_price(provider, model)
+    if price is None:
+        return None
+    return (input_tokens * price[0] + output_tokens * price[1]) / 1_000_000
+
+
+def estimate_call(provider: str, model: str, text: str) -> Tuple[int, float]:
+    """
+    Estimate the tokens and cost of a call before it is made.
+
+    The prompt's tokens are estimated from its length; the response is assumed to use
+    BUDGET_ESTIMATED_OUTPUT_TOKENS plus the thinking tokens requested by the model suffix.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        text: Prompt text
+
+    Returns:
+        Tuple of (estimated tokens, estimated cost in USD; 0 for unpriced models)
+    """
+    input_tokens = metrics.estimate_tokens(text)
+    output_tokens = BUDGET_ESTIMATED_OUTPUT_TOKENS + _thinking_tokens(model_spec(provider, model))
+    cost_usd = token_cost(provider, model, input_tokens, output_tokens) or 0.0
+    return input_tokens + output_tokens, cost_usd
+
+
+def _downgrades(provider: str, model: str) -> Iterator[str]:
+    """Cheaper variants of a model: without its thinking suffix, then the configured downgrades."""
+    seen = {model}
+    spec = model_spec(provider, model)
+    base_model = spec.base_model
+    if _thinking_tokens(spec) and base_model not in seen:
+        seen.add(base_model)
+        yield base_model
+    current = base_model
+    while True:
+        current = _lookup(BUDGET_DOWNGRADE_MODELS, provider, current)
+        if current is None or current in seen:
+            return
+        seen.add(current)
+        yield current
+
+
+def _env_limit(name: str, cast: Callable[[str], Any]) -> Any:
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        return cast(value)
+    except ValueError:
+        logger.error(f"Ignoring invalid {name}: {value!r}")
+        return None
+
+
+class _LocalSession:
+    """Session key used for calls made outside an MCP request (tests, benchmarks, scripts)."""
+
+
+_lock = threading.RLock()
+_global_budget = Budget("global", _env_limit("BUDGET_GLOBAL_TOKENS", int), _env_limit("BUDGET_GLOBAL_USD", float))
+_session_defaults = (_env_limit("BUDGET_SESSION_TOKENS", int), _env_limit("BUDGET_SESSION_USD", float))
+_call_defaults = (_env_limit("BUDGET_CALL_TOKENS", int), _env_limit("BUDGET_CALL_USD", float))
+_policy = os.environ.get("BUDGET_POLICY") or BUDGET_DEFAULT_POLICY
+_sessions: "weakref.WeakKeyDictionary[Any, Budget]" = weakref.WeakKeyDictionary()
+_local_session = _LocalSession()
+
+_call_budget: contextvars.ContextVar[Optional[Budget]] = contextvars.ContextVar("budget_call", default=None)
+
+
+def session_budget() -> Budget:
+    """The budget of the current MCP session (created with the session defaults on first use)."""
+    try:
+        session = request_ctx.get().session
+    except LookupError:
+        session = _local_session
+    with _lock:
+        budget = _sessions.get(session)
+        if budget is None:
+            budget = _sessions[session] = Budget("session", *_session_defaults)
+        return budget
+
+
+def call_budget() -> Optional[Budget]:
+    """The budget of the current tool call, if inside budget_scope()."""
+    return _call_budget.get()
+
+
+def global_budget() -> Budget:
+    """The budget shared by every call."""
+    return _global_budget
+
+
+@contextmanager
+def budget_scope(max_tokens: Optional[int] = None, max_cost_usd: Optional[float] = None) -> Iterator[Budget]:
+    """
+    Open a per-call budget for the provider calls made inside the block.
+
+    Args:
+        max_tokens: Token limit (defaults to the configured per-call default)
+        max_cost_usd: USD limit (defaults to the configured per-call default)
+
+    Yields:
+        The call budget
+    """
+    budget = Budget(
+        "call",
+        max_tokens if max_tokens is not None else _call_defaults[0],
+        max_cost_usd if max_cost_usd is not None else _call_defaults[1],
+    )
+    token = _call_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _call_budget.reset(token)
+
+
+def active_budgets() -> List[Budget]:
+    """Budgets a call made now is charged to, from narrowest to widest."""
+    budgets = [_call_budget.get(), session_budget(), _global_budget]
+    return [budget for budget in budgets if budget is not None]
+
+
+def reserve(provider: str, model: str, text: str) -> Tuple[str, Reservation]:
+    """
+    Reserve the estimated cost of a call against the active budgets.
+
+    With the "downgrade" policy, a call that does not fit is moved to the first
+    cheaper variant of the model that does.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        text: Prompt text
+
+    Returns:
+        Tuple of (model to call, reservation to settle or release after the call)
+
+    Raises:
+        BudgetExceededError: If neither the model nor an allowed downgrade fits
+    """
+    budgets = active_budgets()
+    candidates = [model]
+    if _policy == "downgrade":
+        candidates.extend(_downgrades(provider, model))
+
+    with _lock:
+        for candidate in candidates:
+            tokens, cost_usd = estimate_call(provider, candidate, text)
+            if all(budget.fits(tokens, cost_usd) for budget in budgets):
+                for budget in budgets:
+                    budget.reserved_tokens += tokens
+                    budget.reserved_cost_usd += cost_usd
+                    budget.downgraded += candidate != model
+                break
+        else:
+            tokens, cost_usd = estimate_call(provider, model, text)
+            exceeded = next(budget for budget in budgets if not budget.fits(tokens, cost_usd))
+            for budget in budgets:
+                budget.rejected += 1
+            remaining = exceeded.status()
+            candidate = None
+
+    labels = {"provider": provider, "model": model}
+    if candidate is None:
+        metrics.registry.inc(
+            "budget_rejections_total", {**labels, "scope": exceeded.scope}, help_text="Calls rejected by a budget"
+        )
+        raise BudgetExceededError(
+            f"Budget exceeded for {provider}:{model}: the call is estimated at {tokens} tokens (${cost_usd:.4f}) "
+            f"but the {exceeded.scope} budget has {remaining['remaining_tokens']} tokens and "
+            f"${remaining['remaining_cost_usd']} remaining"
+        )
+
+    if candidate != model:
+        logger.info(f"Downgraded {provider}:{model} to {provider}:{candidate} to stay within budget")
+        metrics.registry.inc("budget_downgrades_total", labels, help_text="Calls downgraded to a cheaper model by a budget")
+    tracing.set_attributes(tracing.current_span(), {
+        "budget.estimated_tokens": tokens,
+        "budget.estimated_cost_usd": cost_usd,
+        "budget.downgraded_from": model if candidate != model else None,
+    })
+    return candidate, Reservation(provider, candidate, tokens, cost_usd, budgets)
+
+
+def configure(
+    scope: str,
+    max_tokens: Optional[int] = None,
+    max_cost_usd: Optional[float] = None,
+    reset: bool = False
+) -> None:
+    """
+    Change the limits of a budget.
+
+    Limits that are None are left unchanged; a limit of 0 removes it. For the
+    "call" scope the limits are the defaults of tool calls started afterwards.
+
+    Args:
+        scope: "global", "session" (the current session) or "call"
+        max_tokens: New token limit
+        max_cost_usd: New USD limit
+        reset: Whether to clear the amounts spent against the budget
+    """
+    global _call_defaults
+    if scope not in SCOPES:
+        raise ValueError(f"Unknown budget scope: {scope}. Expected one of {', '.join(SCOPES)}")
+    if (max_tokens is not None and max_tokens < 0) or (max_cost_usd is not None and max_cost_usd < 0):
+        raise ValueError("Budget limits cannot be negative")
+
+    with _lock:
+        if scope == "call":
+            tokens, cost_usd = _call_defaults
+            _call_defaults = (
+                tokens if max_tokens is None else max_tokens or None,
+                cost_usd if max_cost_usd is None else max_cost_usd or None,
+            )
+            return
+        budget = _global_budget if scope == "global" else session_budget()
+        if max_tokens is not None:
+            budget.max_tokens = max_tokens or None
+        if max_cost_usd is not None:
+            budget.max_cost_usd = max_cost_usd or None
+        if reset:
+            budget.spent_tokens = 0
+            budget.spent_cost_usd = 0.0
+            budget.rejected = 0
+            budget.downgraded = 0
+
+
+def set_policy(policy: str) -> None:
+    """
+    Set what happens to calls that would exceed a budget.
+
+    Args:
+        policy: "reject" or "downgrade"
+    """
+    global _policy
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown budget policy: {policy}. Expected one of {', '.join(POLICIES)}")
+    _policy = policy
+
+
+def status() -> Dict[str, Any]:
+    """
+    Report the active budgets.
+
+    Returns:
+        Dictionary with the policy, the per-call defaults, and the status of the
+        current call (when inside a tool call), session and global budgets
+    """
+    with _lock:
+        call = _call_budget.get()
+        return {
+            "policy": _policy,
+            "call_defaults": {"max_tokens": _call_defaults[0], "max_cost_usd": _call_defaults[1]},
+            "call": call.status() if call is not None else None,
+            "session": session_budget().status(),
+            "global": _global_budget.status(),
+        }
+
+
+def budgeted(fn: Callable) -> Callable:
+    """
+    Decorator running a tool inside a per-call budget.
+
+    Every result reports what is left of the call, session and global budgets in
+    a "budget" entry: dictionary results get the entry added, other results
+    (response lists, output paths) are returned as {"result": ..., "budget": ...},
+    the shape of FastMCP's structured output for non-object results.
+
+    Args:
+        fn: The tool function
+
+    Returns:
+        The wrapped function
+    """
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with budget_scope():
+            result = fn(*args, **kwargs)
+            if not isinstance(result, dict):
+                result = {"result": result}
+            result["budget"] = status()
+            return result
+
+    return wrapper
@@ -0,0 +1,395 @@
+"""
+Cache of model catalogs, responses and provider health.
+
+Each worker process of a multi-worker deployment would otherwise warm its own
+catalogs and repeat the provider calls of its neighbours. The cache backend is
+chosen with CACHE_BACKEND:
+
+- "memory": a dictionary in this process (the default for a single process)
+- "sqlite": a SQLite database in WAL mode at CACHE_PATH, shared by every process using it
+- "shm": the same database kept in shared memory (/dev/shm), shared by the processes of one
+  user and deployment (CACHE_PATH) on a host, and the default of the workers of a multi-worker server
+
+Database files are created readable by their owner only, as they hold model responses.
+
+Entries are JSON values stored under a namespace and key with a time to live.
+get_or_compute is single-flight: while one thread or process computes a missing
+entry, under a lease recorded atomically in the backend, the others wait for
+its result instead of repeating the work. A lease expires after
+CACHE_LEASE_SECONDS, so a process that dies while computing does not block the
+others. Lookups are counted in cache_requests_total by namespace and outcome
+(hit, miss or coalesced).
+"""
+
+import os
+import json
+import getpass
+import hashlib
+import time
+import uuid
+import sqlite3
+import logging
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from mcp.server.fastmcp.exceptions import ValidationError
+
+from agile_team.shared.config import CACHE_BACKEND, CACHE_PATH, CACHE_LEASE_SECONDS, CACHE_POLL_SECONDS
+from agile_team.shared import cancellation, metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Cache backends by name
+BACKENDS = ("memory", "sqlite", "shm")
+
+# File name prefix of the shared memory cache databases
+SHM_FILE_NAME = "agile_team_cache"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE TABLE IF NOT EXISTS leases (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+def _record(namespace: str, outcome: str) -> None:
+    metrics.registry.inc(
+        "cache_requests_total", {"namespace": namespace, "outcome": outcome},
+        help_text="Cache lookups by namespace and outcome (hit, miss or coalesced)"
+    )
+
+
+class CacheBackend:
+    """Namespaced JSON entries with a time to live and single-flight computation of missing entries."""
+
+    # Whether other processes see the entries
+    shared = False
+
+    def __init__(self, lease_seconds: float = CACHE_LEASE_SECONDS, poll_seconds: float = CACHE_POLL_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        """
+        Look up an entry.
+
+        Args:
+            namespace: Namespace of the entry (e.g., "catalog")
+            key: Key of the entry within the namespace
+
+        Returns:
+            The entry's value, or None if it is missing or expired
+        """
+        raise NotImplementedError
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        """
+        Store an entry.
+
+        Args:
+            namespace: Namespace of the entry
+            key: Key of the entry within the namespace
+            value: JSON-serializable value (None values are not cached)
+            ttl: Seconds until the entry expires
+        """
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> None:
+        """Remove an entry."""
+        raise NotImplementedError
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        """Remove the entries of a namespace, or every entry when None."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the backend's resources."""
+
+    def _try_lease(self, namespace: str, key: str, owner: str) -> bool:
+        """Take the lease to compute an entry unless another owner holds an unexpired one."""
+        raise NotImplementedError
+
+    def _release_lease(self, namespace: str, key: str, owner: str) -> None:
+        raise NotImplementedError
+
+    def get_or_compute(self, namespace: str, key: str, compute: Callable[[], Any], ttl: float) -> Any:
+        """
+        Look up an entry, computing and storing it when missing.
+
+        Only one caller across all threads and processes sharing the backend
+        computes a missing entry; the others wait for its result, and compute it
+        themselves only when the computation failed or its lease expired.
+        Errors are not cached.
+
+        Args:
+            namespace: Namespace of the entry
+            key: Key of the entry within the namespace
+            compute: Zero-argument callable returning the JSON-serializable value
+            ttl: Seconds until the entry expires
+
+        Returns:
+            The cached or computed value
+        """
+        value = self.get(namespace, key)
+        if value is not None:
+            _record(namespace, "hit")
+            return value
+        owner = uuid.uuid4().hex
+        while not self._try_lease(namespace, key, owner):
+            # Waiting is a cancellation point, bounded by the call's deadline
+            cancellation.sleep(self.poll_seconds)
+            value = self.get(namespace, key)
+            if value is not None:
+                _record(namespace, "coalesced")
+                return value
+        try:
+            # Stored by another owner between the first lookup and the lease
+            value = self.get(namespace, key)
+            if value is not None:
+                _record(namespace, "coalesced")
+                return value
+            value = compute()
+            if value is not None:
+                self.set(namespace, key, value, ttl)
+        finally:
+            self._release_lease(namespace, key, owner)
+        _record(namespace, "miss")
+        return value
+
+
+class MemoryCache(CacheBackend):
+    """Cache in this process's memory."""
+
+    def __init__(self, lease_seconds: float = CACHE_LEASE_SECONDS, poll_seconds: float = CACHE_POLL_SECONDS):
+        super().__init__(lease_seconds, poll_seconds)
+        self._entries: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._leases: Dict[Tuple[str, str], Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return None
+            if entry[1] <= time.time():
+                del self._entries[(namespace, key)]
+                return None
+        # Stored as JSON, so callers cannot modify the cached value
+        return json.loads(entry[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        if value is None:
+            return
+        encoded = json.dumps(value)
+        with self._lock:
+            self._entries[(namespace, key)] = (encoded, time.time() + ttl)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._entries.clear()
+            else:
+                for entry_key in [entry_key for entry_key in self._entries if entry_key[0] == namespace]:
+                    del self._entries[entry_key]
+
+    def _try_lease(self, namespace: str, key: str, owner: str) -> bool:
+        now = time.time()
+        with self._lock:
+            lease = self._leases.get((namespace, key))
+            if lease is not None and lease[0] != owner and lease[1] > now:
+                return False
+            self._leases[(namespace, key)] = (owner, now + self.lease_seconds)
+            return True
+
+    def _release_lease(self, namespace: str, key: str, owner: str) -> None:
+        with self._lock:
+            if self._leases.get((namespace, key), (None,))[0] == owner:
+                del self._leases[(namespace, key)]
+
+
+class SQLiteCache(CacheBackend):
+    """Cache in a SQLite database in WAL mode, shared by every process opening the same file."""
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = CACHE_LEASE_SECONDS,
+        poll_seconds: float = CACHE_POLL_SECONDS
+    ):
+        super().__init__(lease_seconds, poll_seconds)
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _create_private(path)
+        self._lock = threading.Lock()
+        # Writers of other processes hold the database for milliseconds; wait for them
+        self._connection = sqlite3.connect(path, timeout=10.0, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        with self._lock:
+            self._connection.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                (namespace, key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        if value is None:
+            return
+        encoded = json.dumps(value)
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, encoded, time.time() + ttl)
+            )
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def clear(self, namespace: Optional[str] = None) -> None:
+        with self._lock:
+            if namespace is None:
+                self._connection.execute("DELETE FROM entries")
+            else:
+                self._connection.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+    def _try_lease(self, namespace: str, key: str, owner: str) -> bool:
+        now = time.time()
+        # One statement: takes a free or expired lease, and leaves an unexpired one alone
+        with self._lock:
+            cursor = self._connection.execute(
+                "INSERT INTO leases (namespace, key, owner, expires_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.expires_at <= ? OR leases.owner = excluded.owner",
+                (namespace, key, owner, now + self.lease_seconds, now)
+            )
+        return cursor.rowcount == 1
+
+    def _release_lease(self, namespace: str, key: str, owner: str) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM leases WHERE namespace = ? AND key = ? AND owner = ?", (namespace, key, owner)
+            )
+
+
+def _create_private(path: str) -> None:
+    """Create a database file readable by its owner only (SQLite gives its WAL files the same mode)."""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        # A file another user created in a shared directory would expose the entries to them
+        if hasattr(os, "getuid") and os.fstat(fd).st_uid != os.getuid():
+            raise PermissionError(f"Cache database {path} is owned by another user")
+    finally:
+        os.close(fd)
+
+
+def shm_path(path: Optional[str] = None) -> str:
+    """
+    Path of the shared memory cache database of this user and deployment.
+
+    Args:
+        path: CACHE_PATH of the deployment (defaults to the environment)
+
+    Returns:
+        Database path in /dev/shm (else the temporary directory), named by user and a hash of CACHE_PATH
+    """
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    user = os.getuid() if hasattr(os, "getuid") else getpass.getuser()
+    deployment = os.path.abspath(os.path.expanduser(path or os.environ.get("CACHE_PATH") or CACHE_PATH))
+    digest = hashlib.sha256(deployment.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(directory, f"{SHM_FILE_NAME}-{user}-{digest}.db")
+
+
+def _create(backend: Optional[str] = None, path: Optional[str] = None) -> CacheBackend:
+    """Create a cache backend from its name, defaulting to the environment."""
+    backend = backend or os.environ.get("CACHE_BACKEND") or CACHE_BACKEND
+    if backend not in BACKENDS:
+        raise ValidationError(f"Unknown cache backend: {backend}. Use one of: {', '.join(BACKENDS)}")
+    if backend == "memory":
+        return MemoryCache()
+    if backend == "shm":
+        path = shm_path(path)
+    else:
+        path = os.path.expanduser(path or os.environ.get("CACHE_PATH") or CACHE_PATH)
+    logger.info(f"Caching to the {backend} backend at {path}")
+    return SQLiteCache(path)
+
+
+_cache: Optional[CacheBackend] = None
+_cache_lock = threading.Lock()
+
+
+def open_cache(backend: Optional[str] = None, path: Optional[str] = None) -> CacheBackend:
+    """
+    Open the process-wide cache, replacing the current one.
+
+    Args:
+        backend: "memory", "sqlite" or "shm" (defaults to CACHE_BACKEND)
+        path: Database of the sqlite backend, or the deployment of the shm backend's database
+              (defaults to CACHE_PATH)
+
+    Returns:
+        The cache
+    """
+    cache = _create(backend, path)
+    previous = set_cache(cache)
+    if previous is not None:
+        previous.close()
+    return cache
+
+
+def get_cache() -> CacheBackend:
+    """The process-wide cache, opened from the environment on first use."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                _cache = _create()
+            except (ValidationError, OSError, sqlite3.Error) as e:
+                logger.error(f"Falling back to the memory cache backend: {e}")
+                _cache = MemoryCache()
+        return _cache
+
+
+def set_cache(cache: Optional[CacheBackend]) -> Optional[CacheBackend]:
+    """
+    Replace the process-wide cache (e.g., with one using another database).
+
+    Args:
+        cache: The new cache, or None to open one from the environment on next use
+
+    Returns:
+        The previous cache
+    """
+    global _cache
+    with _cache_lock:
+        previous, _cache = _cache, cache
+    return previous
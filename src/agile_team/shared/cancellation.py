@@ -0,0 +1,326 @@
+"""
+Cooperative cancellation of tool calls.
+
+Every long-running tool call gets a CancellationToken, made current for the
+call (and for the worker threads it fans out to through wrap_context). The
+token is cancelled when the MCP client cancels the request (cancellable), or
+when a background job is cancelled (job_cancel_tool). Work checks the token at
+its cancellation points:
+
+- ModelRouter before each provider call and between streamed chunks, so queued
+  team members and decision maker calls never start and streams stop mid-response
+- the shared HTTP transport before each request, so SDK retries stop as well
+- waits for concurrency slots (Ollama hosts) and simulated latency (testing provider)
+
+A cancelled call raises RequestCancelled, which derives from BaseException
+(like asyncio.CancelledError) so the per-model "except Exception" handlers that
+turn failures into error files do not swallow it; budget reservations,
+in-flight counters and concurrency slots are released by the usual finally blocks.
+
+Tokens also carry deadlines. Tool calls run under deadline_scope (the
+deadline_seconds argument, else TOOL_DEADLINE_SECONDS), and multi-stage tools
+give each stage (validation, team fan-out, decision maker) its share of the
+remaining time with stage(). Past a deadline the cancellation points raise
+DeadlineExceeded, an ordinary ToolError, so a team member that runs out of time
+is reported like any failed member. Provider requests get the remaining time
+as their HTTP timeout, and every expiry is counted in deadline_exceeded_total.
+"""
+
+import os
+import time
+import logging
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import anyio
+import anyio.to_thread
+from mcp.server.fastmcp.exceptions import ToolError, ValidationError
+
+from agile_team.shared.config import CANCELLATION_POLL_SECONDS, DEADLINE_STAGE_SHARES, TOOL_DEADLINE_SECONDS
+from agile_team.shared import metrics
+from agile_team.shared.tracing import wrap_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class RequestCancelled(BaseException):
+    """Raised at a cancellation point once the current tool call has been cancelled."""
+
+
+class DeadlineExceeded(ToolError):
+    """Raised at a cancellation point once the deadline of the current call or stage has passed."""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag of one tool call, optionally with a deadline.
+
+    A token created with a parent (a stage of the call) shares the parent's
+    cancellation and has its own, earlier deadline.
+    """
+
+    def __init__(
+        self,
+        deadline_seconds: Optional[float] = None,
+        parent: Optional["CancellationToken"] = None,
+        stage: str = "tool"
+    ):
+        self.parent = parent
+        self.stage = stage
+        self.deadline_seconds = deadline_seconds
+        self.expires_at = time.monotonic() + deadline_seconds if deadline_seconds is not None else None
+        self._root: CancellationToken = parent._root if parent else self
+        self._event: threading.Event = parent._event if parent else threading.Event()
+        self._lock = threading.Lock()
+        self._reason: Optional[str] = None
+        self._expiry_recorded = False
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether the tool call has been cancelled."""
+        return self._event.is_set()
+
+    @property
+    def reason(self) -> Optional[str]:
+        """Why the tool call was cancelled."""
+        return self._root._reason
+
+    def cancel(self, reason: str = "Request cancelled") -> bool:
+        """
+        Cancel the tool call, waking up every call waiting on it.
+
+        Args:
+            reason: Why the call was cancelled (reported by RequestCancelled)
+
+        Returns:
+            False if the call was already cancelled
+        """
+        root = self._root
+        with root._lock:
+            if root._event.is_set():
+                return False
+            root._reason = reason
+            root._event.set()
+        return True
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left before the nearest deadline of the token or its parents (None without a deadline)."""
+        now = time.monotonic()
+        remaining = None
+        token = self
+        while token is not None:
+            if token.expires_at is not None:
+                left = token.expires_at - now
+                remaining = left if remaining is None else min(remaining, left)
+            token = token.parent
+        return remaining
+
+    def _expired(self) -> Optional["CancellationToken"]:
+        """The innermost token of the chain whose deadline has passed."""
+        now = time.monotonic()
+        token = self
+        while token is not None:
+            if token.expires_at is not None and token.expires_at <= now:
+                return token
+            token = token.parent
+        return None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the call is cancelled, the deadline passes or the timeout expires.
+
+        Returns:
+            Whether the call was cancelled
+        """
+        remaining = self.remaining()
+        if remaining is not None:
+            timeout = max(0.0, remaining if timeout is None else min(timeout, remaining))
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise RequestCancelled if the call has been cancelled, or DeadlineExceeded if a deadline has passed."""
+        if self._event.is_set():
+            raise RequestCancelled(self.reason)
+        expired = self._expired()
+        if expired is not None:
+            with expired._lock:
+                record, expired._expiry_recorded = not expired._expiry_recorded, True
+            if record:
+                logger.warning(f"Deadline of the {expired.stage} stage ({expired.deadline_seconds:.3g}s) exceeded")
+                metrics.registry.inc(
+                    "deadline_exceeded_total", {"stage": expired.stage},
+                    help_text="Tool calls and stages that ran out of their deadline"
+                )
+            raise DeadlineExceeded(f"Deadline of the {expired.stage} stage ({expired.deadline_seconds:.3g}s) exceeded")
+
+
+_current_token: contextvars.ContextVar[Optional[CancellationToken]] = contextvars.ContextVar(
+    "cancellation_token", default=None
+)
+
+
+def current_token() -> Optional[CancellationToken]:
+    """The cancellation token of the current tool call, if any."""
+    return _current_token.get()
+
+
+@contextmanager
+def cancellation_scope(token: Optional[CancellationToken] = None) -> Iterator[CancellationToken]:
+    """
+    Make a cancellation token current for the enclosed calls.
+
+    Args:
+        token: The token (a new one by default)
+
+    Yields:
+        The current token
+    """
+    token = token or CancellationToken()
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def default_deadline_seconds() -> Optional[float]:
+    """The deadline of tool calls made without one (TOOL_DEADLINE_SECONDS; 0 disables it)."""
+    value = os.environ.get("TOOL_DEADLINE_SECONDS")
+    try:
+        seconds = float(value) if value else TOOL_DEADLINE_SECONDS
+    except ValueError:
+        logger.error(f"Ignoring invalid TOOL_DEADLINE_SECONDS: {value!r}")
+        seconds = TOOL_DEADLINE_SECONDS
+    return seconds if seconds > 0 else None
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float] = None) -> Iterator[CancellationToken]:
+    """
+    Run the enclosed calls under a deadline, within the deadline and cancellation of the current call.
+
+    Args:
+        seconds: The deadline in seconds (defaults to default_deadline_seconds())
+
+    Yields:
+        The current token
+    """
+    if seconds is None:
+        seconds = default_deadline_seconds()
+    elif seconds <= 0:
+        raise ValidationError(f"deadline_seconds must be positive, got {seconds}")
+    parent = _current_token.get()
+    token = CancellationToken(seconds, parent) if seconds is not None or parent is None else parent
+    with cancellation_scope(token):
+        yield token
+
+
+@contextmanager
+def stage(name: str) -> Iterator[CancellationToken]:
+    """
+    Run a stage of a tool call with its share of the remaining deadline (DEADLINE_STAGE_SHARES).
+
+    Leaving part of the deadline to later stages means a slow team fan-out
+    cannot use up the time of the decision maker call.
+
+    Args:
+        name: Stage name ("validation", "team", "decision"), reported when its deadline passes
+
+    Yields:
+        The stage's token
+    """
+    parent = _current_token.get()
+    remaining = parent.remaining() if parent is not None else None
+    share = DEADLINE_STAGE_SHARES.get(name, 1.0)
+    with cancellation_scope(CancellationToken(
+        max(remaining, 0.0) * share if remaining is not None else None, parent, name
+    )) as token:
+        yield token
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the deadline of the current call or stage (None without a deadline)."""
+    token = _current_token.get()
+    return token.remaining() if token is not None else None
+
+
+def check() -> None:
+    """Cancellation point: raise RequestCancelled or DeadlineExceeded if the current call must stop."""
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def sleep(seconds: float) -> None:
+    """
+    Sleep, waking up and raising as soon as the current call is cancelled or its deadline passes.
+
+    Args:
+        seconds: Time to sleep
+    """
+    token = _current_token.get()
+    if token is None:
+        time.sleep(seconds)
+        return
+    token.wait(seconds)
+    token.raise_if_cancelled()
+
+
+def acquire(semaphore: threading.Semaphore) -> None:
+    """
+    Acquire a semaphore, giving up if the current call is cancelled or its deadline passes while waiting.
+
+    Args:
+        semaphore: The semaphore guarding a concurrency slot
+    """
+    token = _current_token.get()
+    if token is None:
+        semaphore.acquire()
+        return
+    while True:
+        token.raise_if_cancelled()
+        remaining = token.remaining()
+        timeout = CANCELLATION_POLL_SECONDS if remaining is None else min(CANCELLATION_POLL_SECONDS, max(remaining, 0.0))
+        if semaphore.acquire(timeout=timeout):
+            break
+    try:
+        token.raise_if_cancelled()
+    except BaseException:
+        semaphore.release()
+        raise
+
+
+def cancellable(fn: Callable) -> Callable:
+    """
+    Decorator running a synchronous tool in a worker thread with its own cancellation token.
+
+    The event loop stays free to receive the client's cancellation notification
+    while the tool runs; when it arrives the call returns to the client at once
+    and the token is cancelled, so the worker stops at its next cancellation point.
+
+    Args:
+        fn: The tool function
+
+    Returns:
+        The wrapped (async) function
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = CancellationToken()
+
+        def run():
+            with cancellation_scope(token):
+                return fn(*args, **kwargs)
+
+        try:
+            return await anyio.to_thread.run_sync(wrap_context(run), abandon_on_cancel=True)
+        except anyio.get_cancelled_exc_class():
+            logger.info(f"{fn.__name__} cancelled by the client")
+            token.cancel("The client cancelled the request")
+            raise
+
+    return wrapper
@@ -0,0 +1,296 @@
+"""
+Record/replay cassettes of provider calls.
+
+A cassette is a gzip-compressed JSON Lines file. The first line is a header and
+every following line is one provider call: provider, model, prompt text,
+response (or error), start offset, duration, chunk boundaries and usage.
+
+Recording is enabled with start_recording() or the CASSETTE_RECORD environment
+variable; the model router then writes every provider call to the cassette.
+Replay is enabled with start_replay() or the CASSETTE_REPLAY environment
+variable; the model router then serves calls from the cassette instead of the
+providers, so no API keys or network access are needed. Replay timing is the
+recorded timing multiplied by CASSETTE_TIME_SCALE (1.0 by default, 0 disables
+sleeping).
+
+Recorded calls are matched by provider, model and prompt text ("exact"), or
+in recorded order per provider and model ("model") so traces can still be
+replayed after orchestration changes alter the prompts.
+"""
+
+import os
+import gzip
+import json
+import time
+import atexit
+import logging
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from agile_team.shared import cancellation
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Version of the cassette format, bumped when the entry structure changes
+CASSETTE_VERSION = 1
+
+# Supported replay match modes
+MATCH_MODES = ("exact", "model")
+
+
+def _usage(text: str, response: str) -> Dict[str, Optional[int]]:
+    """Usage of a call, in characters and (when known) tokens."""
+    return {
+        "input_chars": len(text),
+        "output_chars": len(response),
+        "input_tokens": getattr(response, "input_tokens", None),
+        "output_tokens": getattr(response, "output_tokens", None),
+    }
+
+
+class CassetteRecorder:
+    """Appends provider calls to a cassette file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._write({
+            "version": CASSETTE_VERSION,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        })
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line + "\n")
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        text: str,
+        started: float,
+        response: Optional[str] = None,
+        error: Optional[str] = None,
+        chunks: Optional[List[Tuple[float, str]]] = None
+    ) -> None:
+        """
+        Write one call to the cassette.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            text: Prompt text
+            started: time.perf_counter() value when the call started
+            response: Model response, if the call succeeded
+            error: Error message, if the call failed
+            chunks: (seconds since start, text) pairs of the streamed response
+        """
+        elapsed = time.perf_counter() - started
+        self._write({
+            "provider": provider,
+            "model": model,
+            "text": text,
+            "response": response,
+            "error": error,
+            "offset": round(started - self._start, 6),
+            "elapsed": round(elapsed, 6),
+            "chunks": [[round(offset, 6), chunk] for offset, chunk in chunks or []],
+            "usage": _usage(text, response or ""),
+        })
+
+    def close(self) -> None:
+        """Flush and close the cassette file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class CassettePlayer:
+    """Serves provider calls from a cassette file."""
+
+    def __init__(self, path: str, time_scale: float = 1.0, match: str = "exact"):
+        if match not in MATCH_MODES:
+            raise ValueError(f"Unknown cassette match mode: {match}. Expected one of {', '.join(MATCH_MODES)}")
+        self.path = path
+        self.time_scale = time_scale
+        self.match = match
+        self.header, self.entries = load_cassette(path)
+        self._by_key: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for entry in self.entries:
+            self._by_key.setdefault(self._key(entry["provider"], entry["model"], entry["text"]), []).append(entry)
+        self._positions: Dict[Tuple[str, ...], int] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, provider: str, model: str, text: str) -> Tuple[str, ...]:
+        if self.match == "exact":
+            return (provider, model, text)
+        return (provider, model)
+
+    def find(self, provider: str, model: str, text: str) -> Dict[str, Any]:
+        """
+        Find the recorded call to serve, cycling through repeated calls in recorded order.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            text: Prompt text
+
+        Returns:
+            The cassette entry
+        """
+        key = self._key(provider, model, text)
+        candidates = self._by_key.get(key)
+        if not candidates:
+            raise LookupError(f"No recorded call for {provider}:{model} in cassette {self.path}")
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return candidates[position % len(candidates)]
+
+    def stream(self, provider: str, model: str, text: str) -> Iterator[str]:
+        """
+        Replay a recorded call chunk by chunk with scaled timing.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            text: Prompt text
+
+        Yields:
+            Recorded response chunks
+        """
+        entry = self.find(provider, model, text)
+        started = time.perf_counter()
+        for offset, chunk in entry["chunks"]:
+            self._sleep_until(started, offset)
+            yield chunk
+        if entry["error"] is not None:
+            self._sleep_until(started, entry["elapsed"])
+            raise RuntimeError(entry["error"])
+
+    def _sleep_until(self, started: float, offset: float) -> None:
+        remaining = started + offset * self.time_scale - time.perf_counter()
+        if remaining > 0:
+            # Replayed calls honour cancellation and deadlines like live ones
+            cancellation.sleep(remaining)
+
+    def prompt(self, provider: str, model: str, text: str) -> str:
+        """Replay a recorded call and return the full response."""
+        return "".join(self.stream(provider, model, text))
+
+    def list_models(self, provider: str) -> List[str]:
+        """Models of a provider that appear in the cassette, in recorded order."""
+        return list(dict.fromkeys(entry["model"] for entry in self.entries if entry["provider"] == provider))
+
+
+def load_cassette(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Read a cassette file.
+
+    Args:
+        path: Path to the cassette
+
+    Returns:
+        Tuple of (header, entries)
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or "version" not in lines[0]:
+        raise ValueError(f"Not a cassette file: {path}")
+    header = lines[0]
+    if header["version"] > CASSETTE_VERSION:
+        raise ValueError(f"Unsupported cassette version {header['version']} in {path}")
+    return header, lines[1:]
+
+
+# Active recorder and player
+_recorder: Optional[CassetteRecorder] = None
+_player: Optional[CassettePlayer] = None
+
+
+def start_recording(path: str) -> CassetteRecorder:
+    """
+    Record every provider call made through the model router to a cassette.
+
+    Args:
+        path: Path of the cassette to write (overwritten if it exists)
+
+    Returns:
+        The active recorder
+    """
+    global _recorder
+    stop_recording()
+    _recorder = CassetteRecorder(path)
+    logger.info(f"Recording provider calls to cassette {path}")
+    return _recorder
+
+
+def stop_recording() -> None:
+    """Stop recording and close the cassette."""
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
+
+
+def start_replay(path: str, time_scale: float = 1.0, match: str = "exact") -> CassettePlayer:
+    """
+    Serve provider calls made through the model router from a cassette.
+
+    Args:
+        path: Path of the cassette to replay
+        time_scale: Multiplier applied to recorded timing (0 replays instantly)
+        match: How calls are matched to recorded calls ("exact" or "model")
+
+    Returns:
+        The active player
+    """
+    global _player
+    _player = CassettePlayer(path, time_scale, match)
+    logger.info(f"Replaying provider calls from cassette {path} ({len(_player.entries)} calls)")
+    return _player
+
+
+def stop_replay() -> None:
+    """Stop replaying and call the providers again."""
+    global _player
+    _player = None
+
+
+def get_recorder() -> Optional[CassetteRecorder]:
+    """The active recorder, if any."""
+    return _recorder
+
+
+def get_player() -> Optional[CassettePlayer]:
+    """The active player, if any."""
+    return _player
+
+
+def _load_env() -> None:
+    """Enable recording or replay from the CASSETTE_* environment variables."""
+    replay_path = os.environ.get("CASSETTE_REPLAY")
+    record_path = os.environ.get("CASSETTE_RECORD")
+    try:
+        if replay_path:
+            start_replay(
+                replay_path,
+                float(os.environ.get("CASSETTE_TIME_SCALE", "1.0")),
+                os.environ.get("CASSETTE_MATCH", "exact")
+            )
+        elif record_path:
+            start_recording(record_path)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to enable cassette from environment: {e}")
+
+
+atexit.register(stop_recording)
+_load_env()
@@ -13,4 +13,227 @@ DEFAULT_DECISION_MAKER_MODEL = "openai:gpt-4o-mini"
 DEFAULT_PM_PROMPT = "pm_prompt.md"
 
 # Default Spec Writer prompt
-DEFAULT_SW_PROMPT = "sw_prompt.md"
\ No newline at end of file
+DEFAULT_SW_PROMPT = "sw_prompt.md"
+
+# Maximum number of workflow steps executed in parallel
+WORKFLOW_MAX_PARALLEL_STEPS = 4
+
+# Connection pool limits of each provider's HTTP client, sized for parallel workflow
+# steps each fanning out to a team of models
+HTTP_MAX_CONNECTIONS = 32
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 16
+
+# Seconds an idle provider connection is kept open for reuse
+HTTP_KEEPALIVE_EXPIRY_SECONDS = 90.0
+
+# Provider HTTP timeouts in seconds (reads are long for thinking models)
+HTTP_CONNECT_TIMEOUT_SECONDS = 10.0
+HTTP_READ_TIMEOUT_SECONDS = 600.0
+HTTP_WRITE_TIMEOUT_SECONDS = 60.0
+HTTP_POOL_TIMEOUT_SECONDS = 30.0
+
+# Maximum concurrent requests per Ollama host (further requests wait for a slot)
+OLLAMA_HOST_CONCURRENCY = 4
+
+# How long Ollama keeps a model loaded after a request (Ollama duration string)
+OLLAMA_KEEP_ALIVE = "30m"
+
+# Seconds after which the models loaded on an Ollama host are queried again (0 disables)
+OLLAMA_RESIDENT_REFRESH_SECONDS = 30.0
+
+# Logical model aliases usable wherever "provider:model" is accepted; each call is routed to the
+# target with the best recent latency and error rate (extend with MODEL_ALIASES or MODEL_ALIASES_FILE)
+MODEL_ALIASES = {
+    "fast-drafter": ["groq:llama-3.3-70b-versatile", "openai:gpt-4o-mini", "gemini:gemini-1.5-flash-latest"],
+}
+
+# Weight of the newest sample in the per-target latency and error rate moving averages
+ROUTING_EWMA_ALPHA = 0.3
+
+# Seconds after which a target's statistics are stale and it is probed again
+ROUTING_STATS_TTL_SECONDS = 300.0
+
+# Seconds a target is skipped after a rate limit error
+ROUTING_RATE_LIMIT_COOLDOWN_SECONDS = 30.0
+
+# Maximum concurrent alias calls routed to one target before it has no headroom
+ROUTING_MAX_IN_FLIGHT = 8
+
+# Number of recent routing decisions kept for routing_tool
+ROUTING_DECISION_LOG_SIZE = 200
+
+# Nicknames accepted for model names when correcting them against a provider's catalog
+MODEL_NAME_ALIASES = {
+    "4o": "gpt-4o",
+    "4o-mini": "gpt-4o-mini",
+    "opus": "claude-3-opus",
+    "sonnet": "claude-3-7-sonnet",
+    "haiku": "claude-3-5-haiku",
+    "flash": "gemini-2.5-flash",
+    "pro": "gemini-2.5-pro",
+    "r1": "deepseek-reasoner",
+    "v3": "deepseek-chat",
+}
+
+# Lowest confidence (0-1) at which a misspelled model name is corrected instead of rejected
+MODEL_MATCH_MIN_CONFIDENCE = 0.6
+
+# Upper bounds (seconds) of the provider latency and queue wait histogram buckets
+METRICS_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+# Upper bounds of the per-request token count histogram buckets
+METRICS_TOKEN_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144)
+
+# Seconds between writes of the Prometheus metrics textfile
+METRICS_EXPORT_INTERVAL_SECONDS = 15.0
+
+# Model prices in USD per million (input, output) tokens, keyed by "provider:model" prefix
+# (the longest matching prefix wins). Models without a price only count against token budgets.
+MODEL_PRICES = {
+    "openai:gpt-4.1": (2.0, 8.0),
+    "openai:gpt-4.1-mini": (0.4, 1.6),
+    "openai:gpt-4.1-nano": (0.1, 0.4),
+    "openai:gpt-4o": (2.5, 10.0),
+    "openai:gpt-4o-mini": (0.15, 0.6),
+    "openai:gpt-4-turbo": (10.0, 30.0),
+    "openai:gpt-3.5-turbo": (0.5, 1.5),
+    "openai:o3": (2.0, 8.0),
+    "openai:o3-mini": (1.1, 4.4),
+    "openai:o4-mini": (1.1, 4.4),
+    "anthropic:claude-3-opus": (15.0, 75.0),
+    "anthropic:claude-3-sonnet": (3.0, 15.0),
+    "anthropic:claude-3-5-sonnet": (3.0, 15.0),
+    "anthropic:claude-3-7-sonnet": (3.0, 15.0),
+    "anthropic:claude-3-haiku": (0.25, 1.25),
+    "anthropic:claude-3-5-haiku": (0.8, 4.0),
+    "gemini:gemini-2.5-pro": (1.25, 10.0),
+    "gemini:gemini-2.5-flash": (0.15, 0.6),
+    "gemini:gemini-1.5-pro": (1.25, 5.0),
+    "gemini:gemini-1.5-flash": (0.075, 0.3),
+    "gemini:gemini-1.0-pro": (0.5, 1.5),
+    "deepseek:deepseek-chat": (0.27, 1.1),
+    "deepseek:deepseek-coder": (0.27, 1.1),
+    "deepseek:deepseek-reasoner": (0.55, 2.19),
+    "groq:llama-3.3-70b": (0.59, 0.79),
+    "groq:llama-3.1-70b": (0.59, 0.79),
+    "groq:llama3-70b": (0.59, 0.79),
+    "groq:llama3-8b": (0.05, 0.08),
+    "groq:mixtral-8x7b": (0.24, 0.24),
+    "groq:gemma-7b": (0.07, 0.07),
+    "ollama:": (0.0, 0.0),
+    "testing:": (0.0, 0.0),
+}
+
+# Cheaper model a call is downgraded to when it would exceed a budget, keyed by "provider:model" prefix
+BUDGET_DOWNGRADE_MODELS = {
+    "openai:gpt-4.1": "gpt-4.1-mini",
+    "openai:gpt-4o": "gpt-4o-mini",
+    "openai:gpt-4-turbo": "gpt-4o-mini",
+    "openai:o3": "o4-mini",
+    "anthropic:claude-3-opus": "claude-3-7-sonnet-20250219",
+    "anthropic:claude-3-sonnet": "claude-3-haiku-20240307",
+    "anthropic:claude-3-5-sonnet": "claude-3-5-haiku-20241022",
+    "anthropic:claude-3-7-sonnet": "claude-3-5-haiku-20241022",
+    "gemini:gemini-2.5-pro": "gemini-2.5-flash-preview-04-17",
+    "gemini:gemini-1.5-pro": "gemini-1.5-flash-latest",
+    "deepseek:deepseek-reasoner": "deepseek-chat",
+    "groq:llama-3.3-70b": "llama3-8b-8192",
+    "groq:llama3-70b": "llama3-8b-8192",
+}
+
+# Response tokens assumed when estimating the cost of a call before it is made
+BUDGET_ESTIMATED_OUTPUT_TOKENS = 1024
+
+# Reasoning tokens assumed for OpenAI reasoning effort suffixes (e.g., "o3-mini:high")
+BUDGET_REASONING_EFFORT_TOKENS = {"low": 1024, "medium": 4096, "high": 16384}
+
+# What to do with a call that would exceed a budget: "reject" or "downgrade"
+BUDGET_DEFAULT_POLICY = "reject"
+
+# Directory where background jobs and their results are stored (overridden by JOB_STORE_DIR)
+JOB_STORE_DIR = "~/.agile_team/jobs"
+
+# Background jobs run at the same time (overridden by JOB_WORKERS)
+JOB_WORKERS = 4
+
+# Days finished jobs are kept in the job store
+JOB_RETENTION_DAYS = 7
+
+# Seconds between checks for cancellations of running jobs requested by other server processes
+JOB_CANCEL_POLL_SECONDS = 1.0
+
+# Seconds between cancellation checks while waiting for a concurrency slot
+CANCELLATION_POLL_SECONDS = 0.1
+
+# Seconds a tool call may run when no deadline_seconds is given (overridden by TOOL_DEADLINE_SECONDS; 0 disables)
+TOOL_DEADLINE_SECONDS = 300
+
+# Seconds a background job may run once started (overridden by JOB_DEADLINE_SECONDS; 0 disables)
+JOB_DEADLINE_SECONDS = 1800
+
+# Share of the remaining deadline each stage of a multi-stage tool may use; later stages get the rest
+DEADLINE_STAGE_SHARES = {
+    "validation": 0.1,
+    "team": 0.7,
+    "decision": 1.0,
+}
+
+# Address of the streamable HTTP transport (overridden by MCP_HOST / MCP_PORT)
+MCP_HOST = "127.0.0.1"
+MCP_PORT = 8000
+
+# Worker processes behind the session-sticky router (overridden by MCP_WORKERS); workers use the following ports
+MCP_WORKERS = 1
+
+# Seconds the router waits for a worker's /ready answer
+MCP_READY_TIMEOUT_SECONDS = 5
+
+# Seconds without requests or open streams after which the router forgets a session (overridden by MCP_SESSION_IDLE_SECONDS)
+MCP_SESSION_IDLE_SECONDS = 3600
+
+# Cache of model catalogs, responses and provider health (overridden by CACHE_BACKEND):
+# "memory" (per process), "sqlite" (a WAL database at CACHE_PATH) or "shm" (a database in shared memory)
+CACHE_BACKEND = "memory"
+
+# Database of the sqlite cache backend (overridden by CACHE_PATH)
+CACHE_PATH = "~/.agile_team/cache.db"
+
+# Seconds a process may compute a missing entry before another process takes over
+CACHE_LEASE_SECONDS = 120
+
+# Seconds between checks while another thread or process computes an entry
+CACHE_POLL_SECONDS = 0.05
+
+# Seconds a provider's model catalog is cached (overridden by CATALOG_CACHE_TTL_SECONDS; 0 disables)
+CATALOG_CACHE_TTL_SECONDS = 600
+
+# Seconds identical prompts to a model are answered from the cache (overridden by RESPONSE_CACHE_TTL_SECONDS; 0 disables)
+RESPONSE_CACHE_TTL_SECONDS = 0
+
+# How response files are written when the artifact store is enabled (overridden by ARTIFACT_MATERIALIZE):
+# "hardlink" (identical outputs share one read-only file), "copy" (a file per output) or "lazy" (written on first read)
+ARTIFACT_MATERIALIZE = "hardlink"
+
+# zstd compression level of stored artifacts
+ARTIFACT_COMPRESSION_LEVEL = 10
+
+# Whether responses without an explicit output directory go to a run directory inside responses/
+# (responses/<run id>/), so concurrent runs over the same input do not overwrite each other (overridden by OUTPUT_RUN_DIRS)
+OUTPUT_RUN_DIRS = False
+
+# Whether response files are written on a background thread while the next model is called (overridden by BACKGROUND_WRITES)
+BACKGROUND_WRITES = False
+
+# Lock stripes serializing writes to the same output path within a process
+WRITE_LOCK_STRIPES = 64
+
+# Seconds between checks of a prompt template file for changes (overridden by TEMPLATE_RELOAD_SECONDS; 0 checks on every use)
+TEMPLATE_RELOAD_SECONDS = 1.0
+
+# Estimated Jaccard similarity above which team responses are collapsed into one entry of the decision
+# maker prompt, listing every agreeing model (overridden by TEAM_DEDUP_THRESHOLD; 0 disables collapsing)
+TEAM_DEDUP_THRESHOLD = 0.8
+
+# Word shingle size and number of MinHash permutations used to compare team responses
+TEAM_DEDUP_SHINGLE_SIZE = 5
+TEAM_DEDUP_PERMUTATIONS = 64
@@ -1,6 +1,6 @@
 """Data types for the Agile Team MCP Server."""
 
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 from pydantic import BaseModel, Field, field_validator
 from enum import Enum
 
@@ -32,10 +32,147 @@ class ModelProviders(Enum):
         Returns:
             ModelProviders: The corresponding provider enum, or None if not found
         """
-        for provider in cls:
-            if provider.full_name == name or provider.short_name == name:
-                return provider
-        return None
+        return _PROVIDERS_BY_NAME.get(name)
+
+
+# Providers by full and short name, so lookups do not scan the enum
+_PROVIDERS_BY_NAME = {
+    name: provider for provider in ModelProviders for name in (provider.full_name, provider.short_name)
+}
+
+
+class ModelSpec(tuple):
+    """
+    A parsed "provider:model" string.
+
+    Subclasses the (provider, model) tuple so callers that unpack or compare pairs
+    are unaffected. The provider is the full provider name and the model keeps its
+    suffix; the parsed parts are attributes. Instances are immutable and built once
+    per distinct string by utils.model_spec.
+    """
+
+    provider_enum: ModelProviders
+    base_model: str
+    suffix: Optional[str]
+    thinking_budget: int
+    reasoning_effort: Optional[str]
+
+    def __new__(
+        cls,
+        provider_enum: ModelProviders,
+        model: str,
+        base_model: str,
+        suffix: Optional[str] = None,
+        thinking_budget: int = 0,
+        reasoning_effort: Optional[str] = None
+    ):
+        spec = super().__new__(cls, (provider_enum.full_name, model))
+        fields = spec.__dict__
+        fields["provider_enum"] = provider_enum
+        fields["base_model"] = base_model
+        fields["suffix"] = suffix
+        fields["thinking_budget"] = thinking_budget
+        fields["reasoning_effort"] = reasoning_effort
+        return spec
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("ModelSpec is immutable")
+
+    def __getnewargs__(self) -> Tuple:
+        return (self.provider_enum, self.model, self.base_model, self.suffix, self.thinking_budget, self.reasoning_effort)
+
+    @property
+    def provider(self) -> str:
+        """Full provider name."""
+        return self[0]
+
+    @property
+    def model(self) -> str:
+        """Model name including its suffix."""
+        return self[1]
+
+    def with_base_model(self, base_model: str) -> str:
+        """The model name with another base model and this spec's suffix."""
+        return f"{base_model}:{self.suffix}" if self.suffix else base_model
+
+
+class FallbackModelList(list):
+    """
+    Hardcoded model list a provider returns when listing its models failed.
+
+    Subclasses list so callers are unaffected; the model router does not cache it
+    as the provider's catalog.
+    """
+
+
+class ProviderResponse(str):
+    """
+    Model response text with the token usage and latency reported by the provider.
+
+    Subclasses str so callers that only need the text are unaffected. Usage fields
+    are None when the provider did not report them.
+    """
+
+    input_tokens: Optional[int]
+    output_tokens: Optional[int]
+    cached_tokens: Optional[int]
+    thinking_tokens: Optional[int]
+    latency_seconds: Optional[float]
+
+    def __new__(
+        cls,
+        text: str,
+        input_tokens: Optional[int] = None,
+        output_tokens: Optional[int] = None,
+        cached_tokens: Optional[int] = None,
+        thinking_tokens: Optional[int] = None,
+        latency_seconds: Optional[float] = None
+    ):
+        response = super().__new__(cls, text)
+        response.input_tokens = input_tokens
+        response.output_tokens = output_tokens
+        response.cached_tokens = cached_tokens
+        response.thinking_tokens = thinking_tokens
+        response.latency_seconds = latency_seconds
+        return response
+
+    @classmethod
+    def from_openai_usage(cls, text: str, usage: Any) -> "ProviderResponse":
+        """
+        Build a response from an OpenAI-compatible usage object (OpenAI, DeepSeek, Groq).
+
+        Args:
+            text: The response text
+            usage: The response's usage object (may be None)
+
+        Returns:
+            The response with usage
+        """
+        if usage is None:
+            return cls(text)
+        prompt_details = getattr(usage, "prompt_tokens_details", None)
+        completion_details = getattr(usage, "completion_tokens_details", None)
+        cached_tokens = getattr(prompt_details, "cached_tokens", None)
+        if cached_tokens is None:
+            # DeepSeek reports context cache hits separately
+            cached_tokens = getattr(usage, "prompt_cache_hit_tokens", None)
+        return cls(
+            text,
+            input_tokens=getattr(usage, "prompt_tokens", None),
+            output_tokens=getattr(usage, "completion_tokens", None),
+            cached_tokens=cached_tokens,
+            thinking_tokens=getattr(completion_details, "reasoning_tokens", None),
+        )
+
+    def usage(self) -> Dict[str, Optional[float]]:
+        """Usage fields as a dictionary."""
+        return {
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cached_tokens": self.cached_tokens,
+            "thinking_tokens": self.thinking_tokens,
+            "latency_seconds": self.latency_seconds,
+        }
 
 
 class ProviderModelRequest(BaseModel):
@@ -93,4 +230,93 @@ class FileToFilePromptRequest(FilePromptRequest):
 
 class ProviderRequest(BaseModel):
     """Request model for provider-specific operations."""
-    provider: str = Field(description="The provider to use")
\ No newline at end of file
+    provider: str = Field(description="The provider to use")
+
+
+class WorkflowStep(BaseModel):
+    """A single step in a declarative workflow graph."""
+    id: str = Field(description="Unique identifier of the step within the workflow")
+    type: str = Field(description="Step type: 'prompt', 'persona' or 'dm'")
+    persona: Optional[str] = Field(
+        default=None,
+        description="Persona to run for 'persona' steps: 'ba', 'pm' or 'sw'"
+    )
+    depends_on: List[str] = Field(
+        default_factory=list,
+        description="Ids of the steps whose outputs feed this step"
+    )
+    from_file: Optional[str] = Field(
+        default=None,
+        description="Path to a file used as the step input (root steps only)"
+    )
+    text: Optional[str] = Field(
+        default=None,
+        description="Inline text used as the step input (root steps only)"
+    )
+    prompt: Optional[str] = Field(
+        default=None,
+        description="Custom prompt template for the step (defaults to the persona/decision maker template)"
+    )
+    models_prefixed_by_provider: Optional[List[str]] = Field(
+        default=None,
+        description="Models in the format provider:model (team members for 'dm' and decision maker steps)"
+    )
+    use_decision_maker: bool = Field(
+        default=False,
+        description="Whether a 'persona' step should use team decision making"
+    )
+    decision_maker_model: Optional[str] = Field(
+        default=None,
+        description="Model used for the decision step"
+    )
+
+    @field_validator("type")
+    @classmethod
+    def validate_type(cls, v: str) -> str:
+        """Validate that the step type is supported."""
+        if v not in ("prompt", "persona", "dm"):
+            raise ValueError(f"Invalid step type: {v}. Must be one of 'prompt', 'persona', 'dm'")
+        return v
+
+
+class WorkflowRequest(BaseModel):
+    """Request model for workflow operations."""
+    steps: List[WorkflowStep] = Field(description="Steps of the workflow graph")
+    workflow_name: str = Field(default="workflow", description="Name used to prefix output files")
+    output_dir: Optional[str] = Field(default=None, description="Directory where step outputs are written")
+    output_extension: Optional[str] = Field(default=None, description="File extension for output files")
+
+    @field_validator("steps")
+    @classmethod
+    def validate_steps(cls, v: List[WorkflowStep]) -> List[WorkflowStep]:
+        """Validate step ids and dependencies, and reject cycles."""
+        if not v:
+            raise ValueError("At least one workflow step must be provided")
+        
+        ids = [step.id for step in v]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Workflow step ids must be unique")
+        
+        for step in v:
+            for dependency in step.depends_on:
+                if dependency not in ids:
+                    raise ValueError(f"Step {step.id} depends on unknown step {dependency}")
+            if not step.depends_on and step.from_file is None and step.text is None:
+                raise ValueError(f"Root step {step.id} needs either from_file or text")
+            if step.depends_on and (step.from_file is not None or step.text is not None):
+                raise ValueError(
+                    f"Step {step.id} takes its input from the steps it depends on; from_file and text are for root steps only"
+                )
+        
+        # Kahn's algorithm to detect cycles
+        remaining = {step.id: set(step.depends_on) for step in v}
+        while remaining:
+            ready = [step_id for step_id, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Workflow contains a dependency cycle between: {', '.join(sorted(remaining))}")
+            for step_id in ready:
+                del remaining[step_id]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        
+        return v
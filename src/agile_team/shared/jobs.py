@@ -0,0 +1,472 @@
+"""
+Background jobs for long-running tools.
+
+Persona and workflow tools called with background=True return a job id
+immediately and run on a server-side executor, so MCP clients do not time out
+(and retry, doubling provider load) on multi-minute calls. Clients poll with
+job_status_tool, fetch the output with job_result_tool and cancel with
+job_cancel_tool; a running job stops at its next cancellation point (see
+cancellation.py), before any further provider call or streamed chunk.
+
+Every job is stored as a JSON file in JOB_STORE_DIR and rewritten atomically on
+each state change, so finished jobs and their results survive a restart. Each
+job records its owner, the process running it (pid and process start time).
+Several server processes may share JOB_STORE_DIR (every stdio agent spawns its
+own server), so a starting manager only marks queued or running jobs
+"interrupted" when their owner is no longer alive; workflow jobs can be
+resubmitted and resume from their step cache. Any process can look up the jobs
+of the store. Cancelling a job of another process leaves a cancellation marker
+next to the job file, which the owner picks up within JOB_CANCEL_POLL_SECONDS.
+"""
+
+import os
+import json
+import time
+import uuid
+import logging
+import threading
+from contextlib import nullcontext
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from mcp.server.fastmcp.exceptions import ResourceError
+
+from agile_team.shared.config import (
+    JOB_STORE_DIR, JOB_WORKERS, JOB_RETENTION_DAYS, JOB_DEADLINE_SECONDS, JOB_CANCEL_POLL_SECONDS
+)
+from agile_team.shared import metrics
+from agile_team.shared.cancellation import CancellationToken, RequestCancelled, cancellation_scope, deadline_scope
+from agile_team.shared.tracing import wrap_context
+from agile_team.shared.utils import env_number
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+# States a job does not leave
+FINISHED = (SUCCEEDED, FAILED, CANCELLED, INTERRUPTED)
+
+
+def _process_started(pid: int) -> Optional[int]:
+    """Start time of a process in clock ticks since boot, where /proc provides it; tells reused pids apart."""
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+        # Fields after the parenthesized command name, which may contain spaces; starttime is field 22
+        return int(stat[stat.rindex(")") + 2:].split()[19])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def current_owner() -> Dict[str, Any]:
+    """Owner record of jobs run by this process."""
+    pid = os.getpid()
+    return {"pid": pid, "started": _process_started(pid)}
+
+
+def owner_alive(owner: Optional[Dict[str, Any]]) -> bool:
+    """
+    Whether the process that owns a job is still running.
+
+    Args:
+        owner: The job's owner record (jobs persisted without one have no live owner)
+
+    Returns:
+        True if the process exists and, where start times are known, is the same process
+    """
+    if not owner or not owner.get("pid"):
+        return False
+    pid = owner["pid"]
+    if os.name == "nt":
+        # Signal 0 would terminate the process on Windows; rely on the start time alone
+        return True
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        pass
+    except OSError:
+        return False
+    started = owner.get("started")
+    return started is None or _process_started(pid) in (None, started)
+
+
+def _timestamp(seconds: Optional[float]) -> Optional[str]:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(seconds)) if seconds is not None else None
+
+
+class Job:
+    """State of one background tool call."""
+
+    def __init__(self, job_id: str, tool: str, arguments: Dict[str, Any], deadline_seconds: Optional[float] = None):
+        self.id = job_id
+        self.tool = tool
+        self.arguments = arguments
+        self.deadline_seconds = deadline_seconds
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        self.owner: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Persisted form of the job."""
+        return {
+            "id": self.id,
+            "tool": self.tool,
+            "arguments": self.arguments,
+            "deadline_seconds": self.deadline_seconds,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "cancel_requested": self.cancel_requested,
+            "owner": self.owner,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        """Restore a job from its persisted form."""
+        job = cls(data["id"], data["tool"], data.get("arguments") or {})
+        for field in ("deadline_seconds", "status", "created_at", "started_at", "finished_at", "result", "error", "cancel_requested", "owner"):
+            if field in data:
+                setattr(job, field, data[field])
+        return job
+
+    def status_dict(self) -> Dict[str, Any]:
+        """JSON-serializable status, without the result."""
+        end = self.finished_at or time.time()
+        return {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+            "run_seconds": round(end - self.started_at, 3) if self.started_at else None,
+            "deadline_seconds": self.deadline_seconds,
+            "cancel_requested": self.cancel_requested,
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs tool calls on a thread pool and persists their state to a directory."""
+
+    def __init__(
+        self,
+        store_dir: str,
+        workers: int = JOB_WORKERS,
+        retention_days: float = JOB_RETENTION_DAYS,
+        deadline_seconds: Optional[float] = JOB_DEADLINE_SECONDS,
+        cancel_poll_seconds: float = JOB_CANCEL_POLL_SECONDS
+    ):
+        self.store_dir = store_dir
+        self.retention_days = retention_days
+        self.deadline_seconds = deadline_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="agile-team-job")
+        self._jobs: Dict[str, Job] = {}
+        self._futures: Dict[str, Future] = {}
+        self._tokens: Dict[str, CancellationToken] = {}
+        self._lock = threading.Lock()
+        self.owner = current_owner()
+        self._closed = threading.Event()
+        os.makedirs(store_dir, exist_ok=True)
+        self._load()
+        threading.Thread(
+            target=self._watch_cancellations, args=(cancel_poll_seconds,), name="agile-team-job-cancel", daemon=True
+        ).start()
+
+    def _path(self, job_id: str) -> str:
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _cancel_path(self, job_id: str) -> str:
+        return os.path.join(self.store_dir, f"{job_id}.cancel")
+
+    def _watch_cancellations(self, poll_seconds: float) -> None:
+        """Cancel this manager's jobs for which another process left a cancellation marker."""
+        while not self._closed.wait(poll_seconds):
+            with self._lock:
+                job_ids = list(self._futures)
+            for job_id in job_ids:
+                marker = self._cancel_path(job_id)
+                if os.path.exists(marker):
+                    logger.info(f"Job {job_id} cancelled by another server process")
+                    self.cancel(job_id)
+                    self._remove_marker(job_id)
+
+    def _remove_marker(self, job_id: str) -> None:
+        try:
+            os.remove(self._cancel_path(job_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Failed to remove the cancellation marker of job {job_id}: {e}")
+
+    def _load(self) -> None:
+        """Load persisted jobs, marking unfinished ones of dead owners interrupted and dropping expired ones."""
+        expires = time.time() - self.retention_days * 86400
+        for name in os.listdir(self.store_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.store_dir, name)
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = Job.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable job file {path}: {e}")
+                continue
+            if job.status in FINISHED and (job.finished_at or job.created_at) < expires:
+                os.remove(path)
+                continue
+            if job.status not in FINISHED:
+                if owner_alive(job.owner):
+                    # Run by another live server process sharing the store
+                    continue
+                self._interrupt(job)
+            self._jobs[job.id] = job
+        if self._jobs:
+            logger.info(f"Loaded {len(self._jobs)} jobs from {self.store_dir}")
+
+    def _interrupt(self, job: Job) -> None:
+        """Mark a job whose owner stopped before it finished."""
+        job.status = INTERRUPTED
+        job.finished_at = time.time()
+        job.error = "The server stopped before the job finished"
+        self._save(job)
+
+    def _save(self, job: Job) -> None:
+        """Write the job's state atomically."""
+        path = self._path(job.id)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f, default=str)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.error(f"Failed to persist job {job.id}: {e}")
+
+    def submit(
+        self,
+        tool: str,
+        fn: Callable[..., Any],
+        arguments: Dict[str, Any],
+        deadline_seconds: Optional[float] = None
+    ) -> Job:
+        """
+        Run a tool call in the background.
+
+        The call runs in a copy of the caller's context, so it keeps the caller's
+        budgets, persona attribution and trace.
+
+        Args:
+            tool: Tool name recorded with the job
+            fn: The tool implementation
+            arguments: Keyword arguments of the call (persisted with the job)
+            deadline_seconds: Seconds the job may run once started (defaults to the manager's deadline)
+
+        Returns:
+            The queued job
+        """
+        job = Job(uuid.uuid4().hex, tool, arguments, deadline_seconds)
+        job.owner = self.owner
+        with self._lock:
+            self._jobs[job.id] = job
+            self._save(job)
+            self._tokens[job.id] = CancellationToken()
+            self._futures[job.id] = self._executor.submit(wrap_context(self._run), job, fn)
+        logger.info(f"Queued job {job.id} for {tool}")
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any]) -> None:
+        with self._lock:
+            if job.status != QUEUED:
+                return
+            job.status = RUNNING
+            job.started_at = time.time()
+            self._save(job)
+        metrics.record_queue_wait("jobs", job.started_at - job.created_at)
+        deadline = job.deadline_seconds or self.deadline_seconds
+        try:
+            with cancellation_scope(self._tokens[job.id]), \
+                    (deadline_scope(deadline) if deadline else nullcontext()):
+                result = fn(**job.arguments)
+        except RequestCancelled:
+            logger.info(f"Job {job.id} ({job.tool}) cancelled")
+            status, result, error = CANCELLED, None, "Cancelled while running"
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.tool}) failed: {e}")
+            status, result, error = FAILED, None, str(e)
+        else:
+            status, error = SUCCEEDED, None
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished_at = time.time()
+            self._futures.pop(job.id, None)
+            self._tokens.pop(job.id, None)
+            self._save(job)
+        self._remove_marker(job.id)
+
+    def _read(self, job_id: str) -> Optional[Job]:
+        """A job as persisted, or None if there is no readable job file."""
+        if not job_id or os.path.basename(job_id) != job_id or job_id.startswith("."):
+            return None
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return Job.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def get(self, job_id: str) -> Job:
+        """
+        Look up a job.
+
+        Jobs this manager does not run (submitted by another server process, or
+        persisted after it started) are read from the store on every lookup.
+
+        Args:
+            job_id: The job id returned by the tool call
+
+        Returns:
+            The job
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        job = self._read(job_id)
+        if job is None:
+            raise ResourceError(f"Unknown job: {job_id}")
+        with self._lock:
+            if job.status not in FINISHED and not owner_alive(job.owner):
+                self._interrupt(job)
+            if job.status in FINISHED:
+                # Finished jobs do not change anymore
+                self._jobs.setdefault(job.id, job)
+        return job
+
+    def list(self, limit: int = 20) -> List[Job]:
+        """The most recently created jobs of the store, newest first."""
+        with self._lock:
+            job_ids = set(self._jobs)
+        try:
+            job_ids.update(name[:-len(".json")] for name in os.listdir(self.store_dir) if name.endswith(".json"))
+        except OSError as e:
+            logger.warning(f"Failed to list jobs in {self.store_dir}: {e}")
+        jobs = []
+        for job_id in job_ids:
+            try:
+                jobs.append(self.get(job_id))
+            except ResourceError:
+                # Removed since it was listed
+                continue
+        jobs.sort(key=lambda job: job.created_at, reverse=True)
+        return jobs[:limit]
+
+    def cancel(self, job_id: str) -> Job:
+        """
+        Cancel a job: queued jobs never start; running jobs stop at their next cancellation point.
+
+        Jobs of another server process are cancelled by that process, which
+        polls for cancellation markers.
+
+        Args:
+            job_id: The job id
+
+        Returns:
+            The job
+        """
+        job = self.get(job_id)
+        with self._lock:
+            if job.status in FINISHED:
+                return job
+            if job_id not in self._futures:
+                # Owned by another live process (get interrupts jobs of dead ones)
+                try:
+                    with open(self._cancel_path(job_id), "w", encoding="utf-8") as f:
+                        f.write(str(time.time()))
+                except OSError as e:
+                    raise ResourceError(f"Failed to request cancellation of job {job_id}: {str(e)}")
+                job.cancel_requested = True
+                return job
+            job.cancel_requested = True
+            future = self._futures.get(job_id)
+            if job.status == QUEUED and (future is None or future.cancel()):
+                job.status = CANCELLED
+                job.finished_at = time.time()
+                self._futures.pop(job_id, None)
+                self._tokens.pop(job_id, None)
+            elif job_id in self._tokens:
+                self._tokens[job_id].cancel("The job was cancelled")
+            self._save(job)
+        return job
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop the executor, optionally waiting for running jobs."""
+        self._closed.set()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_manager: Optional[JobManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_manager() -> JobManager:
+    """The process-wide job manager, storing jobs in JOB_STORE_DIR (created on first use)."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            store_dir = os.path.expanduser(os.environ.get("JOB_STORE_DIR") or JOB_STORE_DIR)
+            workers = max(int(env_number("JOB_WORKERS", JOB_WORKERS)), 1)
+            deadline = env_number("JOB_DEADLINE_SECONDS", JOB_DEADLINE_SECONDS)
+            _manager = JobManager(store_dir, workers, deadline_seconds=deadline if deadline > 0 else None)
+        return _manager
+
+
+def set_manager(manager: Optional[JobManager]) -> Optional[JobManager]:
+    """
+    Replace the process-wide job manager (e.g., with one using another directory).
+
+    Args:
+        manager: The new manager, or None to create one from the environment on next use
+
+    Returns:
+        The previous manager
+    """
+    global _manager
+    with _manager_lock:
+        previous, _manager = _manager, manager
+    return previous
+
+
+def submit(tool: str, fn: Callable[..., Any], arguments: Dict[str, Any], deadline_seconds: Optional[float] = None) -> Job:
+    """Run a tool call in the background with the process-wide job manager."""
+    return get_manager().submit(tool, fn, arguments, deadline_seconds)
+
+
+def background(tool: str, fn: Callable[..., Any], arguments: Dict[str, Any], deadline_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Run a tool call in the background and describe the job as every tool returns it.
+
+    Args:
+        tool: Tool name recorded with the job
+        fn: The tool implementation
+        arguments: Keyword arguments of the call
+        deadline_seconds: Seconds the job may run once started
+
+    Returns:
+        Dictionary with the job id and its status, for job_status_tool, job_result_tool and job_cancel_tool
+    """
+    job = submit(tool, fn, arguments, deadline_seconds)
+    return {"job_id": job.id, "status": job.status}
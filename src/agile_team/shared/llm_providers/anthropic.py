@@ -3,11 +3,13 @@ Anthropic provider implementation.
 """
 
 import os
-import re
 import anthropic
 from typing import List, Tuple
 import logging
 from dotenv import load_dotenv
+from ..data_types import FallbackModelList, ProviderResponse
+from ..utils import model_spec
+from ..transport import get_http_client
 
 # Load environment variables
 load_dotenv()
@@ -15,8 +17,12 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+# Initialize Anthropic client (ANTHROPIC_BASE_URL points it at a proxy or local stub)
+client = anthropic.Anthropic(
+    api_key=os.environ.get("ANTHROPIC_API_KEY"),
+    base_url=os.environ.get("ANTHROPIC_BASE_URL") or None,
+    http_client=get_http_client("anthropic", anthropic.DefaultHttpxClient)
+)
 
 
 def parse_thinking_suffix(model: str) -> Tuple[str, int]:
@@ -35,44 +41,44 @@ def parse_thinking_suffix(model: str) -> Tuple[str, int]:
         Tuple of (base_model_name, thinking_budget)
         If no thinking suffix is found, thinking_budget will be 0
     """
-    # Look for patterns like ":1k", ":4k", ":16k" or ":1000", ":1054", etc.
-    pattern = r'^(.+?)(?::(\d+)k?)?$'
-    match = re.match(pattern, model)
-    
-    if not match:
-        return model, 0
-    
-    base_model = match.group(1)
-    thinking_suffix = match.group(2)
+    spec = model_spec("anthropic", model)
+    base_model, thinking_budget = spec.base_model, spec.thinking_budget
     
     # Validate the model - only claude-3-7-sonnet-20250219 supports thinking
     if base_model != "claude-3-7-sonnet-20250219":
-        logger.warning(f"Model {base_model} does not support thinking, ignoring thinking suffix")
+        if thinking_budget:
+            logger.warning(f"Model {base_model} does not support thinking, ignoring thinking suffix")
         return base_model, 0
     
-    if not thinking_suffix:
-        return model, 0
-    
-    # Convert to integer
-    try:
-        thinking_budget = int(thinking_suffix)
-        # If a small number like 1, 4, 16 is provided, assume it's in "k" (multiply by 1024)
-        if thinking_budget < 100:
-            thinking_budget *= 1024
-            
-        # Adjust values outside the range
-        if thinking_budget < 1024:
-            logger.warning(f"Thinking budget {thinking_budget} below minimum (1024), using 1024 instead")
-            thinking_budget = 1024
-        elif thinking_budget > 16000:
-            logger.warning(f"Thinking budget {thinking_budget} above maximum (16000), using 16000 instead")
-            thinking_budget = 16000
-            
-        logger.info(f"Using thinking budget of {thinking_budget} tokens for model {base_model}")
-        return base_model, thinking_budget
-    except ValueError:
-        logger.warning(f"Invalid thinking budget format: {thinking_suffix}, ignoring")
+    if not thinking_budget:
         return base_model, 0
+    
+    # Adjust values outside the range
+    if thinking_budget < 1024:
+        logger.warning(f"Thinking budget {thinking_budget} below minimum (1024), using 1024 instead")
+        thinking_budget = 1024
+    elif thinking_budget > 16000:
+        logger.warning(f"Thinking budget {thinking_budget} above maximum (16000), using 16000 instead")
+        thinking_budget = 16000
+        
+    logger.info(f"Using thinking budget of {thinking_budget} tokens for model {base_model}")
+    return base_model, thinking_budget
+
+
+def _with_usage(text: str, usage) -> ProviderResponse:
+    """
+    Attach the token usage of a message to its response text.
+    
+    Thinking tokens are billed as output tokens and not reported separately.
+    """
+    if usage is None:
+        return ProviderResponse(text)
+    return ProviderResponse(
+        text,
+        input_tokens=usage.input_tokens,
+        output_tokens=usage.output_tokens,
+        cached_tokens=getattr(usage, "cache_read_input_tokens", None),
+    )
 
 
 def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
@@ -85,7 +91,7 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         thinking_budget: The token budget for thinking
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by Anthropic
     """
     try:
         # Ensure max_tokens is greater than thinking_budget
@@ -110,7 +116,7 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         if not text_blocks:
             raise ValueError("No text content found in response")
             
-        return text_blocks[0].text
+        return _with_usage(text_blocks[0].text, message.usage)
     except Exception as e:
         logger.error(f"Error sending prompt with thinking to Anthropic: {e}")
         raise ValueError(f"Failed to get response from Anthropic with thinking: {str(e)}")
@@ -127,7 +133,7 @@ def prompt(text: str, model: str) -> str:
         model: The model name, optionally with thinking suffix
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by Anthropic
     """
     # Parse the model name to check for thinking suffixes
     base_model, thinking_budget = parse_thinking_suffix(model)
@@ -150,7 +156,7 @@ def prompt(text: str, model: str) -> str:
         if not text_blocks:
             raise ValueError("No text content found in response")
             
-        return text_blocks[0].text
+        return _with_usage(text_blocks[0].text, message.usage)
     except Exception as e:
         logger.error(f"Error sending prompt to Anthropic: {e}")
         raise ValueError(f"Failed to get response from Anthropic: {str(e)}")
@@ -173,7 +179,7 @@ def list_models() -> List[str]:
         logger.error(f"Error listing Anthropic models: {e}")
         # Return some known models if API fails
         logger.info("Returning hardcoded list of known Anthropic models")
-        return [
+        return FallbackModelList([
             "claude-3-7-sonnet",
             "claude-3-5-sonnet",
             "claude-3-5-sonnet-20240620",
@@ -181,4 +187,4 @@ def list_models() -> List[str]:
             "claude-3-sonnet-20240229",
             "claude-3-haiku-20240307",
             "claude-3-5-haiku",
-        ]
\ No newline at end of file
+        ])
\ No newline at end of file
@@ -5,8 +5,10 @@ DeepSeek provider implementation.
 import os
 from typing import List
 import logging
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient
 from dotenv import load_dotenv
+from ..data_types import FallbackModelList, ProviderResponse
+from ..transport import get_http_client
 
 # Load environment variables
 load_dotenv()
@@ -17,7 +19,8 @@ logger = logging.getLogger(__name__)
 # Initialize DeepSeek client with OpenAI-compatible interface
 client = OpenAI(
     api_key=os.environ.get("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com"
+    base_url=os.environ.get("DEEPSEEK_BASE_URL") or "https://api.deepseek.com",
+    http_client=get_http_client("deepseek", DefaultHttpxClient)
 )
 
 
@@ -30,7 +33,7 @@ def prompt(text: str, model: str) -> str:
         model: The model name
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by DeepSeek
     """
     try:
         logger.info(f"Sending prompt to DeepSeek model: {model}")
@@ -43,7 +46,7 @@ def prompt(text: str, model: str) -> str:
         )
         
         # Extract response content
-        return response.choices[0].message.content
+        return ProviderResponse.from_openai_usage(response.choices[0].message.content, response.usage)
     except Exception as e:
         logger.error(f"Error sending prompt to DeepSeek: {e}")
         raise ValueError(f"Failed to get response from DeepSeek: {str(e)}")
@@ -68,10 +71,10 @@ def list_models() -> List[str]:
         logger.error(f"Error listing DeepSeek models: {e}")
         # Return some known models if API fails
         logger.info("Returning hardcoded list of known DeepSeek models")
-        return [
+        return FallbackModelList([
             "deepseek-coder",
             "deepseek-chat",
             "deepseek-reasoner",
             "deepseek-coder-v2",
             "deepseek-reasoner-lite"
-        ]
\ No newline at end of file
+        ])
\ No newline at end of file
@@ -3,10 +3,13 @@ Google Gemini provider implementation.
 """
 
 import os
-import re
-from typing import List, Tuple
+import functools
+from typing import Any, Callable, List, Tuple
 import logging
 from dotenv import load_dotenv
+from .. import cancellation
+from ..data_types import FallbackModelList, ProviderResponse
+from ..utils import model_spec
 
 # Load environment variables
 load_dotenv()
@@ -19,18 +22,34 @@ logger = logging.getLogger(__name__)
 # 1. google-genai: Using "from google import genai" approach (newer Client API)
 # 2. google-generativeai: Using "import google.generativeai as genai" approach (older API)
 # We support both to ensure compatibility in different environments
+# GEMINI_BASE_URL points either client at a proxy or local stub (REST transport)
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL") or None
+
 try:
     # First try the google-genai package approach with Client API
     from google import genai
     logger.info("Successfully imported from google import genai")
-    client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
+    if GEMINI_BASE_URL:
+        client = genai.Client(
+            api_key=os.environ.get("GEMINI_API_KEY"),
+            http_options=genai.types.HttpOptions(base_url=GEMINI_BASE_URL)
+        )
+    else:
+        client = genai.Client(api_key=os.environ.get("GEMINI_API_KEY"))
     USE_CLIENT_API = True
 except ImportError:
     try:
         # Fallback to google.generativeai package
         import google.generativeai as genai
         logger.info("Successfully imported google.generativeai")
-        genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
+        if GEMINI_BASE_URL:
+            genai.configure(
+                api_key=os.environ.get("GEMINI_API_KEY"),
+                transport="rest",
+                client_options={"api_endpoint": GEMINI_BASE_URL}
+            )
+        else:
+            genai.configure(api_key=os.environ.get("GEMINI_API_KEY"))
         USE_CLIENT_API = False
     except ImportError:
         logger.error("Failed to import any Gemini module")
@@ -40,6 +59,22 @@ except ImportError:
 # Models that support thinking_budget
 THINKING_ENABLED_MODELS = ["gemini-2.5-flash-preview-04-17"]
 
+# Harm categories set to BLOCK_NONE so XML-like prompt content is not filtered
+SAFETY_CATEGORIES = (
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
+)
+
+# Sampling settings of every request, so complete responses are returned
+GENERATION_SETTINGS = {
+    "temperature": 0.7,
+    "top_p": 0.95,
+    "top_k": 40,
+    "max_output_tokens": 8192,
+}
+
 
 def parse_thinking_suffix(model: str) -> Tuple[str, int]:
     """
@@ -57,55 +92,101 @@ def parse_thinking_suffix(model: str) -> Tuple[str, int]:
         Tuple of (base_model_name, thinking_budget)
         If no thinking suffix is found, thinking_budget will be 0
     """
-    # Look for patterns like ":1k", ":4k", ":24k" or ":1000", ":1054", etc.
-    pattern = r'^(.+?)(?::(.+))?$'
-    match = re.match(pattern, model)
-    
-    if not match:
-        return model, 0
-    
-    base_model = match.group(1)
-    thinking_suffix = match.group(2)
+    spec = model_spec("gemini", model)
+    base_model, thinking_budget = spec.base_model, spec.thinking_budget
     
     # Validate the model - only supported models get thinking
     if base_model not in THINKING_ENABLED_MODELS:
-        logger.warning(f"Model {model} does not support thinking, ignoring thinking suffix")
+        if spec.suffix:
+            logger.warning(f"Model {model} does not support thinking, ignoring thinking suffix")
         return base_model, 0
     
-    if not thinking_suffix:
+    if not thinking_budget:
         return base_model, 0
     
-    # Handle valid numeric thinking budgets
-    if thinking_suffix and re.match(r'^\d+k?$', thinking_suffix):
-        try:
-            # Remove 'k' suffix if present and convert to int
-            if thinking_suffix.endswith('k'):
-                thinking_budget = int(thinking_suffix[:-1]) * 1024
-            else:
-                thinking_budget = int(thinking_suffix)
-                
-            # If a small number like 1, 4, 16 is provided without 'k', assume it's in "k"
-            if thinking_budget < 100:
-                thinking_budget *= 1024
-                
-            # Adjust values outside the range
-            if thinking_budget < 0:
-                logger.warning(f"Thinking budget {thinking_budget} below minimum (0), using 0 instead")
-                thinking_budget = 0
-            elif thinking_budget > 24576:
-                logger.warning(f"Thinking budget {thinking_budget} above maximum (24576), using 24576 instead")
-                thinking_budget = 24576
-                
-            logger.info(f"Using thinking budget of {thinking_budget} tokens for model {base_model}")
-            return base_model, thinking_budget
-        except ValueError:
-            logger.warning(f"Invalid thinking budget format: {thinking_suffix}, ignoring")
-            return base_model, 0
-    else:
-        # Handle invalid thinking suffixes
-        if thinking_suffix:
-            logger.warning(f"Invalid thinking budget format: {thinking_suffix}, ignoring")
-        return base_model, 0
+    # Adjust values outside the range
+    if thinking_budget > 24576:
+        logger.warning(f"Thinking budget {thinking_budget} above maximum (24576), using 24576 instead")
+        thinking_budget = 24576
+        
+    logger.info(f"Using thinking budget of {thinking_budget} tokens for model {base_model}")
+    return base_model, thinking_budget
+
+
+def _with_usage(response) -> ProviderResponse:
+    """Attach the token usage metadata of a Gemini response to its text."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return ProviderResponse(response.text)
+    return ProviderResponse(
+        response.text,
+        input_tokens=getattr(usage, "prompt_token_count", None),
+        output_tokens=getattr(usage, "candidates_token_count", None),
+        cached_tokens=getattr(usage, "cached_content_token_count", None),
+        thinking_tokens=getattr(usage, "thoughts_token_count", None),
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def _request_handle(model: str, thinking_budget: int) -> Callable[..., Any]:
+    """
+    Prepared generate_content callable for a model and thinking budget.
+    
+    Safety settings, generation config and (on the google.generativeai path) the
+    GenerativeModel are built once per model and thinking budget and reused by
+    every call.
+    
+    Args:
+        model: The base model name (without thinking suffix)
+        thinking_budget: The token budget for thinking (0 disables thinking)
+        
+    Returns:
+        Callable taking the prompt as contents
+    """
+    if USE_CLIENT_API:
+        # Using google-genai Client API
+        config = genai.types.GenerateContentConfig(
+            safety_settings=[
+                genai.types.SafetySetting(category=category, threshold="BLOCK_NONE")
+                for category in SAFETY_CATEGORIES
+            ],
+            thinking_config=genai.types.ThinkingConfig(thinking_budget=thinking_budget) if thinking_budget else None,
+            **GENERATION_SETTINGS
+        )
+        return functools.partial(client.models.generate_content, model=model, config=config)
+    
+    # Using google.generativeai API (which does not support thinking_config)
+    gemini_model = genai.GenerativeModel(
+        model_name=model,
+        safety_settings={category: "BLOCK_NONE" for category in SAFETY_CATEGORIES},
+        generation_config=genai.GenerationConfig(**GENERATION_SETTINGS)
+    )
+    return gemini_model.generate_content
+
+
+def _generate(model: str, thinking_budget: int, text: str) -> Any:
+    """
+    Send a prompt with the prepared request handle, limited to the time left before the call's deadline.
+    
+    Args:
+        model: The base model name (without thinking suffix)
+        thinking_budget: The token budget for thinking (0 disables thinking)
+        text: The prompt text
+        
+    Returns:
+        The Gemini response
+    """
+    handle = _request_handle(model, thinking_budget)
+    remaining = cancellation.remaining()
+    if remaining is None:
+        return handle(contents=text)
+    if USE_CLIENT_API:
+        # Request timeout in milliseconds, on a copy of the shared config
+        config = handle.keywords["config"].model_copy(
+            update={"http_options": genai.types.HttpOptions(timeout=max(1, int(remaining * 1000)))}
+        )
+        return handle(contents=text, config=config)
+    return handle(contents=text, request_options={"timeout": max(remaining, 0.001)})
 
 
 def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
@@ -118,85 +199,12 @@ def prompt_with_thinking(text: str, model: str, thinking_budget: int) -> str:
         thinking_budget: The token budget for thinking
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by Gemini
     """
     try:
         logger.info(f"Sending prompt to Gemini model {model} with thinking budget {thinking_budget}")
-        
-        # Add safety settings to ensure we don't filter out XML-like content
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_DANGEROUS",
-                "threshold": "BLOCK_NONE",
-            },
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_NONE",
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_NONE",
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_NONE",
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_NONE",
-            },
-        ]
-        
-        # Log if we detect XML-like content
-        if "<" in text and ">" in text:
-            if "analyst_request" in text:
-                logger.info("Detected BA prompt with XML tags in thinking prompt")
-            else:
-                logger.info("Detected XML-like tags in thinking prompt")
-        
-        if USE_CLIENT_API:
-            # Using google-genai Client API
-            response = client.models.generate_content(
-                model=model,
-                contents=text,
-                safety_settings=safety_settings,
-                config=genai.types.GenerateContentConfig(
-                    thinking_config=genai.types.ThinkingConfig(
-                        thinking_budget=thinking_budget
-                    ),
-                    temperature=0.7,
-                    top_p=0.95,
-                    top_k=40,
-                    max_output_tokens=8192
-                )
-            )
-        else:
-            # Using google.generativeai API
-            safety_settings_dict = {
-                "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
-                "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
-                "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
-                "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE",
-            }
-            
-            generation_config = genai.GenerationConfig(
-                temperature=0.7,
-                top_p=0.95,
-                top_k=40,
-                max_output_tokens=8192
-                # The old API may not support thinking_config directly
-                # This is a placeholder - actual implementation may vary
-                # depending on the API version
-            )
-            
-            gemini_model = genai.GenerativeModel(
-                model_name=model,
-                safety_settings=safety_settings_dict,
-                generation_config=generation_config
-            )
-            response = gemini_model.generate_content(text)
-        
-        return response.text
+        response = _generate(model, thinking_budget, text)
+        return _with_usage(response)
     except Exception as e:
         logger.error(f"Error sending prompt with thinking to Gemini: {e}")
         raise ValueError(f"Failed to get response from Gemini with thinking: {str(e)}")
@@ -207,27 +215,17 @@ def prompt(text: str, model: str) -> str:
     Send a prompt to Google Gemini and get a response.
     
     Automatically handles thinking suffixes in the model name (e.g., gemini-2.5-flash-preview-04-17:4k)
-    Also includes special handling for XML-like tags in prompts.
     
     Args:
         text: The prompt text
         model: The model name, optionally with thinking suffix
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by Gemini
     """
     # Parse the model name to check for thinking suffixes
     base_model, thinking_budget = parse_thinking_suffix(model)
     
-    # Wrap XML-tag formatted prompts to ensure they're preserved properly
-    # This helps prevent Gemini from filtering out or modifying special tags
-    if "<" in text and ">" in text:
-        if "analyst_request" in text:
-            logger.info("Detected BA prompt with XML tags, using special handling")
-            # No modifications to the text structure, just log that we detected it
-        else:
-            logger.info("Detected XML-like tags in prompt")
-    
     # If thinking budget is specified, use prompt_with_thinking
     if thinking_budget > 0:
         return prompt_with_thinking(text, base_model, thinking_budget)
@@ -235,72 +233,8 @@ def prompt(text: str, model: str) -> str:
     # Otherwise, use regular prompt
     try:
         logger.info(f"Sending prompt to Gemini model: {base_model}")
-        
-        if USE_CLIENT_API:
-            # Using google-genai Client API
-            # Add safety settings to ensure we don't filter out XML-like content
-            safety_settings = [
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS",
-                    "threshold": "BLOCK_NONE",
-                },
-                {
-                    "category": "HARM_CATEGORY_HARASSMENT",
-                    "threshold": "BLOCK_NONE",
-                },
-                {
-                    "category": "HARM_CATEGORY_HATE_SPEECH",
-                    "threshold": "BLOCK_NONE",
-                },
-                {
-                    "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                    "threshold": "BLOCK_NONE",
-                },
-                {
-                    "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                    "threshold": "BLOCK_NONE",
-                },
-            ]
-            
-            # Set generation config to ensure we get complete responses
-            generation_config = {
-                "temperature": 0.7,
-                "topP": 0.95,
-                "topK": 40,
-                "maxOutputTokens": 8192
-            }
-            
-            response = client.models.generate_content(
-                model=base_model,
-                contents=text,
-                safety_settings=safety_settings,
-                generation_config=generation_config
-            )
-        else:
-            # Using google.generativeai API
-            # We need to create safety settings
-            safety_settings = {
-                "HARM_CATEGORY_HARASSMENT": "BLOCK_NONE",
-                "HARM_CATEGORY_HATE_SPEECH": "BLOCK_NONE",
-                "HARM_CATEGORY_SEXUALLY_EXPLICIT": "BLOCK_NONE",
-                "HARM_CATEGORY_DANGEROUS_CONTENT": "BLOCK_NONE",
-            }
-            
-            generation_config = genai.GenerationConfig(
-                temperature=0.7,
-                top_p=0.95,
-                top_k=40,
-                max_output_tokens=8192
-            )
-            
-            gemini_model = genai.GenerativeModel(
-                model_name=base_model,
-                safety_settings=safety_settings,
-                generation_config=generation_config
-            )
-            response = gemini_model.generate_content(text)
-        
-        return response.text
+        response = _generate(base_model, 0, text)
+        return _with_usage(response)
     except Exception as e:
         logger.error(f"Error sending prompt to Gemini: {e}")
         raise ValueError(f"Failed to get response from Gemini: {str(e)}")
@@ -339,7 +273,7 @@ def list_models() -> List[str]:
         logger.error(f"Error listing Gemini models: {e}")
         # Return some known models if API fails
         logger.info("Returning hardcoded list of known Gemini models")
-        return [
+        return FallbackModelList([
             "gemini-2.5-flash-preview-04-17",
             "gemini-2.5-pro-preview-03-25"
-        ]
\ No newline at end of file
+        ])
\ No newline at end of file
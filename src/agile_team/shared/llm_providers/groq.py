@@ -5,8 +5,10 @@ Groq provider implementation.
 import os
 from typing import List
 import logging
-from groq import Groq
+from groq import Groq, DefaultHttpxClient
 from dotenv import load_dotenv
+from ..data_types import FallbackModelList, ProviderResponse
+from ..transport import get_http_client
 
 # Load environment variables
 load_dotenv()
@@ -14,8 +16,12 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize Groq client
-client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
+# Initialize Groq client (GROQ_BASE_URL points it at a proxy or local stub)
+client = Groq(
+    api_key=os.environ.get("GROQ_API_KEY"),
+    base_url=os.environ.get("GROQ_BASE_URL") or None,
+    http_client=get_http_client("groq", DefaultHttpxClient)
+)
 
 
 def prompt(text: str, model: str) -> str:
@@ -27,7 +33,7 @@ def prompt(text: str, model: str) -> str:
         model: The model name
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by Groq
     """
     try:
         logger.info(f"Sending prompt to Groq model: {model}")
@@ -47,7 +53,7 @@ def prompt(text: str, model: str) -> str:
         )
         
         # Extract response content
-        return chat_completion.choices[0].message.content
+        return ProviderResponse.from_openai_usage(chat_completion.choices[0].message.content, chat_completion.usage)
     except Exception as e:
         logger.error(f"Error sending prompt to Groq: {e}")
         raise ValueError(f"Failed to get response from Groq: {str(e)}")
@@ -72,11 +78,11 @@ def list_models() -> List[str]:
         logger.error(f"Error listing Groq models: {e}")
         # Return some known models if API fails
         logger.info("Returning hardcoded list of known Groq models")
-        return [
+        return FallbackModelList([
             "llama-3.3-70b-versatile",
             "llama-3.1-70b-versatile",
             "llama-3.1-8b-versatile",
             "mixtral-8x7b-32768",
             "gemma-7b-it",
             "qwen-qwq-32b"
-        ]
\ No newline at end of file
+        ])
\ No newline at end of file
@@ -1,12 +1,32 @@
 """
 Ollama provider implementation.
+
+Requests are spread over a pool of Ollama hosts (OLLAMA_HOSTS, a comma-separated
+list, or the single OLLAMA_HOST). Each request goes to the host with the fewest
+outstanding requests, preferring hosts that already have the model loaded, and
+each host runs at most OLLAMA_HOST_CONCURRENCY requests at a time; the time a
+request waits for a slot is recorded as queue wait. Models stay loaded for
+OLLAMA_KEEP_ALIVE, and the models in OLLAMA_PRELOAD_MODELS can be loaded on
+every host at startup with preload_models(). The loaded models of each host are
+queried again in the background when they are older than
+OLLAMA_RESIDENT_REFRESH_SECONDS, so hosts that unloaded a model after its keep
+alive stop being preferred for it.
 """
 
 import os
-from typing import List
+import time
 import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
 import ollama
 from dotenv import load_dotenv
+from ..config import OLLAMA_HOST_CONCURRENCY, OLLAMA_KEEP_ALIVE, OLLAMA_RESIDENT_REFRESH_SECONDS
+from .. import cancellation
+from ..data_types import ProviderResponse
+from ..metrics import record_queue_wait
+from ..transport import client_options
+from ..utils import env_number
 
 # Load environment variables
 load_dotenv()
@@ -15,6 +35,140 @@ load_dotenv()
 logger = logging.getLogger(__name__)
 
 
+def _tagged(model: str) -> str:
+    """A model name with its tag, as Ollama reports loaded models ("llama3" is "llama3:latest")."""
+    name = model.rsplit("/", 1)[-1]
+    return model if ":" in name else f"{model}:latest"
+
+
+class OllamaHost:
+    """One Ollama endpoint with its client, concurrency cap and outstanding request count."""
+
+    def __init__(self, host: Optional[str], concurrency: int):
+        self.host = host or "default"
+        self.client = ollama.Client(host=host, **client_options("ollama"))
+        self.slots = threading.BoundedSemaphore(concurrency)
+        self.outstanding = 0
+        self.resident: List[str] = []
+        # Monotonic time of the last query of the loaded models, and whether one is running
+        self.refreshed = 0.0
+        self._refreshing = False
+        self._lock = threading.Lock()
+
+    def refresh_resident(self) -> List[str]:
+        """
+        Query the models currently loaded on the host.
+
+        Returns:
+            Names of the loaded models (empty if the host cannot be reached)
+        """
+        try:
+            resident = [model.model for model in self.client.ps().models]
+        except Exception as e:
+            logger.warning(f"Failed to list loaded models on Ollama host {self.host}: {e}")
+            resident = []
+        with self._lock:
+            self.resident = resident
+            self.refreshed = time.monotonic()
+            self._refreshing = False
+        return list(resident)
+
+    def refresh_if_stale(self, max_age: float) -> Optional[threading.Thread]:
+        """
+        Query the loaded models in the background if they were last queried more than max_age seconds ago.
+
+        Returns:
+            The thread querying the host, or None if the loaded models are recent or already being queried
+        """
+        with self._lock:
+            if self._refreshing or time.monotonic() - self.refreshed < max_age:
+                return None
+            self._refreshing = True
+        thread = threading.Thread(target=self.refresh_resident, name=f"ollama-resident-{self.host}", daemon=True)
+        thread.start()
+        return thread
+
+    def mark_resident(self, model: str) -> None:
+        """Record that the host loaded a model for a request."""
+        with self._lock:
+            if not self._is_resident(model):
+                self.resident.append(_tagged(model))
+
+    def is_resident(self, model: str) -> bool:
+        """Whether a model, tagged or not, is loaded on the host."""
+        with self._lock:
+            return self._is_resident(model)
+
+    def _is_resident(self, model: str) -> bool:
+        tagged = _tagged(model)
+        return any(_tagged(name) == tagged for name in self.resident)
+
+
+class OllamaPool:
+    """Least-outstanding-requests balancing over Ollama hosts with per-host concurrency caps."""
+
+    def __init__(
+        self,
+        hosts: List[Optional[str]],
+        concurrency: int = OLLAMA_HOST_CONCURRENCY,
+        refresh_seconds: float = OLLAMA_RESIDENT_REFRESH_SECONDS
+    ):
+        self.hosts = [OllamaHost(host, concurrency) for host in hosts]
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def acquire(self, model: str) -> Iterator[OllamaHost]:
+        """
+        Reserve a request slot on the best host for a model.
+
+        Args:
+            model: The model name
+
+        Yields:
+            The host to send the request to
+        """
+        with self._lock:
+            host = min(
+                self.hosts,
+                key=lambda candidate: (candidate.outstanding, not candidate.is_resident(model))
+            )
+            host.outstanding += 1
+        if self.refresh_seconds > 0:
+            # Later requests see models loaded or unloaded since the last query
+            for candidate in self.hosts:
+                candidate.refresh_if_stale(self.refresh_seconds)
+        try:
+            queued = time.perf_counter()
+            # Requests of a cancelled tool call give up their place in the queue
+            cancellation.acquire(host.slots)
+            try:
+                record_queue_wait(f"ollama:{host.host}", time.perf_counter() - queued)
+                yield host
+            finally:
+                host.slots.release()
+        finally:
+            with self._lock:
+                host.outstanding -= 1
+
+
+def _configured_hosts() -> List[Optional[str]]:
+    """Hosts from OLLAMA_HOSTS, else OLLAMA_HOST, else the library default."""
+    hosts = [host.strip() for host in os.environ.get("OLLAMA_HOSTS", "").split(",") if host.strip()]
+    return hosts or [os.environ.get("OLLAMA_HOST") or None]
+
+
+# Pool of Ollama hosts with the shared transport settings
+pool = OllamaPool(
+    _configured_hosts(),
+    max(int(env_number("OLLAMA_HOST_CONCURRENCY", OLLAMA_HOST_CONCURRENCY)), 1),
+    env_number("OLLAMA_RESIDENT_REFRESH_SECONDS", OLLAMA_RESIDENT_REFRESH_SECONDS)
+)
+
+# How long models stay loaded after a request (Ollama duration, e.g. "30m", or "-1" to keep them loaded)
+KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE") or OLLAMA_KEEP_ALIVE
+
+
 def prompt(text: str, model: str) -> str:
     """
     Send a prompt to Ollama and get a response.
@@ -24,24 +178,31 @@ def prompt(text: str, model: str) -> str:
         model: The model name
 
     Returns:
-        Response string from the model
+        Response string from the model, with the token counts reported by Ollama
     """
     try:
-        logger.info(f"Sending prompt to Ollama model: {model}")
-
-        # Create chat completion
-        response = ollama.chat(
-            model=model,
-            messages=[
-                {
-                    "role": "user",
-                    "content": text,
-                },
-            ],
-        )
+        with pool.acquire(model) as host:
+            logger.info(f"Sending prompt to Ollama model {model} on {host.host}")
+
+            # Create chat completion
+            response = host.client.chat(
+                model=model,
+                messages=[
+                    {
+                        "role": "user",
+                        "content": text,
+                    },
+                ],
+                keep_alive=KEEP_ALIVE,
+            )
+            host.mark_resident(model)
 
         # Extract response content
-        return response.message.content
+        return ProviderResponse(
+            response.message.content,
+            input_tokens=response.prompt_eval_count,
+            output_tokens=response.eval_count,
+        )
     except Exception as e:
         logger.error(f"Error sending prompt to Ollama: {e}")
         raise ValueError(f"Failed to get response from Ollama: {str(e)}")
@@ -52,12 +213,69 @@ def list_models() -> List[str]:
     List available Ollama models.
 
     Returns:
-        List of model names
+        List of model names installed on any host of the pool
     """
     logger.info("Listing Ollama models")
-    response = ollama.list()
+    models: List[str] = []
+    errors = []
+    for host in pool.hosts:
+        try:
+            response = host.client.list()
+        except Exception as e:
+            logger.warning(f"Failed to list models on Ollama host {host.host}: {e}")
+            errors.append(e)
+            continue
+        # Extract model names from the models attribute
+        models.extend(model.model for model in response.models)
+
+    if len(errors) == len(pool.hosts):
+        raise errors[0]
+    return list(dict.fromkeys(models))
+
+
+def list_resident_models() -> Dict[str, List[str]]:
+    """
+    List the models loaded in memory on each host.
+
+    Returns:
+        Dictionary mapping each host to the names of its loaded models
+    """
+    return {host.host: host.refresh_resident() for host in pool.hosts}
+
+
+def preload_models(models: Optional[List[str]] = None, wait: bool = False) -> List[threading.Thread]:
+    """
+    Load models into memory on every host, so the first requests do not pay the cold load.
+
+    Args:
+        models: Models to load (defaults to the comma-separated OLLAMA_PRELOAD_MODELS)
+        wait: Whether to wait until every host has finished loading
+
+    Returns:
+        The threads loading the models, one per host
+    """
+    if models is None:
+        models = [model.strip() for model in os.environ.get("OLLAMA_PRELOAD_MODELS", "").split(",") if model.strip()]
+    if not models:
+        return []
 
-    # Extract model names from the models attribute
-    models = [model.model for model in response.models]
+    def load(host: OllamaHost) -> None:
+        for model in models:
+            try:
+                # An empty generate request loads the model without producing output
+                host.client.generate(model=model, keep_alive=KEEP_ALIVE)
+                logger.info(f"Preloaded Ollama model {model} on {host.host}")
+            except Exception as e:
+                logger.warning(f"Failed to preload Ollama model {model} on {host.host}: {e}")
+        host.refresh_resident()
 
-    return models
+    threads = [
+        threading.Thread(target=load, args=(host,), name=f"ollama-preload-{index}", daemon=True)
+        for index, host in enumerate(pool.hosts)
+    ]
+    for thread in threads:
+        thread.start()
+    if wait:
+        for thread in threads:
+            thread.join()
+    return threads
@@ -3,11 +3,13 @@ OpenAI provider implementation.
 """
 
 import os
-from openai import OpenAI
+from openai import OpenAI, DefaultHttpxClient
 from typing import List
 import logging
 from dotenv import load_dotenv
 from ..utils import parse_reasoning_effort
+from ..data_types import ProviderResponse
+from ..transport import get_http_client
 
 # Load environment variables
 load_dotenv()
@@ -15,8 +17,12 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+# Initialize OpenAI client (OPENAI_BASE_URL points it at a proxy or local stub)
+client = OpenAI(
+    api_key=os.environ.get("OPENAI_API_KEY"),
+    base_url=os.environ.get("OPENAI_BASE_URL") or None,
+    http_client=get_http_client("openai", DefaultHttpxClient)
+)
 
 # Models that support reasoning effort
 REASONING_ENABLED_MODELS = ["o3-mini", "o4-mini", "o3"]
@@ -32,7 +38,7 @@ def prompt_with_reasoning(text: str, model: str, reasoning_effort: str) -> str:
         reasoning_effort: The reasoning effort level (low, medium, high)
         
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by OpenAI
     """
     try:
         logger.info(f"Sending prompt to OpenAI model {model} with reasoning effort level {reasoning_effort}")
@@ -42,7 +48,7 @@ def prompt_with_reasoning(text: str, model: str, reasoning_effort: str) -> str:
             messages=[{"role": "user", "content": text}],
         )
 
-        return response.choices[0].message.content
+        return ProviderResponse.from_openai_usage(response.choices[0].message.content, response.usage)
     except Exception as e:
         logger.error(f"Error sending prompt with reasoning to OpenAI: {e}")
         raise ValueError(f"Failed to get response from OpenAI with reasoning: {str(e)}")
@@ -59,7 +65,7 @@ def prompt(text: str, model: str) -> str:
         model: The model name, optionally with reasoning effort suffix
 
     Returns:
-        Response string from the model
+        Response string from the model, with the token usage reported by OpenAI
     """
     # Parse the model name to check for reasoning effort suffixes
     base_model, reasoning_effort = parse_reasoning_effort(model)
@@ -78,7 +84,7 @@ def prompt(text: str, model: str) -> str:
             messages=[{"role": "user", "content": text}],
         )
 
-        return response.choices[0].message.content
+        return ProviderResponse.from_openai_usage(response.choices[0].message.content, response.usage)
     except Exception as e:
         logger.error(f"Error sending prompt to OpenAI: {e}")
         raise ValueError(f"Failed to get response from OpenAI: {str(e)}")
@@ -3,28 +3,193 @@ Testing provider implementation.
 
 This provider is specifically designed for testing purposes.
 It does not require API keys and returns predictable responses.
+
+Performance and fault behavior can be simulated per model name with profiles,
+configured through the TESTING_PROVIDER_PROFILES environment variable (a JSON
+object, or a path to a JSON file, mapping model names or glob patterns to
+profiles) or with set_profile(). Supported profile keys:
+
+- latency: {"distribution": "fixed", "ms": 200}
+           {"distribution": "lognormal", "median_ms": 800, "sigma": 0.5}
+           {"distribution": "replay", "file": "latencies.json"}
+- ttft_ms: time to first token when streaming
+- tokens_per_second: streaming speed (whitespace-delimited tokens)
+- rate_limit_rate / server_error_rate: probability of a 429 / 5xx error
+- hang_rate / hang_seconds: probability and duration of a hang
+- truncate_rate: probability of returning a truncated response
+- seed: seed of the profile's random number generator
+
+Simulated waits (latency, hangs, streaming) end as soon as the tool call is
+cancelled, like an aborted HTTP request.
 """
 
+import os
+import re
+import json
+import math
+import random
+import fnmatch
 import logging
-from typing import List
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from .. import cancellation
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-def prompt(text: str, model: str) -> str:
+# Synthetic latency (in seconds) added to every prompt, used by the benchmark suite
+SYNTHETIC_LATENCY = float(os.environ.get("TESTING_PROVIDER_LATENCY_MS", "0")) / 1000
+
+# Models always listed by the testing provider
+BASE_MODELS = ["test-model-1", "test-model-2", "test-model-3"]
+
+# Default hang duration in seconds when a profile does not set hang_seconds
+DEFAULT_HANG_SECONDS = 3600.0
+
+# Whitespace-delimited token, keeping the surrounding whitespace attached
+_TOKEN_PATTERN = re.compile(r"\s*\S+\s*|\s+")
+
+
+class RateLimitError(Exception):
+    """Simulated HTTP 429 rate limit error."""
+    status_code = 429
+
+
+class ServerError(Exception):
+    """Simulated HTTP 5xx server error."""
+    status_code = 503
+
+
+class _ProfileState:
+    """Random number generator and replay position of a profile."""
+
+    def __init__(self, profile: Dict[str, Any]):
+        self.profile = profile
+        self.random = random.Random(profile.get("seed"))
+        self.replay_samples = _load_replay_samples(profile)
+        self.replay_index = 0
+        self.lock = threading.Lock()
+
+    def draw(self) -> float:
+        """Draw a uniform random number in [0, 1)."""
+        with self.lock:
+            return self.random.random()
+
+    def latency_seconds(self) -> float:
+        """Sample the profile's latency distribution."""
+        latency = self.profile.get("latency")
+        if not latency:
+            return 0.0
+
+        distribution = latency.get("distribution", "fixed")
+        with self.lock:
+            if distribution == "fixed":
+                return latency.get("ms", 0) / 1000
+            if distribution == "lognormal":
+                median_ms = latency.get("median_ms", 0)
+                if median_ms <= 0:
+                    return 0.0
+                return self.random.lognormvariate(math.log(median_ms), latency.get("sigma", 0.5)) / 1000
+            if distribution == "replay":
+                if not self.replay_samples:
+                    return 0.0
+                sample = self.replay_samples[self.replay_index % len(self.replay_samples)]
+                self.replay_index += 1
+                return sample / 1000
+        raise ValueError(f"Unknown latency distribution: {distribution}")
+
+
+# Profiles by model name or glob pattern, and their runtime state
+_profiles: Dict[str, Dict[str, Any]] = {}
+_profile_states: Dict[str, _ProfileState] = {}
+_profiles_lock = threading.Lock()
+
+
+def _load_replay_samples(profile: Dict[str, Any]) -> List[float]:
     """
-    Mock implementation of prompt function for testing.
-    
+    Load recorded latencies (in milliseconds) for a replay distribution.
+
+    The file may contain a JSON list of numbers, or of objects with a
+    "latency_ms" or "elapsed" (seconds) field.
+    """
+    latency = profile.get("latency") or {}
+    if latency.get("distribution") != "replay":
+        return []
+    if "samples_ms" in latency:
+        return [float(sample) for sample in latency["samples_ms"]]
+
+    with open(latency["file"], "r", encoding="utf-8") as f:
+        records = json.load(f)
+    samples = []
+    for record in records:
+        if isinstance(record, (int, float)):
+            samples.append(float(record))
+        elif "latency_ms" in record:
+            samples.append(float(record["latency_ms"]))
+        elif "elapsed" in record:
+            samples.append(float(record["elapsed"]) * 1000)
+    return samples
+
+
+def _load_env_profiles() -> None:
+    """Load profiles from the TESTING_PROVIDER_PROFILES environment variable."""
+    value = os.environ.get("TESTING_PROVIDER_PROFILES")
+    if not value:
+        return
+    try:
+        if os.path.isfile(value):
+            with open(value, "r", encoding="utf-8") as f:
+                profiles = json.load(f)
+        else:
+            profiles = json.loads(value)
+    except (OSError, ValueError) as e:
+        logger.error(f"Failed to load TESTING_PROVIDER_PROFILES: {e}")
+        return
+    for model, profile in profiles.items():
+        set_profile(model, profile)
+
+
+def set_profile(model: str, profile: Dict[str, Any]) -> None:
+    """
+    Configure the simulated behavior of a model.
+
+    Args:
+        model: Model name or glob pattern (e.g., "slow-*")
+        profile: Profile dictionary (see module docstring)
+    """
+    with _profiles_lock:
+        _profiles[model] = profile
+        _profile_states[model] = _ProfileState(profile)
+
+
+def clear_profiles() -> None:
+    """Remove all configured profiles."""
+    with _profiles_lock:
+        _profiles.clear()
+        _profile_states.clear()
+
+
+def get_profile(model: str) -> Optional[_ProfileState]:
+    """
+    Find the profile state for a model, by exact name first and then by glob pattern.
+
     Args:
-        text: The prompt text
         model: The model name
-        
+
     Returns:
-        A predictable response based on the input text
+        The profile state, or None if no profile matches
     """
-    logger.info(f"Testing provider received prompt request for model {model}")
-    
-    # Return predictable responses based on input text
+    with _profiles_lock:
+        if model in _profile_states:
+            return _profile_states[model]
+        for pattern, state in _profile_states.items():
+            if fnmatch.fnmatchcase(model, pattern):
+                return state
+    return None
+
+
+def _canned_response(text: str) -> str:
+    """Return the predictable response for a prompt."""
     if "capital of France" in text:
         return "Paris is the capital of France."
     elif "largest planet" in text:
@@ -34,12 +199,85 @@ def prompt(text: str, model: str) -> str:
     else:
         return f"Testing response for: {text}"
 
+
+def _tokenize(response: str) -> List[str]:
+    """Split a response into whitespace-preserving chunks, one per token."""
+    return _TOKEN_PATTERN.findall(response)
+
+
+def stream(text: str, model: str) -> Iterator[str]:
+    """
+    Stream a response chunk by chunk, applying the model's profile.
+
+    Args:
+        text: The prompt text
+        model: The model name
+
+    Yields:
+        Response chunks (one per whitespace-delimited token)
+    """
+    logger.info(f"Testing provider received prompt request for model {model}")
+
+    if SYNTHETIC_LATENCY > 0:
+        cancellation.sleep(SYNTHETIC_LATENCY)
+
+    state = get_profile(model)
+    profile = state.profile if state else {}
+
+    if state:
+        if state.draw() < profile.get("hang_rate", 0):
+            logger.warning(f"Testing provider simulating a hang for model {model}")
+            cancellation.sleep(profile.get("hang_seconds", DEFAULT_HANG_SECONDS))
+        if state.draw() < profile.get("rate_limit_rate", 0):
+            raise RateLimitError(f"Simulated rate limit for model {model}")
+        if state.draw() < profile.get("server_error_rate", 0):
+            raise ServerError(f"Simulated server error for model {model}")
+        latency = state.latency_seconds()
+        if latency > 0:
+            cancellation.sleep(latency)
+
+    response = _canned_response(text)
+    chunks = _tokenize(response)
+
+    if state and state.draw() < profile.get("truncate_rate", 0):
+        chunks = chunks[:max(1, len(chunks) // 2)]
+
+    ttft_ms = profile.get("ttft_ms", 0)
+    if ttft_ms > 0:
+        cancellation.sleep(ttft_ms / 1000)
+
+    tokens_per_second = profile.get("tokens_per_second", 0)
+    for index, chunk in enumerate(chunks):
+        if tokens_per_second > 0 and index > 0:
+            cancellation.sleep(1 / tokens_per_second)
+        yield chunk
+
+
+def prompt(text: str, model: str) -> str:
+    """
+    Mock implementation of prompt function for testing.
+
+    Args:
+        text: The prompt text
+        model: The model name
+
+    Returns:
+        A predictable response based on the input text
+    """
+    return "".join(stream(text, model))
+
+
 def list_models() -> List[str]:
     """
     Mock implementation of list_models function for testing.
-    
+
     Returns:
-        A predetermined list of test models
+        A predetermined list of test models, plus any models with an exact-name profile
     """
     logger.info("Testing provider received list_models request")
-    return ["test-model-1", "test-model-2", "test-model-3"]
\ No newline at end of file
+    with _profiles_lock:
+        profiled = [model for model in _profiles if not any(c in model for c in "*?[") and model not in BASE_MODELS]
+    return list(BASE_MODELS) + profiled
+
+
+_load_env_profiles()
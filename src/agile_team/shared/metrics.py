@@ -0,0 +1,358 @@
+"""
+Per-provider request metrics for the Agile Team MCP Server.
+
+The model router records request counts, error counts by class, latency and
+time-to-first-token histograms, and input/output token counts per provider and
+model. Queue wait is recorded per queue by the components that queue work.
+Histograms use fixed buckets, so memory does not grow with traffic.
+
+Metrics are exposed as a JSON snapshot (metrics_tool) and in the Prometheus
+text format, optionally written periodically to a textfile for the node
+exporter's textfile collector (METRICS_TEXTFILE environment variable).
+"""
+
+import os
+import atexit
+import bisect
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from agile_team.shared.config import (
+    METRICS_LATENCY_BUCKETS,
+    METRICS_TOKEN_BUCKETS,
+    METRICS_EXPORT_INTERVAL_SECONDS,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "agile_team"
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in a text (about four characters per token).
+
+    Args:
+        text: The text to estimate
+
+    Returns:
+        Estimated token count
+    """
+    return (len(text) + 3) // 4
+
+
+class Histogram:
+    """Histogram with fixed bucket upper bounds."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add an observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile by linear interpolation within its bucket.
+
+        Args:
+            q: Quantile in [0, 1]
+
+        Returns:
+            The estimated value, or None without observations
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def summary(self) -> Dict[str, Any]:
+        """Count, sum, mean and estimated percentiles."""
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store of labelled counters and histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+
+    def inc(self, name: str, labels: Dict[str, str], value: float = 1, help_text: str = "") -> None:
+        """Increment a counter."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+            self._help.setdefault(name, help_text)
+
+    def observe(
+        self,
+        name: str,
+        labels: Dict[str, str],
+        value: float,
+        buckets: Sequence[float] = METRICS_LATENCY_BUCKETS,
+        help_text: str = ""
+    ) -> None:
+        """Add an observation to a histogram."""
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(buckets)
+            series[key].observe(value)
+            self._help.setdefault(name, help_text)
+
+    def reset(self) -> None:
+        """Remove all recorded metrics."""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+            self._help.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Return all metrics as a JSON-serializable dictionary.
+
+        Returns:
+            {"counters": {name: [{"labels", "value"}]}, "histograms": {name: [{"labels", ...summary}]}}
+        """
+        with self._lock:
+            return {
+                "counters": {
+                    name: [{"labels": dict(labels), "value": value} for labels, value in sorted(series.items())]
+                    for name, series in sorted(self._counters.items())
+                },
+                "histograms": {
+                    name: [{"labels": dict(labels), **histogram.summary()} for labels, histogram in sorted(series.items())]
+                    for name, series in sorted(self._histograms.items())
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                full_name = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# HELP {full_name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {full_name} counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{full_name}{_format_labels(labels)} {_format_value(value)}")
+            for name, series in sorted(self._histograms.items()):
+                full_name = f"{METRIC_PREFIX}_{name}"
+                lines.append(f"# HELP {full_name} {self._help.get(name, '')}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for labels, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        bucket_labels = labels + (("le", _format_value(bound)),)
+                        lines.append(f"{full_name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+                    bucket_labels = labels + (("le", "+Inf"),)
+                    lines.append(f"{full_name}_bucket{_format_labels(bucket_labels)} {histogram.count}")
+                    lines.append(f"{full_name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{full_name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# Process-wide registry used by the model router
+registry = MetricsRegistry()
+
+
+def record_request(
+    provider: str,
+    model: str,
+    latency: float,
+    input_text: str,
+    output_text: Optional[str] = None,
+    ttft: Optional[float] = None,
+    error: Optional[BaseException] = None,
+    input_tokens: Optional[int] = None,
+    output_tokens: Optional[int] = None
+) -> None:
+    """
+    Record one provider request.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        latency: Total request latency in seconds
+        input_text: Prompt text
+        output_text: Response text, if the request succeeded
+        ttft: Time to first token in seconds, when streaming
+        error: The exception raised, if the request failed
+        input_tokens: Prompt tokens reported by the provider (estimated from input_text if None)
+        output_tokens: Response tokens reported by the provider (estimated from output_text if None)
+    """
+    labels = {"provider": provider, "model": model}
+    registry.inc("requests_total", labels, help_text="Provider requests")
+    registry.observe("request_latency_seconds", labels, latency, help_text="Provider request latency")
+    if ttft is not None:
+        registry.observe("time_to_first_token_seconds", labels, ttft, help_text="Time to first streamed token")
+    if input_tokens is None:
+        input_tokens = estimate_tokens(input_text)
+    registry.inc("input_tokens_total", labels, input_tokens, help_text="Prompt tokens")
+    registry.observe("input_tokens", labels, input_tokens, METRICS_TOKEN_BUCKETS, help_text="Prompt tokens per request")
+    if error is not None:
+        registry.inc(
+            "errors_total", {**labels, "error_class": type(error).__name__}, help_text="Provider errors by exception class"
+        )
+    if output_text is not None:
+        if output_tokens is None:
+            output_tokens = estimate_tokens(output_text)
+        registry.inc("output_tokens_total", labels, output_tokens, help_text="Response tokens")
+        registry.observe("output_tokens", labels, output_tokens, METRICS_TOKEN_BUCKETS, help_text="Response tokens per request")
+
+
+def record_queue_wait(queue: str, wait: float) -> None:
+    """
+    Record how long a unit of work waited in a queue before starting.
+
+    Args:
+        queue: Queue name (e.g., "workflow")
+        wait: Wait time in seconds
+    """
+    registry.observe("queue_wait_seconds", {"queue": queue}, wait, help_text="Time spent waiting in a queue")
+
+
+def get_metrics(format: str = "json") -> Any:
+    """
+    Return the current metrics.
+
+    Args:
+        format: "json" for a snapshot dictionary or "prometheus" for the text exposition format
+
+    Returns:
+        Metrics snapshot dictionary or Prometheus text
+    """
+    if format == "prometheus":
+        return registry.to_prometheus()
+    if format != "json":
+        raise ValueError(f"Unsupported metrics format: {format}. Expected 'json' or 'prometheus'")
+    return registry.snapshot()
+
+
+def write_textfile(path: str) -> None:
+    """
+    Atomically write the metrics in Prometheus text format to a file.
+
+    Args:
+        path: Destination path (should end in .prom for the node exporter)
+    """
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(registry.to_prometheus())
+    os.replace(temp_path, path)
+
+
+class TextfileExporter:
+    """Background thread periodically writing metrics to a Prometheus textfile."""
+
+    def __init__(self, path: str, interval: float = METRICS_EXPORT_INTERVAL_SECONDS):
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+
+    def start(self) -> "TextfileExporter":
+        """Start exporting."""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._export()
+
+    def _export(self) -> None:
+        try:
+            write_textfile(self.path)
+        except OSError as e:
+            logger.error(f"Failed to write metrics textfile {self.path}: {e}")
+
+    def stop(self) -> None:
+        """Stop exporting and write a final snapshot."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        self._export()
+
+
+_exporter: Optional[TextfileExporter] = None
+
+
+def start_textfile_exporter(path: Optional[str] = None, interval: Optional[float] = None) -> Optional[TextfileExporter]:
+    """
+    Start the Prometheus textfile exporter.
+
+    Args:
+        path: Destination file (defaults to the METRICS_TEXTFILE environment variable)
+        interval: Seconds between writes (defaults to METRICS_EXPORT_INTERVAL or the configured default)
+
+    Returns:
+        The running exporter, or None if no path is configured
+    """
+    global _exporter
+    path = path or os.environ.get("METRICS_TEXTFILE")
+    if not path:
+        return None
+    if interval is None:
+        interval = float(os.environ.get("METRICS_EXPORT_INTERVAL", METRICS_EXPORT_INTERVAL_SECONDS))
+    stop_textfile_exporter()
+    _exporter = TextfileExporter(path, interval).start()
+    logger.info(f"Writing Prometheus metrics to {path} every {interval}s")
+    return _exporter
+
+
+def stop_textfile_exporter() -> None:
+    """Stop the Prometheus textfile exporter, if running."""
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+        _exporter = None
+
+
+atexit.register(stop_textfile_exporter)
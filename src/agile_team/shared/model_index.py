@@ -0,0 +1,149 @@
+"""
+Ranked fuzzy matching of model names against a provider's model catalog.
+
+An index is built once per distinct catalog (model_index is memoized on the
+catalog contents) and maps character trigrams of each normalized model name to
+the models containing them. A query is matched in stages:
+
+1. Exact or separator-insensitive match ("gpt4" -> "gpt-4"): confidence 1.0
+2. Nicknames from MODEL_NAME_ALIASES ("sonnet" -> "claude-3-7-sonnet") replace the query
+3. Token prefix match ("claude-3-7-sonnet" -> "claude-3-7-sonnet-20250219"), where the
+   query must end on a token boundary, so "gpt-4" does not match "gpt-4o"
+4. Candidates sharing trigrams with the query, scored by trigram overlap and edit distance
+
+Ties are broken by version: newer dates and higher version numbers rank first.
+"""
+
+import re
+import functools
+from typing import Dict, List, Sequence, Set, Tuple
+
+from agile_team.shared.config import MODEL_NAME_ALIASES
+
+# Separators between the tokens of a model name
+_SEPARATORS = re.compile(r"[-_.:/\s]+")
+
+# Candidates scored by edit distance after trigram filtering
+_EDIT_DISTANCE_CANDIDATES = 20
+
+
+def _tokens(name: str) -> Tuple[str, ...]:
+    return tuple(token for token in _SEPARATORS.split(name.lower()) if token)
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance between two strings."""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        previous = current
+    return previous[-1]
+
+
+def _version_key(name: str) -> Tuple[int, ...]:
+    """Numbers in a model name, so newer dates and versions sort higher."""
+    return tuple(int(number) for number in re.findall(r"\d+", name))
+
+
+class ModelIndex:
+    """Trigram index over one model catalog, returning ranked matches with a confidence."""
+
+    def __init__(self, models: Sequence[str]):
+        self.models = list(dict.fromkeys(models))
+        self._tokens = [_tokens(model) for model in self.models]
+        self._normalized = {"".join(tokens): index for index, tokens in reversed(list(enumerate(self._tokens)))}
+        self._postings: Dict[str, List[int]] = {}
+        for index, tokens in enumerate(self._tokens):
+            for trigram in _trigrams("-".join(tokens)):
+                self._postings.setdefault(trigram, []).append(index)
+
+    def search(self, query: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Rank the catalog's models by similarity to a query.
+
+        Args:
+            query: Model name, possibly misspelled, abbreviated or a nickname
+            limit: Maximum number of candidates to return
+
+        Returns:
+            List of (model, confidence) pairs, best first; confidence is between 0 and 1
+        """
+        if query in self.models:
+            return [(query, 1.0)]
+        tokens = _tokens(query)
+        exact = self._normalized.get("".join(tokens))
+        if exact is not None:
+            return [(self.models[exact], 1.0)]
+        alias = MODEL_NAME_ALIASES.get("-".join(tokens))
+        if alias:
+            tokens = _tokens(alias)
+            exact = self._normalized.get("".join(tokens))
+            if exact is not None:
+                return [(self.models[exact], 1.0)]
+        if not tokens:
+            return []
+
+        scores: Dict[int, float] = {}
+        # Token prefix matches: the query names a model family or omits a date/version suffix
+        for index, candidate in enumerate(self._tokens):
+            if len(candidate) > len(tokens) and candidate[:len(tokens)] == tokens:
+                scores[index] = 0.85 + 0.15 * len(tokens) / len(candidate)
+
+        # Trigram candidates, ranked by overlap and then by edit distance
+        text = "-".join(tokens)
+        query_trigrams = _trigrams(text)
+        shared: Dict[int, int] = {}
+        for trigram in query_trigrams:
+            for index in self._postings.get(trigram, ()):
+                shared[index] = shared.get(index, 0) + 1
+        overlap = {
+            index: 2 * count / (len(query_trigrams) + len(_trigrams("-".join(self._tokens[index]))))
+            for index, count in shared.items()
+        }
+        for index in sorted(overlap, key=overlap.get, reverse=True)[:_EDIT_DISTANCE_CANDIDATES]:
+            candidate = "-".join(self._tokens[index])
+            similarity = 1 - _edit_distance(text, candidate) / max(len(text), len(candidate))
+            scores[index] = max(scores.get(index, 0.0), (overlap[index] + similarity) / 2)
+
+        ranked = sorted(
+            scores, key=lambda index: (round(scores[index], 6), _version_key(self.models[index])), reverse=True
+        )
+        return [(self.models[index], round(scores[index], 4)) for index in ranked[:limit]]
+
+
+@functools.lru_cache(maxsize=64)
+def model_index(models: Tuple[str, ...]) -> ModelIndex:
+    """
+    The index of a model catalog, built once per distinct catalog.
+
+    Args:
+        models: The catalog's model names
+
+    Returns:
+        The catalog's index
+    """
+    return ModelIndex(models)
+
+
+def rank_models(query: str, models: Sequence[str], limit: int = 5) -> List[Tuple[str, float]]:
+    """
+    Rank the models of a catalog by similarity to a query.
+
+    Args:
+        query: Model name to match
+        models: The catalog's model names
+        limit: Maximum number of candidates to return
+
+    Returns:
+        List of (model, confidence) pairs, best first
+    """
+    return model_index(tuple(models)).search(query, limit)
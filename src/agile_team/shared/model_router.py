@@ -1,13 +1,18 @@
 """Model router for the Agile Team MCP Server."""
 
 import os
+import time
+import hashlib
+import inspect
 import importlib
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Callable, Dict, Iterable, List, Any, Optional, Tuple, Union
 from mcp.server.fastmcp.exceptions import ValidationError, ToolError, ResourceError
 from dotenv import load_dotenv
-from agile_team.shared.utils import weak_provider_and_model
-from agile_team.shared.data_types import ModelProviders
+from agile_team.shared.utils import env_number, model_spec, weak_provider_and_model
+from agile_team.shared.data_types import FallbackModelList, ModelProviders, ProviderResponse
+from agile_team.shared.config import CATALOG_CACHE_TTL_SECONDS, RESPONSE_CACHE_TTL_SECONDS
+from agile_team.shared import budget, cache, cancellation, cassette, metrics, routing, tracing, usage
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -87,19 +92,99 @@ PROVIDER_CONFIG["groq"]["models"] = [
 ]
 
 
+class ProviderHandle:
+    """
+    A provider resolved once: its module, capabilities and credential status.
+    
+    Handles are cached by provider and reused while the environment variables the
+    provider depends on (its API key, Ollama hosts) are unchanged.
+    """
+
+    def __init__(self, provider: str, module: Any, provider_info: Optional[Dict[str, Any]] = None):
+        provider_info = provider_info or {}
+        self.provider = provider
+        self.module = module
+        self.testing = provider_info.get("testing", False)
+        self.local = provider_info.get("local", False)
+        self.key_env: Optional[str] = provider_info.get("key_env")
+        self.has_credentials = self.key_env is None or bool(os.getenv(self.key_env))
+        # Stream when the provider module supports it, so time to first token is measured
+        self.streams = inspect.isgeneratorfunction(getattr(module, "stream", None))
+        self.fingerprint = _config_fingerprint(provider)
+
+    @property
+    def client(self) -> Any:
+        """The provider module's SDK client (or Ollama host pool), if it has one."""
+        return getattr(self.module, "client", None) or getattr(self.module, "pool", None)
+
+
+def _config_fingerprint(provider: str) -> Tuple[Optional[str], ...]:
+    """Values of the environment variables a provider handle depends on."""
+    return tuple(os.environ.get(name) for name in _HANDLE_ENV.get(provider, ()))
+
+
+def _config_digest(provider: str) -> str:
+    """Short hash of a provider's configuration, for cache keys that must not be shared across deployments."""
+    return hashlib.sha256(repr(_config_fingerprint(provider)).encode("utf-8")).hexdigest()[:16]
+
+
+# Environment variables each provider handle depends on: its API key and endpoint
+_HANDLE_ENV = {
+    name: (info["key_env"], f"{name.upper()}_BASE_URL") for name, info in PROVIDER_CONFIG.items() if "key_env" in info
+}
+_HANDLE_ENV["ollama"] = ("OLLAMA_HOSTS", "OLLAMA_HOST")
+
+# Resolved provider handles by full and short provider name
+_handles: Dict[str, ProviderHandle] = {}
+
+
+def invalidate_provider_handles(provider: Optional[str] = None) -> None:
+    """
+    Drop cached provider handles, so they are resolved again on next use.
+    
+    Args:
+        provider: Provider whose handle to drop (all providers when None)
+    """
+    if provider is None:
+        _handles.clear()
+        return
+    provider_enum = ModelProviders.from_name(provider)
+    for name in (provider_enum.full_name, provider_enum.short_name) if provider_enum else (provider,):
+        _handles.pop(name, None)
+
+
 class ModelRouter:
     """Router for model operations across different providers."""
     
     @staticmethod
-    def _get_provider_module(provider: str) -> Any:
+    def _get_provider_handle(provider: str) -> ProviderHandle:
         """
-        Get or import the provider module.
+        Get the cached handle of a provider, resolving it on first use or after a configuration change.
         
         Args:
-            provider: Provider name
+            provider: Provider name (full or short)
             
         Returns:
-            Provider module
+            Provider handle
+        """
+        handle = _handles.get(provider)
+        if handle is None or handle.fingerprint != _config_fingerprint(handle.provider):
+            handle = ModelRouter._resolve_provider_handle(provider)
+            _handles[provider] = handle
+        if not handle.has_credentials:
+            raise ValidationError(f"Missing API key for {handle.provider}. Set the {handle.key_env} environment variable")
+        return handle
+
+    @staticmethod
+    def _resolve_provider_handle(provider: str) -> ProviderHandle:
+        """
+        Resolve a provider: normalize its name, check its configuration and import its module.
+        
+        Args:
+            provider: Provider name (full or short)
+            
+        Returns:
+            New provider handle
         """
         # Convert provider name to full name using ModelProviders enum
         provider_enum = ModelProviders.from_name(provider)
@@ -117,26 +202,36 @@ class ModelRouter:
             logger.debug(f"Using testing provider: {provider}")
         # For local providers like Ollama, no API key needed
         elif provider_info.get("local", False):
-            # Check if OLLAMA_HOST is set (not required but recommended)
-            if provider == "ollama" and not os.getenv("OLLAMA_HOST"):
-                logger.warning("OLLAMA_HOST environment variable not set, using default")
-        else:
-            # For cloud providers, check API key
-            api_key = os.getenv(provider_info["key_env"])
-            if not api_key:
-                raise ValidationError(f"Missing API key for {provider}. Set the {provider_info['key_env']} environment variable")
+            # Check if OLLAMA_HOSTS or OLLAMA_HOST is set (not required but recommended)
+            if provider == "ollama" and not (os.getenv("OLLAMA_HOSTS") or os.getenv("OLLAMA_HOST")):
+                logger.warning("OLLAMA_HOSTS and OLLAMA_HOST environment variables not set, using default")
         
-        # Import provider module (fresh import each time to avoid test interference)
+        # Import provider module
         try:
             module = importlib.import_module(provider_info["module_path"])
-            return module
         except ImportError:
             raise ResourceError(f"Provider module for {provider} not found: {provider_info['module_path']}")
         except Exception as e:
             raise ResourceError(f"Failed to import provider module for {provider}: {str(e)}")
+        logger.debug(f"Resolved provider handle for {provider}")
+        return ProviderHandle(provider, module, provider_info)
+
+    @staticmethod
+    def _get_provider_module(provider: str) -> Any:
+        """
+        Get the provider module from its cached handle.
+        
+        Args:
+            provider: Provider name
+            
+        Returns:
+            Provider module
+        """
+        return ModelRouter._get_provider_handle(provider).module
 
     @staticmethod
-    def prompt_model(provider: str, model: str, text: str) -> str:
+    @tracing.traced("ModelRouter.prompt_model", record_args=("provider", "model"))
+    def prompt_model(provider: str, model: str, text: str) -> ProviderResponse:
         """
         Send a prompt to a model and return the response.
         
@@ -146,23 +241,285 @@ class ModelRouter:
             text: Prompt text
             
         Returns:
-            Model response
+            Model response (a str carrying token usage and latency)
         """
-        # Convert provider name to full name using ModelProviders enum
-        provider_enum = ModelProviders.from_name(provider)
-        if not provider_enum:
-            raise ValidationError(f"Unsupported provider: {provider}")
+        # Calls of a cancelled tool call never start
+        cancellation.check()
         
-        provider = provider_enum.full_name
+        # Aliases are routed to one of their concrete targets
+        if provider == routing.ALIAS_PROVIDER:
+            return ModelRouter._prompt_alias(model, text)
+        
+        # Parse the provider and model once (memoized per distinct pair)
+        provider, model = model_spec(provider, model)
+        
+        # Serve the call from a cassette when replaying (no provider or API key needed)
+        player = cassette.get_player()
+        if player:
+            return ModelRouter._call_provider(
+                provider, model, text, lambda: player.stream(provider, model, text), replayed=True
+            )
+        
+        # Get the cached provider handle
+        handle = ModelRouter._get_provider_handle(provider)
+        
+        # Identical prompts are answered once across all processes sharing the cache
+        ttl = _cache_ttl("RESPONSE_CACHE_TTL_SECONDS", RESPONSE_CACHE_TTL_SECONDS)
+        if ttl:
+            return ModelRouter._prompt_cached(handle, provider, model, text, ttl)
+        return ModelRouter._prompt_handle(handle, provider, model, text)
+
+    @staticmethod
+    def _prompt_cached(handle: ProviderHandle, provider: str, model: str, text: str, ttl: float) -> ProviderResponse:
+        """
+        Send a prompt through the response cache.
         
-        # Get provider module
-        provider_module = ModelRouter._get_provider_module(provider)
+        The budget reservation comes first, so a call downgraded by a budget is
+        cached under the model that answered it. Cache hits release the
+        reservation and are recorded as saved tokens in the usage ledger and metrics.
         
+        Args:
+            handle: The provider's handle
+            provider: Provider name
+            model: Model name
+            text: Prompt text
+            ttl: Seconds responses are cached for
+            
+        Returns:
+            Model response, from the cache or the provider
+        """
+        model, reservation = budget.reserve(provider, model, text)
+        # Keyed by the provider's configuration too, so deployments with other keys or endpoints
+        # sharing the cache do not answer each other
+        key = hashlib.sha256(f"{provider}\0{_config_digest(provider)}\0{model}\0{text}".encode("utf-8")).hexdigest()
+        called = False
+
+        def compute() -> Dict[str, Any]:
+            nonlocal called
+            called = True
+            return _response_entry(ModelRouter._prompt_reserved(handle, provider, model, text, reservation))
+
+        started = time.perf_counter()
         try:
-            # Call the prompt function in the provider module
-            return provider_module.prompt(text=text, model=model)
-        except Exception as e:
-            raise ToolError(f"Error from {provider} API: {str(e)}")
+            entry = dict(cache.get_cache().get_or_compute("response", key, compute, ttl))
+        except BaseException:
+            if not called:
+                reservation.release()
+            raise
+        response = ProviderResponse(entry.pop("text"), **entry)
+        if not called:
+            # Answered from the cache: nothing was spent
+            reservation.release()
+            saved_tokens = (response.input_tokens or 0) + (response.output_tokens or 0)
+            metrics.registry.inc(
+                "response_cache_saved_tokens_total", {"provider": provider, "model": model}, saved_tokens,
+                help_text="Prompt and response tokens of calls answered from the response cache"
+            )
+            usage.record_cached_response(provider, model, response, time.perf_counter() - started)
+        return response
+
+    @staticmethod
+    def _prompt_handle(handle: ProviderHandle, provider: str, model: str, text: str) -> ProviderResponse:
+        """
+        Send a prompt through a resolved provider handle, within the active budgets.
+        
+        Args:
+            handle: The provider's handle
+            provider: Provider name
+            model: Model name
+            text: Prompt text
+            
+        Returns:
+            Model response
+        """
+        # Reserve the estimated cost against the active budgets (may reject or downgrade the call)
+        model, reservation = budget.reserve(provider, model, text)
+        return ModelRouter._prompt_reserved(handle, provider, model, text, reservation)
+
+    @staticmethod
+    def _prompt_reserved(
+        handle: ProviderHandle, provider: str, model: str, text: str, reservation: budget.Reservation
+    ) -> ProviderResponse:
+        """
+        Send a prompt whose cost is reserved, settling the reservation with the reported usage.
+        
+        Args:
+            handle: The provider's handle
+            provider: Provider name
+            model: Model to call (after any budget downgrade)
+            text: Prompt text
+            reservation: The call's budget reservation, released if the call fails
+            
+        Returns:
+            Model response
+        """
+        if handle.streams:
+            call = lambda: handle.module.stream(text=text, model=model)
+        else:
+            call = lambda: [handle.module.prompt(text=text, model=model)]
+        try:
+            response = ModelRouter._call_provider(provider, model, text, call)
+        except BaseException:
+            reservation.release()
+            raise
+        reservation.settle(response)
+        return response
+
+    @staticmethod
+    def _prompt_alias(alias: str, text: str) -> ProviderResponse:
+        """
+        Send a prompt to the best target of a model alias, failing over to the next on error.
+        
+        Args:
+            alias: Alias name
+            text: Prompt text
+            
+        Returns:
+            Model response from the first target that succeeded
+        """
+        def available(provider: str) -> bool:
+            provider_enum = ModelProviders.from_name(provider)
+            if not provider_enum or provider_enum.full_name not in PROVIDER_CONFIG:
+                return False
+            key_env = PROVIDER_CONFIG[provider_enum.full_name].get("key_env")
+            return not key_env or bool(os.getenv(key_env)) or cassette.get_player() is not None
+        
+        targets = routing.router.rank(alias, available)
+        if not targets:
+            raise ValidationError(f"No available targets for model alias {alias}: set the API key of one of its providers")
+        
+        last_error: Optional[Exception] = None
+        for attempt, target in enumerate(targets):
+            routing.router.start(target)
+            started = time.perf_counter()
+            try:
+                response = ModelRouter.prompt_model(target[0], target[1], text)
+            except (cancellation.RequestCancelled, cancellation.DeadlineExceeded) as e:
+                # The call ran out of time or was cancelled; the next target would fare no better
+                routing.router.finish(alias, target, time.perf_counter() - started, e, attempt, sample=False)
+                raise
+            except budget.BudgetExceededError as e:
+                # Budget rejections say nothing about the target; do not fail over to spend elsewhere
+                routing.router.finish(alias, target, time.perf_counter() - started, e, attempt, sample=False)
+                raise
+            except ToolError as e:
+                routing.router.finish(alias, target, time.perf_counter() - started, e, attempt)
+                logger.warning(f"Alias {alias}: {target[0]}:{target[1]} failed, trying the next target: {e}")
+                last_error = e
+                continue
+            routing.router.finish(alias, target, response.latency_seconds or time.perf_counter() - started, None, attempt)
+            tracing.set_attributes(tracing.current_span(), {
+                "routing.alias": alias, "routing.target": f"{target[0]}:{target[1]}", "routing.attempt": attempt
+            })
+            return response
+        raise ToolError(f"All targets of model alias {alias} failed. Last error: {last_error}") from last_error
+
+    @staticmethod
+    def _call_provider(
+        provider: str,
+        model: str,
+        text: str,
+        call: Callable[[], Iterable[str]],
+        replayed: bool = False
+    ) -> ProviderResponse:
+        """
+        Run a provider call, recording metrics, token usage and (when enabled) the cassette entry.
+        
+        Args:
+            provider: Provider name
+            model: Model name
+            text: Prompt text
+            call: Zero-argument callable returning the response chunks
+            replayed: Whether the call is served from a cassette
+            
+        Returns:
+            Model response with token usage and latency
+        """
+        recorder = cassette.get_recorder()
+        with tracing.span(
+            f"provider.{provider}",
+            **{"llm.provider": provider, "llm.model": model, "llm.replayed": replayed}
+        ) as span:
+            started = time.perf_counter()
+            chunks: List[Tuple[float, str]] = []
+            stream = None
+            try:
+                stream = call()
+                for chunk in stream:
+                    # Stop reading a stream as soon as the tool call is cancelled
+                    cancellation.check()
+                    if not chunks:
+                        span.add_event("first_token")
+                    chunks.append((time.perf_counter() - started, chunk))
+                response, estimated = ModelRouter._with_usage(text, chunks, time.perf_counter() - started)
+            except cancellation.RequestCancelled:
+                span.add_event("cancelled")
+                metrics.registry.inc(
+                    "provider_calls_cancelled_total", {"provider": provider, "model": model},
+                    help_text="Provider calls aborted because their tool call was cancelled"
+                )
+                raise
+            except Exception as e:
+                metrics.record_request(
+                    provider, model, time.perf_counter() - started, text,
+                    ttft=chunks[0][0] if len(chunks) > 1 else None, error=e
+                )
+                if recorder:
+                    recorder.record(provider, model, text, started, error=str(e), chunks=chunks)
+                # A timeout caused by the call's deadline is reported as such
+                cancellation.check()
+                raise ToolError(f"Error from {provider} API: {str(e)}") from e
+            finally:
+                # Closing an unfinished stream closes its HTTP response
+                if hasattr(stream, "close"):
+                    stream.close()
+            
+            # Time to first token is only meaningful when the response was streamed in several chunks
+            metrics.record_request(
+                provider, model, response.latency_seconds, text, response,
+                ttft=chunks[0][0] if len(chunks) > 1 else None,
+                input_tokens=response.input_tokens, output_tokens=response.output_tokens
+            )
+            usage.record_usage(provider, model, response, estimated)
+            if recorder:
+                recorder.record(provider, model, text, started, response=response, chunks=chunks)
+            tracing.set_attributes(span, {
+                "llm.input_tokens": response.input_tokens,
+                "llm.output_tokens": response.output_tokens,
+                "llm.cached_tokens": response.cached_tokens,
+                "llm.thinking_tokens": response.thinking_tokens,
+                "llm.usage_estimated": estimated,
+            })
+            return response
+
+    @staticmethod
+    def _with_usage(text: str, chunks: List[Tuple[float, str]], latency: float) -> Tuple[ProviderResponse, bool]:
+        """
+        Build the response envelope from the received chunks.
+        
+        Uses the usage reported by the provider when its module returned a
+        ProviderResponse, and estimates the input and output tokens otherwise.
+        
+        Returns:
+            Tuple of (response, whether the token counts are estimates)
+        """
+        response_text = "".join(chunk for _, chunk in chunks)
+        reported = chunks[0][1] if len(chunks) == 1 and isinstance(chunks[0][1], ProviderResponse) else None
+        if reported is None or reported.input_tokens is None or reported.output_tokens is None:
+            return ProviderResponse(
+                response_text,
+                input_tokens=metrics.estimate_tokens(text),
+                output_tokens=metrics.estimate_tokens(response_text),
+                latency_seconds=latency
+            ), True
+        return ProviderResponse(
+            response_text,
+            input_tokens=reported.input_tokens,
+            output_tokens=reported.output_tokens,
+            cached_tokens=reported.cached_tokens,
+            thinking_tokens=reported.thinking_tokens,
+            latency_seconds=latency
+        ), False
 
     @staticmethod
     def list_providers(detailed: bool = False) -> Union[List[str], Dict[str, List[str]]]:
@@ -195,6 +552,7 @@ class ModelRouter:
             return all_providers
 
     @staticmethod
+    @tracing.traced("ModelRouter.list_models", record_args=("provider",))
     def list_models(provider: str) -> List[str]:
         """
         List all models for the given provider.
@@ -218,10 +576,26 @@ class ModelRouter:
             
         provider_info = PROVIDER_CONFIG[provider]
         
+        # When replaying a cassette, list the models it recorded for the provider
+        player = cassette.get_player()
+        if player and player.list_models(provider):
+            return player.list_models(provider)
+        
         try:
             # Get provider module
             provider_module = ModelRouter._get_provider_module(provider)
             
+            # Catalogs are fetched once per TTL across all processes sharing the cache,
+            # keyed by a hash of the credentials and hosts they were listed with
+            ttl = _cache_ttl("CATALOG_CACHE_TTL_SECONDS", CATALOG_CACHE_TTL_SECONDS)
+            if ttl and not provider_info.get("testing"):
+                try:
+                    return cache.get_cache().get_or_compute(
+                        "catalog", f"{provider}:{_config_digest(provider)}", lambda: _fetched_catalog(provider_module), ttl
+                    )
+                except _UncachedCatalog as fallback:
+                    return fallback.models
+            
             # Try to get dynamic list of models from the provider module
             return provider_module.list_models()
         except (AttributeError, ImportError, Exception) as e:
@@ -237,6 +611,32 @@ class ModelRouter:
             return []
 
 
+class _UncachedCatalog(Exception):
+    """Raised out of the catalog cache with a provider's fallback list, so the fallback is not cached."""
+
+    def __init__(self, models: List[str]):
+        super().__init__("Provider returned its fallback model list")
+        self.models = models
+
+
+def _fetched_catalog(provider_module: Any) -> List[str]:
+    """A provider's model list, if it was fetched from the provider rather than its hardcoded fallback."""
+    models = provider_module.list_models()
+    if isinstance(models, FallbackModelList):
+        raise _UncachedCatalog(models)
+    return models
+
+
+def _cache_ttl(env: str, default: float) -> float:
+    """Seconds entries are cached for, from an environment variable or the configured default."""
+    return max(env_number(env, default), 0.0)
+
+
+def _response_entry(response: ProviderResponse) -> Dict[str, Any]:
+    """Cached form of a response: its text and usage."""
+    return {"text": str(response), **response.usage()}
+
+
 # Function wrappers to maintain backwards compatibility
 def _get_provider_module(provider: str) -> Any:
     """Wrapper for ModelRouter._get_provider_module"""
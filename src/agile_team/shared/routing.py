@@ -0,0 +1,323 @@
+"""
+Latency-aware routing of logical model aliases.
+
+An alias (e.g. "fast-drafter") names a list of equivalent "provider:model"
+targets and can be used wherever "provider:model" is accepted, either bare or
+as "alias:<name>". For each call the model router ranks the alias targets by
+their exponentially weighted moving average (EWMA) latency, inflated by their
+EWMA error rate, skipping targets without headroom: cooling down after a rate
+limit error, or at their in-flight limit. The call goes to the best target and
+fails over to the next one on error.
+
+Targets that have not been called recently have stale statistics and are ranked
+first, so a vendor that was slow earlier is probed again. Every decision and its
+outcome is kept in a bounded log (routing_tool) and counted in the metrics.
+
+With a shared cache backend (see cache.py) rate limit cooldowns are provider
+health shared by all processes: a target rate limited in one worker is skipped
+by the others until its cooldown ends.
+
+Aliases come from MODEL_ALIASES in config.py, extended by the MODEL_ALIASES
+environment variable (JSON object) or the JSON file named by MODEL_ALIASES_FILE.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from mcp.server.fastmcp.exceptions import ValidationError
+
+from agile_team.shared.config import (
+    MODEL_ALIASES,
+    ROUTING_EWMA_ALPHA,
+    ROUTING_STATS_TTL_SECONDS,
+    ROUTING_RATE_LIMIT_COOLDOWN_SECONDS,
+    ROUTING_MAX_IN_FLIGHT,
+    ROUTING_DECISION_LOG_SIZE,
+)
+from agile_team.shared.utils import parse_provider_model
+from agile_team.shared import cache, metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Provider name of alias entries in validated (provider, model) pairs
+ALIAS_PROVIDER = "alias"
+
+# Lowest success rate used when inflating latency by the error rate
+_MIN_SUCCESS_RATE = 0.05
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Whether an error, or an error it was raised from, is a provider rate limit (HTTP 429).
+
+    Args:
+        error: The exception raised by a provider call
+
+    Returns:
+        True for rate limit errors
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if "RateLimit" in type(error).__name__ or getattr(error, "status_code", None) == 429:
+            return True
+        if "429" in str(error) or "rate limit" in str(error).lower():
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class TargetStats:
+    """Moving averages and headroom of one alias target."""
+
+    def __init__(self):
+        self.ewma_latency: Optional[float] = None
+        self.ewma_error = 0.0
+        self.samples = 0
+        self.in_flight = 0
+        self.last_sample = 0.0
+        self.cooldown_until = 0.0
+
+    def stale(self, now: float, ttl: float) -> bool:
+        """Whether the target has no recent samples."""
+        return self.samples == 0 or now - self.last_sample > ttl
+
+    def score(self) -> float:
+        """Expected latency of a successful call: EWMA latency divided by the EWMA success rate."""
+        if self.ewma_latency is None:
+            # Only failures so far
+            return float("inf")
+        return self.ewma_latency / max(1.0 - self.ewma_error, _MIN_SUCCESS_RATE)
+
+    def status(self, now: float) -> Dict[str, Any]:
+        """JSON-serializable statistics."""
+        return {
+            "ewma_latency_seconds": round(self.ewma_latency, 6) if self.ewma_latency is not None else None,
+            "ewma_error_rate": round(self.ewma_error, 4),
+            "samples": self.samples,
+            "in_flight": self.in_flight,
+            "cooldown_seconds": round(max(self.cooldown_until - now, 0.0), 3),
+        }
+
+
+class AliasRouter:
+    """Ranks alias targets by recent latency and error rate and records routing decisions."""
+
+    def __init__(
+        self,
+        aliases: Dict[str, List[str]],
+        alpha: float = ROUTING_EWMA_ALPHA,
+        stats_ttl: float = ROUTING_STATS_TTL_SECONDS,
+        cooldown: float = ROUTING_RATE_LIMIT_COOLDOWN_SECONDS,
+        max_in_flight: int = ROUTING_MAX_IN_FLIGHT,
+        log_size: int = ROUTING_DECISION_LOG_SIZE
+    ):
+        self.aliases = {name: [parse_provider_model(target) for target in targets] for name, targets in aliases.items()}
+        self.alpha = alpha
+        self.stats_ttl = stats_ttl
+        self.cooldown = cooldown
+        self.max_in_flight = max_in_flight
+        self.decisions: deque = deque(maxlen=log_size)
+        self._stats: Dict[Tuple[str, str], TargetStats] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, entry: str) -> Optional[str]:
+        """
+        The alias named by a models_prefixed_by_provider entry, if it is one.
+
+        Args:
+            entry: "alias:<name>" or a bare alias name
+
+        Returns:
+            The alias name, or None if the entry is not an alias
+        """
+        if entry.startswith(f"{ALIAS_PROVIDER}:"):
+            name = entry.split(":", 1)[1]
+            if name not in self.aliases:
+                raise ValidationError(f"Unknown model alias: {name}. Known aliases: {', '.join(sorted(self.aliases))}")
+            return name
+        return entry if entry in self.aliases else None
+
+    def _stats_for(self, target: Tuple[str, str]) -> TargetStats:
+        stats = self._stats.get(target)
+        if stats is None:
+            stats = self._stats[target] = TargetStats()
+        return stats
+
+    def rank(self, alias: str, available: Callable[[str], bool] = lambda provider: True) -> List[Tuple[str, str]]:
+        """
+        Order the targets of an alias for a call.
+
+        Targets with headroom come first: those with stale statistics (to probe
+        them), then by expected latency. Targets without headroom follow, soonest
+        available first, so they are only used when nothing else is.
+
+        Args:
+            alias: Alias name
+            available: Predicate excluding providers that cannot be called (e.g. missing API key)
+
+        Returns:
+            (provider, model) targets in the order they should be tried
+        """
+        if alias not in self.aliases:
+            raise ValidationError(f"Unknown model alias: {alias}")
+        targets = [target for target in self.aliases[alias] if available(target[0])]
+        shared_cooldowns = self._shared_cooldowns(targets)
+        now = time.monotonic()
+        with self._lock:
+            def key(target: Tuple[str, str]) -> Tuple:
+                stats = self._stats_for(target)
+                cooldown_until = max(stats.cooldown_until, shared_cooldowns.get(target, 0.0))
+                no_headroom = cooldown_until > now or stats.in_flight >= self.max_in_flight
+                return (no_headroom, cooldown_until if no_headroom else 0.0, not stats.stale(now, self.stats_ttl), stats.score())
+
+            return sorted(targets, key=key)
+
+    @staticmethod
+    def _shared_cooldowns(targets: List[Tuple[str, str]]) -> Dict[Tuple[str, str], float]:
+        """Ends (monotonic) of the rate limit cooldowns other processes recorded in a shared cache."""
+        shared = cache.get_cache()
+        if not shared.shared:
+            return {}
+        cooldowns = {}
+        for target in targets:
+            entry = shared.get("health", f"{target[0]}:{target[1]}")
+            if entry:
+                cooldowns[target] = time.monotonic() + entry["cooldown_until"] - time.time()
+        return cooldowns
+
+    def start(self, target: Tuple[str, str]) -> None:
+        """Count a call routed to a target as in flight."""
+        with self._lock:
+            self._stats_for(target).in_flight += 1
+
+    def finish(
+        self,
+        alias: str,
+        target: Tuple[str, str],
+        latency: float,
+        error: Optional[BaseException] = None,
+        attempt: int = 0,
+        sample: bool = True
+    ) -> None:
+        """
+        Record the outcome of a routed call and update the target's moving averages.
+
+        Args:
+            alias: Alias name
+            target: (provider, model) the call was routed to
+            latency: Call latency in seconds
+            error: The exception raised, if the call failed
+            attempt: Position of the target in the failover order (0 for the first choice)
+            sample: Whether the outcome reflects the target (False for calls rejected before reaching it)
+        """
+        rate_limited = error is not None and is_rate_limit_error(error)
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats_for(target)
+            stats.in_flight -= 1
+            if sample:
+                failed = 1.0 if error is not None else 0.0
+                if stats.samples == 0:
+                    stats.ewma_error = failed
+                else:
+                    stats.ewma_error += self.alpha * (failed - stats.ewma_error)
+                if error is None:
+                    if stats.ewma_latency is None:
+                        stats.ewma_latency = latency
+                    else:
+                        stats.ewma_latency += self.alpha * (latency - stats.ewma_latency)
+                stats.samples += 1
+                stats.last_sample = now
+            if rate_limited:
+                stats.cooldown_until = now + self.cooldown
+            if not sample:
+                outcome = "rejected"
+            else:
+                outcome = "rate_limited" if rate_limited else "error" if error is not None else "ok"
+            self.decisions.append({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                "alias": alias,
+                "target": f"{target[0]}:{target[1]}",
+                "attempt": attempt,
+                "outcome": outcome,
+                "latency_seconds": round(latency, 6),
+                "error": str(error) if error is not None else None,
+            })
+        if rate_limited:
+            shared = cache.get_cache()
+            if shared.shared:
+                shared.set(
+                    "health", f"{target[0]}:{target[1]}", {"cooldown_until": time.time() + self.cooldown}, self.cooldown
+                )
+        metrics.registry.inc(
+            "routing_decisions_total",
+            {"alias": alias, "target": f"{target[0]}:{target[1]}", "outcome": outcome},
+            help_text="Alias calls routed to each target by outcome"
+        )
+
+    def snapshot(self, decisions: int = 50) -> Dict[str, Any]:
+        """
+        Per-target statistics of every alias and the most recent routing decisions.
+
+        Args:
+            decisions: Number of recent decisions to include
+
+        Returns:
+            Dictionary with "aliases" (alias -> target -> statistics) and "decisions"
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "aliases": {
+                    alias: {
+                        f"{provider}:{model}": self._stats_for((provider, model)).status(now)
+                        for provider, model in targets
+                    }
+                    for alias, targets in self.aliases.items()
+                },
+                "decisions": list(self.decisions)[-decisions:] if decisions > 0 else [],
+            }
+
+
+def _read_aliases(source: str) -> Dict[str, List[str]]:
+    """Parse and check a JSON object mapping alias names to "provider:model" targets."""
+    loaded = json.loads(source)
+    if not isinstance(loaded, dict) or not all(
+        isinstance(targets, list) and all(isinstance(target, str) and ":" in target for target in targets)
+        for targets in loaded.values()
+    ):
+        raise ValueError("expected an object mapping alias names to lists of provider:model targets")
+    return loaded
+
+
+def load_aliases() -> Dict[str, List[str]]:
+    """
+    Aliases from config.py extended by MODEL_ALIASES_FILE and MODEL_ALIASES (JSON).
+
+    Returns:
+        Dictionary mapping alias names to "provider:model" targets
+    """
+    aliases = dict(MODEL_ALIASES)
+    path = os.environ.get("MODEL_ALIASES_FILE")
+    if path:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                aliases.update(_read_aliases(f.read()))
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring invalid MODEL_ALIASES_FILE {path}: {e}")
+    if os.environ.get("MODEL_ALIASES"):
+        try:
+            aliases.update(_read_aliases(os.environ["MODEL_ALIASES"]))
+        except ValueError as e:
+            logger.error(f"Ignoring invalid MODEL_ALIASES: {e}")
+    return aliases
+
+
+# Process-wide alias router used by the validator and the model router
+router = AliasRouter(load_aliases())
@@ -0,0 +1,127 @@
+"""
+Near-duplicate detection of team responses with MinHash signatures.
+
+Team members backed by similar models (e.g., two GPT variants) often answer
+almost identically. Before the decision step, each response is reduced to the
+set of its word shingles (runs of TEAM_DEDUP_SHINGLE_SIZE words) and a MinHash
+signature of TEAM_DEDUP_PERMUTATIONS minimum hashes over that set. The share of
+equal positions of two signatures estimates the Jaccard similarity of the
+shingle sets, without comparing the texts themselves.
+
+Responses whose similarity to an earlier response reaches TEAM_DEDUP_THRESHOLD
+are collapsed into that response's group, so the decision maker reads the text
+once, attributed to every agreeing model.
+"""
+
+import re
+import random
+import hashlib
+import logging
+import functools
+from typing import List, Sequence, Tuple
+
+from agile_team.shared.config import TEAM_DEDUP_THRESHOLD, TEAM_DEDUP_SHINGLE_SIZE, TEAM_DEDUP_PERMUTATIONS
+from agile_team.shared.utils import env_number
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Mersenne prime modulus of the permutations (a * x + b) mod p, above the 64-bit shingle hashes
+_PRIME = (1 << 61) - 1
+
+_WORDS = re.compile(r"\w+")
+
+
+@functools.lru_cache(maxsize=8)
+def _permutations(count: int) -> Tuple[Tuple[int, int], ...]:
+    """Fixed (a, b) coefficients of the hash permutations, identical in every process."""
+    rng = random.Random(count)
+    return tuple((rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(count))
+
+
+def shingles(text: str, size: int = TEAM_DEDUP_SHINGLE_SIZE) -> List[int]:
+    """
+    Hashes of the word shingles of a text.
+
+    Case, punctuation and whitespace are ignored. A text shorter than one
+    shingle is a single shingle of all its words.
+
+    Args:
+        text: The text to shingle
+        size: Number of words per shingle
+
+    Returns:
+        Distinct 64-bit hashes of the shingles
+    """
+    words = _WORDS.findall(text.lower())
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+    return [
+        int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+        for gram in grams
+    ]
+
+
+def minhash(text: str, permutations: int = TEAM_DEDUP_PERMUTATIONS, size: int = TEAM_DEDUP_SHINGLE_SIZE) -> Tuple[int, ...]:
+    """
+    MinHash signature of a text.
+
+    Args:
+        text: The text to sign
+        permutations: Number of hash permutations (signature length)
+        size: Number of words per shingle
+
+    Returns:
+        Minimum permuted shingle hash of every permutation
+    """
+    hashes = shingles(text, size)
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _permutations(permutations))
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """
+    Estimated Jaccard similarity of the texts of two MinHash signatures.
+
+    Args:
+        first: Signature of the first text
+        second: Signature of the second text
+
+    Returns:
+        Share of equal signature positions, from 0.0 to 1.0
+    """
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+def collapse_near_duplicates(
+    responses: Sequence[Tuple[str, str]],
+    threshold: float = None
+) -> List[Tuple[List[str], str]]:
+    """
+    Group near-identical responses.
+
+    Each response joins the first earlier group whose first response it is at
+    least threshold similar to, so groups keep the order of the team.
+
+    Args:
+        responses: (model name, response text) of each team member
+        threshold: Minimum estimated similarity to collapse (defaults to TEAM_DEDUP_THRESHOLD; 0 disables)
+
+    Returns:
+        (model names, text of the group's first response) of each group
+    """
+    threshold = env_number("TEAM_DEDUP_THRESHOLD", TEAM_DEDUP_THRESHOLD) if threshold is None else threshold
+    if threshold <= 0 or len(responses) < 2:
+        return [([name], text) for name, text in responses]
+
+    groups: List[Tuple[List[str], str, Tuple[int, ...]]] = []
+    for name, text in responses:
+        signature = minhash(text)
+        for names, _, representative in groups:
+            if similarity(signature, representative) >= threshold:
+                names.append(name)
+                break
+        else:
+            groups.append(([name], text, signature))
+
+    if len(groups) < len(responses):
+        logger.info(f"Collapsed {len(responses)} team responses into {len(groups)} distinct responses")
+    return [(names, text) for names, text, _ in groups]
@@ -0,0 +1,217 @@
+"""
+Registry of precompiled prompt templates.
+
+Persona and decision maker templates (tools/prompts/*.md) are compiled once into
+their static segments and placeholders, so rendering joins the segments with
+the values instead of parsing the template on every call. Each template has a
+digest (SHA-256 of its text), for cache keys that must change when the template does.
+
+Template files are checked for changes at most every TEMPLATE_RELOAD_SECONDS and
+recompiled when their modification time changes, so edited templates apply
+without restarting the server. PROMPT_TEMPLATES_DIR names a directory whose
+templates take precedence over the packaged ones.
+
+Tools keep receiving template text (the persona modules' DEFAULT_* constants
+are the text loaded at import). resolve_template maps any text a template file
+ever had to the file's current template, and compiles other (custom) templates
+once per distinct text.
+"""
+
+import os
+import time
+import string
+import hashlib
+import logging
+import pathlib
+import functools
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from mcp.server.fastmcp.exceptions import ResourceError
+
+from agile_team.shared.config import TEMPLATE_RELOAD_SECONDS
+from agile_team.shared.utils import env_number
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Directory of the packaged prompt templates
+PACKAGED_TEMPLATES_DIR = str(pathlib.Path(__file__).parent.parent.absolute() / "tools" / "prompts")
+
+_formatter = string.Formatter()
+
+# (static text, field name, format spec, conversion) of each segment, as parsed by str.format
+Segment = Tuple[str, Optional[str], Optional[str], Optional[str]]
+
+_CONVERSIONS = {"r": repr, "s": str, "a": ascii}
+
+
+class Template:
+    """A prompt template compiled into static segments and placeholders."""
+
+    def __init__(self, source: str, name: Optional[str] = None, path: Optional[str] = None, mtime: float = 0.0):
+        self.source = source
+        self.name = name
+        self.path = path
+        self.mtime = mtime
+        self.digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        self.segments: List[Segment] = list(_formatter.parse(source))
+        self.fields = tuple(dict.fromkeys(field for _, field, _, _ in self.segments if field is not None))
+        # Positional, attribute and index fields and nested format specs are left to str.format
+        self._simple = all(
+            field is None or (field.isidentifier() and "{" not in (spec or ""))
+            for _, field, spec, _ in self.segments
+        )
+
+    def render(self, **values: Any) -> str:
+        """
+        Fill the template's placeholders.
+
+        Args:
+            **values: Value of each placeholder
+
+        Returns:
+            The rendered prompt, equal to str.format of the template text
+        """
+        if not self._simple:
+            return self.source.format(**values)
+        parts = []
+        for text, field, spec, conversion in self.segments:
+            parts.append(text)
+            if field is None:
+                continue
+            value = values[field]
+            if conversion:
+                value = _CONVERSIONS[conversion](value)
+            parts.append(format(value, spec or ""))
+        return "".join(parts)
+
+    def describe(self) -> Dict[str, Any]:
+        """JSON-serializable summary of the template."""
+        return {
+            "name": self.name,
+            "path": self.path,
+            "digest": self.digest,
+            "fields": list(self.fields),
+        }
+
+
+class TemplateRegistry:
+    """Template files by name, recompiled when their modification time changes."""
+
+    def __init__(self, directories: List[str], reload_seconds: float = TEMPLATE_RELOAD_SECONDS):
+        self.directories = directories
+        self.reload_seconds = reload_seconds
+        self._templates: Dict[str, Template] = {}
+        self._checked: Dict[str, float] = {}
+        # Digests of every text a template file had, mapped to the file's name
+        self._names_by_digest: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _find(self, name: str) -> str:
+        for directory in self.directories:
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+        raise ResourceError(f"Prompt file not found: {name} (searched {', '.join(self.directories)})")
+
+    def get(self, name: str) -> Template:
+        """
+        The current template of a file.
+
+        Args:
+            name: File name of the template (e.g., "ba_prompt.md")
+
+        Returns:
+            The compiled template, reloaded if the file changed since it was compiled
+        """
+        now = time.monotonic()
+        with self._lock:
+            template = self._templates.get(name)
+            if template is not None and now - self._checked.get(name, 0.0) < self.reload_seconds:
+                return template
+            self._checked[name] = now
+        path = self._find(name)
+        try:
+            mtime = os.stat(path).st_mtime
+            if template is not None and template.path == path and template.mtime == mtime:
+                return template
+            with open(path, "r", encoding="utf-8") as f:
+                source = f.read()
+        except OSError as e:
+            if template is not None:
+                logger.error(f"Keeping the loaded template {name}: {e}")
+                return template
+            raise ResourceError(f"Failed to load prompt file {name}: {str(e)}")
+        compiled = Template(source, name, path, mtime)
+        with self._lock:
+            previous = self._templates.get(name)
+            self._templates[name] = compiled
+            self._names_by_digest[compiled.digest] = name
+        if previous is not None and previous.digest != compiled.digest:
+            logger.info(f"Reloaded prompt template {name} from {path}")
+        return compiled
+
+    def resolve(self, text: str) -> Template:
+        """
+        The template for a template text.
+
+        Args:
+            text: Template text, e.g. a tool's prompt argument
+
+        Returns:
+            The current template of the file that text was loaded from, or the compiled text itself
+        """
+        name = self._names_by_digest.get(hashlib.sha256(text.encode("utf-8")).hexdigest())
+        if name is not None:
+            return self.get(name)
+        return compile_template(text)
+
+    def hashes(self) -> Dict[str, str]:
+        """Digest of the current template of every loaded file."""
+        return {name: self.get(name).digest for name in sorted(self._templates)}
+
+
+@functools.lru_cache(maxsize=128)
+def compile_template(text: str) -> Template:
+    """
+    Compile a template text, once per distinct text.
+
+    Args:
+        text: Template text
+
+    Returns:
+        The compiled template
+    """
+    return Template(text)
+
+
+# Process-wide registry of the packaged templates, overridden by PROMPT_TEMPLATES_DIR
+registry = TemplateRegistry(
+    [directory for directory in (os.environ.get("PROMPT_TEMPLATES_DIR"), PACKAGED_TEMPLATES_DIR) if directory],
+    env_number("TEMPLATE_RELOAD_SECONDS", TEMPLATE_RELOAD_SECONDS)
+)
+
+
+def get_template(name: str) -> Template:
+    """The current template of a packaged (or overriding) template file."""
+    return registry.get(name)
+
+
+def resolve_template(text: str) -> Template:
+    """The template for a template text (see TemplateRegistry.resolve)."""
+    return registry.resolve(text)
+
+
+def render(text: str, **values: Any) -> str:
+    """
+    Render a template text, using the current version of the file it was loaded from.
+
+    Args:
+        text: Template text
+        **values: Value of each placeholder
+
+    Returns:
+        The rendered prompt
+    """
+    return registry.resolve(text).render(**values)
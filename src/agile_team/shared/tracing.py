@@ -0,0 +1,262 @@
+"""
+Optional OpenTelemetry tracing for the Agile Team MCP Server.
+
+Spans are created for MCP tool invocations, model validation, router and
+provider calls, file I/O and decision steps. When the OpenTelemetry API is not
+installed, or tracing is not configured, spans are no-ops.
+
+Tracing is configured with configure_tracing() (called by the server entry
+point) from the TRACING_EXPORTER environment variable:
+
+- "otlp": export to an OTLP collector (standard OTEL_EXPORTER_OTLP_* settings),
+  requires opentelemetry-sdk and opentelemetry-exporter-otlp
+- "file": append one JSON object per span to TRACING_FILE (default traces.jsonl),
+  requires opentelemetry-sdk
+- "console": print spans to stderr (stdout carries the stdio transport), requires
+  opentelemetry-sdk
+
+Install the optional dependencies with: pip install "agile-team[tracing]"
+"""
+
+import os
+import sys
+import json
+import inspect
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - depends on installed extras
+    otel_trace = None
+
+# Name of the instrumentation scope reported with every span
+TRACER_NAME = "agile_team"
+
+# Maximum length of string attributes recorded on spans
+MAX_ATTRIBUTE_LENGTH = 256
+
+# Default destination of the JSON file exporter
+DEFAULT_TRACING_FILE = "traces.jsonl"
+
+
+class _NoopSpan:
+    """Span used when OpenTelemetry is not installed."""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[Dict[str, Any]] = None) -> None:
+        pass
+
+    def record_exception(self, exception: BaseException) -> None:
+        pass
+
+    def is_recording(self) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _attribute_value(value: Any) -> Any:
+    """Convert a value to a type accepted as an OpenTelemetry attribute."""
+    if isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        return [item[:MAX_ATTRIBUTE_LENGTH] for item in value]
+    return str(value)[:MAX_ATTRIBUTE_LENGTH]
+
+
+def set_attributes(span: Any, attributes: Dict[str, Any]) -> None:
+    """
+    Set attributes on a span, skipping None values.
+
+    Args:
+        span: The span
+        attributes: Attribute names and values
+    """
+    if not span.is_recording():
+        return
+    for key, value in attributes.items():
+        if value is not None:
+            span.set_attribute(key, _attribute_value(value))
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Start a span as the current span.
+
+    Args:
+        name: Span name
+        **attributes: Attributes set on the span (None values are skipped)
+
+    Yields:
+        The span (a no-op span when OpenTelemetry is not installed)
+    """
+    if otel_trace is None:
+        yield _NOOP_SPAN
+        return
+    tracer = otel_trace.get_tracer(TRACER_NAME)
+    with tracer.start_as_current_span(name) as current:
+        set_attributes(current, attributes)
+        yield current
+
+
+def current_span() -> Any:
+    """The current span (a no-op span when OpenTelemetry is not installed)."""
+    if otel_trace is None:
+        return _NOOP_SPAN
+    return otel_trace.get_current_span()
+
+
+def traced(name: Optional[str] = None, record_args: Sequence[str] = ()) -> Callable:
+    """
+    Decorator running a function inside a span.
+
+    Args:
+        name: Span name (defaults to the function's qualified name)
+        record_args: Names of arguments recorded as "arg.<name>" span attributes
+
+    Returns:
+        The decorator
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__qualname__
+        signature = inspect.signature(fn) if record_args else None
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            attributes = {}
+            if signature is not None:
+                bound = signature.bind_partial(*args, **kwargs)
+                attributes = {f"arg.{arg}": bound.arguments.get(arg) for arg in record_args}
+            with span(span_name, **attributes):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def wrap_context(fn: Callable) -> Callable:
+    """
+    Bind a callable to the current context, so spans it creates in a worker
+    thread are children of the current span.
+
+    Args:
+        fn: The callable to run in another thread
+
+    Returns:
+        A callable running fn in a copy of the current context
+    """
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+
+    return wrapper
+
+
+def _span_to_dict(finished_span: Any) -> Dict[str, Any]:
+    """Convert a finished SDK span to a compact JSON-serializable dictionary."""
+    context = finished_span.get_span_context()
+    parent = finished_span.parent
+    return {
+        "name": finished_span.name,
+        "trace_id": f"{context.trace_id:032x}",
+        "span_id": f"{context.span_id:016x}",
+        "parent_id": f"{parent.span_id:016x}" if parent else None,
+        "start_time_ns": finished_span.start_time,
+        "end_time_ns": finished_span.end_time,
+        "duration_ms": (finished_span.end_time - finished_span.start_time) / 1e6,
+        "status": finished_span.status.status_code.name,
+        "attributes": dict(finished_span.attributes or {}),
+        "events": [
+            {"name": event.name, "time_ns": event.timestamp, "attributes": dict(event.attributes or {})}
+            for event in finished_span.events
+        ],
+    }
+
+
+def _json_file_exporter(path: str) -> Any:
+    """Build an SDK span exporter appending one JSON object per span to a file."""
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+    class JsonFileSpanExporter(SpanExporter):
+        """Appends finished spans to a JSON Lines file."""
+
+        def __init__(self, file_path: str):
+            self.file_path = file_path
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+        def export(self, spans):
+            try:
+                with open(self.file_path, "a", encoding="utf-8") as f:
+                    for finished_span in spans:
+                        f.write(json.dumps(_span_to_dict(finished_span), separators=(",", ":")) + "\n")
+            except OSError as e:
+                logger.error(f"Failed to export spans to {self.file_path}: {e}")
+                return SpanExportResult.FAILURE
+            return SpanExportResult.SUCCESS
+
+        def shutdown(self):
+            pass
+
+    return JsonFileSpanExporter(path)
+
+
+def configure_tracing(exporter: Optional[str] = None, file_path: Optional[str] = None) -> bool:
+    """
+    Install an OpenTelemetry tracer provider exporting spans.
+
+    Args:
+        exporter: "otlp", "file" or "console" (defaults to the TRACING_EXPORTER environment variable)
+        file_path: Destination of the file exporter (defaults to TRACING_FILE or traces.jsonl)
+
+    Returns:
+        True if tracing was configured, False if it is disabled or unavailable
+    """
+    exporter = exporter or os.environ.get("TRACING_EXPORTER")
+    if not exporter:
+        return False
+
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("TRACING_EXPORTER is set but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            try:
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            except ImportError:
+                logger.warning("opentelemetry-exporter-otlp is not installed; tracing disabled")
+                return False
+        span_exporter = OTLPSpanExporter()
+    elif exporter == "file":
+        span_exporter = _json_file_exporter(file_path or os.environ.get("TRACING_FILE", DEFAULT_TRACING_FILE))
+    elif exporter == "console":
+        span_exporter = ConsoleSpanExporter(out=sys.stderr)
+    else:
+        logger.warning(f"Unknown TRACING_EXPORTER {exporter!r}; expected otlp, file or console")
+        return False
+
+    provider = TracerProvider(resource=Resource.create({"service.name": os.environ.get("OTEL_SERVICE_NAME", "agile-team")}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    otel_trace.set_tracer_provider(provider)
+    logger.info(f"Tracing enabled with the {exporter} exporter")
+    return True
@@ -0,0 +1,194 @@
+"""
+Shared HTTP transport for the provider SDK clients.
+
+Every provider SDK client that accepts an httpx client (OpenAI, DeepSeek, Groq,
+Anthropic, Ollama) is given one built here, so keep-alive pool limits,
+timeouts and HTTP/2 are configured in one place instead of taking each SDK's
+defaults. Clients are created once per provider and reused, so connections
+(and their TLS sessions) survive between calls and across parallel fan-out.
+
+Connection reuse is recorded in the metrics registry: requests served on a new
+versus a reused connection, TLS handshakes, and connection setup time. Requests
+made for a cancelled tool call are refused before they are sent, and the
+timeouts of every request are capped at the time left before its tool call's
+deadline.
+
+Settings (environment variables override the defaults in config.py):
+
+- HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE_CONNECTIONS: pool limits per provider
+- HTTP_KEEPALIVE_EXPIRY: seconds an idle connection is kept
+- HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT / HTTP_WRITE_TIMEOUT / HTTP_POOL_TIMEOUT
+- HTTP_HTTP2: "auto" (HTTP/2 when the h2 package is installed), "1" or "0"
+"""
+
+import os
+import time
+import logging
+import threading
+import importlib
+import importlib.util
+from types import ModuleType
+from typing import Any, Dict, Optional, Type
+
+import httpx
+
+from agile_team.shared.config import (
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_KEEPALIVE_EXPIRY_SECONDS,
+    HTTP_CONNECT_TIMEOUT_SECONDS,
+    HTTP_READ_TIMEOUT_SECONDS,
+    HTTP_WRITE_TIMEOUT_SECONDS,
+    HTTP_POOL_TIMEOUT_SECONDS,
+)
+from agile_team.shared import cancellation, metrics
+from agile_team.shared.utils import env_number
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+
+def http2_enabled() -> bool:
+    """Whether clients negotiate HTTP/2 (HTTP_HTTP2, by default when the h2 package is installed)."""
+    setting = os.environ.get("HTTP_HTTP2", "auto").lower()
+    if setting in ("0", "false", "no"):
+        return False
+    available = importlib.util.find_spec("h2") is not None
+    if setting in ("1", "true", "yes") and not available:
+        logger.warning("HTTP_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+    return available
+
+
+def limits(http: ModuleType = httpx) -> Any:
+    """
+    Connection pool limits for each provider client.
+
+    Args:
+        http: httpx-compatible package the client is built with
+    """
+    return http.Limits(
+        max_connections=int(env_number("HTTP_MAX_CONNECTIONS", HTTP_MAX_CONNECTIONS)),
+        max_keepalive_connections=int(env_number("HTTP_MAX_KEEPALIVE_CONNECTIONS", HTTP_MAX_KEEPALIVE_CONNECTIONS)),
+        keepalive_expiry=env_number("HTTP_KEEPALIVE_EXPIRY", HTTP_KEEPALIVE_EXPIRY_SECONDS),
+    )
+
+
+def timeout(http: ModuleType = httpx) -> Any:
+    """
+    Connect, read, write and pool timeouts for each provider client.
+
+    Args:
+        http: httpx-compatible package the client is built with
+    """
+    return http.Timeout(
+        connect=env_number("HTTP_CONNECT_TIMEOUT", HTTP_CONNECT_TIMEOUT_SECONDS),
+        read=env_number("HTTP_READ_TIMEOUT", HTTP_READ_TIMEOUT_SECONDS),
+        write=env_number("HTTP_WRITE_TIMEOUT", HTTP_WRITE_TIMEOUT_SECONDS),
+        pool=env_number("HTTP_POOL_TIMEOUT", HTTP_POOL_TIMEOUT_SECONDS),
+    )
+
+
+class _ConnectionTrace:
+    """httpcore trace callback recording whether a request opened a new connection."""
+
+    def __init__(self, provider: str):
+        self.provider = provider
+        self.connected = False
+        self._started: Optional[float] = None
+
+    def __call__(self, event_name: str, info: Dict[str, Any]) -> None:
+        if event_name == "connection.connect_tcp.started":
+            self.connected = True
+            self._started = time.perf_counter()
+        elif event_name == "connection.start_tls.complete":
+            metrics.registry.inc(
+                "http_tls_handshakes_total", {"provider": self.provider}, help_text="TLS handshakes with provider APIs"
+            )
+        elif event_name.endswith("send_request_headers.started"):
+            labels = {"provider": self.provider, "connection": "new" if self.connected else "reused"}
+            metrics.registry.inc(
+                "http_requests_total", labels, help_text="HTTP requests to provider APIs by connection reuse"
+            )
+            if self._started is not None:
+                metrics.registry.observe(
+                    "http_connect_seconds", {"provider": self.provider}, time.perf_counter() - self._started,
+                    help_text="Time to open a connection (TCP and TLS) to a provider API"
+                )
+                self._started = None
+
+
+def _request_hook(provider: str):
+    def hook(request: Any) -> None:
+        # A cancelled tool call sends no further requests, including SDK retries
+        cancellation.check()
+        # The request may not outlive the deadline of its tool call
+        remaining = cancellation.remaining()
+        if remaining is not None:
+            configured = request.extensions.get("timeout") or {}
+            request.extensions["timeout"] = {
+                name: remaining if configured.get(name) is None else min(configured[name], remaining)
+                for name in ("connect", "read", "write", "pool")
+            }
+        request.extensions["trace"] = _ConnectionTrace(provider)
+    return hook
+
+
+def _http_package(client_class: Type) -> ModuleType:
+    """The httpx-compatible package (httpx, or a fork some SDK versions vendor) a client class derives from."""
+    for klass in client_class.__mro__:
+        package = klass.__module__.split(".")[0]
+        if klass.__name__ == "Client" and package.startswith("httpx"):
+            return importlib.import_module(package)
+    return httpx
+
+
+def client_options(provider: str, http: ModuleType = httpx) -> Dict[str, Any]:
+    """
+    Keyword arguments for an httpx.Client with the shared transport settings.
+
+    Used directly by SDKs that build their own httpx client from keyword arguments (Ollama).
+
+    Args:
+        provider: Provider name, used to label connection metrics
+        http: httpx-compatible package the client is built with
+
+    Returns:
+        Dictionary of httpx.Client keyword arguments
+    """
+    return {
+        "limits": limits(http),
+        "timeout": timeout(http),
+        "http2": http2_enabled(),
+        "follow_redirects": True,
+        "event_hooks": {"request": [_request_hook(provider)]},
+    }
+
+
+def get_http_client(provider: str, client_class: Type = httpx.Client) -> Any:
+    """
+    The shared httpx client of a provider, created on first use.
+
+    Args:
+        provider: Provider name
+        client_class: Client class the SDK expects (e.g., anthropic.DefaultHttpxClient)
+
+    Returns:
+        httpx client to pass to the provider's SDK client
+    """
+    with _lock:
+        client = _clients.get(provider)
+        if client is None or client.is_closed:
+            client = _clients[provider] = client_class(**client_options(provider, _http_package(client_class)))
+            logger.debug(f"Created HTTP client for {provider}")
+        return client
+
+
+def close_clients() -> None:
+    """Close every shared client and its pooled connections."""
+    with _lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
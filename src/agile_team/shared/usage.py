@@ -0,0 +1,308 @@
+"""
+Token usage ledger for the Agile Team MCP Server.
+
+The model router appends one row per successful provider call to a local
+SQLite database: timestamp, provider, model, persona, input/output/cached/
+thinking tokens and latency. Tokens are taken from the provider's response;
+when a provider does not report usage they are estimated from the text and the
+row is flagged as estimated. Calls answered from the response cache (see
+model_router) are recorded as cached responses that spent no tokens, with the
+tokens of the cached call counted as saved.
+
+The ledger is enabled by setting USAGE_LEDGER to a database path (or with
+open_ledger()). Persona tools attribute calls to a persona with persona_scope().
+"""
+
+import os
+import time
+import sqlite3
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Columns usage can be grouped by
+GROUP_BY_COLUMNS = ("provider", "model", "persona", "day")
+
+# Persona the current provider calls are attributed to
+_current_persona: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("usage_persona", default=None)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    ts REAL NOT NULL,
+    day TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    model TEXT NOT NULL,
+    persona TEXT,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    cached_tokens INTEGER NOT NULL,
+    thinking_tokens INTEGER NOT NULL,
+    latency_ms REAL NOT NULL,
+    estimated INTEGER NOT NULL,
+    response_cached INTEGER NOT NULL,
+    saved_tokens INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS usage_day ON usage (day);
+"""
+
+@contextmanager
+def persona_scope(persona: str, override: bool = True) -> Iterator[None]:
+    """
+    Attribute provider calls made inside the block to a persona.
+
+    Args:
+        persona: Persona name (e.g., "business_analyst")
+        override: Whether to replace a persona set by an enclosing scope
+    """
+    if not override and _current_persona.get() is not None:
+        yield
+        return
+    token = _current_persona.set(persona)
+    try:
+        yield
+    finally:
+        _current_persona.reset(token)
+
+
+def current_persona() -> Optional[str]:
+    """The persona the current provider calls are attributed to, if any."""
+    return _current_persona.get()
+
+
+class UsageLedger:
+    """Append-only SQLite ledger of provider token usage."""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+
+    def append(
+        self,
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        cached_tokens: int = 0,
+        thinking_tokens: int = 0,
+        latency_seconds: float = 0.0,
+        persona: Optional[str] = None,
+        estimated: bool = False,
+        timestamp: Optional[float] = None,
+        saved_tokens: Optional[int] = None
+    ) -> None:
+        """
+        Append one provider call to the ledger.
+
+        Args:
+            provider: Provider name
+            model: Model name
+            input_tokens: Prompt tokens
+            output_tokens: Response tokens
+            cached_tokens: Prompt tokens served from the provider's cache
+            thinking_tokens: Reasoning/thinking tokens
+            latency_seconds: Call latency
+            persona: Persona the call is attributed to
+            estimated: Whether the token counts are estimates
+            timestamp: Unix time of the call (defaults to now)
+            saved_tokens: Tokens of the cached call, if the call was answered from the response cache
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        row = (
+            timestamp,
+            time.strftime("%Y-%m-%d", time.gmtime(timestamp)),
+            provider,
+            model,
+            persona,
+            input_tokens,
+            output_tokens,
+            cached_tokens,
+            thinking_tokens,
+            round(latency_seconds * 1000, 3),
+            int(estimated),
+            int(saved_tokens is not None),
+            saved_tokens or 0,
+        )
+        with self._lock:
+            self._connection.execute(
+                "INSERT INTO usage (ts, day, provider, model, persona, input_tokens, output_tokens, cached_tokens, "
+                "thinking_tokens, latency_ms, estimated, response_cached, saved_tokens) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                row
+            )
+
+    def summarize(
+        self,
+        group_by: Sequence[str] = ("provider", "model"),
+        since: Optional[str] = None,
+        until: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Aggregate usage.
+
+        Args:
+            group_by: Columns to group by (provider, model, persona, day)
+            since: First day to include (YYYY-MM-DD)
+            until: Last day to include (YYYY-MM-DD)
+
+        Returns:
+            One dictionary per group with request and token totals, mean provider latency,
+            and the calls answered from the response cache with the tokens they saved
+        """
+        unknown = [column for column in group_by if column not in GROUP_BY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Cannot group usage by {', '.join(unknown)}. Expected any of {', '.join(GROUP_BY_COLUMNS)}")
+
+        conditions, parameters = [], []
+        if since:
+            conditions.append("day >= ?")
+            parameters.append(since)
+        if until:
+            conditions.append("day <= ?")
+            parameters.append(until)
+
+        columns = ", ".join(group_by)
+        query = (
+            f"SELECT {columns + ', ' if columns else ''}COUNT(*) - SUM(response_cached), SUM(input_tokens), "
+            "SUM(output_tokens), SUM(cached_tokens), SUM(thinking_tokens), "
+            "AVG(CASE WHEN response_cached = 0 THEN latency_ms END), SUM(estimated), "
+            "SUM(response_cached), SUM(saved_tokens) FROM usage"
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        if columns:
+            query += f" GROUP BY {columns} ORDER BY {columns}"
+
+        with self._lock:
+            rows = self._connection.execute(query, parameters).fetchall()
+
+        results = []
+        for row in rows:
+            group = dict(zip(group_by, row[:len(group_by)]))
+            (requests, input_tokens, output_tokens, cached_tokens, thinking_tokens, latency_ms, estimated,
+             cached_responses, saved_tokens) = row[len(group_by):]
+            if not requests and not cached_responses:
+                continue
+            results.append({
+                **group,
+                "requests": requests,
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "cached_tokens": cached_tokens,
+                "thinking_tokens": thinking_tokens,
+                "cache_hit_ratio": round(cached_tokens / input_tokens, 4) if input_tokens else 0.0,
+                "mean_latency_ms": round(latency_ms, 3) if latency_ms is not None else None,
+                "estimated_requests": estimated,
+                "cached_responses": cached_responses,
+                "saved_tokens": saved_tokens,
+            })
+        return results
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+
+_ledger: Optional[UsageLedger] = None
+
+
+def open_ledger(path: Optional[str] = None) -> Optional[UsageLedger]:
+    """
+    Open the usage ledger.
+
+    Args:
+        path: Database path (defaults to the USAGE_LEDGER environment variable)
+
+    Returns:
+        The ledger, or None if no path is configured
+    """
+    global _ledger
+    path = path or os.environ.get("USAGE_LEDGER")
+    if not path:
+        return None
+    close_ledger()
+    _ledger = UsageLedger(path)
+    logger.info(f"Recording token usage to {path}")
+    return _ledger
+
+
+def close_ledger() -> None:
+    """Close the usage ledger, if open."""
+    global _ledger
+    if _ledger is not None:
+        _ledger.close()
+        _ledger = None
+
+
+def get_ledger() -> Optional[UsageLedger]:
+    """The open usage ledger, if any."""
+    return _ledger
+
+
+def record_usage(provider: str, model: str, response: Any, estimated: bool) -> None:
+    """
+    Append a provider response to the ledger, if open.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        response: ProviderResponse with usage and latency
+        estimated: Whether the token counts are estimates
+    """
+    ledger = _ledger
+    if ledger is None:
+        return
+    try:
+        ledger.append(
+            provider,
+            model,
+            input_tokens=response.input_tokens or 0,
+            output_tokens=response.output_tokens or 0,
+            cached_tokens=response.cached_tokens or 0,
+            thinking_tokens=response.thinking_tokens or 0,
+            latency_seconds=response.latency_seconds or 0.0,
+            persona=current_persona(),
+            estimated=estimated,
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to record token usage: {e}")
+
+
+def record_cached_response(provider: str, model: str, response: Any, latency_seconds: float) -> None:
+    """
+    Append a call answered from the response cache to the ledger, if open.
+
+    Args:
+        provider: Provider name
+        model: Model name
+        response: The cached ProviderResponse, with the usage of the call that produced it
+        latency_seconds: Time taken by the cache lookup
+    """
+    ledger = _ledger
+    if ledger is None:
+        return
+    try:
+        ledger.append(
+            provider,
+            model,
+            input_tokens=0,
+            output_tokens=0,
+            latency_seconds=latency_seconds,
+            persona=current_persona(),
+            saved_tokens=(response.input_tokens or 0) + (response.output_tokens or 0),
+        )
+    except sqlite3.Error as e:
+        logger.error(f"Failed to record token usage: {e}")
+
+
+open_ledger()
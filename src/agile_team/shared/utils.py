@@ -1,10 +1,26 @@
 """Utility functions for the Agile Team MCP Server."""
 
 import os
+import re
+import uuid
+import zlib
+import logging
 import pathlib
-from typing import Dict, List, Tuple, Optional
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
 from mcp.server.fastmcp.exceptions import ValidationError, ToolError, ResourceError
 import json
+from agile_team.shared.config import MODEL_MATCH_MIN_CONFIDENCE, OUTPUT_RUN_DIRS, BACKGROUND_WRITES, WRITE_LOCK_STRIPES
+from agile_team.shared.data_types import ModelProviders, ModelSpec
+from agile_team.shared.model_index import rank_models
+from agile_team.shared import artifacts
+from agile_team.shared.tracing import traced, wrap_context
+
+# Configure logging
+logger = logging.getLogger(__name__)
 
 # Mapping of short provider names to full provider names
 SHORT_NAME_MAPPING = {
@@ -16,6 +32,15 @@ SHORT_NAME_MAPPING = {
     "l": "ollama"
 }
 
+# Reasoning effort levels accepted as model suffixes (e.g. o3-mini:high)
+REASONING_EFFORTS = ("low", "medium", "high")
+
+# Thinking budget suffixes: tokens, or thousands of tokens with "k" (e.g. :4k, :8000)
+_THINKING_SUFFIX = re.compile(r"^(\d+)(k?)$")
+
+# Providers whose model names contain ":" as part of the name (Ollama tags, e.g. llama3:8b)
+_TAGGED_PROVIDERS = ("ollama",)
+
 
 def format_error_response(error_code: str, error_message: str, details: Dict = None) -> Dict:
     """Format a standard error response."""
@@ -45,8 +70,12 @@ def validate_directory_exists(dir_path: str) -> None:
             raise ResourceError(f"Failed to create directory {dir_path}: {str(e)}")
 
 
+@traced("read_file", record_args=("file_path",))
 def read_file(file_path: str) -> str:
     """Read a file and return its contents."""
+    if not os.path.isfile(file_path):
+        # Responses stored lazily in the artifact store are written on first read
+        artifacts.materialize(file_path)
     validate_file_exists(file_path)
     try:
         with open(file_path, "r", encoding="utf-8") as f:
@@ -55,19 +84,120 @@ def read_file(file_path: str) -> str:
         raise ResourceError(f"Failed to read file {file_path}: {str(e)}")
 
 
+# Locks serializing writes to the same path within this process, striped by path
+_write_locks = [threading.Lock() for _ in range(WRITE_LOCK_STRIPES)]
+
+
+@contextmanager
+def path_lock(file_path: str) -> Iterator[None]:
+    """Serialize writers of a path within this process."""
+    key = os.path.abspath(file_path).encode("utf-8")
+    with _write_locks[zlib.crc32(key) % len(_write_locks)]:
+        yield
+
+
+@traced("write_file", record_args=("file_path",))
 def write_file(file_path: str, content: str) -> None:
-    """Write content to a file."""
+    """
+    Write content to a file atomically.
+    
+    The content goes to a temporary file in the same directory, which then
+    replaces the target, so readers and crashes never see a truncated file and a
+    file hard-linked to a shared artifact is replaced rather than written through.
+    """
     directory = os.path.dirname(file_path)
     if directory:
         validate_directory_exists(directory)
     
+    temp_path = os.path.join(directory, f".{os.path.basename(file_path)}.{uuid.uuid4().hex[:8]}.tmp")
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(content)
+        with path_lock(file_path):
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(temp_path, file_path)
     except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
         raise ResourceError(f"Failed to write to file {file_path}: {str(e)}")
 
 
+def _env_flag(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def env_number(name: str, default: float) -> float:
+    """
+    A number from an environment variable, logging and falling back to the default when it is invalid.
+
+    Args:
+        name: Name of the environment variable
+        default: Value when the variable is unset, empty or not a number
+
+    Returns:
+        The number
+    """
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.error(f"Ignoring invalid {name}: {value!r}")
+        return default
+
+
+def default_output_dir(file_path: str) -> str:
+    """
+    Default directory for the responses to an input file.
+    
+    Args:
+        file_path: Path of the input file
+        
+    Returns:
+        "responses" next to the input file, or with OUTPUT_RUN_DIRS the current
+        run's directory inside it (e.g. responses/20250601T120000Z-3f2c9e1a)
+    """
+    output_dir = os.path.join(os.path.dirname(file_path) or ".", "responses")
+    run = artifacts.current_run()
+    if run and _env_flag("OUTPUT_RUN_DIRS", OUTPUT_RUN_DIRS):
+        output_dir = os.path.join(output_dir, run)
+    return output_dir
+
+
+_writer: Optional[ThreadPoolExecutor] = None
+_writer_lock = threading.Lock()
+
+
+def offload_write(write: Callable[[], Any]) -> Future:
+    """
+    Run a write on the background writer thread when BACKGROUND_WRITES is enabled.
+    
+    Writes run one at a time in submission order, in the caller's context. When
+    background writes are disabled the write runs at once.
+    
+    Args:
+        write: Zero-argument callable performing the write
+        
+    Returns:
+        Future of the write; its result() raises the write's error
+    """
+    global _writer
+    if not _env_flag("BACKGROUND_WRITES", BACKGROUND_WRITES):
+        future: Future = Future()
+        try:
+            future.set_result(write())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    with _writer_lock:
+        if _writer is None:
+            _writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="agile-team-writer")
+    return _writer.submit(wrap_context(write))
+
+
 def parse_provider_model(provider_model: str) -> Tuple[str, str]:
     """Parse a provider:model string into provider and model components."""
     if ":" not in provider_model:
@@ -80,6 +210,43 @@ def parse_provider_model(provider_model: str) -> Tuple[str, str]:
     return provider, model
 
 
+@functools.lru_cache(maxsize=1024)
+def model_spec(provider: str, model: str) -> ModelSpec:
+    """
+    Parse a provider and model name into a ModelSpec, once per distinct pair.
+    
+    A trailing ":suffix" on the model selects a thinking budget (":4k" is 4096
+    tokens, ":8000" is 8000 tokens and numbers below 100 are thousands) or a
+    reasoning effort (":low", ":medium", ":high"). Unrecognized suffixes are
+    dropped, except for Ollama, whose ":tag" is part of the model name. Whether a
+    model supports the option is left to its provider.
+    
+    Args:
+        provider: Provider name (full or short)
+        model: Model name, optionally with a suffix
+        
+    Returns:
+        The parsed, immutable model specification
+    """
+    provider_enum = ModelProviders.from_name(provider)
+    if not provider_enum:
+        raise ValidationError(f"Unsupported provider: {provider}")
+    if provider_enum.full_name in _TAGGED_PROVIDERS or ":" not in model:
+        return ModelSpec(provider_enum, model, model)
+    
+    base_model, suffix = model.rsplit(":", 1)
+    thinking = _THINKING_SUFFIX.match(suffix)
+    if thinking:
+        thinking_budget = int(thinking.group(1))
+        if thinking.group(2) or thinking_budget < 100:
+            thinking_budget *= 1024
+        return ModelSpec(provider_enum, model, base_model, suffix, thinking_budget=thinking_budget)
+    if suffix.lower() in REASONING_EFFORTS:
+        return ModelSpec(provider_enum, model, base_model, suffix, reasoning_effort=suffix.lower())
+    logger.warning(f"Ignoring unrecognized suffix of model {model}")
+    return ModelSpec(provider_enum, model, base_model, suffix)
+
+
 def parse_reasoning_effort(model: str) -> Tuple[str, Optional[str]]:
     """
     Parse a model name to check for reasoning effort suffixes.
@@ -94,25 +261,17 @@ def parse_reasoning_effort(model: str) -> Tuple[str, Optional[str]]:
         Tuple of (base_model_name, reasoning_effort)
         If no reasoning suffix is found or it's invalid, reasoning_effort will be None
     """
-    if ":" not in model:
-        return model, None
-        
-    base_model, reasoning_level = model.split(":", 1)
-    
-    # Normalize reasoning level to lowercase
-    reasoning_level = reasoning_level.lower()
-    
-    # Validate reasoning level
-    if reasoning_level in ["low", "medium", "high"]:
-        return base_model, reasoning_level
-    else:
-        return base_model, None
+    spec = model_spec("openai", model)
+    return spec.base_model, spec.reasoning_effort
 
 
 def weak_provider_and_model(provider: str, model: str, available_models: List[str]) -> Tuple[str, str]:
     """
     Attempt to correct provider and model names using fuzzy matching.
     
+    Models are matched with the catalog's ranked index (see model_index); a model
+    without a match of at least MODEL_MATCH_MIN_CONFIDENCE is rejected.
+    
     Args:
         provider: The provider name to correct
         model: The model name to correct
@@ -144,16 +303,15 @@ def weak_provider_and_model(provider: str, model: str, available_models: List[st
     if not corrected_provider:
         corrected_provider = provider
         
-    # If the model is not in the available models, try fuzzy matching
-    if model not in available_models:
-        # Look for partial matches
-        for available_model in available_models:
-            if model.lower() in available_model.lower() or available_model.lower() in model.lower():
-                return corrected_provider, available_model
-                
-        # If no matches, use the first available model as a fallback
-        if available_models:
-            return corrected_provider, available_models[0]
+    # If the model is not in the available models, use the best ranked match of the catalog's index
+    if available_models and model not in available_models:
+        candidates = rank_models(model, available_models)
+        if not candidates or candidates[0][1] < MODEL_MATCH_MIN_CONFIDENCE:
+            suggestions = ", ".join(candidate for candidate, _ in candidates[:3])
+            raise ValidationError(
+                f"Unknown model for {corrected_provider}: {model}" + (f". Did you mean: {suggestions}?" if suggestions else "")
+            )
+        return corrected_provider, candidates[0][0]
     
     return corrected_provider, model
 
@@ -172,6 +330,11 @@ def load_prompt_file(prompt_file: str, relative_path: str = "tools/prompts") ->
     Raises:
         ResourceError: If the prompt file cannot be loaded
     """
+    # Packaged templates go through the registry, which recompiles them when they change
+    if relative_path == "tools/prompts":
+        from agile_team.shared.templates import get_template
+        return get_template(prompt_file).source
+
     # Get the path to the agile_team module
     module_path = pathlib.Path(__file__).parent.parent.absolute()
     
@@ -4,20 +4,26 @@ import os
 import logging
 from typing import List, Dict, Tuple, Any
 from mcp.server.fastmcp.exceptions import ValidationError
-from agile_team.shared.utils import parse_provider_model, weak_provider_and_model, SHORT_NAME_MAPPING
+from agile_team.shared.utils import model_spec, parse_provider_model, weak_provider_and_model, SHORT_NAME_MAPPING
+from agile_team.shared.tracing import traced
+from agile_team.shared import routing
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+@traced("validate_and_correct_models", record_args=("models_prefixed_by_provider",))
 def validate_and_correct_models(models_prefixed_by_provider: List[str]) -> List[Tuple[str, str]]:
     """
     Validate and correct model/provider combinations.
     
+    Model aliases ("alias:<name>" or a bare alias name) are kept as
+    ("alias", name) pairs and resolved to a concrete target per call.
+    
     Args:
         models_prefixed_by_provider: List of strings in format "provider:model"
         
     Returns:
-        List of tuples containing (provider, model) pairs
+        List of (provider, model) pairs: ModelSpec instances for concrete models
     """
     if not models_prefixed_by_provider:
         raise ValidationError("No models specified")
@@ -28,6 +34,12 @@ def validate_and_correct_models(models_prefixed_by_provider: List[str]) -> List[
     from agile_team.shared.model_router import list_models
     
     for entry in models_prefixed_by_provider:
+        # Aliases are routed by the model router
+        alias = routing.router.resolve(entry)
+        if alias:
+            validated_models.append((routing.ALIAS_PROVIDER, alias))
+            continue
+        
         # Parse provider and model
         try:
             provider, model = parse_provider_model(entry)
@@ -45,14 +57,15 @@ def validate_and_correct_models(models_prefixed_by_provider: List[str]) -> List[
             except Exception as e:
                 raise ValidationError(f"Invalid provider: {provider}")
         
-        # Check if the model exists or needs correction
-        if model not in available_models:
-            original_model = model
-            _, model = weak_provider_and_model(provider, model, available_models)
+        # Check if the model exists or needs correction (keeping a thinking or reasoning suffix)
+        spec = model_spec(provider, model)
+        if model not in available_models and spec.base_model not in available_models:
+            _, base_model = weak_provider_and_model(provider, spec.base_model, available_models)
+            spec = model_spec(provider, spec.with_base_model(base_model))
             
-            logger.info(f"Model correction: {provider}:{original_model} -> {provider}:{model}")
+            logger.info(f"Model correction: {provider}:{model} -> {spec.provider}:{spec.model}")
         
-        validated_models.append((provider, model))
+        validated_models.append(spec)
     
     return validated_models
 
@@ -0,0 +1,87 @@
+"""
+Tests for the local provider API stub server.
+"""
+
+import json
+import httpx
+import pytest
+import ollama
+from anthropic import Anthropic
+from openai import OpenAI, RateLimitError
+from agile_team.benchmarks.stub_server import StubServer
+from agile_team.shared.llm_providers import testing
+
+
+@pytest.fixture
+def server():
+    testing.clear_profiles()
+    with StubServer() as stub:
+        yield stub
+    testing.clear_profiles()
+
+
+def test_openai_chat_completions(server):
+    """Test non-streaming and streaming chat completions through the OpenAI SDK."""
+    client = OpenAI(base_url=f"{server.url}/v1", api_key="stub", max_retries=0)
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "hello stub"}]
+    )
+    assert response.choices[0].message.content == "Testing response for: hello stub"
+
+    stream = client.chat.completions.create(
+        model="gpt-4o-mini", messages=[{"role": "user", "content": "hello stub"}], stream=True
+    )
+    text = "".join(chunk.choices[0].delta.content or "" for chunk in stream if chunk.choices)
+    assert text == "Testing response for: hello stub"
+
+    assert "gpt-4o-mini" in [model.id for model in client.models.list()]
+
+
+def test_anthropic_messages(server):
+    """Test non-streaming and streaming messages through the Anthropic SDK."""
+    client = Anthropic(base_url=server.url, api_key="stub", max_retries=0)
+
+    message = client.messages.create(
+        model="claude-3-7-sonnet-20250219", max_tokens=100,
+        messages=[{"role": "user", "content": "hello stub"}],
+    )
+    assert message.content[0].text == "Testing response for: hello stub"
+
+    with client.messages.stream(
+        model="claude-3-7-sonnet-20250219", max_tokens=100,
+        messages=[{"role": "user", "content": "hello stub"}],
+    ) as stream:
+        assert "".join(stream.text_stream) == "Testing response for: hello stub"
+
+
+def test_ollama_chat(server):
+    """Test chat and model listing through the Ollama client."""
+    client = ollama.Client(host=server.url)
+
+    response = client.chat(model="llama3", messages=[{"role": "user", "content": "hello stub"}])
+    assert response["message"]["content"] == "Testing response for: hello stub"
+    assert "llama3" in [model.model for model in client.list().models]
+
+
+def test_gemini_generate_content(server):
+    """Test the Gemini REST endpoints, including SSE streaming."""
+    body = {"contents": [{"role": "user", "parts": [{"text": "hello stub"}]}]}
+    url = f"{server.url}/v1beta/models/gemini-2.5-pro-preview-03-25"
+
+    response = httpx.post(f"{url}:generateContent", json=body)
+    assert response.json()["candidates"][0]["content"]["parts"][0]["text"] == "Testing response for: hello stub"
+
+    response = httpx.post(f"{url}:streamGenerateContent?alt=sse", json=body)
+    events = [json.loads(line[len("data: "):]) for line in response.text.splitlines() if line.startswith("data: ")]
+    text = "".join(event["candidates"][0]["content"]["parts"][0]["text"] for event in events)
+    assert text == "Testing response for: hello stub"
+
+
+def test_profile_faults_map_to_http_errors(server):
+    """Test that testing provider profiles produce HTTP errors from the stub."""
+    testing.set_profile("limited-model", {"rate_limit_rate": 1.0})
+    client = OpenAI(base_url=f"{server.url}/v1", api_key="stub", max_retries=0)
+
+    with pytest.raises(RateLimitError):
+        client.chat.completions.create(model="limited-model", messages=[{"role": "user", "content": "hi"}])
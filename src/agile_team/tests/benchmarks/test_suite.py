@@ -0,0 +1,114 @@
+"""
+Tests for the benchmark suite.
+"""
+
+import sys
+import json
+from agile_team.benchmarks.suite import run_suite, run_e2e_suite, run_replay_suite, compare_results, measure
+from agile_team.shared import cassette
+from agile_team.shared.llm_providers import testing
+from agile_team.tools.persona_dm import persona_dm
+
+
+def test_run_suite_structure(tmp_path):
+    """Test that a small suite run produces a complete, JSON-serializable results document."""
+    results = run_suite(
+        repeat=1,
+        team_sizes=[1, 2],
+        input_sizes=[100],
+        catalog_sizes=[10],
+        work_dir=str(tmp_path)
+    )
+
+    # Results must be machine-readable
+    json.dumps(results)
+
+    names = {result["name"] for result in results["results"]}
+    assert names == {
+        "validate_and_correct_models",
+        "weak_provider_and_model",
+        "ModelRouter.prompt_model",
+        "ModelRouter.provider_handle",
+        "prompt_from_file_to_file",
+        "persona_dm",
+        "persona_base",
+    }
+    for result in results["results"]:
+        assert result["wall_seconds"]["min"] <= result["wall_seconds"]["max"]
+        assert "peak_bytes" in result["alloc"]
+
+    dm_result = next(r for r in results["results"] if r["name"] == "persona_dm")
+    assert dm_result["params"] == {"team_size": 2, "input_size": 100}
+    assert dm_result["stage_calls"]["prompt_from_file_to_file.prompt_model"] == 2
+    assert dm_result["stage_calls"]["persona_dm.prompt_model"] == 1
+
+    # The synthetic latency is restored after the run
+    assert testing.SYNTHETIC_LATENCY == 0
+
+
+def test_synthetic_latency_is_measured():
+    """Test that the testing provider's synthetic latency shows up in wall time."""
+    testing.SYNTHETIC_LATENCY = 0.01
+    try:
+        result = measure("latency", lambda: testing.prompt("hello", "test-model-1"), repeat=2, warmup=0)
+    finally:
+        testing.SYNTHETIC_LATENCY = 0
+    assert result["wall_seconds"]["min"] >= 0.01
+
+
+def test_compare_results_reports_regressions():
+    """Test regression detection between two results documents."""
+    baseline = {"results": [
+        {"name": "a", "params": {"n": 1}, "wall_seconds": {"median": 1.0}},
+        {"name": "b", "params": {}, "wall_seconds": {"median": 1.0}},
+    ]}
+    current = {"results": [
+        {"name": "a", "params": {"n": 1}, "wall_seconds": {"median": 1.5}},
+        {"name": "b", "params": {}, "wall_seconds": {"median": 1.1}},
+        {"name": "c", "params": {}, "wall_seconds": {"median": 9.0}},
+    ]}
+
+    regressions = compare_results(baseline, current, threshold=0.2)
+
+    assert len(regressions) == 1
+    assert regressions[0]["case"].startswith("a[")
+    assert regressions[0]["ratio"] == 1.5
+
+
+def test_run_replay_suite(tmp_path):
+    """Test replaying a recorded persona_dm run through persona_dm."""
+    cassette_path = str(tmp_path / "dm.jsonl.gz")
+    input_path = tmp_path / "prompt.md"
+    input_path.write_text("Pick a queue")
+
+    cassette.start_recording(cassette_path)
+    try:
+        persona_dm(
+            from_file=str(input_path),
+            models_prefixed_by_provider=["testing:test-model-1", "testing:test-model-2"],
+            output_dir=str(tmp_path / "recorded"),
+            persona_dm_model="testing:test-model-3"
+        )
+    finally:
+        cassette.stop_recording()
+
+    results = run_replay_suite(cassette_path, repeat=1, time_scale=0, work_dir=str(tmp_path))
+
+    result = results["results"][0]
+    assert results["meta"]["recorded_calls"] == 3
+    assert result["params"] == {"team_size": 2, "time_scale": 0}
+    assert result["stage_calls"]["persona_dm.prompt_model"] == 1
+    assert cassette.get_player() is None
+
+
+def test_run_e2e_suite_gemini_reuses_request_handles():
+    """Test the Gemini module end to end against the stub server and the request setup benchmark."""
+    results = run_e2e_suite(["gemini"], repeat=1, input_sizes=[100])
+
+    names = [result["name"] for result in results["results"]]
+    assert names.count("e2e.prompt_model") == 1
+    setup = {result["params"]["handle"] for result in results["results"] if result["name"] == "e2e.gemini_request_setup"}
+    assert setup == {"cached", "uncached"}
+
+    gemini = sys.modules["agile_team.shared.llm_providers.gemini"]
+    assert gemini._request_handle("gemini-1.5-flash-latest", 0) is gemini._request_handle("gemini-1.5-flash-latest", 0)
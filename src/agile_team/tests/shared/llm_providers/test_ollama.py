@@ -34,3 +34,83 @@ def test_prompt():
     assert isinstance(response, str)
     assert len(response) > 0
     assert "paris" in response.lower() or "Paris" in response
+
+
+@pytest.fixture
+def stub_pool(monkeypatch):
+    """Pool of two Ollama hosts served by local stub servers."""
+    from agile_team.benchmarks.stub_server import StubServer
+    with StubServer() as first, StubServer() as second:
+        pool = ollama.OllamaPool([first.url, second.url], concurrency=1, refresh_seconds=0)
+        monkeypatch.setattr(ollama, "pool", pool)
+        yield pool
+
+
+def test_pool_balances_by_outstanding_requests(stub_pool):
+    """Test least-outstanding balancing with a preference for hosts that have the model loaded."""
+    first, second = stub_pool.hosts
+    second.resident = ["llama3"]
+
+    with stub_pool.acquire("llama3") as host:
+        assert host is second
+        assert host.outstanding == 1
+        with stub_pool.acquire("llama3") as other:
+            assert other is first
+    assert first.outstanding == second.outstanding == 0
+
+    # Loaded models are reported with their tag; untagged names mean ":latest"
+    second.resident = ["llama3:latest"]
+    assert second.is_resident("llama3") and not second.is_resident("llama3:8b")
+    with stub_pool.acquire("llama3") as host:
+        assert host is second
+    first.resident, second.resident = ["registry.local:5000/team/llama3"], []
+    assert first.is_resident("registry.local:5000/team/llama3:latest")
+
+
+def test_stale_resident_models_are_refreshed(stub_pool):
+    """Test that loaded models are queried again in the background once they are older than the refresh interval."""
+    import time
+    first, second = stub_pool.hosts
+    stub_pool.refresh_seconds = 3600
+    first.resident = ["unloaded-model:latest"]
+
+    # Never queried: the first request refreshes every host
+    with stub_pool.acquire("llama3"):
+        pass
+    deadline = time.monotonic() + 5
+    while not (first.refreshed and second.refreshed) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not first.is_resident("unloaded-model") and first.is_resident("llama3")
+
+    # Recently queried: requests keep the known models
+    first.resident = ["unloaded-model:latest"]
+    with stub_pool.acquire("llama3"):
+        pass
+    assert first.refresh_if_stale(3600) is None
+    assert first.is_resident("unloaded-model")
+
+    first.refresh_if_stale(0).join()
+    assert not first.is_resident("unloaded-model")
+
+
+def test_pool_prompt_list_and_preload(stub_pool):
+    """Test prompts, model listing and preloading across the hosts of the pool."""
+    from agile_team.shared.metrics import registry
+
+    registry.reset()
+    response = ollama.prompt("hello pool", "llama3")
+    assert response == "Testing response for: hello pool"
+    assert response.input_tokens > 0
+
+    assert "llama3" in ollama.list_models()
+    resident = ollama.list_resident_models()
+    assert list(resident) == [host.host for host in stub_pool.hosts]
+    assert all("llama3" in models for models in resident.values())
+
+    threads = ollama.preload_models(["llama3"], wait=True)
+    assert len(threads) == 2
+    assert ollama.preload_models([]) == []
+
+    waits = registry.snapshot()["histograms"]["queue_wait_seconds"]
+    assert [item["labels"]["queue"] for item in waits] == [f"ollama:{stub_pool.hosts[0].host}"]
+    registry.reset()
@@ -0,0 +1,90 @@
+"""
+Tests for the testing provider.
+"""
+
+import json
+import time
+import pytest
+from agile_team.shared.llm_providers import testing
+
+
+@pytest.fixture(autouse=True)
+def reset_profiles():
+    """Start and finish every test without profiles."""
+    testing.clear_profiles()
+    yield
+    testing.clear_profiles()
+
+
+def test_canned_responses():
+    """Test the predictable responses without a profile."""
+    assert testing.prompt("What is the capital of France?", "test-model-1") == "Paris is the capital of France."
+    assert testing.prompt("hello", "test-model-1") == "Testing response for: hello"
+    with pytest.raises(ValueError):
+        testing.prompt("test error", "test-model-1")
+
+
+def test_stream_preserves_text_and_paces_tokens():
+    """Test that streaming yields the full response at the configured pace."""
+    testing.set_profile("stream-model", {"ttft_ms": 20, "tokens_per_second": 100})
+
+    start = time.perf_counter()
+    chunks = list(testing.stream("hello there", "stream-model"))
+    elapsed = time.perf_counter() - start
+
+    assert "".join(chunks) == "Testing response for: hello there"
+    assert len(chunks) == 5
+    # 20ms time to first token + 4 inter-token gaps of 10ms
+    assert elapsed >= 0.055
+
+
+def test_fixed_and_replayed_latency(tmp_path):
+    """Test fixed and replayed latency distributions."""
+    testing.set_profile("fixed-model", {"latency": {"distribution": "fixed", "ms": 30}})
+    start = time.perf_counter()
+    testing.prompt("hello", "fixed-model")
+    assert time.perf_counter() - start >= 0.03
+
+    replay_file = tmp_path / "latencies.json"
+    replay_file.write_text(json.dumps([{"latency_ms": 5}, {"elapsed": 0.01}, 15]))
+    testing.set_profile("replay-*", {"latency": {"distribution": "replay", "file": str(replay_file)}})
+    state = testing.get_profile("replay-model")
+    assert [round(state.latency_seconds(), 3) for _ in range(4)] == [0.005, 0.01, 0.015, 0.005]
+
+
+def test_lognormal_latency_is_seeded():
+    """Test that log-normal latency is reproducible with a seed."""
+    profile = {"latency": {"distribution": "lognormal", "median_ms": 100, "sigma": 0.5}, "seed": 7}
+    testing.set_profile("a", profile)
+    first = [testing.get_profile("a").latency_seconds() for _ in range(5)]
+    testing.set_profile("a", profile)
+    second = [testing.get_profile("a").latency_seconds() for _ in range(5)]
+    assert first == second
+    assert all(sample > 0 for sample in first)
+
+
+def test_fault_injection():
+    """Test rate limit, server error, truncation and hang injection."""
+    testing.set_profile("limited", {"rate_limit_rate": 1.0})
+    with pytest.raises(testing.RateLimitError):
+        testing.prompt("hello", "limited")
+
+    testing.set_profile("broken", {"server_error_rate": 1.0})
+    with pytest.raises(testing.ServerError):
+        testing.prompt("hello", "broken")
+
+    testing.set_profile("truncated", {"truncate_rate": 1.0})
+    assert testing.prompt("one two three four", "truncated") == "Testing response for: "
+
+    testing.set_profile("hanging", {"hang_rate": 1.0, "hang_seconds": 0.03})
+    start = time.perf_counter()
+    testing.prompt("hello", "hanging")
+    assert time.perf_counter() - start >= 0.03
+
+
+def test_list_models_includes_profiled_models():
+    """Test that exact-name profiles are listed and glob patterns are not."""
+    assert testing.list_models() == ["test-model-1", "test-model-2", "test-model-3"]
+    testing.set_profile("slow-model", {"ttft_ms": 1})
+    testing.set_profile("flaky-*", {"server_error_rate": 0.5})
+    assert testing.list_models() == ["test-model-1", "test-model-2", "test-model-3", "slow-model"]
@@ -0,0 +1,86 @@
+"""
+Tests for the content-addressed artifact store.
+"""
+
+import os
+import pytest
+from agile_team.shared import artifacts
+from agile_team.shared.artifacts import ArtifactStore
+from agile_team.shared.utils import read_file, write_file
+from agile_team.tools.artifacts import artifacts as artifacts_tool
+from agile_team.tools.persona_dm import persona_dm
+from agile_team.tools.prompt_from_file_to_file import prompt_from_file_to_file
+
+
+@pytest.fixture
+def prompt_file(tmp_path):
+    path = tmp_path / "prompt.txt"
+    path.write_text("hello")
+    return str(path)
+
+
+@pytest.fixture
+def open_store(tmp_path):
+    def open_store(materialize):
+        return artifacts.open_store(str(tmp_path / "store"), materialize)
+
+    yield open_store
+    artifacts.close_store()
+
+
+def test_identical_responses_are_stored_once(open_store, prompt_file, tmp_path):
+    """Test that identical responses share one blob and one read-only linked file."""
+    store = open_store("hardlink")
+    models = ["testing:test-model-1", "testing:test-model-2"]
+    first, second = prompt_from_file_to_file(prompt_file, models, str(tmp_path / "responses"))
+
+    assert read_file(first) == read_file(second) == "Testing response for: hello"
+    assert os.stat(first).st_ino == os.stat(second).st_ino
+    assert not os.access(first, os.W_OK) or os.geteuid() == 0
+
+    stats = store.stats()
+    assert (stats["artifacts"], stats["blobs"]) == (2, 1)
+    entries = store.entries()
+    assert {entry["model"] for entry in entries} == {"test-model-1", "test-model-2"}
+    assert len({entry["run"] for entry in entries}) == 1
+    assert entries[0]["input_path"] == os.path.abspath(prompt_file)
+
+    # Writing one path replaces its link and leaves the other response alone
+    write_file(first, "edited")
+    assert read_file(second) == "Testing response for: hello"
+
+
+def test_lazy_paths_are_written_on_read(open_store, prompt_file, tmp_path):
+    """Test that lazily stored responses are materialized when read or listed."""
+    open_store("lazy")
+    output_dir = tmp_path / "responses"
+    decision_path = persona_dm(
+        prompt_file,
+        models_prefixed_by_provider=["testing:test-model-1", "testing:test-model-2"],
+        output_dir=str(output_dir),
+        persona_dm_model="testing:test-model-3"
+    )
+
+    # The decision maker read its team's responses, which wrote them; the decision itself is not on disk
+    assert sorted(os.listdir(output_dir)) == ["prompt_testing_test-model-1.md", "prompt_testing_test-model-2.md"]
+    assert not os.path.exists(decision_path)
+
+    listed = artifacts_tool(path=decision_path, materialize=True)
+    assert listed["artifacts"][0]["materialized"]
+    assert read_file(decision_path).startswith("Testing response for:")
+    assert listed["store"]["artifacts"] == 3
+
+
+def test_zlib_without_zstandard(monkeypatch, tmp_path):
+    """Test that the store falls back to zlib when zstandard is not installed."""
+    monkeypatch.setattr(artifacts, "zstandard", None)
+    store = ArtifactStore(str(tmp_path / "store"), "copy")
+    path = str(tmp_path / "out.md")
+    store.put(path, "answer " * 100)
+    os.remove(path)
+
+    assert store.codec == "zlib"
+    assert store.read(path) == "answer " * 100
+    assert store.materialize(path) and read_file(path) == "answer " * 100
+    assert store.stats()["bytes_stored"] < store.stats()["bytes_unique"]
+    store.close()
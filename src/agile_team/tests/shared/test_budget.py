@@ -0,0 +1,117 @@
+"""
+Tests for token and cost budgets enforced by the model router.
+"""
+
+import os
+import anyio
+import pytest
+import functools
+from mcp.server.fastmcp.exceptions import ToolError, ValidationError
+from agile_team.shared import budget
+from agile_team.shared.budget import BudgetExceededError, budgeted, estimate_call, model_price
+from agile_team.shared.model_router import ModelRouter
+from agile_team.tools.budget import budget as budget_tool
+
+
+@pytest.fixture(autouse=True)
+def reset_budgets():
+    yield
+    for scope in budget.SCOPES:
+        budget.configure(scope, max_tokens=0, max_cost_usd=0, reset=True)
+    budget.set_policy("reject")
+    budget.model_price.cache_clear()
+
+
+def test_prices_and_estimates():
+    """Test price lookup by longest prefix and up-front estimates including thinking tokens."""
+    assert model_price("openai", "gpt-4o-mini") == (0.15, 0.6)
+    assert model_price("openai", "gpt-4o") == (2.5, 10.0)
+    assert model_price("anthropic", "claude-3-7-sonnet-20250219:4k") == (3.0, 15.0)
+    assert model_price("openai", "unknown-model") is None
+
+    tokens, cost = estimate_call("openai", "o3-mini:high", "x" * 4000)
+    assert tokens == 1000 + budget.BUDGET_ESTIMATED_OUTPUT_TOKENS + 16384
+    assert cost == pytest.approx((1000 * 1.1 + (tokens - 1000) * 4.4) / 1_000_000)
+    assert estimate_call("testing", "test-model-1", "hello") == (2 + budget.BUDGET_ESTIMATED_OUTPUT_TOKENS, 0.0)
+
+
+def test_reject_and_charge_reported_tokens():
+    """Test that calls over budget are rejected and completed calls are charged."""
+    budget.configure("session", max_tokens=3000)
+
+    response = ModelRouter.prompt_model("testing", "test-model-1", "hello budget")
+    session = budget.status()["session"]
+    assert session["spent_tokens"] == response.input_tokens + response.output_tokens
+    assert session["remaining_tokens"] == 3000 - session["spent_tokens"]
+
+    with pytest.raises(BudgetExceededError, match="session budget has"):
+        ModelRouter.prompt_model("testing", "test-model-1:16k", "hello budget")
+    assert budget.status()["session"]["rejected_calls"] == 1
+
+    # USD limits use the price table
+    budget.MODEL_PRICES["testing:priced-"] = (1000.0, 1000.0)
+    try:
+        budget.configure("global", max_cost_usd=0.5)
+        with pytest.raises(ToolError, match="global budget"):
+            ModelRouter.prompt_model("testing", "priced-model", "hello")
+    finally:
+        del budget.MODEL_PRICES["testing:priced-"]
+
+
+def test_downgrade_policy():
+    """Test that the downgrade policy drops the thinking suffix before rejecting."""
+    budget.set_policy("downgrade")
+    budget.configure("global", max_tokens=4000)
+
+    assert ModelRouter.prompt_model("testing", "test-model-2:16k", "hello") == "Testing response for: hello"
+    assert budget.status()["global"]["downgraded_calls"] == 1
+
+    with pytest.raises(ValueError):
+        budget.set_policy("ignore")
+
+
+def test_call_scope_and_tool():
+    """Test per-call budgets from the tool decorator and the budget tool."""
+    budget_tool(scope="call", max_tokens=100)
+
+    @budgeted
+    def tool():
+        with pytest.raises(BudgetExceededError, match="call budget"):
+            ModelRouter.prompt_model("testing", "test-model-1", "hello")
+        return {"status": "done"}
+
+    result = tool()
+    assert result["budget"]["call"]["max_tokens"] == 100
+    assert result["budget"]["call"]["rejected_calls"] == 1
+    assert budget.status()["call"] is None
+
+    status = budget_tool(scope="global", max_cost_usd=5, policy="downgrade")
+    assert status["policy"] == "downgrade"
+    assert status["global"]["max_cost_usd"] == 5
+
+    with pytest.raises(ValidationError):
+        budget_tool(scope="team", max_tokens=1)
+    with pytest.raises(ValidationError):
+        budget_tool(max_tokens=1)
+    with pytest.raises(ValidationError):
+        budget_tool(scope="global", max_tokens=-1)
+
+
+def test_tools_report_remaining_budget(tmp_path):
+    """Test that prompt and persona tools return their result next to the remaining budgets."""
+    from agile_team.server import persona_ba_tool, prompt_tool
+
+    budget.configure("session", max_tokens=100000)
+    prompt_file = tmp_path / "brief.md"
+    prompt_file.write_text("A todo app")
+
+    result = anyio.run(functools.partial(
+        persona_ba_tool, str(prompt_file), ["testing:test-model-1"], output_dir=str(tmp_path / "out")
+    ))
+    assert os.path.isfile(result["result"])
+    assert result["budget"]["session"]["max_tokens"] == 100000
+    assert result["budget"]["session"]["spent_tokens"] > 0
+
+    result = anyio.run(functools.partial(prompt_tool, "hello", ["testing:test-model-1"]))
+    assert result["result"] == ["Testing response for: hello"]
+    assert "global" in result["budget"]
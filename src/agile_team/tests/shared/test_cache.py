@@ -0,0 +1,231 @@
+"""
+Tests for the cache of model catalogs, responses and provider health.
+"""
+
+import os
+import time
+import threading
+import multiprocessing
+import types
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+from agile_team.shared import budget, cache, routing, usage
+from agile_team.shared.cache import MemoryCache, SQLiteCache
+from agile_team.shared.data_types import FallbackModelList, ProviderResponse
+from agile_team.shared.metrics import registry
+from agile_team.shared.model_router import ModelRouter
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    registry.reset()
+    previous = cache.set_cache(MemoryCache())
+    yield
+    cache.set_cache(previous)
+    registry.reset()
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    backend = MemoryCache(poll_seconds=0.01) if request.param == "memory" else SQLiteCache(
+        str(tmp_path / "cache.db"), poll_seconds=0.01
+    )
+    yield backend
+    backend.close()
+
+
+def _outcomes():
+    series = registry.snapshot()["counters"].get("cache_requests_total", [])
+    return {(item["labels"]["namespace"], item["labels"]["outcome"]): item["value"] for item in series}
+
+
+def _compute_once(path, log_path):
+    """Worker process: compute a shared entry that is slow to compute."""
+    def compute():
+        with open(log_path, "a") as f:
+            f.write("computed\n")
+        time.sleep(0.5)
+        return ["model-a", "model-b"]
+
+    return SQLiteCache(path, poll_seconds=0.01).get_or_compute("catalog", "openai", compute, 60)
+
+
+def test_entries_expire(backend):
+    """Test that entries are stored as JSON copies and expire after their TTL."""
+    backend.set("catalog", "openai", ["gpt-4o"], 60)
+    backend.set("catalog", "groq", ["llama3"], 0.05)
+    backend.set("catalog", "none", None, 60)
+    models = backend.get("catalog", "openai")
+    models.append("mutated")
+    assert backend.get("catalog", "openai") == ["gpt-4o"]
+    assert backend.get("catalog", "none") is None
+
+    time.sleep(0.1)
+    assert backend.get("catalog", "groq") is None
+
+    backend.clear("catalog")
+    assert backend.get("catalog", "openai") is None
+
+
+def test_single_flight_across_threads(backend):
+    """Test that concurrent lookups of a missing entry compute it once."""
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"answer": 42}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(backend.get_or_compute("response", "key", compute, 60)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"answer": 42}] * 8
+    assert _outcomes() == {("response", "miss"): 1, ("response", "coalesced"): 7}
+    assert backend.get_or_compute("response", "key", compute, 60) == {"answer": 42}
+    assert _outcomes()[("response", "hit")] == 1
+
+
+def test_failed_computation_is_not_cached(backend):
+    """Test that errors are not cached and release the lease."""
+    def fail():
+        raise ToolError("Error from openai API: boom")
+
+    with pytest.raises(ToolError):
+        backend.get_or_compute("catalog", "openai", fail, 60)
+    assert backend.get_or_compute("catalog", "openai", lambda: ["gpt-4o"], 60) == ["gpt-4o"]
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """Test that the lease of an owner that died expires."""
+    backend = SQLiteCache(str(tmp_path / "cache.db"), lease_seconds=0.2)
+    assert backend._try_lease("catalog", "openai", "dead-owner")
+    assert not backend._try_lease("catalog", "openai", "other-owner")
+    time.sleep(0.25)
+    assert backend._try_lease("catalog", "openai", "other-owner")
+    backend.close()
+
+
+def test_single_flight_across_processes(tmp_path):
+    """Test that worker processes sharing a SQLite cache compute a missing entry once."""
+    path, log_path = str(tmp_path / "cache.db"), str(tmp_path / "computed.log")
+    SQLiteCache(path).close()
+
+    with multiprocessing.get_context("spawn").Pool(3) as pool:
+        results = pool.starmap(_compute_once, [(path, log_path)] * 3)
+
+    assert results == [["model-a", "model-b"]] * 3
+    with open(log_path) as f:
+        assert f.read().count("computed") == 1
+
+
+def test_fallback_catalog_is_not_cached(monkeypatch):
+    """Test that a provider's hardcoded fallback list is returned but not cached as its catalog."""
+    catalogs = [FallbackModelList(["gpt-4o"]), ["gpt-4o", "gpt-4.1"]]
+    provider_module = types.SimpleNamespace(list_models=lambda: catalogs.pop(0))
+    monkeypatch.setattr(ModelRouter, "_get_provider_module", staticmethod(lambda provider: provider_module))
+
+    assert ModelRouter.list_models("openai") == ["gpt-4o"]
+    assert ModelRouter.list_models("openai") == ["gpt-4o", "gpt-4.1"]
+    assert ModelRouter.list_models("openai") == ["gpt-4o", "gpt-4.1"]
+    assert _outcomes()[("catalog", "hit")] == 1
+
+
+def test_response_cache(monkeypatch):
+    """Test that identical prompts are answered from the cache when enabled."""
+    first = ModelRouter.prompt_model("testing", "test-model-1", "hello")
+    ModelRouter.prompt_model("testing", "test-model-1", "hello")
+    assert _outcomes() == {}
+
+    monkeypatch.setenv("RESPONSE_CACHE_TTL_SECONDS", "60")
+    ModelRouter.prompt_model("testing", "test-model-1", "hello")
+    cached = ModelRouter.prompt_model("testing", "test-model-1", "hello")
+    assert cached == first
+    assert cached.input_tokens == first.input_tokens
+    assert _outcomes() == {("response", "miss"): 1, ("response", "hit"): 1}
+
+
+def test_response_cache_hits_are_recorded_as_saved(monkeypatch, tmp_path):
+    """Test that cache hits spend nothing and are recorded as saved tokens in the ledger and metrics."""
+    monkeypatch.setenv("RESPONSE_CACHE_TTL_SECONDS", "60")
+    ledger = usage.open_ledger(str(tmp_path / "usage.sqlite3"))
+    try:
+        first = ModelRouter.prompt_model("testing", "test-model-1", "hello ledger")
+        ModelRouter.prompt_model("testing", "test-model-1", "hello ledger")
+        totals = ledger.summarize([])[0]
+    finally:
+        usage.close_ledger()
+
+    saved = first.input_tokens + first.output_tokens
+    assert (totals["requests"], totals["cached_responses"], totals["saved_tokens"]) == (1, 1, saved)
+    assert totals["input_tokens"] == first.input_tokens
+    series = registry.snapshot()["counters"]["response_cache_saved_tokens_total"]
+    assert [item["value"] for item in series] == [saved]
+
+
+def test_downgraded_responses_are_cached_under_the_model_that_answered(monkeypatch):
+    """Test that a response of a budget downgrade is not served later for the requested model."""
+    monkeypatch.setenv("RESPONSE_CACHE_TTL_SECONDS", "60")
+    reserve = budget.reserve
+    monkeypatch.setattr(budget, "reserve", lambda provider, model, text: reserve(provider, "test-model-2", text))
+    ModelRouter.prompt_model("testing", "test-model-1", "hello budget")
+
+    monkeypatch.setattr(budget, "reserve", reserve)
+    ModelRouter.prompt_model("testing", "test-model-1", "hello budget")
+    assert _outcomes() == {("response", "miss"): 2}
+
+
+def test_response_cache_is_keyed_by_provider_configuration(monkeypatch):
+    """Test that deployments with other endpoints sharing a cache do not answer each other."""
+    monkeypatch.setenv("RESPONSE_CACHE_TTL_SECONDS", "60")
+    monkeypatch.setattr(ModelRouter, "_prompt_reserved", staticmethod(
+        lambda handle, provider, model, text, reservation: ProviderResponse(f"{os.environ.get('OPENAI_BASE_URL')}: {text}")
+    ))
+
+    monkeypatch.setenv("OPENAI_BASE_URL", "http://127.0.0.1:8080/v1")
+    assert ModelRouter._prompt_cached(None, "openai", "gpt-4o", "hello", 60) == "http://127.0.0.1:8080/v1: hello"
+    monkeypatch.delenv("OPENAI_BASE_URL")
+    assert ModelRouter._prompt_cached(None, "openai", "gpt-4o", "hello", 60) == "None: hello"
+    assert _outcomes() == {("response", "miss"): 2}
+
+
+def test_shm_database_is_private(monkeypatch, tmp_path):
+    """Test that shared memory databases are separate per deployment and readable by their owner only."""
+    monkeypatch.setenv("CACHE_PATH", str(tmp_path / "a.db"))
+    first = cache.shm_path()
+    assert str(os.getuid()) in os.path.basename(first)
+    assert cache.shm_path(str(tmp_path / "b.db")) != first
+
+    backend = SQLiteCache(str(tmp_path / "private.db"))
+    try:
+        backend.set("response", "key", "secret", 60)
+        assert os.stat(backend.path).st_mode & 0o777 == 0o600
+    finally:
+        backend.close()
+
+
+def test_rate_limit_cooldown_is_shared(tmp_path):
+    """Test that a target rate limited in one process is skipped by routers of other processes."""
+    path = str(tmp_path / "cache.db")
+    targets = {"drafter": ["testing:test-model-1", "testing:test-model-2"]}
+    first, second = routing.AliasRouter(targets), routing.AliasRouter(targets)
+    limited = first.aliases["drafter"][0]
+
+    cache.set_cache(SQLiteCache(path))
+    first.start(limited)
+    first.finish("drafter", limited, 0.1, ToolError("Error from testing API: 429 rate limit"))
+
+    # Another process opening the same database
+    cache.set_cache(SQLiteCache(path))
+    assert second.rank("drafter")[-1] == limited
+
+    # Process-local caches do not share health
+    cache.set_cache(MemoryCache())
+    assert second.rank("drafter")[0] == limited
@@ -0,0 +1,141 @@
+"""
+Tests for cancellation of tool calls.
+"""
+
+import os
+import time
+import threading
+import anyio
+import httpx
+import pytest
+from agile_team.shared import jobs, routing, transport
+from agile_team.shared.cancellation import (
+    DeadlineExceeded, RequestCancelled, cancellable, cancellation_scope, deadline_scope
+)
+from agile_team.shared.jobs import JobManager
+from agile_team.shared.llm_providers import testing
+from agile_team.shared.metrics import registry
+from agile_team.shared.model_router import ModelRouter
+from agile_team.tools.persona_dm import persona_dm
+from agile_team.tools.prompt_from_file_to_file import prompt_from_file_to_file
+
+
+@pytest.fixture(autouse=True)
+def hanging_model():
+    registry.reset()
+    testing.set_profile("test-model-1", {"hang_rate": 1.0, "hang_seconds": 30})
+    yield
+    testing.clear_profiles()
+    registry.reset()
+
+
+def _counter(name):
+    series = registry.snapshot()["counters"].get(name, [])
+    return {tuple(item["labels"].values()): item["value"] for item in series}
+
+
+def _cancelled_calls():
+    return sum(_counter("provider_calls_cancelled_total").values())
+
+
+def test_cancel_aborts_in_flight_call(monkeypatch):
+    """Test that cancelling a token aborts a hanging call, releases its alias slot and blocks later calls."""
+    router = routing.AliasRouter({"drafter": ["testing:test-model-1"]})
+    monkeypatch.setattr(routing, "router", router)
+
+    with cancellation_scope() as token:
+        threading.Timer(0.1, token.cancel).start()
+        started = time.perf_counter()
+        with pytest.raises(RequestCancelled):
+            ModelRouter.prompt_model("alias", "drafter", "hello")
+        assert time.perf_counter() - started < 5
+
+        # Calls of a cancelled tool call never start
+        with pytest.raises(RequestCancelled):
+            ModelRouter.prompt_model("testing", "test-model-2", "hello")
+
+    assert _cancelled_calls() == 1
+    snapshot = router.snapshot()
+    assert snapshot["aliases"]["drafter"]["testing:test-model-1"]["in_flight"] == 0
+    assert snapshot["decisions"][-1]["outcome"] == "rejected"
+
+    # Without a cancelled token calls run normally
+    assert ModelRouter.prompt_model("testing", "test-model-2", "hello") == "Testing response for: hello"
+
+
+def test_client_cancellation_skips_queued_team_members(tmp_path):
+    """Test that a cancelled tool returns at once and its worker stops before the remaining team members."""
+    prompt_file = tmp_path / "prompt.txt"
+    prompt_file.write_text("hello")
+    output_dir = tmp_path / "responses"
+    models = ["testing:test-model-1", "testing:test-model-2", "testing:test-model-3"]
+
+    @cancellable
+    def tool():
+        return prompt_from_file_to_file(str(prompt_file), models, str(output_dir))
+
+    async def call_and_cancel():
+        with anyio.move_on_after(0.2):
+            await tool()
+
+    started = time.perf_counter()
+    anyio.run(call_and_cancel)
+    assert time.perf_counter() - started < 5
+
+    deadline = time.monotonic() + 5
+    while _cancelled_calls() < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert _cancelled_calls() == 1
+    assert not output_dir.exists() or os.listdir(output_dir) == []
+
+
+def test_cancel_running_job(tmp_path):
+    """Test that cancelling a running background job stops it."""
+    manager = JobManager(str(tmp_path / "jobs"), workers=1)
+    try:
+        job = manager.submit("prompt", lambda: ModelRouter.prompt_model("testing", "test-model-1", "hello"), {})
+        deadline = time.monotonic() + 5
+        while manager.get(job.id).status != jobs.RUNNING and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        future = manager._futures[job.id]
+        assert manager.cancel(job.id).cancel_requested
+        future.result(timeout=5)
+        assert manager.get(job.id).status == jobs.CANCELLED
+    finally:
+        manager.shutdown()
+
+
+def test_deadline_stops_hanging_call():
+    """Test that a call past its deadline fails fast and caps the HTTP timeouts of its requests."""
+    started = time.perf_counter()
+    with deadline_scope(0.2):
+        with pytest.raises(DeadlineExceeded):
+            ModelRouter.prompt_model("testing", "test-model-1", "hello")
+    assert time.perf_counter() - started < 5
+    assert _counter("deadline_exceeded_total") == {("tool",): 1}
+
+    request = httpx.Request("POST", "https://api.example.com/v1/chat", extensions={"timeout": {"connect": 1, "read": 600}})
+    with deadline_scope(5):
+        transport._request_hook("openai")(request)
+    assert request.extensions["timeout"]["connect"] == 1
+    assert 4 < request.extensions["timeout"]["read"] <= 5
+    assert request.extensions["timeout"]["pool"] <= 5
+
+
+def test_team_stage_leaves_time_for_the_decision(tmp_path):
+    """Test that a hanging team member uses up only the team's share of the deadline."""
+    prompt_file = tmp_path / "prompt.txt"
+    prompt_file.write_text("hello")
+
+    with deadline_scope(1.0):
+        result = persona_dm(
+            str(prompt_file),
+            models_prefixed_by_provider=["testing:test-model-2", "testing:test-model-1"],
+            persona_dm_model="testing:test-model-3"
+        )
+
+    assert os.path.isfile(result)
+    error_files = [name for name in os.listdir(tmp_path / "responses") if "_error" in name]
+    assert len(error_files) == 1 and "test-model-1" in error_files[0]
+    assert _counter("deadline_exceeded_total") == {("team",): 1}
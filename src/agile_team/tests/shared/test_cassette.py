@@ -0,0 +1,105 @@
+"""
+Tests for cassette recording and replay.
+"""
+
+import time
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+from agile_team.shared import cancellation, cassette
+from agile_team.shared.cassette import load_cassette
+from agile_team.shared.model_router import ModelRouter
+from agile_team.shared.llm_providers import testing
+
+
+@pytest.fixture(autouse=True)
+def reset_cassette():
+    testing.clear_profiles()
+    yield
+    cassette.stop_recording()
+    cassette.stop_replay()
+    testing.clear_profiles()
+
+
+def test_record_captures_calls_and_chunks(tmp_path):
+    """Test that router calls are written with chunk boundaries, timing and usage."""
+    path = str(tmp_path / "run.jsonl.gz")
+    testing.set_profile("test-model-2", {"ttft_ms": 20})
+
+    cassette.start_recording(path)
+    assert ModelRouter.prompt_model("testing", "test-model-2", "hello cassette") == "Testing response for: hello cassette"
+    with pytest.raises(ToolError):
+        ModelRouter.prompt_model("testing", "test-model-1", "test error")
+    cassette.stop_recording()
+
+    header, entries = load_cassette(path)
+    assert header["version"] == cassette.CASSETTE_VERSION
+    assert len(entries) == 2
+
+    ok, failed = entries
+    assert ok["provider"] == "testing" and ok["model"] == "test-model-2"
+    assert "".join(chunk for _, chunk in ok["chunks"]) == ok["response"]
+    assert len(ok["chunks"]) == 5
+    assert ok["chunks"][0][0] >= 0.02
+    assert ok["usage"]["input_chars"] == 14
+    assert ok["usage"]["output_chars"] == len(ok["response"])
+    assert ok["usage"]["output_tokens"] > 0
+    assert failed["response"] is None
+    assert "Test error" in failed["error"]
+
+
+def test_replay_serves_recorded_responses_with_scaled_timing(tmp_path):
+    """Test replay without calling the provider, with original and scaled timing."""
+    path = str(tmp_path / "run.jsonl.gz")
+    testing.set_profile("test-model-1", {"latency": {"distribution": "fixed", "ms": 50}})
+    cassette.start_recording(path)
+    ModelRouter.prompt_model("testing", "test-model-1", "hello replay")
+    cassette.stop_recording()
+    testing.clear_profiles()
+
+    cassette.start_replay(path)
+    start = time.perf_counter()
+    assert ModelRouter.prompt_model("testing", "test-model-1", "hello replay") == "Testing response for: hello replay"
+    assert time.perf_counter() - start >= 0.05
+
+    cassette.start_replay(path, time_scale=0)
+    start = time.perf_counter()
+    ModelRouter.prompt_model("testing", "test-model-1", "hello replay")
+    assert time.perf_counter() - start < 0.05
+
+    # Unrecorded prompts are not sent to the provider
+    with pytest.raises(ToolError):
+        ModelRouter.prompt_model("testing", "test-model-1", "something else")
+
+
+def test_replay_waits_honour_deadlines(tmp_path):
+    """Test that a replayed slow call stops at the deadline of the tool call."""
+    path = str(tmp_path / "run.jsonl.gz")
+    testing.set_profile("test-model-1", {"latency": {"distribution": "fixed", "ms": 500}})
+    cassette.start_recording(path)
+    ModelRouter.prompt_model("testing", "test-model-1", "hello deadline")
+    cassette.stop_recording()
+
+    cassette.start_replay(path)
+    start = time.perf_counter()
+    with pytest.raises(cancellation.DeadlineExceeded), cancellation.deadline_scope(0.05):
+        ModelRouter.prompt_model("testing", "test-model-1", "hello deadline")
+    assert time.perf_counter() - start < 0.4
+
+
+def test_replay_model_match_and_recorded_errors(tmp_path):
+    """Test model matching in recorded order, recorded errors and model listing."""
+    path = str(tmp_path / "run.jsonl.gz")
+    cassette.start_recording(path)
+    ModelRouter.prompt_model("testing", "test-model-3", "first")
+    with pytest.raises(ToolError):
+        ModelRouter.prompt_model("testing", "test-model-3", "test error")
+    cassette.stop_recording()
+
+    cassette.start_replay(path, time_scale=0, match="model")
+    assert ModelRouter.prompt_model("testing", "test-model-3", "changed prompt") == "Testing response for: first"
+    with pytest.raises(ToolError, match="Test error"):
+        ModelRouter.prompt_model("testing", "test-model-3", "changed prompt")
+    assert ModelRouter.list_models("testing") == ["test-model-3"]
+
+    with pytest.raises(ValueError):
+        cassette.start_replay(path, match="fuzzy")
@@ -0,0 +1,185 @@
+"""
+Tests for background jobs.
+"""
+
+import os
+import json
+import functools
+import subprocess
+import sys
+import threading
+import anyio
+import pytest
+from mcp.server.fastmcp.exceptions import ResourceError
+from agile_team.shared import cancellation, jobs
+from agile_team.shared.jobs import JobManager
+from agile_team.tools.jobs import job_cancel, job_result, job_status
+from agile_team.tools.workflow import run_workflow
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(str(tmp_path / "jobs"), workers=1)
+    previous = jobs.set_manager(manager)
+    yield manager
+    manager.shutdown()
+    jobs.set_manager(previous)
+
+
+def _wait(manager, job_id):
+    future = manager._futures.get(job_id)
+    if future is not None:
+        future.result(timeout=10)
+    return manager.get(job_id)
+
+
+def test_job_result_survives_restart(manager, tmp_path):
+    """Test that a background workflow's result is persisted and reloaded after a restart."""
+    steps = [{"id": "draft", "type": "prompt", "text": "hello", "models_prefixed_by_provider": ["testing:test-model-1"]}]
+    job = jobs.submit("workflow_tool", run_workflow, {"steps": steps, "output_dir": str(tmp_path / "out")})
+
+    assert _wait(manager, job.id).status == jobs.SUCCEEDED
+    result = job_result(job.id)
+    assert result["status"] == "succeeded"
+    assert result["result"]["steps"]["draft"]["status"] == "completed"
+    assert job_status()["jobs"][0]["job_id"] == job.id
+
+    restarted = JobManager(manager.store_dir, workers=1)
+    try:
+        assert restarted.get(job.id).result == result["result"]
+    finally:
+        restarted.shutdown()
+
+
+def test_background_tools_return_the_same_shape(manager, tmp_path):
+    """Test that persona and workflow tools describe background jobs identically."""
+    from agile_team.server import persona_dm_tool, workflow_tool
+
+    prompt_file = tmp_path / "prompt.md"
+    prompt_file.write_text("hello")
+    persona_job = anyio.run(functools.partial(
+        persona_dm_tool, str(prompt_file), ["testing:test-model-1", "testing:test-model-2"],
+        output_dir=str(tmp_path / "out"), persona_dm_model="testing:test-model-3", background=True
+    ))
+    steps = [{"id": "draft", "type": "prompt", "text": "hello", "models_prefixed_by_provider": ["testing:test-model-1"]}]
+    workflow_job = anyio.run(functools.partial(workflow_tool, steps, output_dir=str(tmp_path / "out"), background=True))
+
+    assert set(persona_job) == set(workflow_job) >= {"job_id", "status"}
+    assert _wait(manager, persona_job["job_id"]).status == jobs.SUCCEEDED
+    assert _wait(manager, workflow_job["job_id"]).status == jobs.SUCCEEDED
+
+
+def test_failed_interrupted_and_unknown_jobs(manager):
+    """Test failed jobs, jobs interrupted by a restart, and unknown job ids."""
+    def fail():
+        raise ValueError("provider down")
+
+    job = manager.submit("persona_ba_tool", fail, {})
+    assert _wait(manager, job.id).status == jobs.FAILED
+    assert job_status(job.id)["error"] == "provider down"
+
+    # A job that was running when the server stopped
+    with open(manager._path("stale"), "w") as f:
+        json.dump({"id": "stale", "tool": "persona_dm_tool", "status": "running", "created_at": 1e10}, f)
+    restarted = JobManager(manager.store_dir, workers=1)
+    try:
+        assert restarted.get("stale").status == jobs.INTERRUPTED
+    finally:
+        restarted.shutdown()
+
+    with pytest.raises(ResourceError):
+        job_status("missing")
+
+
+def test_only_jobs_of_dead_owners_are_interrupted(manager):
+    """Test that a starting manager leaves the running jobs of other live processes alone."""
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    owners = {"live": jobs.current_owner(), "dead": {"pid": exited.pid, "started": None}}
+    for job_id, owner in owners.items():
+        with open(manager._path(job_id), "w") as f:
+            json.dump({"id": job_id, "tool": "persona_dm_tool", "status": "running", "created_at": 1e10, "owner": owner}, f)
+
+    restarted = JobManager(manager.store_dir, workers=1)
+    try:
+        assert "live" not in restarted._jobs
+        assert restarted.get("dead").status == jobs.INTERRUPTED
+        with open(manager._path("live")) as f:
+            assert json.load(f)["status"] == "running"
+    finally:
+        restarted.shutdown()
+
+
+def test_jobs_are_found_from_other_managers(manager):
+    """Test that jobs persisted by another manager sharing the store are looked up on disk."""
+    other = JobManager(manager.store_dir, workers=1)
+    try:
+        release = threading.Event()
+        running = other.submit("persona_ba_tool", lambda: release.wait(10) and "done", {})
+        assert manager.get(running.id).status in (jobs.QUEUED, jobs.RUNNING)
+        assert running.id in [job.id for job in manager.list()]
+
+        release.set()
+        _wait(other, running.id)
+        assert job_result(running.id)["result"] == "done"
+    finally:
+        other.shutdown()
+
+
+def test_cancel_job_of_another_manager(manager):
+    """Test that a job running in another server process is cancelled through a marker its owner polls."""
+    other = JobManager(manager.store_dir, workers=1, cancel_poll_seconds=0.05)
+    try:
+        started = threading.Event()
+
+        def wait_for_cancellation():
+            started.set()
+            cancellation.sleep(10)
+            return "finished"
+
+        running = other.submit("workflow_tool", wait_for_cancellation, {})
+        assert started.wait(10)
+        assert job_cancel(running.id)["cancel_requested"] is True
+
+        assert _wait(other, running.id).status == jobs.CANCELLED
+        assert manager.get(running.id).status == jobs.CANCELLED
+        assert not os.path.exists(other._cancel_path(running.id))
+    finally:
+        other.shutdown()
+
+
+def test_cancel_queued_job(manager):
+    """Test that a queued job is cancelled before it starts and a running one is asked to stop."""
+    started, release = threading.Event(), threading.Event()
+
+    def block():
+        started.set()
+        release.wait(10)
+        return "done"
+
+    running = manager.submit("persona_sw_tool", block, {})
+    queued = manager.submit("persona_pm_tool", lambda: "never", {})
+    assert started.wait(10)
+
+    assert job_cancel(queued.id)["status"] == "cancelled"
+    status = job_cancel(running.id)
+    assert status["status"] == "running" and status["cancel_requested"] is True
+
+    release.set()
+    assert _wait(manager, running.id).status == jobs.SUCCEEDED
+    assert manager.get(queued.id).result is None
+
+
+def test_invalid_settings_fall_back_to_defaults(monkeypatch, tmp_path):
+    """Test that invalid JOB_WORKERS and JOB_DEADLINE_SECONDS are ignored instead of failing the first job."""
+    monkeypatch.setenv("JOB_STORE_DIR", str(tmp_path / "jobs"))
+    monkeypatch.setenv("JOB_WORKERS", "four")
+    monkeypatch.setenv("JOB_DEADLINE_SECONDS", "30m")
+    previous = jobs.set_manager(None)
+    try:
+        manager = jobs.get_manager()
+        assert manager.deadline_seconds == jobs.JOB_DEADLINE_SECONDS
+        assert _wait(manager, manager.submit("persona_ba_tool", lambda: "done", {}).id).status == jobs.SUCCEEDED
+    finally:
+        jobs.get_manager().shutdown()
+        jobs.set_manager(previous)
@@ -0,0 +1,81 @@
+"""
+Tests for provider request metrics.
+"""
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError
+from agile_team.shared import metrics
+from agile_team.shared.metrics import Histogram, estimate_tokens, write_textfile
+from agile_team.shared.model_router import ModelRouter
+from agile_team.shared.llm_providers import testing
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.registry.reset()
+    testing.clear_profiles()
+    yield
+    metrics.registry.reset()
+    testing.clear_profiles()
+
+
+def _series(snapshot, kind, name, **labels):
+    return [s for s in snapshot[kind].get(name, []) if all(s["labels"].get(k) == v for k, v in labels.items())]
+
+
+def test_histogram_buckets_and_quantiles():
+    """Test fixed-bucket histogram counting and percentile estimates."""
+    histogram = Histogram((1.0, 2.0, 4.0))
+    for value in (0.5, 1.0, 1.5, 3.0, 10.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 1, 1, 1]
+    assert histogram.count == 5
+    assert histogram.sum == 16.0
+    assert 1.0 <= histogram.quantile(0.5) <= 2.0
+    assert histogram.quantile(1.0) == 4.0
+    assert Histogram((1.0,)).quantile(0.5) is None
+
+
+def test_router_records_requests_errors_and_ttft():
+    """Test that router calls record latency, time to first token, tokens and errors."""
+    testing.set_profile("test-model-2", {"ttft_ms": 10})
+    ModelRouter.prompt_model("testing", "test-model-2", "hello metrics")
+    with pytest.raises(ToolError):
+        ModelRouter.prompt_model("testing", "test-model-2", "test error")
+
+    snapshot = metrics.get_metrics()
+    labels = {"provider": "testing", "model": "test-model-2"}
+
+    assert _series(snapshot, "counters", "requests_total", **labels)[0]["value"] == 2
+    errors = _series(snapshot, "counters", "errors_total", **labels)
+    assert errors[0]["labels"]["error_class"] == "ValueError"
+    assert errors[0]["value"] == 1
+
+    latency = _series(snapshot, "histograms", "request_latency_seconds", **labels)[0]
+    assert latency["count"] == 2
+    ttft = _series(snapshot, "histograms", "time_to_first_token_seconds", **labels)[0]
+    assert ttft["count"] == 1
+    assert ttft["sum"] >= 0.01
+
+    output_tokens = _series(snapshot, "counters", "output_tokens_total", **labels)[0]["value"]
+    assert output_tokens == estimate_tokens("Testing response for: hello metrics")
+
+
+def test_prometheus_textfile(tmp_path):
+    """Test the Prometheus text format and the textfile writer."""
+    ModelRouter.prompt_model("testing", "test-model-1", "hello prometheus")
+    metrics.record_queue_wait("workflow", 0.2)
+
+    path = str(tmp_path / "agile_team.prom")
+    write_textfile(path)
+    with open(path) as f:
+        text = f.read()
+
+    assert "# TYPE agile_team_requests_total counter" in text
+    assert 'agile_team_requests_total{model="test-model-1",provider="testing"} 1' in text
+    assert 'agile_team_request_latency_seconds_bucket{model="test-model-1",provider="testing",le="+Inf"} 1' in text
+    assert 'agile_team_queue_wait_seconds_bucket{queue="workflow",le="0.25"} 1' in text
+
+    with pytest.raises(ValueError):
+        metrics.get_metrics("xml")
@@ -6,10 +6,18 @@ import pytest
 import os
 from unittest.mock import patch, MagicMock
 import importlib
-from agile_team.shared.model_router import ModelRouter, prompt_model, list_models, list_providers, _get_provider_module
+from agile_team.shared.model_router import ModelRouter, prompt_model, list_models, list_providers, _get_provider_module, invalidate_provider_handles
 from agile_team.shared.data_types import ModelProviders
 
 
+@pytest.fixture(autouse=True)
+def fresh_provider_handles():
+    # Provider handles cache the imported module, so tests patching the import start clean
+    invalidate_provider_handles()
+    yield
+    invalidate_provider_handles()
+
+
 @patch('importlib.import_module')
 def test_get_provider_module(mock_import_module):
     """Test _get_provider_module method."""
@@ -41,6 +49,32 @@ def test_get_provider_module(mock_import_module):
         ModelRouter._get_provider_module("unknown")
 
 
+@patch('importlib.import_module')
+def test_provider_handles_are_cached(mock_import_module):
+    """Test that provider handles are resolved once and re-resolved when their configuration changes."""
+    mock_import_module.return_value = MagicMock()
+    
+    with patch.dict(os.environ, {"OPENAI_API_KEY": "test-key"}):
+        handle = ModelRouter._get_provider_handle("openai")
+        assert ModelRouter._get_provider_handle("openai") is handle
+        assert mock_import_module.call_count == 1
+        assert handle.has_credentials and not handle.local
+    
+    # A changed API key re-resolves the handle; a missing one is reported on every call
+    with patch.dict(os.environ, {"OPENAI_API_KEY": ""}):
+        with pytest.raises(Exception, match="Missing API key for openai"):
+            ModelRouter._get_provider_handle("openai")
+        with pytest.raises(Exception, match="Missing API key for openai"):
+            ModelRouter._get_provider_handle("openai")
+    assert mock_import_module.call_count == 2
+    
+    handle = ModelRouter._get_provider_handle("testing")
+    invalidate_provider_handles("ollama")
+    assert ModelRouter._get_provider_handle("testing") is handle
+    invalidate_provider_handles("t")
+    assert ModelRouter._get_provider_handle("testing") is not handle
+
+
 @patch('importlib.import_module')
 def test_prompt_model(mock_import_module):
     """Test prompt_model method."""
@@ -59,10 +93,10 @@ def test_prompt_model(mock_import_module):
     mock_import_module.reset_mock()
     mock_module.prompt.reset_mock()
     
-    # Test with short provider name
+    # Test with short provider name (the cached provider handle is reused)
     response = ModelRouter.prompt_model("o", "gpt-4o-mini", "What is the capital of France?")
     assert response == "Paris is the capital of France."
-    mock_import_module.assert_called_with("agile_team.shared.llm_providers.openai")
+    mock_import_module.assert_not_called()
     
     # Test with error
     mock_module.prompt.side_effect = ValueError("Test error")
@@ -0,0 +1,88 @@
+"""
+Tests for latency-aware routing of model aliases.
+"""
+
+import pytest
+from mcp.server.fastmcp.exceptions import ToolError, ValidationError
+from agile_team.shared import routing
+from agile_team.shared.llm_providers import testing
+from agile_team.shared.model_router import ModelRouter
+from agile_team.shared.validator import validate_and_correct_models
+from agile_team.tools.routing import routing as routing_tool
+
+
+@pytest.fixture(autouse=True)
+def alias_router(monkeypatch):
+    router = routing.AliasRouter({"drafter": ["testing:test-model-1", "testing:test-model-2"]}, alpha=0.5)
+    monkeypatch.setattr(routing, "router", router)
+    yield router
+    testing.clear_profiles()
+
+
+def test_ranking_by_latency_and_errors(alias_router):
+    """Test that stale targets are probed first and fresh ones ranked by expected latency."""
+    first, second = alias_router.aliases["drafter"]
+    for target, latency in ((first, 2.0), (second, 1.0)):
+        alias_router.start(target)
+        alias_router.finish("drafter", target, latency)
+    assert alias_router.rank("drafter") == [second, first]
+
+    # Errors inflate the expected latency
+    for _ in range(3):
+        alias_router.start(second)
+        alias_router.finish("drafter", second, 1.0, ToolError("Error from testing API: boom"))
+    assert alias_router.rank("drafter") == [first, second]
+
+    # Stale statistics are probed again
+    alias_router.stats_ttl = -1
+    alias_router.start(first)
+    alias_router.finish("drafter", first, 2.0)
+    assert alias_router.rank("drafter")[0] == first
+    assert alias_router.rank("drafter", available=lambda provider: False) == []
+
+
+def test_failover_and_rate_limit_cooldown(alias_router):
+    """Test that a rate-limited target fails over and cools down."""
+    testing.set_profile("test-model-1", {"rate_limit_rate": 1.0})
+
+    response = ModelRouter.prompt_model("alias", "drafter", "hello")
+    assert response == "Testing response for: hello"
+
+    snapshot = routing_tool()
+    assert [(d["target"], d["outcome"], d["attempt"]) for d in snapshot["decisions"]] == [
+        ("testing:test-model-1", "rate_limited", 0),
+        ("testing:test-model-2", "ok", 1),
+    ]
+    assert snapshot["aliases"]["drafter"]["testing:test-model-1"]["cooldown_seconds"] > 0
+    assert snapshot["aliases"]["drafter"]["testing:test-model-2"]["in_flight"] == 0
+
+    # The cooling target is tried last even though it looks stale
+    ModelRouter.prompt_model("alias", "drafter", "hello again")
+    assert routing_tool(decisions=1)["decisions"][0]["target"] == "testing:test-model-2"
+
+    testing.set_profile("test-model-*", {"server_error_rate": 1.0})
+    with pytest.raises(ToolError, match="All targets of model alias drafter failed"):
+        ModelRouter.prompt_model("alias", "drafter", "hello")
+
+
+def test_validator_resolves_aliases():
+    """Test that aliases pass validation unchanged and unknown aliases are rejected."""
+    assert validate_and_correct_models(["alias:drafter", "drafter", "testing:test-model-3"]) == [
+        ("alias", "drafter"), ("alias", "drafter"), ("testing", "test-model-3")
+    ]
+    with pytest.raises(ValidationError, match="Unknown model alias"):
+        validate_and_correct_models(["alias:missing"])
+
+
+def test_aliases_from_environment(monkeypatch, tmp_path):
+    """Test aliases from MODEL_ALIASES and MODEL_ALIASES_FILE, ignoring invalid definitions."""
+    path = tmp_path / "aliases.json"
+    path.write_text('{"local": ["ollama:llama3"]}')
+    monkeypatch.setenv("MODEL_ALIASES_FILE", str(path))
+    monkeypatch.setenv("MODEL_ALIASES", '{"cheap": ["openai:gpt-4o-mini"]}')
+    aliases = routing.load_aliases()
+    assert aliases["local"] == ["ollama:llama3"] and aliases["cheap"] == ["openai:gpt-4o-mini"]
+    assert "fast-drafter" in aliases
+
+    monkeypatch.setenv("MODEL_ALIASES", '{"cheap": "gpt-4o-mini"}')
+    assert "cheap" not in routing.load_aliases()
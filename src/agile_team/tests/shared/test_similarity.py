@@ -0,0 +1,31 @@
+"""
+Tests for near-duplicate detection of team responses.
+"""
+
+from agile_team.shared.similarity import collapse_near_duplicates, minhash, similarity
+
+
+def test_similarity_estimates_shingle_overlap():
+    """Test that MinHash similarity separates near-identical from different texts."""
+    text = " ".join(f"word{i}" for i in range(200))
+    edited = text.replace("word100", "changed")
+    other = " ".join(f"term{i}" for i in range(200))
+
+    assert minhash(text) == minhash(text.upper() + "!")
+    assert similarity(minhash(text), minhash(edited)) > 0.8
+    assert similarity(minhash(text), minhash(other)) < 0.1
+
+
+def test_collapse_near_duplicates(monkeypatch):
+    """Test that near-duplicates join the group of the first matching response."""
+    text = " ".join(f"word{i}" for i in range(400))
+    edited = text.replace("word100 ", "changed ").replace("word300 ", "changed ")
+    responses = [("a", text), ("b", "Something else entirely"), ("c", edited), ("d", text)]
+
+    assert collapse_near_duplicates(responses) == [(["a", "c", "d"], text), (["b"], "Something else entirely")]
+    assert collapse_near_duplicates(responses, threshold=1.0) == [
+        (["a", "d"], text), (["b"], "Something else entirely"), (["c"], edited)
+    ]
+
+    monkeypatch.setenv("TEAM_DEDUP_THRESHOLD", "0")
+    assert [names for names, _ in collapse_near_duplicates(responses)] == [["a"], ["b"], ["c"], ["d"]]
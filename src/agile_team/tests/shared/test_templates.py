@@ -0,0 +1,74 @@
+"""
+Tests for the registry of precompiled prompt templates.
+"""
+
+import os
+import pytest
+from agile_team.shared.templates import PACKAGED_TEMPLATES_DIR, Template, TemplateRegistry, compile_template
+
+
+@pytest.fixture
+def template_dir(tmp_path):
+    (tmp_path / "ba_prompt.md").write_text("Analyze: {request_data}")
+    return tmp_path
+
+
+def test_render_matches_str_format():
+    """Test that every packaged template renders exactly as str.format does."""
+    values = {"request_data": "Build a todo app", "original_prompt": "Build it", "team_responses": "<r/>"}
+    names = sorted(os.listdir(PACKAGED_TEMPLATES_DIR))
+    assert names
+
+    for name in names:
+        with open(os.path.join(PACKAGED_TEMPLATES_DIR, name), encoding="utf-8") as f:
+            source = f.read()
+        rendered = Template(source, name).render(**values)
+        assert rendered == source.format(**values)
+
+    # Conversions, format specs and escaped braces
+    source = "{{literal}} {name!r:>10} {count:03d} {items[0]}"
+    assert Template(source).render(name="x", count=7, items=["a"]) == source.format(name="x", count=7, items=["a"])
+    with pytest.raises(KeyError):
+        Template("{missing}").render()
+
+
+def test_compiled_once_per_text():
+    """Test that template texts are compiled once and identified by their digest."""
+    template = Template("Static text of the template: {request_data} and more static text")
+
+    assert template.fields == ("request_data",)
+    assert compile_template(template.source) is compile_template(template.source)
+    assert compile_template(template.source).digest == template.digest
+    assert compile_template(template.source + " ").digest != template.digest
+
+
+def test_reload_on_mtime_change(template_dir):
+    """Test that edited template files are recompiled and stale default text resolves to the new template."""
+    registry = TemplateRegistry([str(template_dir)], reload_seconds=0)
+    original = registry.get("ba_prompt.md")
+    assert registry.get("ba_prompt.md") is original
+
+    path = template_dir / "ba_prompt.md"
+    path.write_text("Analyze carefully: {request_data}")
+    os.utime(path, (original.mtime + 5, original.mtime + 5))
+
+    reloaded = registry.get("ba_prompt.md")
+    assert reloaded.digest != original.digest
+    assert registry.resolve(original.source) is reloaded
+    assert registry.resolve(original.source).render(request_data="x") == "Analyze carefully: x"
+    assert registry.hashes() == {"ba_prompt.md": reloaded.digest}
+
+    # Custom text is compiled on its own
+    assert registry.resolve("Custom: {request_data}").name is None
+
+
+def test_override_directory_and_reload_interval(template_dir, tmp_path):
+    """Test that override directories take precedence and files are rechecked only after the interval."""
+    registry = TemplateRegistry([str(template_dir), PACKAGED_TEMPLATES_DIR], reload_seconds=3600)
+    assert registry.get("ba_prompt.md").source == "Analyze: {request_data}"
+    assert registry.get("dm_prompt.md").path == os.path.join(PACKAGED_TEMPLATES_DIR, "dm_prompt.md")
+
+    path = template_dir / "ba_prompt.md"
+    path.write_text("Changed: {request_data}")
+    os.utime(path, (1, 1))
+    assert registry.get("ba_prompt.md").source == "Analyze: {request_data}"
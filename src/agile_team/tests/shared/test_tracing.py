@@ -0,0 +1,96 @@
+"""
+Tests for OpenTelemetry tracing.
+"""
+
+import json
+import pytest
+from agile_team.shared import tracing
+from agile_team.tools.persona_dm import persona_dm
+from agile_team.tools.workflow import run_workflow
+
+sdk_trace = pytest.importorskip("opentelemetry.sdk.trace")
+from opentelemetry import trace as otel_trace
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+_exporter = InMemorySpanExporter()
+
+
+@pytest.fixture
+def spans():
+    provider = otel_trace.get_tracer_provider()
+    if not isinstance(provider, sdk_trace.TracerProvider):
+        provider = sdk_trace.TracerProvider()
+        otel_trace.set_tracer_provider(provider)
+    if not getattr(provider, "_agile_team_test_exporter", False):
+        provider.add_span_processor(SimpleSpanProcessor(_exporter))
+        provider._agile_team_test_exporter = True
+    _exporter.clear()
+    yield _exporter
+    _exporter.clear()
+
+
+def test_persona_dm_spans(spans, tmp_path):
+    """Test that a persona_dm run produces validator, router, provider, file and decision spans."""
+    prompt_file = tmp_path / "prompt.md"
+    prompt_file.write_text("hello tracing")
+
+    with tracing.span("tool.test"):
+        persona_dm(
+            from_file=str(prompt_file),
+            models_prefixed_by_provider=["testing:test-model-1", "testing:test-model-2"],
+            output_dir=str(tmp_path / "out"),
+            persona_dm_model="testing:test-model-3"
+        )
+
+    finished = spans.get_finished_spans()
+    names = [span.name for span in finished]
+    for name in ("persona_dm.team", "persona_dm.decision", "validate_and_correct_models",
+                 "ModelRouter.prompt_model", "provider.testing", "read_file", "write_file"):
+        assert name in names
+
+    # All spans belong to the same trace
+    assert len({span.context.trace_id for span in finished}) == 1
+
+    provider_span = next(span for span in finished if span.name == "provider.testing")
+    assert provider_span.attributes["llm.provider"] == "testing"
+    assert provider_span.attributes["llm.output_tokens"] > 0
+    assert [event.name for event in provider_span.events] == ["first_token"]
+
+    decision = next(span for span in finished if span.name == "persona_dm.decision")
+    decision_calls = [span for span in finished if span.name == "ModelRouter.prompt_model"
+                      and span.parent.span_id == decision.context.span_id]
+    assert decision_calls[0].attributes["arg.model"] == "test-model-3"
+
+
+def test_context_propagates_to_workflow_threads(spans, tmp_path):
+    """Test that spans created in workflow worker threads are children of the caller's span."""
+    steps = [
+        {"id": "a", "type": "prompt", "text": "branch a", "models_prefixed_by_provider": ["testing:test-model-1"]},
+        {"id": "b", "type": "prompt", "text": "branch b", "models_prefixed_by_provider": ["testing:test-model-2"]},
+    ]
+
+    with tracing.span("tool.workflow") as root:
+        run_workflow(steps, output_dir=str(tmp_path), use_cache=False)
+
+    step_spans = [span for span in spans.get_finished_spans() if span.name == "workflow.step"]
+    assert len(step_spans) == 2
+    for span in step_spans:
+        assert span.parent.span_id == root.get_span_context().span_id
+
+
+def test_json_file_exporter(spans, tmp_path):
+    """Test that the JSON file exporter writes one compact object per span."""
+    with tracing.span("outer", answer=42):
+        with tracing.span("inner"):
+            pass
+
+    path = tmp_path / "traces.jsonl"
+    exporter = tracing._json_file_exporter(str(path))
+    exporter.export(spans.get_finished_spans())
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    inner, outer = records
+    assert outer["name"] == "outer" and outer["attributes"] == {"answer": 42}
+    assert inner["parent_id"] == outer["span_id"]
+    assert inner["trace_id"] == outer["trace_id"]
@@ -0,0 +1,70 @@
+"""
+Tests for the shared provider HTTP transport.
+"""
+
+import httpx
+import pytest
+from anthropic import Anthropic, DefaultHttpxClient as AnthropicHttpxClient
+from openai import OpenAI, DefaultHttpxClient
+from agile_team.benchmarks.stub_server import StubServer
+from agile_team.shared import transport
+from agile_team.shared.metrics import registry
+
+
+@pytest.fixture(autouse=True)
+def reset_transport():
+    registry.reset()
+    yield
+    transport.close_clients()
+    registry.reset()
+
+
+def _requests_by_connection(provider):
+    series = registry.snapshot()["counters"].get("http_requests_total", [])
+    return {item["labels"]["connection"]: item["value"] for item in series if item["labels"]["provider"] == provider}
+
+
+def test_settings_from_environment(monkeypatch):
+    """Test pool limits, timeouts and HTTP/2 settings with environment overrides."""
+    monkeypatch.setenv("HTTP_MAX_CONNECTIONS", "64")
+    monkeypatch.setenv("HTTP_READ_TIMEOUT", "30")
+    monkeypatch.setenv("HTTP_HTTP2", "0")
+
+    options = transport.client_options("openai")
+    assert options["limits"].max_connections == 64
+    assert options["limits"].max_keepalive_connections == transport.HTTP_MAX_KEEPALIVE_CONNECTIONS
+    assert options["timeout"].read == 30
+    assert options["timeout"].connect == transport.HTTP_CONNECT_TIMEOUT_SECONDS
+    assert options["http2"] is False
+
+    monkeypatch.setenv("HTTP_MAX_CONNECTIONS", "lots")
+    assert transport.limits().max_connections == transport.HTTP_MAX_CONNECTIONS
+
+
+def test_client_is_shared_and_reuses_connections():
+    """Test that SDK calls through the shared client reuse pooled connections."""
+    client = transport.get_http_client("openai", DefaultHttpxClient)
+    assert transport.get_http_client("openai", DefaultHttpxClient) is client
+    assert transport.get_http_client("groq") is not client
+
+    with StubServer() as server:
+        sdk = OpenAI(base_url=f"{server.url}/v1", api_key="stub", max_retries=0, http_client=client)
+        for _ in range(3):
+            sdk.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": "hello"}])
+
+    assert _requests_by_connection("openai") == {"new": 1, "reused": 2}
+    assert registry.snapshot()["histograms"]["http_connect_seconds"][0]["count"] == 1
+
+    transport.close_clients()
+    assert client.is_closed
+    assert transport.get_http_client("openai") is not client
+
+
+def test_clients_match_the_sdk_http_package():
+    """Test clients for SDKs built on an httpx fork, and options for SDKs that build their own client."""
+    client = transport.get_http_client("anthropic", AnthropicHttpxClient)
+    Anthropic(api_key="stub", http_client=client)
+    assert client.timeout.read == transport.HTTP_READ_TIMEOUT_SECONDS
+
+    with httpx.Client(**transport.client_options("ollama")) as client:
+        assert client.timeout.read == transport.HTTP_READ_TIMEOUT_SECONDS
@@ -0,0 +1,93 @@
+"""
+Tests for token usage capture and the usage ledger.
+"""
+
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+from mcp.server.fastmcp.exceptions import ResourceError, ValidationError
+from agile_team.shared import usage as usage_ledger
+from agile_team.shared.data_types import ProviderResponse
+from agile_team.shared.model_router import ModelRouter, ProviderHandle
+from agile_team.tools.persona_ba import persona_ba
+from agile_team.tools.usage import usage
+
+
+@pytest.fixture
+def ledger(tmp_path):
+    ledger = usage_ledger.open_ledger(str(tmp_path / "usage.sqlite3"))
+    yield ledger
+    usage_ledger.close_ledger()
+
+
+def test_provider_response_from_openai_usage():
+    """Test extracting usage from OpenAI-compatible usage objects."""
+    openai_usage = SimpleNamespace(
+        prompt_tokens=100,
+        completion_tokens=20,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=64),
+        completion_tokens_details=SimpleNamespace(reasoning_tokens=8),
+    )
+    response = ProviderResponse.from_openai_usage("answer", openai_usage)
+    assert response == "answer"
+    assert response.usage() == {
+        "input_tokens": 100, "output_tokens": 20, "cached_tokens": 64, "thinking_tokens": 8, "latency_seconds": None
+    }
+
+    # DeepSeek reports cache hits in a separate field
+    deepseek_usage = SimpleNamespace(prompt_tokens=10, completion_tokens=5, prompt_cache_hit_tokens=6)
+    assert ProviderResponse.from_openai_usage("x", deepseek_usage).cached_tokens == 6
+    assert ProviderResponse.from_openai_usage("x", None).input_tokens is None
+
+
+def test_router_records_reported_usage(ledger):
+    """Test that usage reported by a provider module is kept and written to the ledger."""
+    module = SimpleNamespace(prompt=lambda text, model: ProviderResponse("hi", 10, 2, cached_tokens=5))
+    with patch.object(ModelRouter, "_get_provider_handle", return_value=ProviderHandle("openai", module)):
+        response = ModelRouter.prompt_model("openai", "gpt-4o-mini", "hello")
+
+    assert response == "hi"
+    assert (response.input_tokens, response.output_tokens, response.cached_tokens) == (10, 2, 5)
+    assert response.latency_seconds >= 0
+
+    row = ledger.summarize(["provider", "model"])[0]
+    assert row["provider"] == "openai" and row["model"] == "gpt-4o-mini"
+    assert row["input_tokens"] == 10 and row["cached_tokens"] == 5
+    assert row["cache_hit_ratio"] == 0.5
+    assert row["estimated_requests"] == 0
+
+
+def test_usage_attributed_to_personas(ledger, tmp_path):
+    """Test persona attribution and the usage tool aggregations."""
+    input_file = tmp_path / "concept.md"
+    input_file.write_text("hello usage")
+
+    persona_ba(
+        from_file=str(input_file),
+        output_dir=str(tmp_path / "out"),
+        use_decision_maker=True,
+        decision_maker_models=["testing:test-model-1", "testing:test-model-2"],
+        decision_maker_model="testing:test-model-3"
+    )
+    ModelRouter.prompt_model("testing", "test-model-1", "hello direct")
+
+    result = usage(group_by=["persona"])
+    by_persona = {row["persona"]: row for row in result["rows"]}
+    assert by_persona["business_analyst"]["requests"] == 3
+    assert by_persona[None]["requests"] == 1
+    assert by_persona["business_analyst"]["estimated_requests"] == 3
+    assert result["totals"]["requests"] == 4
+
+    by_day = usage(group_by=["day", "model"], since="2000-01-01")
+    assert sum(row["requests"] for row in by_day["rows"]) == 4
+    assert usage(until="2000-01-01")["rows"] == []
+
+    with pytest.raises(ValidationError):
+        usage(group_by=["colour"])
+
+
+def test_usage_tool_requires_ledger():
+    """Test that the usage tool reports a disabled ledger."""
+    usage_ledger.close_ledger()
+    with pytest.raises(ResourceError):
+        usage()
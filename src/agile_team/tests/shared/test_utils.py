@@ -1,14 +1,20 @@
 """Tests for utility functions."""
 
 import os
+import threading
 import pytest
 from mcp.server.fastmcp.exceptions import ValidationError, ResourceError
+from agile_team.shared.data_types import ModelProviders
+from agile_team.shared.model_index import model_index, rank_models
 from agile_team.shared.utils import (
+    model_spec,
     parse_provider_model,
     validate_file_exists,
     format_error_response,
-    weak_provider_and_model
+    weak_provider_and_model,
+    write_file
 )
+from agile_team.tools.prompt_from_file_to_file import prompt_from_file_to_file
 
 
 def test_parse_provider_model_valid():
@@ -33,6 +39,29 @@ def test_parse_provider_model_invalid():
         parse_provider_model(":model")
 
 
+def test_model_spec():
+    """Test parsing provider and model suffixes into memoized, immutable specs."""
+    spec = model_spec("a", "claude-3-7-sonnet-20250219:4k")
+    assert spec == ("anthropic", "claude-3-7-sonnet-20250219:4k")
+    assert spec.provider_enum is ModelProviders.ANTHROPIC
+    assert (spec.base_model, spec.thinking_budget, spec.reasoning_effort) == ("claude-3-7-sonnet-20250219", 4096, None)
+    assert model_spec("a", "claude-3-7-sonnet-20250219:4k") is spec
+    with pytest.raises(AttributeError):
+        spec.thinking_budget = 0
+    
+    assert model_spec("openai", "o3-mini:HIGH").reasoning_effort == "high"
+    assert model_spec("gemini", "gemini-2.5-flash-preview-04-17:8000").thinking_budget == 8000
+    assert model_spec("openai", "o3-mini:invalid").base_model == "o3-mini"
+    assert model_spec("openai", "gpt-4o").with_base_model("gpt-4o-mini") == "gpt-4o-mini"
+    assert model_spec("openai", "o3-mini:low").with_base_model("o4-mini") == "o4-mini:low"
+    
+    # Ollama tags are part of the model name
+    assert model_spec("l", "llama3:8").base_model == "llama3:8"
+    
+    with pytest.raises(ValidationError):
+        model_spec("unknown", "model")
+
+
 def test_validate_file_exists(tmp_path):
     """Test file existence validation."""
     # Create a temporary file
@@ -76,7 +105,59 @@ def test_weak_provider_and_model():
     assert provider == "openai"
     assert model == "gpt-4"
     
-    # Test default model when not found
-    provider, model = weak_provider_and_model("openai", "nonexistent", ["gpt-4", "gpt-3.5-turbo"])
-    assert provider == "openai"
-    assert model == "gpt-4"
\ No newline at end of file
+    # Test that low-confidence corrections are rejected instead of falling back to the first model
+    with pytest.raises(ValidationError, match="Unknown model for openai: nonexistent"):
+        weak_provider_and_model("openai", "nonexistent", ["gpt-4", "gpt-3.5-turbo"])
+
+
+def test_rank_models():
+    """Test ranked model matching with token boundaries, nicknames and version tie-breaking."""
+    catalog = ["gpt-4o", "gpt-4o-mini", "gpt-4-turbo", "gpt-3.5-turbo", "claude-3-5-sonnet-20240620", "claude-3-5-sonnet-20241022"]
+    
+    # "gpt-4" names the gpt-4 family, not gpt-4o
+    assert rank_models("gpt-4", catalog)[0] == ("gpt-4-turbo", 0.95)
+    assert rank_models("gpt-35-turbo", catalog) == [("gpt-3.5-turbo", 1.0)]
+    assert rank_models("4o-mini", catalog) == [("gpt-4o-mini", 1.0)]
+    assert rank_models("gpt-4o-mni", catalog)[0][0] == "gpt-4o-mini"
+    
+    # The newest version wins a tie
+    assert rank_models("claude-3-5-sonnet", catalog)[0][0] == "claude-3-5-sonnet-20241022"
+    assert rank_models("nonexistent", catalog) == []
+    
+    # The index is built once per catalog
+    assert model_index(tuple(catalog)) is model_index(tuple(catalog))
+
+
+def test_write_file_is_atomic(tmp_path):
+    """Test that concurrent writers of a path leave one complete file and no temporary files."""
+    path = str(tmp_path / "out.md")
+    contents = [str(i) * 100000 for i in range(8)]
+    threads = [threading.Thread(target=write_file, args=(path, content)) for content in contents]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with open(path) as f:
+        assert f.read() in contents
+    assert os.listdir(tmp_path) == ["out.md"]
+
+    with pytest.raises(ResourceError):
+        write_file(str(tmp_path / "out.md" / "nested.md"), "x")
+    assert os.listdir(tmp_path) == ["out.md"]
+
+
+def test_run_directories_and_background_writes(tmp_path, monkeypatch):
+    """Test that runs over the same input get their own directories, with responses written in the background."""
+    monkeypatch.setenv("OUTPUT_RUN_DIRS", "1")
+    monkeypatch.setenv("BACKGROUND_WRITES", "1")
+    prompt_file = tmp_path / "prompt.txt"
+    prompt_file.write_text("hello")
+    first = prompt_from_file_to_file(str(prompt_file), ["testing:test-model-1", "testing:test-model-2"])
+    second = prompt_from_file_to_file(str(prompt_file), ["testing:test-model-1"])
+
+    assert all(os.path.isfile(path) for path in first + second)
+    first_dir, second_dir = os.path.dirname(first[0]), os.path.dirname(second[0])
+    assert first_dir != second_dir
+    assert os.path.dirname(first_dir) == os.path.dirname(second_dir) == str(tmp_path / "responses")
+    assert os.path.dirname(first[1]) == first_dir
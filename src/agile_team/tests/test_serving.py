@@ -0,0 +1,79 @@
+"""
+Tests for the session-sticky router of the streamable HTTP transport.
+"""
+
+import json
+import httpx
+from starlette.testclient import TestClient
+from agile_team.serving import SESSION_HEADER, StickyRouter
+
+
+class _Body(httpx.AsyncByteStream):
+    """Streamed response body, as a worker sends it."""
+
+    def __init__(self, data):
+        self.data = json.dumps(data).encode()
+
+    async def __aiter__(self):
+        yield self.data
+
+
+def _workers():
+    """Fake workers creating a session per initialize request and reporting which worker answered."""
+    created = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        worker = request.url.port
+        if request.url.path == "/ready":
+            return httpx.Response(200, json={"status": "ready" if worker == 9001 else "starting"})
+        session_id = request.headers.get(SESSION_HEADER)
+        if session_id is None:
+            session_id = f"session-{len(created)}"
+            created.append(session_id)
+            return httpx.Response(200, stream=_Body({"worker": worker}), headers={SESSION_HEADER: session_id})
+        return httpx.Response(200, stream=_Body({"worker": worker, "session": session_id}))
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_sessions_stick_to_their_worker():
+    """Test that new sessions are spread over the workers and later requests follow their session."""
+    router = StickyRouter(["http://127.0.0.1:9001", "http://127.0.0.1:9002"], client=_workers())
+    with TestClient(router.app()) as client:
+        first = client.post("/mcp", json={})
+        second = client.post("/mcp", json={})
+        assert (first.json()["worker"], second.json()["worker"]) == (9001, 9002)
+
+        for _ in range(3):
+            response = client.post("/mcp", json={}, headers={SESSION_HEADER: first.headers[SESSION_HEADER]})
+            assert response.json()["worker"] == 9001
+        assert router.sessions == {"session-0": 0, "session-1": 1}
+
+        client.delete("/mcp", headers={SESSION_HEADER: "session-0"})
+        assert router.sessions == {"session-1": 1}
+
+        ready = client.get("/ready")
+        assert ready.status_code == 503
+        assert [worker["status"] for worker in ready.json()["workers"]] == ["ready", "starting"]
+
+
+def test_idle_and_unreachable_sessions_are_forgotten():
+    """Test that sessions of disconnected clients expire and sessions of an unreachable worker are dropped."""
+    router = StickyRouter(["http://127.0.0.1:9001", "http://127.0.0.1:9002"], client=_workers(), idle_seconds=60)
+    with TestClient(router.app()) as client:
+        client.post("/mcp", json={})
+        client.post("/mcp", json={})
+        assert set(router.sessions) == {"session-0", "session-1"}
+
+        router.expire(router._last_seen["session-0"] + 61)
+        assert router.sessions == {}
+        assert client.post("/mcp", json={}).json()["worker"] == 9001
+
+    def unreachable(request):
+        raise httpx.ConnectError("connection refused")
+
+    router = StickyRouter(["http://127.0.0.1:9001"], client=httpx.AsyncClient(transport=httpx.MockTransport(unreachable)))
+    router.sessions["session-0"] = 0
+    with TestClient(router.app()) as client:
+        assert client.post("/mcp", json={}, headers={SESSION_HEADER: "session-0"}).status_code == 502
+    assert router.sessions == {}
@@ -204,4 +204,50 @@ def test_persona_dm_with_custom_output_path(
     mock_write_file.assert_called_once_with(
         custom_output_path,
         "Decision: Approach B is better"
-    )
\ No newline at end of file
+    )
+
+@patch('agile_team.tools.persona_dm.os.makedirs')
+@patch('agile_team.tools.persona_dm.validate_directory_exists')
+@patch('agile_team.tools.persona_dm.prompt_from_file_to_file')
+@patch('agile_team.tools.persona_dm.read_file')
+@patch('agile_team.tools.persona_dm.validate_and_correct_models')
+@patch('agile_team.tools.persona_dm.prompt_model')
+@patch('agile_team.tools.persona_dm.write_file')
+def test_persona_dm_collapses_near_duplicates(
+    mock_write_file,
+    mock_prompt_model,
+    mock_validate_models,
+    mock_read_file,
+    mock_prompt_from_file,
+    mock_validate_dir,
+    mock_makedirs
+):
+    """Test that near-identical team responses are listed once with every agreeing model."""
+    answer = "Use PostgreSQL for the orders service. " + " ".join(
+        f"Step {i}: migrate table {i} and verify its constraints." for i in range(20)
+    )
+    mock_prompt_from_file.return_value = [
+        "/test/responses/test_openai_gpt-4o.txt",
+        "/test/responses/test_openai_gpt-4.1.txt",
+        "/test/responses/test_anthropic_claude.txt"
+    ]
+    mock_read_file.side_effect = [
+        "Which database should we use?",
+        answer,
+        answer + " Plan the schema first!",
+        "Use MongoDB so the catalog schema can evolve freely without migrations."
+    ]
+    mock_validate_models.return_value = [("openai", "o3")]
+    mock_prompt_model.return_value = "Decision: PostgreSQL"
+
+    persona_dm(
+        from_file="/test/prompt.txt",
+        models_prefixed_by_provider=["openai:gpt-4o", "openai:gpt-4.1", "anthropic:claude"],
+        persona_dm_model="openai:o3"
+    )
+
+    prompt = mock_prompt_model.call_args[0][2]
+    assert prompt.count("<team-response>") == 2
+    assert prompt.count("Use PostgreSQL") == 1
+    assert "<model-name>openai_gpt-4o</model-name>\n    <model-name>openai_gpt-4.1</model-name>" in prompt
+    assert "<model-name>anthropic_claude</model-name>" in prompt
@@ -0,0 +1,156 @@
+"""
+Tests for the workflow tool.
+"""
+
+import os
+import pytest
+from unittest.mock import patch
+from mcp.server.fastmcp.exceptions import ValidationError
+from agile_team.shared.model_router import prompt_model
+from agile_team.tools.workflow import run_workflow, CACHE_DIR_NAME
+
+
+def test_workflow_chains_outputs_in_memory(tmp_path):
+    """Test that dependent steps receive the outputs of their dependencies."""
+    steps = [
+        {"id": "first", "type": "prompt", "text": "hello world",
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+        {"id": "second", "type": "prompt", "depends_on": ["first"], "prompt": "Summarize: {first}",
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+    ]
+
+    result = run_workflow(steps, workflow_name="chain", output_dir=str(tmp_path))
+
+    assert result["steps"]["first"]["status"] == "completed"
+    assert result["steps"]["second"]["status"] == "completed"
+    with open(result["steps"]["second"]["output_path"]) as f:
+        assert f.read() == "Testing response for: Summarize: Testing response for: hello world"
+    assert result["steps"]["second"]["output_path"] == os.path.join(str(tmp_path), "chain_second.md")
+
+
+def test_workflow_decision_step(tmp_path):
+    """Test a dm step fanning out to the team and consolidating in memory."""
+    steps = [
+        {"id": "decide", "type": "dm", "text": "Pick a database",
+         "models_prefixed_by_provider": ["testing:test-model-1", "testing:test-model-2"],
+         "decision_maker_model": "testing:test-model-3"},
+    ]
+
+    with patch("agile_team.tools.workflow.prompt_model", wraps=prompt_model) as mock_prompt:
+        result = run_workflow(steps, output_dir=str(tmp_path))
+
+    with open(result["steps"]["decide"]["output_path"]) as f:
+        decision = f.read()
+    assert [call.args[1] for call in mock_prompt.call_args_list] == ["test-model-1", "test-model-2", "test-model-3"]
+    assert "<model-name>testing_test-model-1</model-name>" in decision
+    assert "<model-name>testing_test-model-2</model-name>" in decision
+
+
+def test_workflow_decision_step_fails_without_team_responses(tmp_path):
+    """Test that a dm step whose team members all failed fails instead of caching a decision."""
+    steps = [
+        {"id": "decide", "type": "dm", "text": "test error for everyone",
+         "models_prefixed_by_provider": ["testing:test-model-1", "testing:test-model-2"],
+         "decision_maker_model": "testing:test-model-3"},
+    ]
+
+    with patch("agile_team.tools.workflow.prompt_model", wraps=prompt_model) as mock_prompt:
+        result = run_workflow(steps, output_dir=str(tmp_path))
+
+    assert result["steps"]["decide"]["status"] == "failed"
+    assert "Every team member failed" in result["steps"]["decide"]["error"]
+    assert mock_prompt.call_count == 2
+    cache_dir = os.path.join(str(tmp_path), CACHE_DIR_NAME)
+    assert not os.path.isdir(cache_dir) or not os.listdir(cache_dir)
+
+
+def test_workflow_failure_skips_dependents_and_resumes(tmp_path):
+    """Test that a failed step skips its dependents and a re-run resumes from the cache."""
+    steps = [
+        {"id": "ok", "type": "prompt", "text": "hello planet",
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+        {"id": "bad", "type": "prompt", "depends_on": ["ok"], "prompt": "test error {ok}",
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+        {"id": "after", "type": "prompt", "depends_on": ["bad"],
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+    ]
+
+    result = run_workflow(steps, output_dir=str(tmp_path))
+
+    assert result["steps"]["ok"]["status"] == "completed"
+    assert result["steps"]["ok"]["cached"] is False
+    assert result["steps"]["bad"]["status"] == "failed"
+    assert result["steps"]["after"]["status"] == "skipped"
+    assert os.listdir(os.path.join(str(tmp_path), CACHE_DIR_NAME))
+
+    # Fix the failing step and re-run: the completed step must not be re-executed
+    steps[1]["prompt"] = "Expand on {ok}"
+    with patch("agile_team.tools.workflow.prompt_model", wraps=prompt_model) as mock_prompt:
+        result = run_workflow(steps, output_dir=str(tmp_path))
+
+    assert result["steps"]["ok"]["cached"] is True
+    assert result["steps"]["bad"]["status"] == "completed"
+    assert result["steps"]["after"]["status"] == "completed"
+    assert mock_prompt.call_count == 2
+
+
+def test_workflow_parallel_branches(tmp_path):
+    """Test that independent branches both run and feed a joining step."""
+    steps = [
+        {"id": "a", "type": "prompt", "text": "branch a", "models_prefixed_by_provider": ["testing:test-model-1"]},
+        {"id": "b", "type": "prompt", "text": "branch b", "models_prefixed_by_provider": ["testing:test-model-2"]},
+        {"id": "join", "type": "prompt", "depends_on": ["a", "b"], "prompt": "{a} | {b}",
+         "models_prefixed_by_provider": ["testing:test-model-3"]},
+    ]
+
+    result = run_workflow(steps, output_dir=str(tmp_path))
+
+    with open(result["steps"]["join"]["output_path"]) as f:
+        assert f.read() == ("Testing response for: Testing response for: branch a | "
+                            "Testing response for: branch b")
+
+
+def test_workflow_validation_errors(tmp_path):
+    """Test that invalid graphs are rejected."""
+    # Unknown dependency
+    with pytest.raises(ValidationError):
+        run_workflow([{"id": "a", "type": "prompt", "depends_on": ["missing"]}], output_dir=str(tmp_path))
+
+    # Cycle
+    with pytest.raises(ValidationError):
+        run_workflow([
+            {"id": "a", "type": "prompt", "depends_on": ["b"]},
+            {"id": "b", "type": "prompt", "depends_on": ["a"]},
+        ], output_dir=str(tmp_path))
+
+    # Root step without input
+    with pytest.raises(ValidationError):
+        run_workflow([{"id": "a", "type": "prompt"}], output_dir=str(tmp_path))
+
+    # Dependent step with its own input, which would ignore its dependencies
+    with pytest.raises(ValidationError, match="root steps only"):
+        run_workflow([
+            {"id": "a", "type": "prompt", "text": "hello"},
+            {"id": "b", "type": "prompt", "text": "ignored", "depends_on": ["a"]},
+        ], output_dir=str(tmp_path))
+
+    # Unsupported step type
+    with pytest.raises(ValidationError):
+        run_workflow([{"id": "a", "type": "unknown", "text": "x"}], output_dir=str(tmp_path))
+
+
+def test_workflow_prompt_with_literal_braces(tmp_path):
+    """Test that unescaped braces in a step prompt fail the step with a message naming it."""
+    steps = [
+        {"id": "json", "type": "prompt", "text": "a todo app", "prompt": 'Answer as {"app": "{input}"}',
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+        {"id": "escaped", "type": "prompt", "text": "a todo app", "prompt": 'Answer as {{"app": "{input}"}}',
+         "models_prefixed_by_provider": ["testing:test-model-1"]},
+    ]
+
+    result = run_workflow(steps, output_dir=str(tmp_path))
+
+    assert result["steps"]["json"]["status"] == "failed"
+    assert "Invalid prompt template of step json" in result["steps"]["json"]["error"]
+    with open(result["steps"]["escaped"]["output_path"]) as f:
+        assert f.read() == 'Testing response for: Answer as {"app": "a todo app"}'
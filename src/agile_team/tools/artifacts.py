@@ -0,0 +1,41 @@
+"""Artifacts tool implementation."""
+
+from typing import Any, Dict, Optional
+from mcp.server.fastmcp.exceptions import ResourceError
+from agile_team.shared.artifacts import get_store
+
+
+def artifacts(
+    run: Optional[str] = None,
+    path: Optional[str] = None,
+    materialize: bool = False,
+    limit: int = 50
+) -> Dict[str, Any]:
+    """
+    List responses in the artifact store and optionally write their files.
+    
+    Args:
+        run: Only responses of this run
+        path: Only responses written to this path
+        materialize: Whether to write the listed paths that are not on disk (stored lazily or deleted)
+        limit: Maximum number of responses to list
+        
+    Returns:
+        Dictionary with the store's statistics and the listed responses, newest first
+    """
+    store = get_store()
+    if store is None:
+        raise ResourceError("Artifact store is disabled. Set the ARTIFACT_STORE environment variable to a directory")
+
+    entries = store.entries(run=run, path=path, limit=limit)
+    if materialize:
+        written = set()
+        for entry in entries:
+            # Newer entries come first; older entries of the same path are superseded
+            if not entry["materialized"] and entry["path"] not in written:
+                entry["materialized"] = store.materialize(entry["path"])
+                written.add(entry["path"])
+    return {
+        "store": store.stats(),
+        "artifacts": entries,
+    }
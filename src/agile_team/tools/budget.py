@@ -0,0 +1,38 @@
+"""Budget tool implementation."""
+
+from typing import Any, Dict, Optional
+from mcp.server.fastmcp.exceptions import ValidationError
+from agile_team.shared import budget as budgets
+
+
+def budget(
+    scope: Optional[str] = None,
+    max_tokens: Optional[int] = None,
+    max_cost_usd: Optional[float] = None,
+    policy: Optional[str] = None,
+    reset: bool = False
+) -> Dict[str, Any]:
+    """
+    Report, and optionally change, the token and cost budgets enforced by the model router.
+    
+    Args:
+        scope: Budget to change: "global", "session" or "call" (the default for later tool calls)
+        max_tokens: New token limit for the scope (0 removes the limit)
+        max_cost_usd: New USD limit for the scope (0 removes the limit)
+        policy: What to do with calls that would exceed a budget: "reject" or "downgrade"
+        reset: Whether to clear the amounts spent against the scope's budget
+        
+    Returns:
+        Dictionary with the policy and the limits, spent and remaining amounts of each budget
+    """
+    try:
+        if policy is not None:
+            budgets.set_policy(policy)
+        if scope is not None:
+            budgets.configure(scope, max_tokens, max_cost_usd, reset)
+        elif max_tokens is not None or max_cost_usd is not None or reset:
+            raise ValueError("A scope is required to change budget limits")
+    except ValueError as e:
+        raise ValidationError(str(e))
+    
+    return budgets.status()
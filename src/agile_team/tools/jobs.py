@@ -0,0 +1,48 @@
+"""Background job tool implementations."""
+
+from typing import Any, Dict, Optional
+from agile_team.shared import jobs
+
+
+def job_status(job_id: Optional[str] = None, limit: int = 20) -> Dict[str, Any]:
+    """
+    Report the status of a background job, or of the most recent jobs.
+    
+    Args:
+        job_id: Job id returned by a tool called with background=True (all recent jobs if None)
+        limit: Number of recent jobs to list when no job id is given
+        
+    Returns:
+        Dictionary with the job's status, or "jobs" with the status of each recent job
+    """
+    manager = jobs.get_manager()
+    if job_id is None:
+        return {"jobs": [job.status_dict() for job in manager.list(limit)]}
+    return manager.get(job_id).status_dict()
+
+
+def job_result(job_id: str) -> Dict[str, Any]:
+    """
+    Fetch the result of a background job.
+    
+    Args:
+        job_id: Job id returned by a tool called with background=True
+        
+    Returns:
+        Dictionary with the job's status and, once it succeeded, the tool's result
+    """
+    job = jobs.get_manager().get(job_id)
+    return {**job.status_dict(), "result": job.result}
+
+
+def job_cancel(job_id: str) -> Dict[str, Any]:
+    """
+    Cancel a background job.
+    
+    Args:
+        job_id: Job id returned by a tool called with background=True
+        
+    Returns:
+        Dictionary with the job's status after the cancellation request
+    """
+    return jobs.get_manager().cancel(job_id).status_dict()
@@ -0,0 +1,21 @@
+"""Metrics tool implementation."""
+
+from typing import Any, Dict, Union
+from mcp.server.fastmcp.exceptions import ValidationError
+from agile_team.shared.metrics import get_metrics
+
+
+def metrics(format: str = "json") -> Union[Dict[str, Any], str]:
+    """
+    Return provider request metrics recorded since the server started.
+    
+    Args:
+        format: "json" for a snapshot with percentile estimates, or "prometheus" for the text exposition format
+        
+    Returns:
+        Metrics snapshot dictionary or Prometheus text
+    """
+    try:
+        return get_metrics(format)
+    except ValueError as e:
+        raise ValidationError(str(e))
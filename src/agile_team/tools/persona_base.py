@@ -8,10 +8,14 @@ from mcp.server.fastmcp.exceptions import ValidationError, ToolError, ResourceEr
 from agile_team.shared.config import DEFAULT_MODEL, DEFAULT_TEAM_MODELS, DEFAULT_DECISION_MAKER_MODEL
 from agile_team.shared.validator import validate_and_correct_models
 from agile_team.shared.model_router import prompt_model
-from agile_team.shared.utils import read_file, write_file
+from agile_team.shared.artifacts import run_scope, store_artifact
+from agile_team.shared.templates import resolve_template
+from agile_team.shared.utils import read_file, write_file, default_output_dir
+from agile_team.shared.usage import persona_scope
 from agile_team.tools.persona_dm import persona_dm, DEFAULT_PERSONA_PROMPT
 
 
+@run_scope()
 def persona_base(
     persona_name: str,
     persona_prompt: str,
@@ -57,9 +61,8 @@ def persona_base(
         # Extract directory from output_path
         output_directory = os.path.dirname(output_path) or "."
     elif output_dir is None:
-        # Use from_file's directory + responses by default
-        input_file_dir = os.path.dirname(from_file) or "."
-        output_directory = os.path.join(input_file_dir, "responses")
+        # Use from_file's directory + responses (or the run's directory inside it) by default
+        output_directory = default_output_dir(from_file)
     else:
         # Use provided output_dir
         output_directory = output_dir
@@ -74,32 +77,34 @@ def persona_base(
         raise ResourceError(f"Failed to read input file: {str(e)}")
     
     # Format the persona prompt with the input content
-    formatted_prompt = persona_prompt.format(request_data=input_content)
+    formatted_prompt = resolve_template(persona_prompt).render(request_data=input_content)
     
-    if use_decision_maker:
-        # Use the decision maker workflow
-        return _run_with_decision_maker(
-            persona_name=persona_name,
-            formatted_prompt=formatted_prompt,
-            from_file=from_file,
-            decision_maker_models=decision_maker_models,
-            output_directory=output_directory,
-            output_extension=output_extension,
-            output_path=output_path,
-            decision_maker_model=decision_maker_model,
-            decision_maker_prompt=decision_maker_prompt
-        )
-    else:
-        # Use the single model workflow
-        return _run_with_single_model(
-            persona_name=persona_name,
-            formatted_prompt=formatted_prompt,
-            from_file=from_file,
-            models_prefixed_by_provider=models_prefixed_by_provider,
-            output_directory=output_directory,
-            output_extension=output_extension,
-            output_path=output_path
-        )
+    # Attribute token usage of the provider calls below to this persona
+    with persona_scope(persona_name):
+        if use_decision_maker:
+            # Use the decision maker workflow
+            return _run_with_decision_maker(
+                persona_name=persona_name,
+                formatted_prompt=formatted_prompt,
+                from_file=from_file,
+                decision_maker_models=decision_maker_models,
+                output_directory=output_directory,
+                output_extension=output_extension,
+                output_path=output_path,
+                decision_maker_model=decision_maker_model,
+                decision_maker_prompt=decision_maker_prompt
+            )
+        else:
+            # Use the single model workflow
+            return _run_with_single_model(
+                persona_name=persona_name,
+                formatted_prompt=formatted_prompt,
+                from_file=from_file,
+                models_prefixed_by_provider=models_prefixed_by_provider,
+                output_directory=output_directory,
+                output_extension=output_extension,
+                output_path=output_path
+            )
 
 
 def _run_with_single_model(
@@ -145,8 +150,9 @@ def _run_with_single_model(
             output_filename = f"{file_name}_{persona_name}_{model_info}{extension}"
             result_file_path = os.path.join(output_directory, output_filename)
         
-        # Write the response to the output file
-        write_file(result_file_path, response)
+        # Write the response to the output file (through the artifact store when enabled)
+        if not store_artifact(result_file_path, response, provider, model, formatted_prompt, from_file):
+            write_file(result_file_path, response)
         
         return result_file_path
         
@@ -1,12 +1,19 @@
 """Persona DM (Decision Maker) tool implementation."""
 
 import os
-from typing import List, Optional
+from typing import List, Optional, Sequence, Tuple
 from mcp.server.fastmcp.exceptions import ValidationError, ToolError, ResourceError
 from agile_team.shared.data_types import FileToFilePromptRequest
 from agile_team.shared.validator import validate_and_correct_models
+from agile_team.shared import metrics
 from agile_team.shared.model_router import prompt_model
-from agile_team.shared.utils import read_file, write_file, validate_directory_exists, load_prompt_file
+from agile_team.shared.artifacts import run_scope, store_artifact
+from agile_team.shared.cancellation import stage
+from agile_team.shared.similarity import collapse_near_duplicates
+from agile_team.shared.templates import resolve_template
+from agile_team.shared.tracing import span
+from agile_team.shared.usage import persona_scope
+from agile_team.shared.utils import read_file, write_file, validate_directory_exists, load_prompt_file, default_output_dir
 from agile_team.tools.prompt_from_file_to_file import prompt_from_file_to_file
 
 # Default persona decision model
@@ -15,10 +22,67 @@ DEFAULT_PERSONA_DM_MODEL = "openai:o4-mini"
 # Default team member models
 DEFAULT_TEAM_MODELS = ["openai:gpt-4.1", "anthropic:claude-3-7-sonnet", "gemini:emini-2.5-pro-preview-03-25"]
 
+# Persona token usage is attributed to, unless called by another persona
+PERSONA_NAME = "decision_maker"
+
 # Load prompt from file
 DEFAULT_PERSONA_PROMPT = load_prompt_file("dm_prompt.md")
 
 
+def format_team_response(model_info: str, response: str, persona_prompt: str, other_models: Sequence[str] = ()) -> str:
+    """
+    Format a single team member response for inclusion in the decision maker prompt.
+    
+    Args:
+        model_info: Model identifier shown to the decision maker (e.g., "openai_gpt-4.1")
+        response: The team member's response text
+        persona_prompt: The decision maker prompt template the response will be inserted into
+        other_models: Identifiers of other team members that gave a near-identical response
+        
+    Returns:
+        The formatted team response block
+    """
+    # One model name per agreeing team member, so each still counts as a vote
+    model_names = "".join(
+        f"    <model-name>{name}</model-name>\n" for name in (model_info, *other_models)
+    )
+    # For backward compatibility - handle both analyst-documents and team-decisions format
+    if "<analyst-documents>" in persona_prompt:
+        return f"""<analyst-document>
+{model_names}    <document>{response}</document>
+</analyst-document>
+"""
+    return f"""<team-response>
+{model_names}    <response>{response}</response>
+</team-response>
+"""
+
+
+def format_team_responses(responses: Sequence[Tuple[str, str]], persona_prompt: str) -> str:
+    """
+    Format the team's responses for the decision maker prompt, collapsing near-duplicates.
+    
+    Args:
+        responses: (model identifier, response text) of each team member
+        persona_prompt: The decision maker prompt template the responses will be inserted into
+        
+    Returns:
+        The formatted team response blocks
+    """
+    groups = collapse_near_duplicates(responses)
+    collapsed = len(responses) - len(groups)
+    if collapsed:
+        metrics.registry.inc(
+            "team_responses_collapsed_total", {}, collapsed,
+            help_text="Team responses merged into a near-identical response before the decision step"
+        )
+    return "".join(
+        format_team_response(names[0], response, persona_prompt, names[1:])
+        for names, response in groups
+    )
+
+
+@run_scope()
 def persona_dm(
     from_file: str,
     models_prefixed_by_provider: List[str] = None,
@@ -54,9 +118,8 @@ def persona_dm(
         # Extract directory from output_path for team responses
         team_output_dir = os.path.dirname(output_path) or "."
     elif output_dir is None:
-        # Use from_file's directory + responses by default
-        input_file_dir = os.path.dirname(from_file) or "."
-        team_output_dir = os.path.join(input_file_dir, "responses")
+        # Use from_file's directory + responses (or the run's directory inside it) by default
+        team_output_dir = default_output_dir(from_file)
     else:
         # Use provided output_dir
         team_output_dir = output_dir
@@ -64,13 +127,25 @@ def persona_dm(
     # Ensure the team output directory exists
     os.makedirs(team_output_dir, exist_ok=True)
     
-    # First, generate team responses using prompt_from_file_to_file with explicit parameters
-    team_responses_files = prompt_from_file_to_file(
-        file_path=from_file,
-        models_prefixed_by_provider=models_prefixed_by_provider,
-        output_dir=team_output_dir,
-        output_extension=output_extension
-    )
+    # Validate and correct the persona model before spending tokens on the team
+    with stage("validation"):
+        validated_models = validate_and_correct_models([persona_dm_model])
+    if not validated_models:
+        raise ValidationError(f"Invalid persona model: {persona_dm_model}")
+    
+    # Extract the provider and model
+    provider, model = validated_models[0]
+    
+    # First, generate team responses using prompt_from_file_to_file with explicit parameters;
+    # the team gets its share of the deadline so the decision is not starved
+    with span("persona_dm.team", **{"team.models": models_prefixed_by_provider}), \
+            persona_scope(PERSONA_NAME, override=False), stage("team"):
+        team_responses_files = prompt_from_file_to_file(
+            file_path=from_file,
+            models_prefixed_by_provider=models_prefixed_by_provider,
+            output_dir=team_output_dir,
+            output_extension=output_extension
+        )
     
     # Read the original prompt from the file
     try:
@@ -78,8 +153,11 @@ def persona_dm(
     except ResourceError as e:
         raise ResourceError(f"Failed to read prompt file: {str(e)}")
     
+    # The current version of the decision template, reloaded if its file changed
+    template = resolve_template(persona_prompt)
+    
     # Read each team member's response from the output files
-    team_responses_text = ""
+    team_responses = []
     for response_file in team_responses_files:
         try:
             # Extract the model name from the filename
@@ -96,40 +174,25 @@ def persona_dm(
             response = read_file(response_file)
             
             # Add to the team responses section
-            # For backward compatibility - handle both analyst-documents and team-decisions format
-            if "<analyst-documents>" in persona_prompt:
-                team_responses_text += f"""<analyst-document>
-    <model-name>{model_info}</model-name>
-    <document>{response}</document>
-</analyst-document>
-"""
-            else:
-                team_responses_text += f"""<team-response>
-    <model-name>{model_info}</model-name>
-    <response>{response}</response>
-</team-response>
-"""
+            team_responses.append((model_info, response))
         except Exception as e:
             # Skip files that can't be read
             continue
     
+    # Near-identical responses are listed once with every agreeing model
+    team_responses_text = format_team_responses(team_responses, template.source)
+    
     # Prepare the persona prompt with the original prompt and team responses
-    final_persona_prompt = persona_prompt.format(
+    final_persona_prompt = template.render(
         original_prompt=original_prompt,
         team_responses=team_responses_text
     )
     
-    # Validate and correct the persona model
-    validated_models = validate_and_correct_models([persona_dm_model])
-    if not validated_models:
-        raise ValidationError(f"Invalid persona model: {persona_dm_model}")
-    
-    # Extract the provider and model
-    provider, model = validated_models[0]
-    
     try:
         # Get decision from the persona model
-        decision = prompt_model(provider, model, final_persona_prompt)
+        with span("persona_dm.decision", **{"llm.provider": provider, "llm.model": model}), \
+                persona_scope(PERSONA_NAME, override=False), stage("decision"):
+            decision = prompt_model(provider, model, final_persona_prompt)
         
         # Handle the persona output path
         if output_path:
@@ -151,8 +214,9 @@ def persona_dm(
             output_filename = f"{file_name}_persona{extension}"
             persona_file_path = os.path.join(team_output_dir, output_filename)
         
-        # Write the decision to the output file
-        write_file(persona_file_path, decision)
+        # Write the decision to the output file (through the artifact store when enabled)
+        if not store_artifact(persona_file_path, decision, provider, model, final_persona_prompt, from_file):
+            write_file(persona_file_path, decision)
         
         return persona_file_path
         
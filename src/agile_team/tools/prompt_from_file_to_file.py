@@ -5,10 +5,13 @@ from typing import List
 from mcp.server.fastmcp.exceptions import ValidationError, ToolError, ResourceError
 from agile_team.shared.data_types import FileToFilePromptRequest
 from agile_team.shared.validator import validate_and_correct_models
+from agile_team.shared.artifacts import run_scope, store_artifact
+from agile_team.shared.cancellation import stage
 from agile_team.shared.model_router import prompt_model
-from agile_team.shared.utils import read_file, write_file, validate_directory_exists
+from agile_team.shared.utils import read_file, write_file, validate_directory_exists, default_output_dir, offload_write
 
 
+@run_scope()
 def prompt_from_file_to_file(
     file_path: str, 
     models_prefixed_by_provider: List[str], 
@@ -37,8 +40,7 @@ def prompt_from_file_to_file(
         output_dir = os.path.dirname(output_path) or "."
     # Handle case with no output_dir specified (use input file's directory/responses)
     elif output_dir is None:
-        input_file_dir = os.path.dirname(file_path) or "."
-        output_dir = os.path.join(input_file_dir, "responses")
+        output_dir = default_output_dir(file_path)
         # Ensure the responses directory exists
         os.makedirs(output_dir, exist_ok=True)
         
@@ -57,8 +59,9 @@ def prompt_from_file_to_file(
     except ResourceError as e:
         raise ResourceError(f"Failed to read prompt file: {str(e)}")
     
-    # Validate and correct models
-    validated_models = validate_and_correct_models(request.models_prefixed_by_provider)
+    # Validate and correct models (a fuzzy match may list a provider's models)
+    with stage("validation"):
+        validated_models = validate_and_correct_models(request.models_prefixed_by_provider)
     
     # Validate output directory
     try:
@@ -96,6 +99,37 @@ def prompt_from_file_to_file(
     exact_path_requested = request.output_path is not None
     single_model_requested = len(validated_models) == 1
     
+    def error_path_for(provider: str, model: str) -> str:
+        if exact_path_requested and single_model_requested:
+            # Case 1: Error with exact path - create error file next to the specified output path
+            dir_path = os.path.dirname(request.output_path)
+            base_name = os.path.basename(request.output_path)
+            name, ext = os.path.splitext(base_name)
+            return os.path.join(dir_path, f"{name}_error{ext}")
+        elif exact_path_requested and not single_model_requested:
+            # Case 2: Error with multiple models but output path specified
+            output_dir = os.path.dirname(request.output_path) or "."
+            basename = os.path.basename(request.output_path)
+            name_part, _ = os.path.splitext(basename)
+            error_filename = f"{name_part}_{provider}_{model}_error{normalized_extension}"
+            return os.path.join(output_dir, error_filename)
+        else:
+            # Case 3: Standard error filename
+            error_filename = f"{file_name}_{provider}_{model}_error{normalized_extension}"
+            return os.path.join(request.output_dir, error_filename)
+    
+    def write_error(provider: str, model: str, error: Exception) -> str:
+        error_path = error_path_for(provider, model)
+        # Create parent directory if needed
+        error_dir = os.path.dirname(error_path)
+        if error_dir and not os.path.exists(error_dir):
+            os.makedirs(error_dir, exist_ok=True)
+        write_file(error_path, f"Error from {provider}:{model}: {str(error)}")
+        return error_path
+    
+    # Responses are persisted while the next model is called when background writes are enabled
+    pending_writes = []
+    
     for idx, (provider, model) in enumerate(validated_models):
         try:
             # Determine output file path
@@ -125,35 +159,21 @@ def prompt_from_file_to_file(
             if output_directory and not os.path.exists(output_directory):
                 os.makedirs(output_directory, exist_ok=True)
                 
-            # Write response to file
-            write_file(file_path, response)
+            # Write response to file (through the artifact store when enabled)
+            def persist(file_path=file_path, response=response, provider=provider, model=model):
+                if not store_artifact(file_path, response, provider, model, prompt_text, request.file_path):
+                    write_file(file_path, response)
             
+            pending_writes.append((len(output_files), provider, model, offload_write(persist)))
             output_files.append(file_path)
         except Exception as e:
-            if exact_path_requested and single_model_requested:
-                # Case 1: Error with exact path - create error file next to the specified output path
-                dir_path = os.path.dirname(request.output_path)
-                base_name = os.path.basename(request.output_path)
-                name, ext = os.path.splitext(base_name)
-                error_path = os.path.join(dir_path, f"{name}_error{ext}")
-            elif exact_path_requested and not single_model_requested:
-                # Case 2: Error with multiple models but output path specified
-                output_dir = os.path.dirname(request.output_path) or "."
-                basename = os.path.basename(request.output_path)
-                name_part, _ = os.path.splitext(basename)
-                error_filename = f"{name_part}_{provider}_{model}_error{normalized_extension}"
-                error_path = os.path.join(output_dir, error_filename)
-            else:
-                # Case 3: Standard error filename
-                error_filename = f"{file_name}_{provider}_{model}_error{normalized_extension}"
-                error_path = os.path.join(request.output_dir, error_filename)
-                
-            # Create parent directory if needed
-            error_dir = os.path.dirname(error_path)
-            if error_dir and not os.path.exists(error_dir):
-                os.makedirs(error_dir, exist_ok=True)
-                
-            write_file(error_path, f"Error from {provider}:{model}: {str(e)}")
-            output_files.append(error_path)
+            output_files.append(write_error(provider, model, e))
+    
+    # Every response is on disk before the paths are returned; failed writes become error files
+    for index, provider, model, write in pending_writes:
+        try:
+            write.result()
+        except Exception as e:
+            output_files[index] = write_error(provider, model, e)
     
     return output_files
\ No newline at end of file
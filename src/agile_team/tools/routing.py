@@ -0,0 +1,18 @@
+"""Routing tool implementation."""
+
+from typing import Any, Dict
+from agile_team.shared import routing as routes
+
+
+def routing(decisions: int = 50) -> Dict[str, Any]:
+    """
+    Report the per-target statistics of every model alias and the recent routing decisions.
+    
+    Args:
+        decisions: Number of recent routing decisions to include
+        
+    Returns:
+        Dictionary with "aliases" (alias -> target -> EWMA latency, error rate,
+        samples, in-flight calls and rate limit cooldown) and "decisions"
+    """
+    return routes.router.snapshot(decisions=decisions)
@@ -0,0 +1,42 @@
+"""Usage tool implementation."""
+
+from typing import Any, Dict, List, Optional
+from mcp.server.fastmcp.exceptions import ValidationError, ResourceError
+from agile_team.shared.usage import get_ledger
+
+
+def usage(
+    group_by: Optional[List[str]] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Aggregate token usage recorded in the usage ledger.
+    
+    Args:
+        group_by: Columns to group by: "provider", "model", "persona", "day" (defaults to provider and model)
+        since: First day to include (YYYY-MM-DD)
+        until: Last day to include (YYYY-MM-DD)
+        
+    Returns:
+        Dictionary with the ledger path, one row per group, and overall totals
+    """
+    ledger = get_ledger()
+    if ledger is None:
+        raise ResourceError("Usage ledger is disabled. Set the USAGE_LEDGER environment variable to a database path")
+
+    if group_by is None:
+        group_by = ["provider", "model"]
+
+    try:
+        rows = ledger.summarize(group_by, since, until)
+        totals = ledger.summarize([], since, until)
+    except ValueError as e:
+        raise ValidationError(str(e))
+
+    return {
+        "ledger": ledger.path,
+        "group_by": group_by,
+        "rows": rows,
+        "totals": totals[0] if totals else {},
+    }
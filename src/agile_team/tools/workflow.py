@@ -0,0 +1,319 @@
+"""Workflow tool implementation for chaining personas in a dependency graph."""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, List, Optional, Tuple
+from mcp.server.fastmcp.exceptions import ValidationError, ToolError, ResourceError
+
+from agile_team.shared.config import (
+    DEFAULT_MODEL,
+    DEFAULT_TEAM_MODELS,
+    DEFAULT_DECISION_MAKER_MODEL,
+    WORKFLOW_MAX_PARALLEL_STEPS,
+)
+from agile_team.shared.data_types import WorkflowRequest, WorkflowStep
+from agile_team.shared.validator import validate_and_correct_models
+from agile_team.shared.model_router import prompt_model
+from agile_team.shared.metrics import record_queue_wait
+from agile_team.shared.cancellation import stage
+from agile_team.shared.templates import resolve_template
+from agile_team.shared.tracing import span, wrap_context
+from agile_team.shared.usage import persona_scope
+from agile_team.shared.utils import read_file, write_file, validate_directory_exists
+from agile_team.tools.persona_dm import DEFAULT_PERSONA_PROMPT, PERSONA_NAME as DM_PERSONA_NAME, format_team_responses
+from agile_team.tools.persona_ba import DEFAULT_BA_PROMPT, DEFAULT_BA_DECISION_PROMPT
+from agile_team.tools.persona_pm import DEFAULT_PM_PROMPT, DEFAULT_PM_DECISION_PROMPT
+from agile_team.tools.persona_sw import DEFAULT_SW_PROMPT_CONTENT, DEFAULT_SW_DECISION_PROMPT
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Persona prompt templates keyed by the short persona name used in workflow steps
+PERSONA_TEMPLATES = {
+    "ba": (DEFAULT_BA_PROMPT, DEFAULT_BA_DECISION_PROMPT),
+    "pm": (DEFAULT_PM_PROMPT, DEFAULT_PM_DECISION_PROMPT),
+    "sw": (DEFAULT_SW_PROMPT_CONTENT, DEFAULT_SW_DECISION_PROMPT),
+}
+
+# Persona names token usage of persona steps is attributed to
+PERSONA_NAMES = {
+    "ba": "business_analyst",
+    "pm": "product_manager",
+    "sw": "spec_writer",
+}
+
+# Name of the directory (inside the output directory) holding cached step outputs
+CACHE_DIR_NAME = ".workflow_cache"
+
+
+def run_workflow(
+    steps: List[Dict[str, Any]],
+    workflow_name: str = "workflow",
+    output_dir: Optional[str] = None,
+    output_extension: Optional[str] = None,
+    use_cache: bool = True
+) -> Dict[str, Any]:
+    """
+    Run a declarative graph of prompt, persona and decision maker steps.
+
+    Steps whose dependencies are satisfied run in parallel. Each step receives the
+    outputs of the steps it depends on in memory, and its own output is cached under
+    a hash of its inputs, so re-running a failed workflow resumes after the last
+    completed step.
+
+    Args:
+        steps: List of step definitions (see WorkflowStep)
+        workflow_name: Name used to prefix output files
+        output_dir: Directory where step outputs are written (defaults to the first
+                    input file's directory/responses)
+        output_extension: File extension for output files (defaults to 'md')
+        use_cache: Whether to reuse cached outputs of previously completed steps
+
+    Returns:
+        Dictionary with the workflow name, output directory and per-step results
+        (status, output_path, cached flag and error message if any)
+    """
+    try:
+        request = WorkflowRequest(
+            steps=steps,
+            workflow_name=workflow_name,
+            output_dir=output_dir,
+            output_extension=output_extension
+        )
+    except ValueError as e:
+        raise ValidationError(f"Invalid workflow: {str(e)}")
+
+    # Default to the first input file's directory/responses
+    if request.output_dir is None:
+        first_file = next((step.from_file for step in request.steps if step.from_file), None)
+        input_file_dir = os.path.dirname(first_file) if first_file else ""
+        request.output_dir = os.path.join(input_file_dir or ".", "responses")
+
+    try:
+        validate_directory_exists(request.output_dir)
+    except ResourceError as e:
+        raise ResourceError(f"Invalid output directory: {str(e)}")
+
+    extension = request.output_extension or ".md"
+    if not extension.startswith("."):
+        extension = f".{extension}"
+
+    cache_dir = os.path.join(request.output_dir, CACHE_DIR_NAME)
+
+    steps_by_id = {step.id: step for step in request.steps}
+    outputs: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = dict(steps_by_id)
+
+    with ThreadPoolExecutor(max_workers=WORKFLOW_MAX_PARALLEL_STEPS) as executor:
+        running = {}
+        while pending or running:
+            # Skip steps whose dependencies failed
+            for step_id, step in list(pending.items()):
+                failed = [dep for dep in step.depends_on if results.get(dep, {}).get("status") in ("failed", "skipped")]
+                if failed:
+                    results[step_id] = {"status": "skipped", "error": f"Dependency failed: {', '.join(failed)}"}
+                    del pending[step_id]
+
+            # Schedule every step whose dependencies have completed
+            for step_id, step in list(pending.items()):
+                if all(dep in outputs for dep in step.depends_on):
+                    future = executor.submit(
+                        wrap_context(_run_queued_step), time.perf_counter(), step, outputs, cache_dir, use_cache
+                    )
+                    running[future] = step_id
+                    del pending[step_id]
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                step_id = running.pop(future)
+                try:
+                    output, cached = future.result()
+                except Exception as e:
+                    logger.error(f"Workflow step {step_id} failed: {e}")
+                    results[step_id] = {"status": "failed", "error": str(e)}
+                    continue
+
+                output_path = os.path.join(
+                    request.output_dir, f"{request.workflow_name}_{step_id}{extension}"
+                )
+                write_file(output_path, output)
+                outputs[step_id] = output
+                results[step_id] = {
+                    "status": "completed",
+                    "output_path": output_path,
+                    "cached": cached
+                }
+
+    return {
+        "workflow_name": request.workflow_name,
+        "output_dir": request.output_dir,
+        "steps": {step.id: results[step.id] for step in request.steps}
+    }
+
+
+def _run_queued_step(submitted: float, *args: Any) -> Tuple[str, bool]:
+    """Record how long a step waited for a free worker, then run it."""
+    record_queue_wait("workflow", time.perf_counter() - submitted)
+    step = args[0]
+    if step.type == "persona":
+        persona = PERSONA_NAMES.get(step.persona)
+    elif step.type == "dm":
+        persona = DM_PERSONA_NAME
+    else:
+        persona = None
+    with span("workflow.step", **{"workflow.step_id": step.id, "workflow.step_type": step.type}), \
+            (persona_scope(persona) if persona else nullcontext()):
+        return _run_step(*args)
+
+
+def _run_step(
+    step: WorkflowStep,
+    outputs: Dict[str, str],
+    cache_dir: str,
+    use_cache: bool
+) -> Tuple[str, bool]:
+    """
+    Run a single workflow step, reusing its cached output when available.
+
+    Returns:
+        Tuple of (output text, whether the output came from the cache)
+    """
+    input_text = _step_input(step, outputs)
+    cache_path = os.path.join(cache_dir, f"{_step_cache_key(step, input_text)}.txt")
+
+    if use_cache and os.path.isfile(cache_path):
+        logger.info(f"Workflow step {step.id} resumed from cache")
+        return read_file(cache_path), True
+
+    if step.type == "prompt":
+        template = step.prompt
+        if template:
+            text = _render_step_prompt(step, template, input=input_text, **{dep: outputs[dep] for dep in step.depends_on})
+        else:
+            text = input_text
+        output = _prompt_single(step.models_prefixed_by_provider or [DEFAULT_MODEL], text)
+    elif step.type == "persona":
+        if step.persona not in PERSONA_TEMPLATES:
+            raise ValidationError(f"Unknown persona for step {step.id}: {step.persona}")
+        persona_template, decision_template = PERSONA_TEMPLATES[step.persona]
+        formatted_prompt = _render_step_prompt(step, step.prompt or persona_template, request_data=input_text)
+        if step.use_decision_maker:
+            output = _decide(
+                formatted_prompt,
+                step.models_prefixed_by_provider or DEFAULT_TEAM_MODELS,
+                step.decision_maker_model or DEFAULT_DECISION_MAKER_MODEL,
+                decision_template
+            )
+        else:
+            output = _prompt_single(step.models_prefixed_by_provider or [DEFAULT_MODEL], formatted_prompt)
+    else:
+        output = _decide(
+            input_text,
+            step.models_prefixed_by_provider or DEFAULT_TEAM_MODELS,
+            step.decision_maker_model or DEFAULT_DECISION_MAKER_MODEL,
+            step.prompt or DEFAULT_PERSONA_PROMPT
+        )
+
+    write_file(cache_path, output)
+    return output, False
+
+
+def _render_step_prompt(step: WorkflowStep, template: str, **values: str) -> str:
+    """Render a step's prompt template, reporting placeholders it cannot fill as invalid input."""
+    try:
+        return resolve_template(template).render(**values)
+    except (KeyError, IndexError, AttributeError, ValueError) as e:
+        raise ValidationError(
+            f"Invalid prompt template of step {step.id}: {type(e).__name__}: {e}. "
+            f"Available placeholders: {', '.join('{' + name + '}' for name in values)}; "
+            "write literal braces as {{ and }}"
+        )
+
+
+def _step_input(step: WorkflowStep, outputs: Dict[str, str]) -> str:
+    """Build the input text of a step from its file, inline text or dependency outputs."""
+    if step.from_file is not None:
+        return read_file(step.from_file)
+    if step.text is not None:
+        return step.text
+    return "\n\n".join(outputs[dep] for dep in step.depends_on)
+
+
+def _step_cache_key(step: WorkflowStep, input_text: str) -> str:
+    """Hash everything that determines a step's output."""
+    if step.type == "persona":
+        templates = PERSONA_TEMPLATES.get(step.persona, ())
+    else:
+        templates = (DEFAULT_PERSONA_PROMPT,) if step.type == "dm" else ()
+    payload = json.dumps(
+        {
+            # Digests of the current persona and decision templates, so edited templates rerun their steps
+            "templates": [resolve_template(template).digest for template in templates],
+            "type": step.type,
+            "persona": step.persona,
+            "prompt": step.prompt,
+            "models": step.models_prefixed_by_provider,
+            "use_decision_maker": step.use_decision_maker,
+            "decision_maker_model": step.decision_maker_model,
+            "input": input_text,
+        },
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _prompt_single(models_prefixed_by_provider: List[str], text: str) -> str:
+    """Send text to the first of the given models."""
+    validated_models = validate_and_correct_models(models_prefixed_by_provider)
+    provider, model = validated_models[0]
+    return prompt_model(provider, model, text)
+
+
+def _decide(
+    original_prompt: str,
+    team_models: List[str],
+    decision_maker_model: str,
+    decision_prompt: str
+) -> str:
+    """Fan a prompt out to the team and let the decision maker consolidate the responses in memory."""
+    if len(team_models) < 2:
+        raise ValidationError("At least two team member models must be provided for decision making")
+
+    # Validate the decision maker before spending tokens on the team, as persona_dm does
+    with stage("validation"):
+        validated_models = validate_and_correct_models([decision_maker_model])
+    if not validated_models:
+        raise ValidationError(f"Invalid decision maker model: {decision_maker_model}")
+    dm_provider, dm_model = validated_models[0]
+
+    template = resolve_template(decision_prompt)
+    team_responses = []
+    with stage("team"):
+        for member_provider, member_model in validate_and_correct_models(team_models):
+            try:
+                response = prompt_model(member_provider, member_model, original_prompt)
+            except Exception as e:
+                # Skip failed team members, as persona_dm does with error files
+                logger.warning(f"Team member {member_provider}:{member_model} failed: {e}")
+                continue
+            model_info = f"{member_provider}_{member_model}".replace("/", "_").replace(":", "_")
+            team_responses.append((model_info, response))
+    if not team_responses:
+        # A decision without team responses would be made up, and cached as the step's output
+        raise ToolError(f"Every team member failed: {', '.join(team_models)}")
+
+    final_prompt = template.render(
+        original_prompt=original_prompt,
+        team_responses=format_team_responses(team_responses, template.source)
+    )
+    with span("workflow.decision", **{"llm.provider": dm_provider, "llm.model": dm_model}), stage("decision"):
+        return prompt_model(dm_provider, dm_model, final_prompt)